@@ -290,6 +290,10 @@ GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
 # TODO: Move the Mako templating into a different engine in TEMPLATES below.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_cms')
+# Whether to load all the Mako templates at startup, rather than on their
+# first request, compiling those that weren't compiled into MAKO_MODULE_DIR
+# ahead of time by the compile_mako_templates management command.
+MAKO_WARM_UP_TEMPLATES = False
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -513,6 +517,15 @@ MODULESTORE = {
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
 
+# Node-local disk cache of the course assets served by the contentserver that
+# are too large for the course_assets cache.  When DIRECTORY is None, these
+# assets are streamed from the contentstore on every request.
+COURSE_ASSETS_DISK_CACHE = {
+    'DIRECTORY': None,
+    # Maximum total size of the cached assets, in bytes.
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -202,6 +202,11 @@ CELERY_RESULT_BACKEND = 'djcelery.backends.cache:CacheBackend'
 
 CLEAR_REQUEST_CACHE_ON_TASK_COMPLETION = False
 
+################################# GEOIP ######################################
+
+# Tests mock the GeoIP lookups, so their results must not be cached.
+GEOIP_CACHE_SIZE = 0
+
 ########################### Server Ports ###################################
 
 # These ports are carefully chosen so that if the browser needs to
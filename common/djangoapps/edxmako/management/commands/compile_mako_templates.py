@@ -0,0 +1,51 @@
+"""
+Command to compile the Mako templates ahead of their first request.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from timeit import default_timer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from edxmako.paths import compile_templates, get_template_uris
+
+
+class Command(BaseCommand):
+    """
+    Compile the Mako templates of the lookup namespaces, including the
+    overrides of comprehensive themes, into MAKO_MODULE_DIR, from which the
+    workers load them instead of compiling them on their first request.
+
+    Example usage:
+        $ ./manage.py lms compile_mako_templates --settings=aws
+        $ ./manage.py cms compile_mako_templates main --settings=aws
+    """
+    help = 'Compiles the Mako templates into MAKO_MODULE_DIR.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'namespaces',
+            nargs='*',
+            help='Compile the templates of the lookup namespaces provided, all of them by default.',
+        )
+
+    def handle(self, *args, **options):
+        namespaces = options['namespaces'] or sorted(settings.MAKO_TEMPLATES)
+        unknown_namespaces = set(namespaces) - set(settings.MAKO_TEMPLATES)
+        if unknown_namespaces:
+            raise CommandError('Unknown namespaces: {}'.format(', '.join(sorted(unknown_namespaces))))
+
+        for namespace in namespaces:
+            start = default_timer()
+            errors = compile_templates(namespace)
+            self.stdout.write('Compiled {} templates of the {} namespace into {} in {:.3f} s'.format(
+                len(get_template_uris(namespace)) - len(errors), namespace, settings.MAKO_MODULE_DIR,
+                default_timer() - start,
+            ))
+            for uri, exc in errors:
+                self.stdout.write('  Unable to compile {}: {!r}'.format(uri, exc))
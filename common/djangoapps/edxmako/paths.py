@@ -12,10 +12,19 @@ from mako.exceptions import TopLevelLookupException
 from mako.lookup import TemplateLookup
 
 from openedx.core.djangoapps.theming.helpers import get_template as themed_template
-from openedx.core.djangoapps.theming.helpers import get_template_path_with_theme, strip_site_theme_templates_path
+from openedx.core.djangoapps.theming.helpers import (
+    get_template_path_with_theme,
+    get_theme_base_dirs,
+    get_themes,
+    strip_site_theme_templates_path
+)
 
 from . import LOOKUP
 
+# Extensions of the Mako templates compiled by compile_templates, as the
+# template directories also contain e.g. Underscore templates.
+MAKO_TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
 
 class DynamicTemplateLookup(TemplateLookup):
     """
@@ -114,6 +123,59 @@ def lookup_template(namespace, name):
     return LOOKUP[namespace].get_template(name)
 
 
+def get_template_uris(namespace):
+    """
+    Returns the sorted uris of the Mako templates in the lookup directories
+    of the given namespace, as they are requested from the lookup: relative
+    to their directory, or to the themes directory for the templates of
+    comprehensive themes, e.g. `red-theme/lms/templates/header.html`.
+    """
+    theme_base_dirs = [os.path.normpath(themes_dir) for themes_dir in get_theme_base_dirs()]
+    uris = set()
+    for directory in LOOKUP[namespace].directories:
+        if directory in theme_base_dirs:
+            for theme in get_themes(directory):
+                uris.update(
+                    os.path.join(theme.template_path, uri)
+                    for uri in _get_directory_template_uris(theme.path / 'templates')
+                )
+        else:
+            uris.update(_get_directory_template_uris(directory))
+    return sorted(uris)
+
+
+def _get_directory_template_uris(directory):
+    """
+    Yields the paths of the Mako templates in the given directory, relative
+    to it.
+    """
+    for dirpath, __, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.endswith(MAKO_TEMPLATE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(dirpath, filename), directory)
+
+
+def compile_templates(namespace):
+    """
+    Loads all the Mako templates of the given namespace in its lookup,
+    compiling those that weren't compiled since they were last modified
+    into the module directory of the lookup.
+
+    Returns a list of the (uri, exception) of the templates that failed to
+    compile.
+    """
+    templates = LOOKUP[namespace]
+    errors = []
+    for uri in get_template_uris(namespace):
+        try:
+            # DynamicTemplateLookup.get_template depends on the theme of the current request,
+            # whereas the uris of themed templates are already prefixed with their theme.
+            TemplateLookup.get_template(templates, uri)
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append((uri, exc))
+    return errors
+
+
 @contextlib.contextmanager
 def save_lookups():
     """
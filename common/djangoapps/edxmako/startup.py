@@ -1,9 +1,14 @@
 """
 Initialize the mako template lookup
 """
+import logging
+
 from django.conf import settings
 
 from . import add_lookup, clear_lookups
+from .paths import compile_templates
+
+log = logging.getLogger(__name__)
 
 
 def run():
@@ -18,3 +23,21 @@ def run():
         clear_lookups(namespace)
         for directory in directories:
             add_lookup(namespace, directory)
+
+    if getattr(settings, 'MAKO_WARM_UP_TEMPLATES', False):
+        warm_up()
+
+
+def warm_up():
+    """
+    Load all the mako templates in their lookups, so that the first requests
+    rendering them don't pay for their loading, or their compilation if they
+    weren't compiled ahead of time by the compile_mako_templates command.
+    """
+    for namespace in settings.MAKO_TEMPLATES:
+        errors = compile_templates(namespace)
+        if errors:
+            log.warning(
+                u"Unable to load %d mako templates of the %s namespace: %s",
+                len(errors), namespace, u", ".join(uri for uri, __ in errors)
+            )
@@ -1,3 +1,4 @@
+import os
 import unittest
 
 import ddt
@@ -10,8 +11,11 @@ from django.test.utils import override_settings
 from mock import Mock, patch
 
 from edxmako import LOOKUP, add_lookup
+from edxmako.paths import compile_templates, get_template_uris
 from edxmako.request_context import get_template_request_context
 from edxmako.shortcuts import is_any_marketing_link_set, is_marketing_link_set, marketing_link, render_to_string
+from openedx.core.djangoapps.theming.helpers import get_project_root_name
+from openedx.core.lib.tempdir import mkdtemp_clean
 from request_cache.middleware import RequestCache
 from student.tests.factories import UserFactory
 from util.testing import UrlResetMixin
@@ -76,6 +80,49 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+class CompileTemplatesTests(TestCase):
+    """
+    Test the `compile_templates` and `get_template_uris` functions.
+    """
+    def setUp(self):
+        super(CompileTemplatesTests, self).setUp()
+        self.template_dir = mkdtemp_clean()
+        os.makedirs(os.path.join(self.template_dir, 'sub'))
+        for uri, content in (('main.html', u'${1 + 1}'), ('sub/mail.txt', u'Hi'), ('sub/view.underscore', u'<% %>')):
+            with open(os.path.join(self.template_dir, uri), 'w') as template_file:
+                template_file.write(content)
+
+    @patch('edxmako.LOOKUP', {})
+    def test_compile_templates(self):
+        with override_settings(MAKO_MODULE_DIR=mkdtemp_clean()):
+            add_lookup('test', self.template_dir)
+        self.assertEqual(get_template_uris('test'), ['main.html', 'sub/mail.txt'])
+
+        self.assertEqual(compile_templates('test'), [])
+        module_directory = LOOKUP['test'].template_args['module_directory']
+        self.assertTrue(os.path.exists(os.path.join(module_directory, 'main.html.py')))
+        self.assertTrue(os.path.exists(os.path.join(module_directory, 'sub', 'mail.txt.py')))
+        self.assertEqual(LOOKUP['test'].get_template('main.html').render(), '2')
+
+    @patch('edxmako.LOOKUP', {})
+    def test_compile_errors(self):
+        with open(os.path.join(self.template_dir, 'broken.html'), 'w') as template_file:
+            template_file.write(u'<%def name="broken(">')
+        add_lookup('test', self.template_dir)
+        errors = compile_templates('test')
+        self.assertEqual([uri for uri, __ in errors], ['broken.html'])
+
+    @patch('edxmako.LOOKUP', {})
+    @override_settings(ENABLE_COMPREHENSIVE_THEMING=True)
+    def test_theme_template_uris(self):
+        themes_dir = settings.COMPREHENSIVE_THEME_DIRS[0]
+        add_lookup('test', themes_dir)
+        template_prefix = os.path.join('red-theme', get_project_root_name(), 'templates') + os.sep
+        red_theme_uris = [uri for uri in get_template_uris('test') if uri.startswith('red-theme')]
+        self.assertTrue(red_theme_uris)
+        self.assertTrue(all(uri.startswith(template_prefix) for uri in red_theme_uris))
+
+
 class MakoRequestContextTest(TestCase):
     """
     Test MakoMiddleware.
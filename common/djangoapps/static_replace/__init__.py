@@ -11,10 +11,17 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
+import request_cache
 
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# Name of the request cache of the urls of static assets, see replace_urls.
+STATIC_URLS_CACHE_NAME = u'static_replace.static_urls'
+
+# Compiled regexes returned by _get_url_replace_regex, by prefix.
+_URL_REPLACE_REGEXES = {}
+
 
 def _url_replace_regex(prefix):
     """
@@ -32,6 +39,28 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _get_url_replace_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex for the given prefix, compiling
+    it only the first time it is requested.
+    """
+    regex = _URL_REPLACE_REGEXES.get(prefix)
+    if regex is None:
+        regex = _URL_REPLACE_REGEXES[prefix] = re.compile(_url_replace_regex(prefix))
+    return regex
+
+
+def _static_url_prefix(data_dir):
+    """
+    Returns the regex of the prefix of the static urls that don't point
+    into the given data directory.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -73,7 +102,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _get_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -93,7 +122,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _get_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -103,34 +132,34 @@ def process_static_urls(text, replacement_function, data_dir=None):
     """
     def wrap_part_extraction(match):
         """
-        Unwraps a match group for the captures specified in _url_replace_regex
-        and forward them on as function arguments
+        Forwards the match to _process_static_url_match
         """
-        original = match.group(0)
-        prefix = match.group('prefix')
-        quote = match.group('quote')
-        rest = match.group('rest')
+        return _process_static_url_match(match, replacement_function)
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
+    return _get_url_replace_regex(_static_url_prefix(data_dir)).sub(wrap_part_extraction, text)
 
-        starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
-            return original
 
-        return replacement_function(original, prefix, quote, rest)
+def _process_static_url_match(match, replacement_function):
+    """
+    Unwraps a match group for the captures specified in _url_replace_regex
+    and forward them on as function arguments
+    """
+    original = match.group(0)
+    prefix = match.group('prefix')
+    quote = match.group('quote')
+    rest = match.group('rest')
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
+    # works for actual static assets and for magical course asset URLs....
+    full_url = prefix + rest
+
+    starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
+    starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
+    if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        return original
+
+    return replacement_function(original, prefix, quote, rest)
 
 
 def make_static_urls_absolute(request, html):
@@ -162,7 +191,62 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    return process_static_urls(
+        text,
+        _static_url_replacer(data_directory, course_id, static_asset_path),
+        data_dir=static_asset_path or data_directory
+    )
+
+
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path=''):
+    """
+    Replace the /static/, /course/ and /jump_to_id/ urls of the text in a
+    single pass, as replace_static_urls, replace_course_urls and
+    replace_jump_to_id_urls would.
+
+    The urls of static assets are memoized in the request cache, so that
+    the assets referenced by several blocks of a course are looked up once
+    per request.  Unlike the successive passes, a url within the quotes of
+    another replaced url isn't replaced.
+
+    text: The source text to do the substitution in
+    course_id: The course identifier used to distinguish static content for this course in studio
+    jump_to_id_base_url: The absolute path to the base of the jump_to_id handler, see replace_jump_to_id_urls
+    data_directory: The directory in which course data is stored
+    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    """
+    replace_static_url = _static_url_replacer(
+        data_directory,
+        course_id,
+        static_asset_path,
+        url_cache=request_cache.get_cache(STATIC_URLS_CACHE_NAME),
+    )
+    course_url = '/courses/' + course_id.to_deprecated_string() + '/'
+
+    def replace_url(match):
+        """
+        Replace a single matched url of any of the prefixes.
+        """
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if match.group('course') is not None:
+            return "".join([quote, course_url, rest, quote])
+        elif match.group('jump_to_id') is not None:
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+        return _process_static_url_match(match, replace_static_url)
+
+    prefix = u'(?P<static>{static})|(?P<course>/course/)|(?P<jump_to_id>/jump_to_id/)'.format(
+        static=_static_url_prefix(static_asset_path or data_directory),
+    )
+    return _get_url_replace_regex(prefix).sub(replace_url, text)
+
+
+def _static_url_replacer(data_directory, course_id, static_asset_path, url_cache=None):
+    """
+    Returns the function replacing a single matched url for replace_static_urls.
 
+    If url_cache is given, the replacement urls are memoized in it.
+    """
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
@@ -171,48 +255,66 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         if rest.endswith('?raw'):
             return original
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
+        if url_cache is None:
+            url = _get_static_url(prefix, rest, data_directory, course_id, static_asset_path)
+        else:
+            cache_key = (course_id, static_asset_path, data_directory, prefix, rest)
+            if cache_key not in url_cache:
+                url_cache[cache_key] = _get_static_url(prefix, rest, data_directory, course_id, static_asset_path)
+            url = url_cache[cache_key]
+
+        if url is None:
             return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+        return "".join([quote, url, quote])
+
+    return replace_static_url
 
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
 
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+def _get_static_url(prefix, rest, data_directory, course_id, static_asset_path):
+    """
+    Returns the url replacing the matched static url of the given prefix
+    and rest, or None if it is to be left as is.
+    """
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return None
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) and course_id:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            base_url = AssetBaseUrlConfig.get_base_url()
+            excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+            url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
 
-        return "".join([quote, url, quote])
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+
+    return url
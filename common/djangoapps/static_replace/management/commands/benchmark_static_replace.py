@@ -0,0 +1,97 @@
+"""
+Command to compare the successive and single-pass rewritings of the
+urls of the HTML of courses.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand, CommandError
+
+import request_cache
+from openedx.core.lib.command_utils import parse_course_keys
+from static_replace import (
+    STATIC_URLS_CACHE_NAME,
+    replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
+)
+from xmodule.modulestore.django import modulestore
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_static_replace 'course-v1:edX+DemoX+Demo_Course' --iterations 20 --settings=devstack
+    """
+    args = '<course_id course_id ...>'
+    help = 'Benchmarks the successive and single-pass rewritings of the urls of the HTML blocks of courses.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help='Benchmark the HTML blocks of the list of courses provided.',
+        )
+        parser.add_argument(
+            '--iterations',
+            help='Number of times to rewrite the HTML of each course.',
+            default=10,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        for course_key in parse_course_keys(options['courses']):
+            store = modulestore()
+            with store.bulk_operations(course_key):
+                course = store.get_course(course_key, depth=0)
+                if course is None:
+                    raise CommandError('Unknown course {}'.format(course_key))
+                texts = [block.data for block in store.get_items(course_key, qualifiers={'category': 'html'})]
+            data_directory = getattr(course, 'data_dir', None)
+            static_asset_path = course.static_asset_path
+            jump_to_id_base_url = '/courses/{}/jump_to_id/'.format(course_key)
+
+            def successive_passes(text):
+                """
+                Rewrites the urls of the text as the separate wrappers do.
+                """
+                text = replace_static_urls(text, data_directory, course_key, static_asset_path=static_asset_path)
+                text = replace_course_urls(text, course_key)
+                return replace_jump_to_id_urls(text, course_key, jump_to_id_base_url)
+
+            def single_pass(text):
+                """
+                Rewrites the urls of the text with replace_urls.
+                """
+                return replace_urls(text, course_key, jump_to_id_base_url, data_directory, static_asset_path)
+
+            results = {}
+            timings = {}
+            for name, rewrite in (('successive passes', successive_passes), ('single pass', single_pass)):
+                start = default_timer()
+                for __ in xrange(options['iterations']):
+                    # Each iteration stands for a request rendering all the HTML of the course.
+                    request_cache.clear_cache(STATIC_URLS_CACHE_NAME)
+                    results[name] = [rewrite(text) for text in texts]
+                timings[name] = default_timer() - start
+
+            mismatches = sum(
+                1 for expected, actual in zip(results['successive passes'], results['single pass']) if expected != actual
+            )
+            num_chars = sum(len(text) for text in texts) * options['iterations']
+            self.stdout.write('{} ({} HTML blocks, {} characters, {} iterations)'.format(
+                course_key, len(texts), sum(len(text) for text in texts), options['iterations'],
+            ))
+            for name in ('successive passes', 'single pass'):
+                self.stdout.write('  {:<18} {:>10.3f} s {:>12.0f} chars/s'.format(
+                    name + ':', timings[name], num_chars / timings[name] if timings[name] else 0,
+                ))
+            self.stdout.write('  mismatches:        {:>10}'.format(mismatches))
+            if mismatches:
+                raise CommandError('Single-pass url rewriting results differ from successive passes.')
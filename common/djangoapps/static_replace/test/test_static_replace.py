@@ -18,7 +18,9 @@ from static_replace import (
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
-    replace_static_urls
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
 )
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
@@ -229,6 +231,47 @@ def test_static_url_with_xblock_resource_on_cdn(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls(mock_storage):
+    """
+    Make sure replace_urls rewrites the urls of all the prefixes as the successive passes do.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+
+    text = (
+        '<img src="/static/file.png"/><a href=\'/course/info\'>Info</a>'
+        '<a href="/jump_to_id/abc">Jump</a><img src="/static/file.png?raw"/>'
+        '<script src="/static/xblock/resources/tehehe.xblock/public/woo.js"></script>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        jump_to_id_base_url,
+    )
+    with patch('static_replace.request_cache.get_cache', return_value={}):
+        assert_equals(expected, replace_urls(text, COURSE_KEY, jump_to_id_base_url, DATA_DIRECTORY))
+
+
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls_memoized(mock_storage):
+    """
+    Make sure replace_urls looks up each static url once per request cache.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/hashed/file.png'
+
+    with patch('static_replace.request_cache.get_cache', return_value={}):
+        for __ in range(2):
+            assert_equals(
+                '"/static/hashed/file.png" "/static/hashed/file.png"',
+                replace_urls(STATIC_SOURCE + ' ' + STATIC_SOURCE, COURSE_KEY, '', DATA_DIRECTORY)
+            )
+    mock_storage.exists.assert_called_once_with('file.png')
+    mock_storage.url.assert_called_once_with('file.png')
+
+
 @ddt.ddt
 class CanonicalContentTest(SharedModuleStoreTestCase):
     """
@@ -99,6 +99,10 @@ def check_verify_status_by_course(user, course_enrollments):
 
     recent_verification_datetime = None
 
+    # Whether the user has an approved verification is the same for all
+    # courses, so it is only queried once, when first needed.
+    user_is_verified = None
+
     for enrollment in course_enrollments:
 
         # If the user hasn't enrolled as verified, then the course
@@ -146,7 +150,9 @@ def check_verify_status_by_course(user, course_enrollments):
             )
             if status is None and not submitted:
                 if deadline is None or deadline > datetime.now(UTC):
-                    if SoftwareSecurePhotoVerification.user_is_verified(user):
+                    if user_is_verified is None:
+                        user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(user)
+                    if user_is_verified:
                         if verification_expiring_soon:
                             # The user has an active verification, but the verification
                             # is set to expire within "EXPIRING_SOON_WINDOW" days (default is 4 weeks).
@@ -50,7 +50,10 @@ import request_cache
 from certificates.models import GeneratedCertificate
 from course_modes.models import CourseMode
 from enrollment.api import _default_course_mode
+from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
+from openedx.core.djangoapps.credit.models import CreditEligibility, CreditRequest, CreditRequirementStatus
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.djangoapps.signals.signals import LEARNER_NOW_VERIFIED
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.djangoapps.xmodule_django.models import CourseKeyField, NoneToEmptyManager
 from track import contexts
@@ -63,6 +66,12 @@ ENROLL_STATUS_CHANGE = Signal(providing_args=["event", "user", "course_id", "mod
 REFUND_ORDER = Signal(providing_args=["course_enrollment"])
 log = logging.getLogger(__name__)
 AUDIT_LOG = logging.getLogger("audit")
+
+# Number of users whose enrollments CourseEnrollment.bulk_enroll queries
+# or inserts at once, which keeps the number of parameters of a query
+# under the limits of sqlite.
+BULK_ENROLLMENT_CHUNK_SIZE = 500
+
 SessionStore = import_module(settings.SESSION_ENGINE).SessionStore  # pylint: disable=invalid-name
 
 # enroll status changed events - signaled to email_marketing.  See email_marketing.tasks for more info
@@ -1351,6 +1360,97 @@ class CourseEnrollment(models.Model):
                 return None
             raise
 
+    @classmethod
+    def bulk_enroll(cls, users, course_key, mode=None):
+        """
+        Enroll the given users in a course, as `enroll` does without
+        checking access, but fetching and inserting their enrollments in
+        batches rather than one by one. This saves immediately.
+
+        Returns a dict of the CoursewareEnrollment objects of the users, by
+        user id.
+
+        `users` is a list of saved Django User objects.
+
+        `course_key` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
+
+        `mode` is the mode of the new and reactivated enrollments. The default
+               is the default course mode. Users who are already enrolled keep
+               their mode.
+
+        The new enrollments are inserted in batches, then the pre_save and
+        post_save signals of each of them are sent, followed by their
+        enrollment events and ENROLL_STATUS_CHANGE signals.  No events or
+        signals are sent for users who were already enrolled.
+        """
+        from courseware.models import chunks  # pylint: disable=import-error
+
+        if mode is None:
+            mode = _default_course_mode(unicode(course_key))
+
+        users_by_id = OrderedDict((user.id, user) for user in users)
+        enrollments = {}
+        for user_ids in chunks(users_by_id.keys(), BULK_ENROLLMENT_CHUNK_SIZE):
+            for enrollment in cls.objects.filter(course_id=course_key, user_id__in=user_ids):
+                enrollment.user = users_by_id[enrollment.user_id]
+                enrollments[enrollment.user_id] = enrollment
+
+        # Reactivate the inactive enrollments one by one, as they are typically few.
+        for enrollment in enrollments.itervalues():
+            if not enrollment.is_active:
+                enrollment.update_enrollment(is_active=True, mode=mode)
+                enrollment.send_signal(EnrollStatusChange.enroll)
+
+        new_enrollments = [
+            cls(user=user, course_id=course_key, mode=mode, is_active=True)
+            for user_id, user in users_by_id.iteritems()
+            if user_id not in enrollments
+        ]
+        if not new_enrollments:
+            return enrollments
+
+        for enrollment in new_enrollments:
+            pre_save.send(sender=cls, instance=enrollment, raw=False, using=cls.objects.db, update_fields=None)
+        cls.objects.bulk_create(new_enrollments, batch_size=BULK_ENROLLMENT_CHUNK_SIZE)
+
+        # bulk_create doesn't set the primary keys of the enrollments, which post_save receivers need.
+        new_enrollments_by_user_id = {enrollment.user_id: enrollment for enrollment in new_enrollments}
+        for user_ids in chunks(new_enrollments_by_user_id.keys(), BULK_ENROLLMENT_CHUNK_SIZE):
+            created = cls.objects.filter(
+                course_id=course_key, user_id__in=user_ids
+            ).values_list('user_id', 'id', 'created')
+            for user_id, enrollment_id, created_time in created:
+                enrollment = new_enrollments_by_user_id[user_id]
+                enrollment.id = enrollment_id
+                enrollment.created = created_time
+
+        cache.delete_many([cls.enrollment_status_hash_cache_key(enrollment.user) for enrollment in new_enrollments])
+        for enrollment in new_enrollments:
+            post_save.send(
+                sender=cls, instance=enrollment, created=True, raw=False, using=cls.objects.db, update_fields=None
+            )
+            cls._update_enrollment_in_request_cache(
+                enrollment.user,
+                course_key,
+                CourseEnrollmentState(enrollment.mode, enrollment.is_active),
+            )
+            enrollments[enrollment.user_id] = enrollment
+
+        for enrollment in new_enrollments:
+            enrollment.emit_event(EVENT_NAME_ENROLLMENT_ACTIVATED)
+            if enrollment.mode != CourseMode.DEFAULT_MODE_SLUG:
+                enrollment.emit_event(EVENT_NAME_ENROLLMENT_MODE_CHANGED)
+            enrollment.send_signal(EnrollStatusChange.enroll)
+        dog_stats_api.increment(
+            "common.student.enrollment",
+            value=len(new_enrollments),
+            tags=[u"org:{}".format(course_key.org),
+                  u"offering:{}".format(course_key.offering),
+                  u"mode:{}".format(mode)]
+        )
+
+        return enrollments
+
     @classmethod
     def unenroll(cls, user, course_id, skip_refund=False):
         """
@@ -1849,6 +1949,44 @@ def invalidate_enrollment_mode_cache(sender, instance, **kwargs):  # pylint: dis
     cache.delete(cache_key)
 
 
+# Cache key and timeout of the course data shown on the dashboard for the
+# enrollments of a user, see student.views._get_dashboard_course_data.
+DASHBOARD_COURSE_DATA_CACHE_KEY = u'student.dashboard_course_data.{user_id}'
+DASHBOARD_COURSE_DATA_CACHE_TIMEOUT = 60 * 5
+
+
+@receiver(models.signals.post_save, sender=GeneratedCertificate)
+@receiver(models.signals.post_delete, sender=GeneratedCertificate)
+def invalidate_dashboard_course_data_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate the cached dashboard course data of the user of a certificate. """
+    cache.delete(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=instance.user_id))
+
+
+@receiver(LEARNER_NOW_VERIFIED)
+def invalidate_verified_dashboard_course_data_cache(sender, user, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate the cached dashboard course data of a user who became verified. """
+    cache.delete(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=user.id))
+
+
+@receiver(models.signals.post_save, sender=SoftwareSecurePhotoVerification)
+@receiver(models.signals.post_delete, sender=SoftwareSecurePhotoVerification)
+def invalidate_verification_dashboard_course_data_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument, invalid-name
+    """Invalidate the cached dashboard course data of the user of a photo verification. """
+    cache.delete(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=instance.user_id))
+
+
+@receiver(models.signals.post_save, sender=CreditRequirementStatus)
+@receiver(models.signals.post_delete, sender=CreditRequirementStatus)
+@receiver(models.signals.post_save, sender=CreditEligibility)
+@receiver(models.signals.post_delete, sender=CreditEligibility)
+@receiver(models.signals.post_save, sender=CreditRequest)
+@receiver(models.signals.post_delete, sender=CreditRequest)
+def invalidate_credit_dashboard_course_data_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate the cached dashboard course data of the user of a credit status or request. """
+    for user_id in User.objects.filter(username=instance.username).values_list('id', flat=True):
+        cache.delete(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=user_id))
+
+
 class ManualEnrollmentAudit(models.Model):
     """
     Table for tracking which enrollments were performed through manual enrollment.
@@ -1873,6 +2011,26 @@ class ManualEnrollmentAudit(models.Model):
             enrollment=enrollment
         )
 
+    @classmethod
+    def bulk_create_manual_enrollment_audits(cls, user, audits, reason):
+        """
+        saves the manual enrollment information of several students, given as
+        (email, state_transition, enrollment) tuples
+        """
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    enrolled_by=user,
+                    enrolled_email=email,
+                    state_transition=state_transition,
+                    reason=reason,
+                    enrollment=enrollment
+                )
+                for email, state_transition, enrollment in audits
+            ],
+            batch_size=BULK_ENROLLMENT_CHUNK_SIZE
+        )
+
     @classmethod
     def get_manual_enrollment_by_email(cls, email):
         """
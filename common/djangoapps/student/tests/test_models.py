@@ -5,6 +5,7 @@ import hashlib
 
 import ddt
 import factory
+import mock
 import pytz
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
@@ -94,6 +95,28 @@ class CourseEnrollmentTests(SharedModuleStoreTestCase):
         CourseEnrollmentFactory.create(user=self.user)
         self.assertIsNone(cache.get(CourseEnrollment.enrollment_status_hash_cache_key(self.user)))
 
+    def test_bulk_enroll(self):
+        """ Verify the method enrolls new and inactive users, and leaves enrolled users as they are. """
+        user_3 = UserFactory()
+        CourseEnrollmentFactory.create(user=self.user, course_id=self.course.id, mode='verified', is_active=True)
+        CourseEnrollmentFactory.create(user=self.user_2, course_id=self.course.id, mode='verified', is_active=False)
+        CourseEnrollment.generate_enrollment_status_hash(user_3)
+
+        with mock.patch('student.models.ENROLL_STATUS_CHANGE.send') as mock_send:
+            enrollments = CourseEnrollment.bulk_enroll([self.user, self.user_2, user_3], self.course.id)
+
+        self.assertEqual(set(enrollments), {self.user.id, self.user_2.id, user_3.id})
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(CourseEnrollment.enrollment_mode_for_user(self.user, self.course.id), ('verified', True))
+        self.assertEqual(CourseEnrollment.enrollment_mode_for_user(self.user_2, self.course.id), ('audit', True))
+        self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user_3, self.course.id), ('audit', True))
+
+        # The new enrollment is saved as by the post_save receivers.
+        enrollment = enrollments[user_3.id]
+        self.assertEqual(enrollment, CourseEnrollment.objects.get(user=user_3, course_id=self.course.id))
+        self.assertEqual(enrollment.history.count(), 1)
+        self.assertIsNone(cache.get(CourseEnrollment.enrollment_status_hash_cache_key(user_3)))
+
     def test_users_enrolled_in_active_only(self):
         """CourseEnrollment.users_enrolled_in should return only Users with active enrollments when
         `include_inactive` has its default value (False)."""
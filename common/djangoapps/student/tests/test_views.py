@@ -9,18 +9,31 @@ import unittest
 import ddt
 import pytz
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from edx_oauth2_provider.constants import AUTHORIZED_CLIENTS_SESSION_KEY
 from edx_oauth2_provider.tests.factories import ClientFactory, TrustedClientFactory
+from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from mock import patch
 from pyquery import PyQuery as pq
 from opaque_keys import InvalidKeyError
-
+from openedx.core.djangoapps.credit.tests.factories import (
+    CreditCourseFactory,
+    CreditProviderFactory,
+    CreditRequestFactory
+)
+from waffle.testutils import override_switch
+
+from certificates.models import CertificateStatuses, GeneratedCertificate
+from certificates.tests.factories import GeneratedCertificateFactory
 from student.cookies import get_user_info_cookie_data
 from student.helpers import DISABLE_UNENROLL_CERT_STATES
-from student.models import CourseEnrollment, REFUND_ORDER, UserProfile
+from student.models import DASHBOARD_COURSE_DATA_CACHE_KEY, CourseEnrollment, REFUND_ORDER, UserProfile
 from student.tests.factories import CourseEnrollmentFactory, UserFactory
+from student.views import _get_dashboard_course_data
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -49,7 +62,7 @@ class TestStudentDashboardUnenrollments(SharedModuleStoreTestCase):
         self.cert_status = None
         self.client.login(username=self.user.username, password=PASSWORD)
 
-    def mock_cert(self, _user, _course_overview, _course_mode):
+    def mock_cert(self, _user, _course_overview, _course_mode, _generated_certificates=None):
         """ Return a preset certificate status. """
         if self.cert_status is not None:
             return {
@@ -317,3 +330,106 @@ class StudentDashboardTests(SharedModuleStoreTestCase):
         response = self.client.get(reverse('dashboard'))
         self.assertEqual('Share on Twitter' in response.content, set_marketing or set_social_sharing)
         self.assertEqual('Share on Facebook' in response.content, set_marketing or set_social_sharing)
+
+
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+class DashboardCourseDataTests(SharedModuleStoreTestCase):
+    """
+    Tests for the course data shown on the dashboard for the enrollments of a user.
+    """
+
+    ENABLED_SIGNALS = ['course_published']
+
+    def setUp(self):
+        super(DashboardCourseDataTests, self).setUp()
+        self.user = UserFactory()
+
+    def _enroll(self, num_courses):
+        """
+        Enrolls the user as verified in the given number of ended courses,
+        in which they have a certificate.
+        """
+        for __ in range(num_courses):
+            course = CourseFactory.create(end=datetime.datetime(2015, 1, 1, tzinfo=pytz.utc), emit_signals=True)
+            CourseEnrollmentFactory(course_id=course.id, user=self.user, mode='verified')
+            GeneratedCertificateFactory(user=self.user, course_id=course.id)
+
+    def _get_course_data(self):
+        """
+        Returns the dashboard course data of the user, and the number of queries it took.
+        """
+        course_enrollments = CourseEnrollment.enrollments_for_user_with_overviews_preload(self.user)
+        course_modes_by_course = {enrollment.course_id: {} for enrollment in course_enrollments}
+        with CaptureQueriesContext(connection) as queries:
+            course_data = _get_dashboard_course_data(self.user, course_enrollments, course_modes_by_course)
+        return course_data, len(queries)
+
+    def test_queries_independent_of_enrollments(self):
+        self._enroll(1)
+        self._get_course_data()
+        course_data, num_queries = self._get_course_data()
+        self.assertEqual(len(course_data['cert_statuses']), 1)
+
+        self._enroll(2)
+        self._get_course_data()
+        course_data, more_num_queries = self._get_course_data()
+        self.assertEqual(len(course_data['cert_statuses']), 3)
+        self.assertEqual(len(course_data['verification_status_by_course']), 3)
+        self.assertEqual(more_num_queries, num_queries)
+
+    @override_switch('student.cache_dashboard_course_data', True)
+    def test_cached(self):
+        self._enroll(2)
+        course_data, __ = self._get_course_data()
+        cached_course_data, num_queries = self._get_course_data()
+        self.assertEqual(cached_course_data, course_data)
+        self.assertEqual(num_queries, 0)
+
+    @override_switch('student.cache_dashboard_course_data', True)
+    def test_invalidated_on_enrollment(self):
+        self._enroll(1)
+        self._get_course_data()
+        self._enroll(1)
+        course_data, num_queries = self._get_course_data()
+        self.assertEqual(len(course_data['cert_statuses']), 2)
+        self.assertGreater(num_queries, 0)
+
+    @override_switch('student.cache_dashboard_course_data', True)
+    def test_invalidated_on_certificate_change(self):
+        self._enroll(1)
+        self._get_course_data()
+        certificate = GeneratedCertificate.objects.get(user=self.user)
+        certificate.status = CertificateStatuses.notpassing
+        certificate.save()
+        self.assertIsNone(cache.get(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=self.user.id)))
+        __, num_queries = self._get_course_data()
+        self.assertGreater(num_queries, 0)
+
+    @override_switch('student.cache_dashboard_course_data', True)
+    def test_invalidated_on_verification_change(self):
+        self._enroll(1)
+        self._get_course_data()
+        verification = SoftwareSecurePhotoVerification.objects.create(user=self.user, status='submitted')
+        self.assertIsNone(cache.get(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=self.user.id)))
+        self._get_course_data()
+        verification.deny('Invalid photo ID')
+        self.assertIsNone(cache.get(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=self.user.id)))
+        __, num_queries = self._get_course_data()
+        self.assertGreater(num_queries, 0)
+
+    @override_switch('student.cache_dashboard_course_data', True)
+    def test_invalidated_on_credit_request_change(self):
+        self._enroll(1)
+        self._get_course_data()
+        credit_request = CreditRequestFactory(
+            username=self.user.username,
+            course=CreditCourseFactory(),
+            provider=CreditProviderFactory(),
+        )
+        self.assertIsNone(cache.get(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=self.user.id)))
+        self._get_course_data()
+        credit_request.status = 'approved'
+        credit_request.save()
+        self.assertIsNone(cache.get(DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=self.user.id)))
+        __, num_queries = self._get_course_data()
+        self.assertGreater(num_queries, 0)
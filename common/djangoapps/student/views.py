@@ -20,6 +20,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import AnonymousUser, User
 from django.contrib.auth.views import password_reset_confirm
 from django.core import mail
+from django.core.cache import cache
 from django.core.context_processors import csrf
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.core.urlresolvers import NoReverseMatch, reverse, reverse_lazy
@@ -58,6 +59,7 @@ from certificates.api import get_certificate_url, has_html_certificates_enabled
 from certificates.models import (  # pylint: disable=import-error
     CertificateStatuses,
     GeneratedCertificate,
+    certificate_status,
     certificate_status_for_student
 )
 from course_modes.models import CourseMode
@@ -100,6 +102,8 @@ from student.helpers import (
 )
 from student.models import (
     ALLOWEDTOENROLL_TO_ENROLLED,
+    DASHBOARD_COURSE_DATA_CACHE_KEY,
+    DASHBOARD_COURSE_DATA_CACHE_TIMEOUT,
     CourseAccessRole,
     CourseEnrollment,
     CourseEnrollmentAllowed,
@@ -225,7 +229,7 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course_overview, course_mode):
+def cert_info(user, course_overview, course_mode, generated_certificates=None):
     """
     Get the certificate info needed to render the dashboard section for the given
     student and course.
@@ -234,6 +238,8 @@ def cert_info(user, course_overview, course_mode):
         user (User): A user.
         course_overview (CourseOverview): A course.
         course_mode (str): The enrollment mode (honor, verified, audit, etc.)
+        generated_certificates (dict): The certificates of the user by course key,
+            if they were already fetched for several courses.
 
     Returns:
         dict: Empty dict if certificates are disabled or hidden, or a dictionary with keys:
@@ -248,10 +254,14 @@ def cert_info(user, course_overview, course_mode):
     """
     if not course_overview.may_certify():
         return {}
+    if generated_certificates is None:
+        cert_status = certificate_status_for_student(user, course_overview.id)
+    else:
+        cert_status = certificate_status(generated_certificates.get(course_overview.id))
     return _cert_info(
         user,
         course_overview,
-        certificate_status_for_student(user, course_overview.id),
+        cert_status,
         course_mode
     )
 
@@ -741,36 +751,9 @@ def dashboard(request):
     meter = ProgramProgressMeter(request.site, user, enrollments=course_enrollments)
     inverted_programs = meter.invert_programs()
 
-    # Construct a dictionary of course mode information
-    # used to render the course list.  We re-use the course modes dict
-    # we loaded earlier to avoid hitting the database.
-    course_mode_info = {
-        enrollment.course_id: complete_course_mode_info(
-            enrollment.course_id, enrollment,
-            modes=course_modes_by_course[enrollment.course_id]
-        )
-        for enrollment in course_enrollments
-    }
-
-    # Determine the per-course verification status
-    # This is a dictionary in which the keys are course locators
-    # and the values are one of:
-    #
-    # VERIFY_STATUS_NEED_TO_VERIFY
-    # VERIFY_STATUS_SUBMITTED
-    # VERIFY_STATUS_APPROVED
-    # VERIFY_STATUS_MISSED_DEADLINE
-    #
-    # Each of which correspond to a particular message to display
-    # next to the course on the dashboard.
-    #
-    # If a course is not included in this dictionary,
-    # there is no verification messaging to display.
-    verify_status_by_course = check_verify_status_by_course(user, course_enrollments)
-    cert_statuses = {
-        enrollment.course_id: cert_info(request.user, enrollment.course_overview, enrollment.mode)
-        for enrollment in course_enrollments
-    }
+    # Construct the dictionaries of course mode information, certificate,
+    # credit and verification statuses used to render the course list.
+    course_data = _get_dashboard_course_data(user, course_enrollments, course_modes_by_course)
 
     # only show email settings for Mongo course and when bulk email is turned on
     show_email_settings_for = frozenset(
@@ -788,14 +771,17 @@ def dashboard(request):
     statuses = ["approved", "denied", "pending", "must_reverify"]
     reverifications = reverification_info(statuses)
 
+    redeemed_registration_codes = defaultdict(list)
+    for registration_code in CourseRegistrationCode.objects.filter(
+            course_id__in=[enrollment.course_id for enrollment in course_enrollments],
+            registrationcoderedemption__redeemed_by=request.user
+    ):
+        redeemed_registration_codes[registration_code.course_id].append(registration_code)
     block_courses = frozenset(
         enrollment.course_id for enrollment in course_enrollments
         if is_course_blocked(
             request,
-            CourseRegistrationCode.objects.filter(
-                course_id=enrollment.course_id,
-                registrationcoderedemption__redeemed_by=request.user
-            ),
+            redeemed_registration_codes[enrollment.course_id],
             enrollment.course_id
         )
     )
@@ -845,13 +831,13 @@ def dashboard(request):
         'staff_access': staff_access,
         'errored_courses': errored_courses,
         'show_courseware_links_for': show_courseware_links_for,
-        'all_course_modes': course_mode_info,
-        'cert_statuses': cert_statuses,
-        'credit_statuses': _credit_statuses(user, course_enrollments),
+        'all_course_modes': course_data['all_course_modes'],
+        'cert_statuses': course_data['cert_statuses'],
+        'credit_statuses': course_data['credit_statuses'],
         'show_email_settings_for': show_email_settings_for,
         'reverifications': reverifications,
         'verification_status': verification_status,
-        'verification_status_by_course': verify_status_by_course,
+        'verification_status_by_course': course_data['verification_status_by_course'],
         'verification_errors': verification_errors,
         'block_courses': block_courses,
         'denied_banner': denied_banner,
@@ -883,6 +869,88 @@ def dashboard(request):
     return response
 
 
+def _get_dashboard_course_data(user, course_enrollments, course_modes_by_course):
+    """
+    Returns the course mode information, certificate, credit and verification
+    statuses shown on the dashboard for the given enrollments of the user.
+
+    With the `student.cache_dashboard_course_data` switch active, they are
+    cached by user until the enrollment status of the user, or the courses
+    shown on the dashboard of the current site, change.  The cache is also
+    invalidated when a certificate, photo verification, credit requirement
+    status, credit eligibility or credit request of the user changes.
+
+    Returns a dict with the keys:
+        * all_course_modes (dict): The course mode information of each course,
+            by course key, see complete_course_mode_info.
+        * cert_statuses (dict): The certificate info of each course, by course
+            key, see cert_info.
+        * credit_statuses (dict): The credit statuses, see _credit_statuses.
+        * verification_status_by_course (dict): The verification statuses,
+            see check_verify_status_by_course.
+    """
+    if not waffle.switch_is_active('student.cache_dashboard_course_data'):
+        return _load_dashboard_course_data(user, course_enrollments, course_modes_by_course)
+
+    cache_key = DASHBOARD_COURSE_DATA_CACHE_KEY.format(user_id=user.id)
+    version = [CourseEnrollment.generate_enrollment_status_hash(user)]
+    version.extend(unicode(enrollment.course_id) for enrollment in course_enrollments)
+    cached_course_data = cache.get(cache_key)
+    if cached_course_data is not None and cached_course_data['version'] == version:
+        return cached_course_data['course_data']
+
+    course_data = _load_dashboard_course_data(user, course_enrollments, course_modes_by_course)
+    cache.set(cache_key, {'version': version, 'course_data': course_data}, DASHBOARD_COURSE_DATA_CACHE_TIMEOUT)
+    return course_data
+
+
+def _load_dashboard_course_data(user, course_enrollments, course_modes_by_course):
+    """
+    Computes the course data of _get_dashboard_course_data, fetching the
+    certificates of the user in all the courses at once.
+    """
+    generated_certificates = {
+        certificate.course_id: certificate
+        for certificate in GeneratedCertificate.objects.filter(
+            user=user,
+            course_id__in=[enrollment.course_id for enrollment in course_enrollments]
+        )
+    }
+
+    return {
+        # We re-use the course modes dict loaded by the dashboard to avoid hitting the database.
+        'all_course_modes': {
+            enrollment.course_id: complete_course_mode_info(
+                enrollment.course_id, enrollment,
+                modes=course_modes_by_course[enrollment.course_id]
+            )
+            for enrollment in course_enrollments
+        },
+        'cert_statuses': {
+            enrollment.course_id: cert_info(
+                user, enrollment.course_overview, enrollment.mode, generated_certificates
+            )
+            for enrollment in course_enrollments
+        },
+        'credit_statuses': _credit_statuses(user, course_enrollments),
+        # Determine the per-course verification status
+        # This is a dictionary in which the keys are course locators
+        # and the values are one of:
+        #
+        # VERIFY_STATUS_NEED_TO_VERIFY
+        # VERIFY_STATUS_SUBMITTED
+        # VERIFY_STATUS_APPROVED
+        # VERIFY_STATUS_MISSED_DEADLINE
+        #
+        # Each of which correspond to a particular message to display
+        # next to the course on the dashboard.
+        #
+        # If a course is not included in this dictionary,
+        # there is no verification messaging to display.
+        'verification_status_by_course': check_verify_status_by_course(user, course_enrollments),
+    }
+
+
 @login_required
 def course_run_refund_status(request, course_id):
     """
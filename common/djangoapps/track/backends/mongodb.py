@@ -96,3 +96,14 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_many(self, events):
+        """Insert the events in to the Mongo collection with a single request"""
+        try:
+            # insert_many adds an _id to the documents it inserts, so insert
+            # copies of the events, which may be shared with other backends.
+            self.collection.insert_many([dict(event) for event in events], ordered=False)
+        except (PyMongoError, BSONError):
+            # As in send, the events are lost on errors.
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
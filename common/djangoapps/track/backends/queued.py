@@ -0,0 +1,275 @@
+"""
+Event tracker backend that delivers events to another backend
+asynchronously, in batches.
+
+Events are added to a bounded in-process queue, and a background thread
+sends them to the wrapped backend with its `send_many` method, so that
+tracking doesn't add the latency of the backend to the response time of
+requests.  For example::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.queued.QueuedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {'database': 'track'},
+              },
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'overflow_policy': 'spill',
+              'spill_path': '/edx/var/log/tracking/spill.log',
+          }
+      }
+  }
+
+When the queue is full, the overflow policy decides what happens to new
+events: 'drop_oldest' discards the oldest queued event, 'block' waits
+for the worker to make room, and 'spill' appends the new event as a JSON
+line to the file at `spill_path`.
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import json
+import logging
+import os
+from collections import deque
+from importlib import import_module
+from threading import Condition, Lock, Thread
+from time import time
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+from track.utils import DateTimeJSONEncoder
+
+log = logging.getLogger(__name__)
+
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+SPILL = 'spill'
+OVERFLOW_POLICIES = (DROP_OLDEST, BLOCK, SPILL)
+
+
+class QueuedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events for delivery to another
+    backend by a background thread.
+    """
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 overflow_policy=DROP_OLDEST, spill_path=None, **kwargs):
+        """
+        :Parameters:
+          - `backend`: the configuration of the backend to deliver events
+            to, as a dict with an `ENGINE` and optional `OPTIONS`.
+          - `max_queue_size`: the maximum number of queued events.
+          - `batch_size`: the maximum number of events sent at once.
+          - `flush_interval`: the maximum number of seconds an event
+            waits for a batch to fill up before it is sent.
+          - `overflow_policy`: one of 'drop_oldest', 'block' or 'spill'.
+          - `spill_path`: the file events are spilled to, required by the
+            'spill' overflow policy.
+
+        """
+        super(QueuedBackend, self).__init__(**kwargs)
+
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError('Invalid overflow policy {}'.format(overflow_policy))
+        if overflow_policy == SPILL and not spill_path:
+            raise ValueError('The spill overflow policy requires a spill_path')
+
+        self.backend = _instantiate_backend(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+        self.name = backend['ENGINE'].rsplit('.', 1)[-1]
+
+        # Queue of (enqueue time, event), and the events waiting to be
+        # spilled, both guarded by the condition.
+        self._queue = deque()
+        self._overflow = []
+        self._condition = Condition(Lock())
+        self._spill_lock = Lock()
+        self._in_flight = 0
+        self._stopping = False
+        self._worker = None
+        self._worker_pid = None
+
+        atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event for delivery to the wrapped backend."""
+        with self._condition:
+            self._ensure_worker()
+
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self._increment('dropped')
+                elif self.overflow_policy == BLOCK:
+                    while len(self._queue) >= self.max_queue_size and not self._stopping:
+                        self._condition.wait()
+                else:
+                    self._overflow.append(event)
+                    event = None
+
+            if event is not None:
+                self._queue.append((time(), event))
+                if len(self._queue) >= self.batch_size:
+                    self._condition.notify_all()
+
+        # Write the overflow to the spill file without holding the condition,
+        # so that the file I/O doesn't hold up the worker and other senders.
+        if event is None:
+            self._spill_overflow()
+
+    def flush(self, timeout=None):
+        """
+        Wait until all queued events have been delivered, or the timeout
+        in seconds has expired.  Returns whether all events were delivered.
+        """
+        deadline = None if timeout is None else time() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._queue or self._in_flight:
+                if self._worker is None or not self._worker.is_alive():
+                    break
+                remaining = None if deadline is None else deadline - time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining if remaining is not None else self.flush_interval)
+
+        # Deliver whatever the worker left behind, e.g. before it was started.
+        self._deliver_queued()
+        return True
+
+    def close(self, timeout=10.0):
+        """
+        Stop the worker after it has delivered the queued events, waiting
+        at most timeout seconds, then deliver anything left from this
+        thread.  Called when the process exits.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            worker = self._worker
+        if worker is not None and worker.is_alive() and self._worker_pid == os.getpid():
+            worker.join(timeout)
+        self._deliver_queued()
+
+    def _ensure_worker(self):
+        """
+        Start the worker thread if it isn't running in this process, e.g.
+        after the process was forked.  The caller must hold the condition.
+        """
+        if self._worker_pid != os.getpid() or self._worker is None or not self._worker.is_alive():
+            self._stopping = False
+            self._in_flight = 0
+            self._worker_pid = os.getpid()
+            self._worker = Thread(target=self._run, name='track.{}'.format(self.name))
+            self._worker.daemon = True
+            self._worker.start()
+
+    def _run(self):
+        """Deliver batches of queued events until stopped."""
+        while True:
+            with self._condition:
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    self._condition.wait(self.flush_interval)
+                batch = self._take_batch()
+                if not batch and self._stopping:
+                    return
+            if batch:
+                self._deliver(batch)
+
+    def _take_batch(self):
+        """
+        Remove the next batch of events from the queue.  The caller must
+        hold the condition.
+        """
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        self._in_flight = len(batch)
+        dog_stats_api.gauge('track.queue.{}.depth'.format(self.name), len(self._queue))
+        # Wake up senders blocked on a full queue.
+        self._condition.notify_all()
+        return batch
+
+    def _deliver(self, batch):
+        """Send a batch of (enqueue time, event) to the wrapped backend."""
+        try:
+            dog_stats_api.histogram('track.queue.{}.latency'.format(self.name), time() - batch[0][0])
+            events = [event for __, event in batch]
+            with dog_stats_api.timer('track.queue.{}.send'.format(self.name)):
+                send_many = getattr(self.backend, 'send_many', None)
+                if send_many is not None:
+                    send_many(events)
+                else:
+                    for event in events:
+                        self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending %d events to the %s tracking backend', len(batch), self.name)
+        finally:
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _deliver_queued(self):
+        """Send all queued events from the calling thread."""
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._deliver(batch)
+
+    def _spill_overflow(self):
+        """
+        Append the events waiting to be spilled to the spill file as JSON
+        lines.  The caller must not hold the condition.
+        """
+        with self._spill_lock:
+            with self._condition:
+                overflow, self._overflow = self._overflow, []
+            if not overflow:
+                return
+
+            lines = []
+            for event in overflow:
+                try:
+                    lines.append(json.dumps(event, cls=DateTimeJSONEncoder) + '\n')
+                except (TypeError, ValueError):
+                    log.exception('Error spilling an event of the %s tracking backend', self.name)
+                    self._increment('dropped')
+            try:
+                with open(self.spill_path, 'a') as spill_file:
+                    spill_file.writelines(lines)
+            except IOError:
+                log.exception('Error spilling %d events of the %s tracking backend', len(lines), self.name)
+                self._increment('dropped', len(lines))
+            else:
+                self._increment('spilled', len(lines))
+
+    def _increment(self, metric, value=1):
+        """Increment the counter of the given overflow metric by value."""
+        dog_stats_api.increment('track.queue.{}.{}'.format(self.name, metric), value)
+
+
+def _instantiate_backend(engine, options):
+    """
+    Instantiate the wrapped backend from the full module path of its
+    class.  Any backend with a `send` method can be wrapped, including
+    the backends of the eventtracking library.
+    """
+    module_name, __, class_name = engine.rpartition('.')
+    try:
+        cls = getattr(import_module(module_name), class_name)
+    except (ValueError, AttributeError, ImportError):
+        raise ValueError('Cannot find event track backend %s' % engine)
+    return cls(**options)
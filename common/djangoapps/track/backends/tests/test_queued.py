@@ -0,0 +1,117 @@
+"""Tests for the queued event tracker backend."""
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.queued import QueuedBackend
+
+
+class InMemoryBackend(BaseBackend):
+    """Event tracker backend that records the batches of events it is sent."""
+
+    def __init__(self, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.batches = []
+
+    def send(self, event):
+        self.batches.append([event])
+
+    def send_many(self, events):
+        self.batches.append(list(events))
+
+    @property
+    def events(self):
+        """All the events sent, in order."""
+        return [event for batch in self.batches for event in batch]
+
+
+class TestQueuedBackend(TestCase):
+    """Tests of QueuedBackend."""
+
+    def _backend(self, **options):
+        """Returns a QueuedBackend delivering to an InMemoryBackend."""
+        backend = QueuedBackend(
+            backend={'ENGINE': 'track.backends.tests.test_queued.InMemoryBackend'},
+            **options
+        )
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_batched_delivery(self):
+        backend = self._backend(batch_size=2)
+        events = [{'test': index} for index in range(5)]
+        for event in events:
+            backend.send(event)
+
+        self.assertTrue(backend.flush(timeout=10))
+        self.assertEqual(backend.backend.events, events)
+        self.assertTrue(all(len(batch) <= 2 for batch in backend.backend.batches))
+
+    def test_block(self):
+        backend = self._backend(max_queue_size=1, batch_size=1, overflow_policy='block')
+        events = [{'test': index} for index in range(5)]
+        for event in events:
+            backend.send(event)
+
+        backend.flush(timeout=10)
+        self.assertEqual(backend.backend.events, events)
+
+    @patch('track.backends.queued.QueuedBackend._ensure_worker')
+    def test_drop_oldest(self, _mock_ensure_worker):
+        backend = self._backend(max_queue_size=2)
+        for index in range(3):
+            backend.send({'test': index})
+
+        backend.flush()
+        self.assertEqual(backend.backend.events, [{'test': 1}, {'test': 2}])
+
+    @patch('track.backends.queued.QueuedBackend._ensure_worker')
+    def test_spill(self, _mock_ensure_worker):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        spill_path = os.path.join(spill_dir, 'spill.log')
+
+        backend = self._backend(max_queue_size=2, overflow_policy='spill', spill_path=spill_path)
+        for index in range(3):
+            backend.send({'test': index})
+
+        backend.flush()
+        self.assertEqual(backend.backend.events, [{'test': 0}, {'test': 1}])
+        with open(spill_path) as spill_file:
+            self.assertEqual([json.loads(line) for line in spill_file], [{'test': 2}])
+
+    @patch('track.backends.queued.QueuedBackend._ensure_worker')
+    def test_spill_without_holding_condition(self, _mock_ensure_worker):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        spill_path = os.path.join(spill_dir, 'spill.log')
+        backend = self._backend(max_queue_size=1, overflow_policy='spill', spill_path=spill_path)
+        backend.send({'test': 0})
+
+        def write_spill_file(lines):
+            """Checks that the condition is free while the spill file is written."""
+            self.assertTrue(backend._condition.acquire(False))  # pylint: disable=protected-access
+            backend._condition.release()  # pylint: disable=protected-access
+            with open(spill_path, 'a') as spill_file:
+                spill_file.writelines(lines)
+
+        with patch('track.backends.queued.open', create=True) as mock_open:
+            mock_open.return_value.__enter__.return_value.writelines.side_effect = write_spill_file
+            backend.send({'test': 1})
+
+        self.assertTrue(mock_open.called)
+        with open(spill_path) as spill_file:
+            self.assertEqual([json.loads(line) for line in spill_file], [{'test': 1}])
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            self._backend(overflow_policy='unknown')
+        with self.assertRaises(ValueError):
+            self._backend(overflow_policy='spill')
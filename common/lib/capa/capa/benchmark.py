@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Commandline tool benchmarking the construction of LoncapaProblems with and
+without the cache of parsed problems.
+
+Example usage:
+    $ python -m capa.benchmark --iterations 50
+    $ python -m capa.benchmark path/to/problem.xml path/to/other_problem.xml
+"""
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import glob
+import os.path
+import sys
+from timeit import default_timer
+
+from capa.capa_problem import PARSED_PROBLEM_CACHE, LoncapaProblem
+from capa.tests.helpers import TEST_DIR, mock_capa_module, test_capa_system
+
+# The problems of the capa tests, used when no problem files are given.
+DEFAULT_PROBLEM_FILES = sorted(glob.glob(os.path.join(TEST_DIR, 'test_files', '*.xml')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the construction of capa problems')
+    parser.add_argument("files", nargs="*", default=DEFAULT_PROBLEM_FILES)
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="Number of times each problem is constructed, each time with a new seed.")
+    args = parser.parse_args()
+
+    problems = []
+    capa_system = test_capa_system()
+    for filename in args.files:
+        with open(filename) as problem_file:
+            problem_text = problem_file.read().decode('utf-8')
+        try:
+            LoncapaProblem(problem_text, 'benchmark', capa_system, mock_capa_module(), seed=0)
+        except Exception as exc:  # pylint: disable=broad-except
+            print("Skipping {}: {}".format(filename, exc))
+            continue
+        problems.append(problem_text)
+
+    if not problems:
+        print("No problems to benchmark.")
+        return 1
+
+    timings = {}
+    for name, use_cache in (('uncached', False), ('cached', True)):
+        PARSED_PROBLEM_CACHE.clear()
+        start = default_timer()
+        for seed in xrange(args.iterations):
+            for problem_text in problems:
+                if not use_cache:
+                    PARSED_PROBLEM_CACHE.clear()
+                LoncapaProblem(problem_text, 'benchmark', capa_system, mock_capa_module(), seed=seed)
+        timings[name] = default_timer() - start
+    PARSED_PROBLEM_CACHE.clear()
+
+    num_constructions = len(problems) * args.iterations
+    print("{} problems, {} iterations".format(len(problems), args.iterations))
+    for name in ('uncached', 'cached'):
+        print("  {:<10} {:>10.3f} s {:>12.1f} constructions/s".format(
+            name + ':', timings[name], num_constructions / timings[name] if timings[name] else 0,
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
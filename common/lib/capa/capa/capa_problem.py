@@ -13,12 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+import hashlib
 import logging
 import os.path
 import re
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+from threading import Lock
 from xml.sax.saxutils import unescape
 
 from lxml import etree
@@ -71,6 +73,81 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Maximum number of parsed problems held in each process's cache.
+PARSED_PROBLEM_CACHE_SIZE = 500
+
+
+class ParsedProblemCache(object):
+    """
+    A thread-safe LRU cache of the parsed XML trees of problems, keyed by
+    the hash of the problem text.
+
+    Parsing a problem only depends on its text, so the tree is shared by
+    all the LoncapaProblem instances constructed from the same text, and
+    each instance works on its own copy.  The cached trees must not be
+    modified.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+
+        # Map of problem text hash to (problem text, tree), in least to
+        # most recently used order.
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, problem_text):
+        """
+        Returns the converted problem text and a copy of the parsed tree of
+        the given problem text, parsing it if it isn't cached.
+        """
+        if isinstance(problem_text, unicode):
+            key = hashlib.sha1(problem_text.encode('utf-8')).hexdigest()
+        else:
+            key = hashlib.sha1(problem_text).hexdigest()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            entry = parse_problem(problem_text)
+            with self._lock:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        converted_text, tree = entry
+        return converted_text, deepcopy(tree)
+
+    def clear(self):
+        """
+        Removes all the entries of the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+PARSED_PROBLEM_CACHE = ParsedProblemCache(PARSED_PROBLEM_CACHE_SIZE)
+
+
+def parse_problem(problem_text):
+    """
+    Returns the problem text with its startouttext and endouttext tags
+    converted to proper <text></text> tags, and its parsed XML tree,
+    adjusted for compatibility by LoncapaProblem.make_xml_compatible.
+    """
+    problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+    problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+    tree = etree.XML(problem_text)
+    LoncapaProblem.make_xml_compatible(tree)
+    return problem_text, tree
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -171,15 +248,10 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
+        # Convert startouttext and endouttext to proper <text></text>, and
+        # parse problem XML file into an element tree.  The parsed tree of
+        # the problem text is cached, as it doesn't depend on the seed.
+        self.problem_text, self.tree = PARSED_PROBLEM_CACHE.get(problem_text)
 
         # handle any <include file="foo"> tags
         self._process_includes()
@@ -214,7 +286,8 @@ class LoncapaProblem(object):
 
             self.extracted_tree = self._extract_html(self.tree)
 
-    def make_xml_compatible(self, tree):
+    @staticmethod
+    def make_xml_compatible(tree):
         """
         Adjust tree xml in-place for compatibility before creating
         a problem from it.
@@ -6,6 +6,7 @@ import textwrap
 from lxml import etree
 import unittest
 
+from capa.capa_problem import PARSED_PROBLEM_CACHE, ParsedProblemCache
 from capa.tests.helpers import new_loncapa_problem
 
 
@@ -590,3 +591,56 @@ class CAPAMultiInputProblemTest(unittest.TestCase):
             description_element = multi_inputs_group.xpath('//p[@id="{}"]'.format(description_id))
             self.assertEqual(len(description_element), 1)
             self.assertEqual(description_element[0].text, descriptions[index])
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Tests the cache of the parsed trees of problems.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <startouttext/>Which color is the sky?<endouttext/>
+            <optionresponse>
+                <optioninput>
+                    <option correct="False">yellow</option>
+                    <option correct="True">blue</option>
+                </optioninput>
+            </optionresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        PARSED_PROBLEM_CACHE.clear()
+        self.addCleanup(PARSED_PROBLEM_CACHE.clear)
+
+    def test_same_problem_as_uncached(self):
+        first_problem = new_loncapa_problem(self.xml, seed=1)
+        second_problem = new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(first_problem.problem_text, second_problem.problem_text)
+        self.assertIn('<text>', first_problem.problem_text)
+        self.assertEqual(etree.tostring(first_problem.tree), etree.tostring(second_problem.tree))
+        self.assertEqual(first_problem.tree.find('.//optioninput').get('correct'), 'blue')
+        self.assertEqual(first_problem.get_html(), second_problem.get_html())
+
+    def test_trees_not_shared(self):
+        first_problem = new_loncapa_problem(self.xml)
+        second_problem = new_loncapa_problem(self.xml)
+        self.assertIsNot(first_problem.tree, second_problem.tree)
+
+    def test_lru_eviction(self):
+        cache = ParsedProblemCache(max_size=2)
+        for text in ('<problem>1</problem>', '<problem>2</problem>', '<problem>1</problem>', '<problem>3</problem>'):
+            cache.get(text)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        cache.get('<problem>1</problem>')
+        self.assertEqual(cache.hits, 2)
+        cache.get('<problem>2</problem>')
+        self.assertEqual(cache.misses, 4)
+
+    def test_parse_errors_not_cached(self):
+        cache = ParsedProblemCache(max_size=2)
+        for __ in range(2):
+            with self.assertRaises(etree.XMLSyntaxError):
+                cache.get('<problem>')
+        self.assertEqual(cache.misses, 2)
@@ -12,6 +12,7 @@ import sys
 from collections import OrderedDict
 from datetime import datetime
 
+import numpy
 from contracts import contract
 from pytz import UTC
 
@@ -242,6 +243,19 @@ class CourseGrader(object):
         '''Given a grade sheet, return a dict containing grading information'''
         raise NotImplementedError
 
+    def bulk_percent(self, grade_sheets):
+        '''
+        Given a list of grade sheets, return a numpy array of the final
+        percentage of each, equal to grade(grade_sheet)['percent'].
+
+        Subclasses may override this to compute the percentages of all
+        grade sheets at once, as long as the results stay exactly equal.
+        '''
+        return numpy.array(
+            [self.grade(grade_sheet)['percent'] for grade_sheet in grade_sheets],
+            dtype=numpy.float64,
+        )
+
 
 class WeightedSubsectionsGrader(CourseGrader):
     """
@@ -287,6 +301,14 @@ class WeightedSubsectionsGrader(CourseGrader):
             'grade_breakdown': grade_breakdown
         }
 
+    def bulk_percent(self, grade_sheets):
+        # The weighted percentages are added in the same order as in
+        # grade, so the results are exactly equal.
+        total_percent = numpy.zeros(len(grade_sheets), dtype=numpy.float64)
+        for subgrader, _, weight in self.subgraders:
+            total_percent = total_percent + subgrader.bulk_percent(grade_sheets) * weight
+        return total_percent
+
 
 class AssignmentFormatGrader(CourseGrader):
     """
@@ -445,6 +467,42 @@ class AssignmentFormatGrader(CourseGrader):
             # No grade_breakdown here
         }
 
+    def bulk_percent(self, grade_sheets):
+        # Each row holds the percentages of a grade sheet's sections, padded
+        # with placeholder zeros up to its own number of sections, as in grade.
+        # Cells beyond a row's own number of sections are unused.
+        num_scores = numpy.array(
+            [len(grade_sheet.get(self.type, {})) for grade_sheet in grade_sheets],
+            dtype=numpy.int64,
+        )
+        num_sections = numpy.maximum(num_scores, self.min_count)
+        width = int(num_sections.max()) if len(grade_sheets) else 0
+
+        percentages = numpy.zeros((len(grade_sheets), width), dtype=numpy.float64)
+        for row, grade_sheet in enumerate(grade_sheets):
+            for column, score in enumerate(grade_sheet.get(self.type, {}).itervalues()):
+                percentages[row, column] = score.graded_total.earned / score.graded_total.possible
+        used = numpy.arange(width) < num_sections[:, numpy.newaxis]
+
+        # Mimic grade's stable sort by descending percentage, dropping the last
+        # drop_count sections.  Unused cells sort first so they are never dropped.
+        included = used.copy()
+        if self.drop_count > 0 and width > 0:
+            sort_keys = numpy.where(used, -percentages, -numpy.inf)
+            sorted_columns = numpy.argsort(sort_keys, axis=1, kind='mergesort')
+            dropped_columns = sorted_columns[:, -self.drop_count:]
+            rows = numpy.arange(len(grade_sheets))[:, numpy.newaxis]
+            included[rows, dropped_columns] = False
+
+        # Sum column by column so the percentages are added in the same
+        # order as in grade, giving exactly equal results.
+        total_percent = numpy.zeros(len(grade_sheets), dtype=numpy.float64)
+        for column in xrange(width):
+            total_percent = total_percent + numpy.where(included[:, column], percentages[:, column], 0.0)
+
+        num_kept = num_sections - self.drop_count
+        return numpy.where(num_kept > 0, total_percent / numpy.maximum(num_kept, 1), total_percent)
+
 
 def _iter_graded(scores):
     """
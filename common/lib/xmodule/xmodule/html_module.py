@@ -76,6 +76,14 @@ class HtmlBlock(object):
         """
         return Fragment(self.get_html())
 
+    @property
+    def cacheable_student_view(self):
+        """
+        Whether the student view is the same for all users, and can be cached
+        by the runtime, which is the case unless the html contains %%USER_ID%%.
+        """
+        return "%%USER_ID%%" not in self.data
+
     def get_html(self):
         """ Returns html required for rendering XModule. """
 
@@ -589,6 +589,18 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_changed_block_keys(self, course_key, since_version_guid):
+        """
+        Returns the usage keys of the blocks in the given course that were
+        added, changed or removed since the given course version, or None
+        if the course's modulestore cannot compute the difference.
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'get_changed_block_keys')
+            return store.get_changed_block_keys(course_key, since_version_guid)
+        except NotImplementedError:
+            return None
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
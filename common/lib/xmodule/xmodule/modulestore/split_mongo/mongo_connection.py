@@ -8,7 +8,9 @@ import zlib
 import pymongo
 import pytz
 import re
+from collections import OrderedDict
 from contextlib import contextmanager
+from threading import Lock
 from time import time
 
 # Import this just to export it
@@ -163,6 +165,118 @@ class QueryTimer(object):
 TIMER = QueryTimer(__name__, 0.01)
 
 
+class LazyBlockMap(dict):
+    """
+    A map {BlockKey: BlockData} of the blocks of a structure, which keeps
+    each block as its Mongo document until it is first accessed.
+
+    Most requests only read a small part of a structure, so decoding the
+    documents of all of its blocks when it is loaded is wasted work on
+    large courses.  Documents are decoded in place, so the map behaves like
+    a dict of BlockData to its callers; only dict.__getitem__ and friends,
+    called on the map directly, can see an undecoded document.
+
+    Pickling and copying keep undecoded documents as is, so structures
+    read back from the structure cache are decoded lazily as well.
+    """
+    def __init__(self, block_docs=()):
+        super(LazyBlockMap, self).__init__()
+        for block in block_docs:
+            dict.__setitem__(self, BlockKey(block['block_type'], block['block_id']), block)
+
+    @staticmethod
+    def _block_data_from_mongo(block):
+        """
+        Returns the BlockData for the given block document, converting
+        its children from [[block_type, block_id]] to [BlockKey].
+        """
+        if 'children' in block['fields']:
+            check('list(list[2])', block['fields']['children'])
+            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
+        return BlockData(**block)
+
+    def _decode(self, block_key, value):
+        """
+        Returns the BlockData for the given stored value, replacing it in
+        the map if it is an undecoded block document.
+        """
+        if isinstance(value, dict):
+            value = self._block_data_from_mongo(value)
+            dict.__setitem__(self, block_key, value)
+        return value
+
+    def is_decoded(self, block_key):
+        """
+        Returns whether the block with the given key has been decoded.
+        """
+        return not isinstance(dict.__getitem__(self, block_key), dict)
+
+    def __getitem__(self, block_key):
+        return self._decode(block_key, dict.__getitem__(self, block_key))
+
+    def get(self, block_key, default=None):
+        if block_key in self:
+            return self[block_key]
+        return default
+
+    def setdefault(self, block_key, default=None):
+        if block_key not in self:
+            self[block_key] = default
+        return self[block_key]
+
+    def pop(self, block_key, *args):
+        if block_key in self:
+            value = self[block_key]
+            del self[block_key]
+            return value
+        return dict.pop(self, block_key, *args)
+
+    def popitem(self):
+        block_key, value = dict.popitem(self)
+        if isinstance(value, dict):
+            value = self._block_data_from_mongo(value)
+        return block_key, value
+
+    def iteritems(self):
+        for block_key in self.keys():
+            yield block_key, self[block_key]
+
+    def itervalues(self):
+        for block_key in self.keys():
+            yield self[block_key]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def copy(self):
+        return dict(self.iteritems())
+
+    def update(self, *args, **kwargs):
+        # dict.update reads other dicts' storage directly, so decode them first.
+        for other in args:
+            if isinstance(other, LazyBlockMap):
+                other = other.iteritems()
+            dict.update(self, other)
+        dict.update(self, **kwargs)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyBlockMap):
+            other = other.copy()
+        return dict.__eq__(self.copy(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, dict.__repr__(self.copy()))
+
+    def __reduce__(self):
+        return self.__class__, (), None, None, dict.iteritems(self)
+
+
 def structure_from_mongo(structure, course_context=None):
     """
     Converts the 'blocks' key from a list [block_data] to a map
@@ -171,6 +285,8 @@ def structure_from_mongo(structure, course_context=None):
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
 
+    The blocks are converted to BlockData as they are accessed (see LazyBlockMap).
+
     Arguments:
         structure: The document structure to convert
         course_context (CourseKey): For metrics gathering, the CourseKey
@@ -181,17 +297,9 @@ def structure_from_mongo(structure, course_context=None):
 
         check('seq[2]', structure['root'])
         check('list(dict)', structure['blocks'])
-        for block in structure['blocks']:
-            if 'children' in block['fields']:
-                check('list(list[2])', block['fields']['children'])
 
         structure['root'] = BlockKey(*structure['root'])
-        new_blocks = {}
-        for block in structure['blocks']:
-            if 'children' in block['fields']:
-                block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-            new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
-        structure['blocks'] = new_blocks
+        structure['blocks'] = LazyBlockMap(structure['blocks'])
 
         return structure
 
@@ -225,15 +333,93 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class LocalCache(object):
+    """
+    A thread-safe, process-local LRU cache of byte strings, bounded by
+    their total length. Entries may be set with a timeout, after which
+    they expire.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int): The maximum total length of the cached values.
+        """
+        self.max_size = max_size
+
+        # Map of key to (value, expiration time or None), in least to most
+        # recently used order.
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Return the unexpired value cached for ``key``, or None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires is not None and expires <= time():
+                self._size -= len(value)
+                return None
+
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value, timeout=None):
+        """
+        Cache ``value`` for ``key``, for ``timeout`` seconds (or until evicted,
+        if ``timeout`` is None), evicting the least recently used entries as needed.
+        """
+        if len(value) > self.max_size:
+            return
+
+        expires = None if timeout is None else time() + timeout
+        with self._lock:
+            self._delete(key)
+            self._entries[key] = (value, expires)
+            self._size += len(value)
+
+            while self._size > self.max_size:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def delete(self, key):
+        """
+        Remove the value cached for ``key``, if any.
+        """
+        with self._lock:
+            self._delete(key)
+
+    def _delete(self, key):
+        """
+        Remove the value cached for ``key``, if any. The caller must hold the lock.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    If a :class:`LocalCache` is given, the pickled data is also cached there,
+    in front of the django cache.  Cached data is unpickled on every get, so
+    that callers are free to modify the returned objects.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
-    for set and get.
+    for set and get (other than using the local cache).
     """
-    def __init__(self):
+    # The name of the cached values, used in metrics.
+    name = 'CourseStructureCache'
+
+    def __init__(self, local_cache=None):
+        self.local_cache = local_cache
         self.cache = None
         if DJANGO_AVAILABLE:
             try:
@@ -241,42 +427,168 @@ class CourseStructureCache(object):
             except InvalidCacheBackendError:
                 pass
 
-    def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
-        if self.cache is None:
-            return None
+    def cache_key(self, key):
+        """
+        Return the key of the cached value for ``key``.
+        """
+        return key
+
+    def get(self, key, course_context=None, timeout=None):
+        """
+        Pull the compressed, pickled struct data from cache and deserialize.
 
-        with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+        Arguments:
+            timeout: The timeout to cache data found in the django cache
+                with in the local cache.
+        """
+        if self.cache is None and self.local_cache is None:
+            return None
 
-            if compressed_pickled_data is None:
+        with TIMER.timer("{}.get".format(self.name), course_context) as tagger:
+            cache_key = self.cache_key(key)
+            tier = 'local'
+            pickled_data = self.local_cache.get(cache_key) if self.local_cache is not None else None
+            if pickled_data is None and self.cache is not None:
+                tier = 'shared'
+                compressed_pickled_data = self.cache.get(cache_key)
+                if compressed_pickled_data is not None:
+                    tagger.measure('compressed_size', len(compressed_pickled_data))
+                    pickled_data = zlib.decompress(compressed_pickled_data)
+                    if self.local_cache is not None:
+                        self.local_cache.set(cache_key, pickled_data, timeout)
+
+            tagger.tag(from_cache=str(pickled_data is not None).lower())
+            if pickled_data is None:
                 # Always log cache misses, because they are unexpected
                 tagger.sample_rate = 1
                 return None
 
-            tagger.measure('compressed_size', len(compressed_pickled_data))
-
-            pickled_data = zlib.decompress(compressed_pickled_data)
+            tagger.tag(tier=tier)
             tagger.measure('uncompressed_size', len(pickled_data))
 
             return pickle.loads(pickled_data)
 
-    def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+    def set(self, key, structure, course_context=None, timeout=None):
+        """
+        Given a structure, will pickle, compress, and write to cache.
+
+        Arguments:
+            timeout: The number of seconds to cache the structure for, or
+                None to cache it until it's evicted.
+        """
+        if self.cache is None and self.local_cache is None:
             return None
 
-        with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
+        with TIMER.timer("{}.set".format(self.name), course_context) as tagger:
+            cache_key = self.cache_key(key)
             pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            if self.local_cache is not None:
+                self.local_cache.set(cache_key, pickled_data, timeout)
+
+            if self.cache is not None:
+                # 1 = Fastest (slightly larger results)
+                compressed_pickled_data = zlib.compress(pickled_data, 1)
+                tagger.measure('compressed_size', len(compressed_pickled_data))
+
+                # Stuctures are immutable, so the default timeout is "never"
+                self.cache.set(cache_key, compressed_pickled_data, timeout)
+
+    def get_many(self, keys, course_context=None):
+        """
+        Return a dict of the deserialized data cached for those of ``keys`` that
+        are cached, reading the django cache with a single request.
+        """
+        if self.cache is None and self.local_cache is None:
+            return {}
+
+        with TIMER.timer("{}.get_many".format(self.name), course_context) as tagger:
+            tagger.measure('requested', len(keys))
+            pickled_data = {}
+            cache_keys = {self.cache_key(key): key for key in keys}
+            if self.local_cache is not None:
+                for cache_key, key in cache_keys.iteritems():
+                    data = self.local_cache.get(cache_key)
+                    if data is not None:
+                        pickled_data[key] = data
+            tagger.measure('local_hits', len(pickled_data))
+
+            missing_cache_keys = [cache_key for cache_key, key in cache_keys.iteritems() if key not in pickled_data]
+            if missing_cache_keys and self.cache is not None:
+                shared_data = self.cache.get_many(missing_cache_keys)
+                tagger.measure('shared_hits', len(shared_data))
+                for cache_key, compressed_pickled_data in shared_data.iteritems():
+                    data = zlib.decompress(compressed_pickled_data)
+                    if self.local_cache is not None:
+                        self.local_cache.set(cache_key, data)
+                    pickled_data[cache_keys[cache_key]] = data
+
+            return {key: pickle.loads(data) for key, data in pickled_data.iteritems()}
+
+    def set_many(self, values, course_context=None):
+        """
+        Cache the given dict of keys to data (until it's evicted), writing
+        the django cache with a single request.
+        """
+        if self.cache is None and self.local_cache is None:
+            return
+
+        with TIMER.timer("{}.set_many".format(self.name), course_context) as tagger:
+            tagger.measure('values', len(values))
+            compressed_data = {}
+            for key, value in values.iteritems():
+                cache_key = self.cache_key(key)
+                pickled_data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                if self.local_cache is not None:
+                    self.local_cache.set(cache_key, pickled_data)
+                if self.cache is not None:
+                    compressed_data[cache_key] = zlib.compress(pickled_data, 1)
 
-            # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            if compressed_data:
+                self.cache.set_many(compressed_data, None)
+
+    def delete(self, key):
+        """
+        Remove the cached data for ``key`` from all tiers.
+        """
+        cache_key = self.cache_key(key)
+        if self.local_cache is not None:
+            self.local_cache.delete(cache_key)
+        if self.cache is not None:
+            self.cache.delete(cache_key)
+
+
+class DefinitionCache(CourseStructureCache):
+    """
+    Cache of definitions, which are immutable by id like structures.
+    """
+    name = 'DefinitionCache'
+
+    def cache_key(self, key):
+        return u'definition.{}'.format(key)
+
+
+class CourseIndexCache(CourseStructureCache):
+    """
+    Cache of course indexes, keyed by course key, which should only be
+    cached with a short timeout since they are updated in place.
+
+    Missing course indexes are cached as well (as ``MISSING``), so that
+    repeated lookups of courses that aren't in this modulestore don't
+    query the database.
+    """
+    name = 'CourseIndexCache'
+    MISSING = {}
+
+    def cache_key(self, key):
+        """
+        Return the key of the cached course index for ``key``, which is either
+        a course key or a course index.
+        """
+        if isinstance(key, dict):
+            return u'course_index.{org}+{course}+{run}'.format(**key)
+        return u'course_index.{}+{}+{}'.format(key.org, key.course, key.run)
 
 
 class MongoConnection(object):
@@ -285,10 +597,20 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, local_cache_max_size=0, course_index_cache_timeout=0,
+        **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Arguments:
+            local_cache_max_size (int): The total size of the pickled structures,
+                definitions and course indexes to cache in this process, in front
+                of the 'course_structure_cache' django cache. 0 disables the local cache,
+                as well as caching definitions in the django cache.
+            course_index_cache_timeout (int): The number of seconds to cache course
+                indexes for, which may be stale in other processes for up to this
+                long after they are updated. 0 disables caching course indexes.
         """
         # Set a write concern of 1, which makes writes complete successfully to the primary
         # only before returning. Also makes pymongo report write errors.
@@ -304,6 +626,9 @@ class MongoConnection(object):
         self.structures = self.database[collection + '.structures']
         self.definitions = self.database[collection + '.definitions']
 
+        self.local_cache = LocalCache(local_cache_max_size) if local_cache_max_size else None
+        self.course_index_cache_timeout = course_index_cache_timeout
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -320,7 +645,7 @@ class MongoConnection(object):
         This method will use a cached version of the structure if it is available.
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
-            cache = CourseStructureCache()
+            cache = CourseStructureCache(self.local_cache)
 
             structure = cache.get(key, course_context)
             tagger_get_structure.tag(from_cache=str(bool(structure)).lower())
@@ -437,6 +762,31 @@ class MongoConnection(object):
     def get_course_index(self, key, ignore_case=False):
         """
         Get the course_index from the persistence mechanism whose id is the given key
+
+        Case-sensitive lookups are cached for ``course_index_cache_timeout`` seconds.
+        """
+        if ignore_case or not self.course_index_cache_timeout:
+            return self._find_course_index(key, ignore_case)
+
+        cache = CourseIndexCache(self.local_cache)
+        with TIMER.timer("get_course_index.cached", key) as tagger:
+            course_index = cache.get(key, key, timeout=self.course_index_cache_timeout)
+            tagger.tag(from_cache=str(course_index is not None).lower())
+            if course_index is None:
+                course_index = self._find_course_index(key)
+                cache.set(
+                    key,
+                    CourseIndexCache.MISSING if course_index is None else course_index,
+                    key,
+                    timeout=self.course_index_cache_timeout,
+                )
+            elif course_index == CourseIndexCache.MISSING:
+                course_index = None
+            return course_index
+
+    def _find_course_index(self, key, ignore_case=False):
+        """
+        Find the course_index whose id is the given key in the database.
         """
         with TIMER.timer("get_course_index", key):
             if ignore_case:
@@ -483,6 +833,7 @@ class MongoConnection(object):
         with TIMER.timer("insert_course_index", course_context):
             course_index['last_update'] = datetime.datetime.now(pytz.utc)
             self.course_index.insert(course_index)
+            self._invalidate_course_index(course_index)
 
     def update_course_index(self, course_index, from_index=None, course_context=None):
         """
@@ -506,6 +857,7 @@ class MongoConnection(object):
                 }
             course_index['last_update'] = datetime.datetime.now(pytz.utc)
             self.course_index.update(query, course_index, upsert=False,)
+            self._invalidate_course_index(course_index)
 
     def delete_course_index(self, course_key):
         """
@@ -516,14 +868,30 @@ class MongoConnection(object):
                 key_attr: getattr(course_key, key_attr)
                 for key_attr in ('org', 'course', 'run')
             }
-            return self.course_index.remove(query)
+            result = self.course_index.remove(query)
+            self._invalidate_course_index(course_key)
+            return result
+
+    def _invalidate_course_index(self, course_key):
+        """
+        Remove the cached course index of ``course_key`` (a course key, or a
+        course index, which has the same org, course and run attributes).
+        """
+        if self.course_index_cache_timeout:
+            CourseIndexCache(self.local_cache).delete(course_key)
 
     def get_definition(self, key, course_context=None):
         """
         Get the definition from the persistence mechanism whose id is the given key
         """
         with TIMER.timer("get_definition", course_context) as tagger:
-            definition = self.definitions.find_one({'_id': key})
+            cache = self._definition_cache()
+            definition = cache.get(key, course_context) if cache is not None else None
+            tagger.tag(from_cache=str(definition is not None).lower())
+            if definition is None:
+                definition = self.definitions.find_one({'_id': key})
+                if definition is not None and cache is not None:
+                    cache.set(key, definition, course_context)
             tagger.measure("fields", len(definition['fields']))
             tagger.tag(block_type=definition['block_type'])
             return definition
@@ -531,11 +899,36 @@ class MongoConnection(object):
     def get_definitions(self, definitions, course_context=None):
         """
         Retrieve all definitions listed in `definitions`.
+
+        Definitions are immutable, so they are cached by id when the local
+        cache is enabled, and only the definitions that aren't cached are
+        queried for.
         """
         with TIMER.timer("get_definitions", course_context) as tagger:
             tagger.measure('definitions', len(definitions))
-            definitions = self.definitions.find({'_id': {'$in': definitions}})
-            return definitions
+            cache = self._definition_cache()
+            cached = cache.get_many(definitions, course_context) if cache is not None else {}
+            tagger.measure('cached_definitions', len(cached))
+
+            found = cached.values()
+            missing = [definition_id for definition_id in definitions if definition_id not in cached]
+            if missing:
+                from_db = list(self.definitions.find({'_id': {'$in': missing}}))
+                if cache is not None:
+                    cache.set_many({definition['_id']: definition for definition in from_db}, course_context)
+                found.extend(from_db)
+            return found
+
+    def _definition_cache(self):
+        """
+        Returns the cache of definitions, or None if definitions are not
+        cached, i.e. when the local cache is disabled.  This keeps the
+        'course_structure_cache' django cache free of definitions unless
+        they are opted in to.
+        """
+        if self.local_cache is None:
+            return None
+        return DefinitionCache(self.local_cache)
 
     def insert_definition(self, definition, course_context=None):
         """
@@ -659,14 +659,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, local_cache_max_size=0, course_index_cache_timeout=0,
+                 **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param local_cache_max_size: the total size in bytes of the pickled structures, definitions and
+            course indexes to cache in this process. 0 disables the process cache, as well as caching
+            definitions in the 'course_structure_cache' django cache.
+        :param course_index_cache_timeout: the number of seconds to cache course indexes for. Only
+            enable this for read-mostly processes (such as the LMS), since updates of a course made
+            by other processes are only seen after this long. 0 disables caching course indexes.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(
+            local_cache_max_size=local_cache_max_size,
+            course_index_cache_timeout=course_index_cache_timeout,
+            **doc_store_config
+        )
 
         if default_class is not None:
             module_path, __, class_name = default_class.rpartition('.')
@@ -1409,6 +1420,47 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             'edited_on': course['edited_on']
         }
 
+    def get_changed_block_keys(self, course_key, since_version_guid):
+        """
+        Returns the usage keys of the blocks whose settings, children or
+        definition differ between the structure with since_version_guid
+        and the current structure of the given course, including blocks
+        that were added or removed since then.
+
+        Returns None if the structure with since_version_guid is not found,
+        e.g. because it was pruned, or is not a version of the given course.
+
+        :param course_key: the course whose current structure is compared
+        :param since_version_guid: the version guid of the earlier structure
+        """
+        if not isinstance(course_key, CourseLocator) or course_key.deprecated:
+            # The supplied CourseKey is of the wrong type, so it can't possibly be stored in this modulestore.
+            raise ItemNotFoundError(course_key)
+
+        current_structure = self._lookup_course(course_key).structure
+        previous_structure = self.get_structure(course_key, course_key.as_object_id(since_version_guid))
+        if (
+                previous_structure is None or
+                previous_structure['original_version'] != current_structure['original_version']
+        ):
+            return None
+
+        current_blocks = current_structure['blocks']
+        previous_blocks = previous_structure['blocks']
+        usage_course_key = course_key.version_agnostic().for_branch(None)
+        changed_block_keys = set()
+        for block_key in set(current_blocks) | set(previous_blocks):
+            current_block = current_blocks.get(block_key)
+            previous_block = previous_blocks.get(block_key)
+            if (
+                    current_block is None or previous_block is None or
+                    current_block.fields != previous_block.fields or
+                    current_block.definition != previous_block.definition or
+                    current_block.defaults != previous_block.defaults
+            ):
+                changed_block_keys.add(usage_course_key.make_usage_key(block_key.type, block_key.id))
+        return changed_block_keys
+
     def get_definition_history_info(self, definition_locator, course_context=None):
         """
         Because xblocks doesn't give a means to separate the definition's meta information from
@@ -1762,6 +1762,79 @@ class TestItemCrud(SplitModuleTest):
             store.delete_course(refetch_course.id, user)
 
 
+class TestChangedBlockKeys(SplitModuleTest):
+    """
+    Test get_changed_block_keys
+    """
+    def setUp(self):
+        super(TestChangedBlockKeys, self).setUp()
+        self.course_key = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        self.since_version_guid = modulestore().get_course(self.course_key).location.version_guid
+
+    def _usage_key(self, block_type, block_id):
+        """
+        Returns the version agnostic usage key of the given block of the course.
+        """
+        return BlockUsageLocator(self.course_key.version_agnostic().for_branch(None), block_type, block_id)
+
+    def _get_changed_block_keys(self):
+        """
+        Returns the keys of the blocks changed since the version of the course in setUp.
+        """
+        return modulestore().get_changed_block_keys(self.course_key, self.since_version_guid)
+
+    def test_unchanged(self):
+        self.assertEqual(self._get_changed_block_keys(), set())
+
+    def test_added(self):
+        new_module = modulestore().create_child(
+            self.user_id, BlockUsageLocator(self.course_key, 'chapter', 'chapter3'), 'problem',
+            fields={'display_name': 'new problem'},
+        )
+        self.assertEqual(self._get_changed_block_keys(), {
+            self._usage_key('problem', new_module.location.block_id),
+            self._usage_key('chapter', 'chapter3'),
+        })
+
+    def test_edited(self):
+        problem = modulestore().get_item(BlockUsageLocator(self.course_key, 'problem', 'problem1'))
+        problem.display_name = 'edited problem'
+        modulestore().update_item(problem, self.user_id)
+        self.assertEqual(self._get_changed_block_keys(), {self._usage_key('problem', 'problem1')})
+
+    def test_moved(self):
+        old_parent = modulestore().get_item(BlockUsageLocator(self.course_key, 'chapter', 'chapter3'))
+        problem_key = BlockUsageLocator(self.course_key, 'problem', 'problem1')
+        old_parent.children = [child for child in old_parent.children if child.block_id != problem_key.block_id]
+        modulestore().update_item(old_parent, self.user_id)
+        new_parent = modulestore().get_item(BlockUsageLocator(self.course_key, 'chapter', 'chapter1'))
+        new_parent.children.append(problem_key)
+        modulestore().update_item(new_parent, self.user_id)
+        self.assertEqual(self._get_changed_block_keys(), {
+            self._usage_key('chapter', 'chapter3'),
+            self._usage_key('chapter', 'chapter1'),
+        })
+
+    def test_deleted(self):
+        modulestore().delete_item(BlockUsageLocator(self.course_key, 'chapter', 'chapter3'), self.user_id)
+        self.assertEqual(self._get_changed_block_keys(), {
+            self._usage_key('course', 'head12345'),
+            self._usage_key('chapter', 'chapter3'),
+            self._usage_key('problem', 'problem1'),
+            self._usage_key('problem', 'problem3_2'),
+            self._usage_key('problem', 'problem32'),
+        })
+
+    def test_unknown_version(self):
+        self.since_version_guid = '{:024x}'.format(random.getrandbits(96))
+        self.assertIsNone(self._get_changed_block_keys())
+
+    def test_version_of_another_course(self):
+        other_course_key = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_DRAFT)
+        self.since_version_guid = modulestore().get_course(other_course_key).location.version_guid
+        self.assertIsNone(self._get_changed_block_keys())
+
+
 class TestCourseCreation(SplitModuleTest):
     """
     Test create_course
@@ -1,7 +1,15 @@
 """ Test the behavior of split_mongo/MongoConnection """
+import copy
+import cPickle as pickle
 import unittest
-from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from django.core.cache import InvalidCacheBackendError
+from mock import Mock, patch
+from opaque_keys.edx.locator import CourseLocator
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    LazyBlockMap, LocalCache, MongoConnection, structure_from_mongo, structure_to_mongo
+)
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -17,3 +25,186 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestLocalCache(unittest.TestCase):
+    """ Test the process-local LRU cache of split_mongo/MongoConnection """
+    def setUp(self):
+        super(TestLocalCache, self).setUp()
+        self.cache = LocalCache(max_size=10)
+
+    def test_lru_eviction(self):
+        self.cache.set('a', 'aaaa')
+        self.cache.set('b', 'bbbb')
+        self.assertEqual(self.cache.get('a'), 'aaaa')
+
+        # 'b' is now the least recently used entry
+        self.cache.set('c', 'cccc')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 'aaaa')
+        self.assertEqual(self.cache.get('c'), 'cccc')
+
+    def test_too_large(self):
+        self.cache.set('a', 'a' * 11)
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_timeout(self):
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.time', return_value=100):
+            self.cache.set('a', 'aaaa', timeout=10)
+            self.assertEqual(self.cache.get('a'), 'aaaa')
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.time', return_value=110):
+            self.assertIsNone(self.cache.get('a'))
+
+    def test_delete(self):
+        self.cache.set('a', 'aaaa')
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+
+
+@patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache', Mock(side_effect=InvalidCacheBackendError))
+class TestCourseIndexCache(unittest.TestCase):
+    """ Test the caching of course indexes by split_mongo/MongoConnection """
+    @patch('pymongo.MongoClient')
+    @patch('pymongo.database.Database')
+    def setUp(self, *calls):  # pylint: disable=arguments-differ
+        super(TestCourseIndexCache, self).setUp()
+        with patch('mongodb_proxy.MongoProxy'):
+            self.connection = MongoConnection(
+                'db', 'collection', 'host', local_cache_max_size=10000, course_index_cache_timeout=60,
+            )
+        self.connection.course_index = Mock()
+        self.course_key = CourseLocator('org', 'course', 'run')
+        self.course_index = {'org': 'org', 'course': 'course', 'run': 'run', 'versions': {}}
+
+    def test_cached_course_index(self):
+        self.connection.course_index.find_one.return_value = self.course_index
+        for __ in range(2):
+            self.assertEqual(self.connection.get_course_index(self.course_key), self.course_index)
+        self.assertEqual(self.connection.course_index.find_one.call_count, 1)
+
+        # Updating the course index invalidates the cached one
+        self.connection.update_course_index(self.course_index)
+        self.connection.get_course_index(self.course_key)
+        self.assertEqual(self.connection.course_index.find_one.call_count, 2)
+
+    def test_cached_missing_course_index(self):
+        self.connection.course_index.find_one.return_value = None
+        for __ in range(2):
+            self.assertIsNone(self.connection.get_course_index(self.course_key))
+        self.assertEqual(self.connection.course_index.find_one.call_count, 1)
+
+        # Inserting the course index invalidates the cached miss
+        self.connection.insert_course_index(self.course_index)
+        self.connection.course_index.find_one.return_value = self.course_index
+        self.assertEqual(self.connection.get_course_index(self.course_key), self.course_index)
+
+    def test_ignore_case_not_cached(self):
+        self.connection.course_index.find_one.return_value = self.course_index
+        for __ in range(2):
+            self.connection.get_course_index(self.course_key, ignore_case=True)
+        self.assertEqual(self.connection.course_index.find_one.call_count, 2)
+
+
+class TestDefinitionCache(unittest.TestCase):
+    """ Test the caching of definitions by split_mongo/MongoConnection """
+    @patch('pymongo.MongoClient')
+    @patch('pymongo.database.Database')
+    def _create_connection(self, local_cache_max_size, *calls):  # pylint: disable=unused-argument
+        """
+        Returns a MongoConnection with the given local cache size and mocked definitions.
+        """
+        with patch('mongodb_proxy.MongoProxy'):
+            connection = MongoConnection('db', 'collection', 'host', local_cache_max_size=local_cache_max_size)
+        connection.definitions = Mock()
+        connection.definitions.find_one.return_value = self.definition
+        connection.definitions.find.side_effect = lambda query: [self.definition]
+        return connection
+
+    def setUp(self):
+        super(TestDefinitionCache, self).setUp()
+        self.definition = {'_id': 'definition', 'block_type': 'html', 'fields': {'data': 'data'}}
+        self.django_cache = Mock()
+        self.django_cache.get.return_value = None
+        self.django_cache.get_many.return_value = {}
+        patcher = patch(
+            'xmodule.modulestore.split_mongo.mongo_connection.get_cache', Mock(return_value=self.django_cache)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_definitions(self):
+        connection = self._create_connection(10000)
+        for __ in range(2):
+            self.assertEqual(connection.get_definition('definition'), self.definition)
+            self.assertEqual(connection.get_definitions(['definition']), [self.definition])
+        self.assertEqual(connection.definitions.find_one.call_count, 1)
+        self.assertFalse(connection.definitions.find.called)
+        self.assertTrue(self.django_cache.set.called)
+
+    def test_local_cache_disabled(self):
+        connection = self._create_connection(0)
+        for __ in range(2):
+            self.assertEqual(connection.get_definition('definition'), self.definition)
+            self.assertEqual(connection.get_definitions(['definition']), [self.definition])
+        self.assertEqual(connection.definitions.find_one.call_count, 2)
+        self.assertEqual(connection.definitions.find.call_count, 2)
+        self.assertFalse(self.django_cache.get.called)
+        self.assertFalse(self.django_cache.set.called)
+        self.assertFalse(self.django_cache.set_many.called)
+
+
+class TestLazyBlockMap(unittest.TestCase):
+    """ Test the lazy decoding of structure blocks by split_mongo/MongoConnection """
+    def setUp(self):
+        super(TestLazyBlockMap, self).setUp()
+        self.course_key = BlockKey('course', 'course')
+        self.chapter_key = BlockKey('chapter', 'chapter')
+        self.structure = structure_from_mongo({
+            'root': ['course', 'course'],
+            'blocks': [
+                {
+                    'block_type': 'course',
+                    'block_id': 'course',
+                    'fields': {'children': [['chapter', 'chapter']]},
+                    'edit_info': {'edited_by': 1},
+                },
+                {'block_type': 'chapter', 'block_id': 'chapter', 'fields': {}, 'edit_info': {}},
+            ],
+        })
+        self.blocks = self.structure['blocks']
+
+    def test_decoded_on_access(self):
+        self.assertIsInstance(self.blocks, LazyBlockMap)
+        self.assertEqual(self.structure['root'], self.course_key)
+        self.assertEqual(len(self.blocks), 2)
+        self.assertIn(self.chapter_key, self.blocks)
+        self.assertFalse(self.blocks.is_decoded(self.course_key))
+
+        course = self.blocks[self.course_key]
+        self.assertIsInstance(course, BlockData)
+        self.assertEqual(course.fields['children'], [self.chapter_key])
+        self.assertEqual(course.edit_info.edited_by, 1)
+        self.assertIs(self.blocks.get(self.course_key), course)
+        self.assertTrue(self.blocks.is_decoded(self.course_key))
+        self.assertFalse(self.blocks.is_decoded(self.chapter_key))
+
+    def test_dict_methods(self):
+        self.assertIsNone(self.blocks.get(BlockKey('html', 'missing')))
+        self.assertTrue(all(isinstance(block, BlockData) for block in self.blocks.itervalues()))
+        self.assertEqual(self.blocks.items(), list(self.blocks.copy().iteritems()))
+
+        chapter = self.blocks.pop(self.chapter_key)
+        self.assertIsInstance(chapter, BlockData)
+        self.assertNotIn(self.chapter_key, self.blocks)
+
+    def test_pickle_and_copy_keep_blocks_undecoded(self):
+        self.blocks[self.course_key]  # pylint: disable=pointless-statement
+        for blocks in (pickle.loads(pickle.dumps(self.blocks, pickle.HIGHEST_PROTOCOL)), copy.deepcopy(self.blocks)):
+            self.assertIsInstance(blocks, LazyBlockMap)
+            self.assertTrue(blocks.is_decoded(self.course_key))
+            self.assertFalse(blocks.is_decoded(self.chapter_key))
+            self.assertEqual(blocks, self.blocks)
+
+    def test_round_trip(self):
+        stored = structure_to_mongo(self.structure)
+        self.assertEqual(structure_from_mongo(stored)['blocks'], self.blocks)
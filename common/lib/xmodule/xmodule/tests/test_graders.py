@@ -2,7 +2,9 @@
 Grading tests
 """
 
+import random
 import unittest
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 import ddt
@@ -245,6 +247,42 @@ class GraderTest(unittest.TestCase):
         self.assertEqual(len(graded['section_breakdown']), 0)
         self.assertEqual(len(graded['grade_breakdown']), 0)
 
+    def test_bulk_percent(self):
+        homework_grader = graders.AssignmentFormatGrader("Homework", 12, 2)
+        lab_grader = graders.AssignmentFormatGrader("Lab", 3, 9)
+        midterm_grader = graders.AssignmentFormatGrader("Midterm", 1, 0)
+        weighted_grader = graders.WeightedSubsectionsGrader([
+            (homework_grader, homework_grader.category, 0.25),
+            (lab_grader, lab_grader.category, 0.25),
+            (midterm_grader, midterm_grader.category, 0.5),
+        ])
+
+        # Include random grade sheets with ties among the lowest scores,
+        # whose dropping order affects the order of the summation.
+        rand = random.Random(0)
+        grade_sheets = [self.empty_gradesheet, self.incomplete_gradesheet, self.test_gradesheet]
+        for _ in range(200):
+            grade_sheets.append({
+                section_type: OrderedDict(
+                    (index, self.MockGrade(
+                        AggregatedScore(
+                            tw_earned=rand.choice([0, 1, 2, rand.random() * 3]),
+                            tw_possible=rand.choice([3.0, 7.0]),
+                            **self.common_fields
+                        ),
+                        display_name=str(index),
+                    ))
+                    for index in range(rand.randint(0, 14))
+                )
+                for section_type in ['Homework', 'Lab', 'Midterm']
+            })
+
+        for grader in [homework_grader, lab_grader, midterm_grader, weighted_grader, graders.WeightedSubsectionsGrader([])]:
+            self.assertEqual(
+                list(grader.bulk_percent(grade_sheets)),
+                [grader.grade(grade_sheet)['percent'] for grade_sheet in grade_sheets],
+            )
+
     def test_grader_from_conf(self):
 
         # Confs always produce a graders.WeightedSubsectionsGrader, so we test this by repeating the test
@@ -29,8 +29,9 @@ class MilestonesAndSpecialExamsTransformer(BlockStructureTransformer):
     student view, based on the value of `include_special_exams`.
 
     """
-    WRITE_VERSION = 1
-    READ_VERSION = 1
+    WRITE_VERSION = 2
+    READ_VERSION = 2
+    SUPPORTS_INCREMENTAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -51,6 +52,7 @@ class MilestonesAndSpecialExamsTransformer(BlockStructureTransformer):
         block_structure.request_xblock_fields('is_proctored_enabled')
         block_structure.request_xblock_fields('is_practice_exam')
         block_structure.request_xblock_fields('is_timed_exam')
+        block_structure.request_xblock_fields('is_time_limited')
         block_structure.request_xblock_fields('entrance_exam_id')
 
     def transform(self, usage_info, block_structure):
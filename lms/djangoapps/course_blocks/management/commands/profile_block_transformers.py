@@ -0,0 +1,102 @@
+"""
+Command to profile the block structure transformers run by the Course
+Blocks API for a course and a user.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from lms.djangoapps.course_api.blocks.transformers.blocks_api import BlocksAPITransformer
+from lms.djangoapps.course_api.blocks.transformers.milestones import MilestonesAndSpecialExamsTransformer
+from lms.djangoapps.course_blocks.api import COURSE_BLOCK_ACCESS_TRANSFORMERS, get_course_blocks
+from lms.djangoapps.course_blocks.transformers.hidden_content import HiddenContentTransformer
+from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.djangoapps.content.block_structure.profiling import BlockStructureProfiler
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms profile_block_transformers 'course-v1:edX+DemoX+Demo_Course' --username staff --settings=devstack
+    """
+    help = 'Prints the cost of each block structure transformer for a course and a user, most expensive first.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'course_id',
+            help='Profile the transformers on the blocks of this course.',
+        )
+        parser.add_argument(
+            '--username',
+            help='Profile the transformers for the user with this username.',
+            required=True,
+        )
+        parser.add_argument(
+            '--iterations',
+            help='Number of times to transform the course blocks.',
+            default=10,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course_key = CourseKey.from_string(options['course_id'])
+        except InvalidKeyError:
+            raise CommandError('Invalid course id {}'.format(options['course_id']))
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Unknown user {}'.format(options['username']))
+
+        store = modulestore()
+        root_block_usage_key = store.make_course_usage_key(course_key)
+        profiler = BlockStructureProfiler()
+
+        with store.bulk_operations(course_key):
+            block_structure = BlockStructureFactory.create_from_modulestore(root_block_usage_key, store)
+            BlockStructureTransformers.collect(block_structure, profiler)
+
+        for __ in xrange(options['iterations']):
+            get_course_blocks(
+                user,
+                root_block_usage_key,
+                BlockStructureTransformers(self._get_transformers(), profiler=profiler),
+                collected_block_structure=block_structure,
+            )
+
+        self.stdout.write('{} ({} blocks), user {}, {} iterations'.format(
+            course_key, len(block_structure), user.username, options['iterations'],
+        ))
+        self.stdout.write('  {:<4} {:<40} {:<9} {:>10} {:>10} {:>14} {:>12}'.format(
+            'rank', 'transformer', 'phase', 'calls', 'ms/call', 'removed/call', 'reads/call',
+        ))
+        for rank, profile in enumerate(profiler.get_ranked_profiles(), 1):
+            calls = max(profile.calls, 1)
+            self.stdout.write('  {:<4} {:<40} {:<9} {:>10} {:>10.3f} {:>14.1f} {:>12.1f}'.format(
+                rank,
+                profile.transformer_name,
+                profile.phase,
+                profile.calls,
+                profile.duration * 1000 / calls,
+                profile.blocks_removed / calls,
+                profile.fields_read / calls,
+            ))
+
+    @staticmethod
+    def _get_transformers():
+        """
+        Returns the transformers the Course Blocks API runs for a user.
+        """
+        return COURSE_BLOCK_ACCESS_TRANSFORMERS + [
+            MilestonesAndSpecialExamsTransformer(),
+            HiddenContentTransformer(),
+            BlocksAPITransformer(None, None),
+        ]
@@ -0,0 +1,50 @@
+"""
+Tests for profile_block_transformers management command.
+"""
+from StringIO import StringIO
+
+from django.core.management import CommandError, call_command
+
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class TestProfileBlockTransformers(SharedModuleStoreTestCase):
+    """
+    Tests profile_block_transformers management command.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestProfileBlockTransformers, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        ItemFactory.create(parent=chapter, category='sequential')
+
+    def setUp(self):
+        super(TestProfileBlockTransformers, self).setUp()
+        self.user = UserFactory.create()
+
+    def test_ranked_report(self):
+        out = StringIO()
+        call_command(
+            'profile_block_transformers',
+            unicode(self.course.id),
+            '--username', self.user.username,
+            '--iterations', '2',
+            stdout=out,
+        )
+        report = out.getvalue()
+        self.assertIn(unicode(self.course.id), report)
+        for transformer_name in ('start_date', 'visibility', 'blocks_api'):
+            self.assertIn(transformer_name, report)
+        self.assertIn('collect', report)
+        self.assertIn('transform', report)
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('profile_block_transformers', unicode(self.course.id), '--username', 'unknown')
+
+    def test_invalid_course_id(self):
+        with self.assertRaises(CommandError):
+            call_command('profile_block_transformers', 'not a course', '--username', self.user.username)
@@ -0,0 +1,103 @@
+"""
+Individual Student Overrides Transformer implementation.
+"""
+from django.conf import settings
+from xblock.fields import Date
+
+from courseware.field_overrides import resolve_dotted
+from courseware.student_field_overrides import IndividualStudentOverrideProvider, get_overrides_for_user_in_course
+from openedx.core.djangoapps.content.block_structure.transformer import BlockStructureTransformer
+
+
+class IndividualStudentOverridesTransformer(BlockStructureTransformer):
+    """
+    A transformer that overrides the 'start' and 'due' fields of the
+    blocks with the values set for the user by the individual due dates
+    feature, without instantiating the blocks.  All the overrides of the
+    user in the course are loaded with a single query.
+
+    The overridden values are passed down to the descendants of the
+    blocks that inherit them, as the XBlock runtime does.  Since it only
+    overrides the collected fields of the blocks, it does not change the
+    merged start dates of the StartDateTransformer.
+    """
+    WRITE_VERSION = 2
+    READ_VERSION = 2
+    SUPPORTS_INCREMENTAL_COLLECT = True
+    OVERRIDDEN_FIELDS = ('start', 'due')
+    INHERITED_FIELDS = 'inherited_fields'
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return "student_field_overrides"
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects any information that's necessary to execute this
+        transformer's transform method.
+        """
+        block_structure.request_xblock_fields(*cls.OVERRIDDEN_FIELDS)
+
+        # Record which of the overridden fields each block inherits from its parents.
+        for block_key in block_structure.topological_traversal():
+            xblock = block_structure.get_xblock(block_key)
+            block_structure.set_transformer_block_field(
+                block_key,
+                cls,
+                cls.INHERITED_FIELDS,
+                frozenset(
+                    field_name for field_name in cls.OVERRIDDEN_FIELDS
+                    if field_name in xblock.fields and not xblock.fields[field_name].is_set_on(xblock)
+                ),
+            )
+
+    def transform(self, usage_info, block_structure):
+        """
+        Mutates block_structure based on the given usage_info.
+        """
+        if not self._is_provider_enabled():
+            return
+
+        overrides = get_overrides_for_user_in_course(usage_info.user, usage_info.course_key)
+        for block_key, block_overrides in overrides.iteritems():
+            if block_key not in block_structure:
+                continue
+            for field_name in self.OVERRIDDEN_FIELDS:
+                if field_name in block_overrides:
+                    value = Date().from_json(block_overrides[field_name])
+                    block_structure.override_xblock_field(block_key, field_name, value)
+                    self._override_inherited_field(block_structure, block_key, field_name, value, overrides)
+
+    def _override_inherited_field(self, block_structure, block_key, field_name, value, overrides):
+        """
+        Overrides the given field of the descendants of the given block
+        that inherit it from the block with the given value, except for
+        those that have an override of their own.
+        """
+        blocks_to_visit = list(block_structure.get_children(block_key))
+        while blocks_to_visit:
+            child_key = blocks_to_visit.pop()
+            inherited_fields = block_structure.get_transformer_block_field(
+                child_key, self, self.INHERITED_FIELDS, frozenset()
+            )
+            if field_name not in inherited_fields or field_name in overrides.get(child_key, {}):
+                continue
+            block_structure.override_xblock_field(child_key, field_name, value)
+            blocks_to_visit.extend(block_structure.get_children(child_key))
+
+    @staticmethod
+    def _is_provider_enabled():
+        """
+        Returns whether the IndividualStudentOverrideProvider is one of
+        the field override providers, which it is always enabled for
+        the courses of.
+        """
+        return any(
+            resolve_dotted(name) is IndividualStudentOverrideProvider
+            for name in settings.FIELD_OVERRIDE_PROVIDERS
+        )
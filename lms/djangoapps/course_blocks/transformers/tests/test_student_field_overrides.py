@@ -0,0 +1,93 @@
+"""
+Tests for IndividualStudentOverridesTransformer.
+"""
+from datetime import datetime
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from nose.plugins.attrib import attr
+from pytz import UTC
+
+from courseware.field_overrides import OverrideFieldData
+from courseware.student_field_overrides import override_field_for_user
+from openedx.core.djangoapps.content.block_structure.transformer_registry import TransformerRegistry
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+
+from ...api import get_course_blocks
+from ..student_field_overrides import IndividualStudentOverridesTransformer
+from .helpers import BlockParentsMapTestCase, update_block
+
+
+@attr(shard=3)
+class IndividualStudentOverridesTransformerTestCase(BlockParentsMapTestCase):
+    """
+    IndividualStudentOverridesTransformer Test
+    """
+    TRANSFORMER_CLASS_TO_TEST = IndividualStudentOverridesTransformer
+
+    DUE = datetime(2010, 5, 12, 2, 42, tzinfo=UTC)
+    EXTENDED_DUE = datetime(2013, 12, 25, 0, 0, tzinfo=UTC)
+    OWN_DUE = datetime(2011, 1, 1, 0, 0, tzinfo=UTC)
+
+    # Following test cases are based on BlockParentsMapTestCase.parents_map:
+    #        0
+    #     /     \
+    #    1       2
+    #   / \     / \
+    #  3   4   /   5
+    #       \ /
+    #        6
+    # Block 1 is due at DUE, block 4 at OWN_DUE, and block 1 is extended
+    # to EXTENDED_DUE for the student.
+
+    def setUp(self, **kwargs):
+        super(IndividualStudentOverridesTransformerTestCase, self).setUp(**kwargs)
+        block = self.get_block(1)
+        block.due = self.DUE
+        update_block(block)
+        block = self.get_block(4)
+        block.due = self.OWN_DUE
+        update_block(block)
+        override_field_for_user(self.student, self.get_block(1), 'due', self.EXTENDED_DUE)
+
+    def tearDown(self):
+        super(IndividualStudentOverridesTransformerTestCase, self).tearDown()
+        OverrideFieldData.provider_classes = None
+
+    def _get_due(self, user, block_index):
+        """
+        Returns the due date of the given block in the block structure
+        transformed for the given user.
+        """
+        block_structure = get_course_blocks(user, self.course.location, self.transformers)
+        return block_structure.get_xblock_field(self.xblock_keys[block_index], 'due')
+
+    @override_settings(
+        FIELD_OVERRIDE_PROVIDERS=('courseware.student_field_overrides.IndividualStudentOverrideProvider',),
+    )
+    def test_overridden_due_date(self):
+        self.assertEqual(self._get_due(self.student, 1), self.EXTENDED_DUE)
+        self.assertEqual(self._get_due(self.staff, 1), self.DUE)
+        self.assertIsNone(self._get_due(self.student, 2))
+
+    @override_settings(
+        FIELD_OVERRIDE_PROVIDERS=('courseware.student_field_overrides.IndividualStudentOverrideProvider',),
+    )
+    def test_overridden_due_date_inherited(self):
+        self.assertEqual(self._get_due(self.student, 3), self.EXTENDED_DUE)
+        self.assertEqual(self._get_due(self.staff, 3), self.DUE)
+        # Block 4 has a due date of its own.
+        self.assertEqual(self._get_due(self.student, 4), self.OWN_DUE)
+
+    def test_provider_disabled(self):
+        self.assertEqual(self._get_due(self.student, 1), self.DUE)
+
+
+@attr(shard=3)
+class IndividualStudentOverridesTransformerRegistryTestCase(TestCase):
+    """
+    Tests IndividualStudentOverridesTransformer with the registered transformers.
+    """
+    def test_supports_incremental_collect(self):
+        self.assertIn(IndividualStudentOverridesTransformer, TransformerRegistry.get_registered_transformers())
+        self.assertTrue(BlockStructureTransformers.supports_incremental_collect())
@@ -0,0 +1,22 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Courseware app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'courseware'
+
+# Switches
+PREFETCH_SECTION_WITH_COURSE = u'prefetch_section_with_course'
+BUFFER_STUDENT_MODULE_WRITES = u'buffer_student_module_writes'
+CACHE_TABLE_OF_CONTENTS = u'cache_table_of_contents'
+REPLACE_URLS_IN_SINGLE_PASS = u'replace_urls_in_single_pass'
+CACHE_STUDENT_VIEW_FRAGMENTS = u'cache_student_view_fragments'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for Courseware.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Courseware: ')
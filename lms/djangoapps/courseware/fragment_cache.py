@@ -0,0 +1,132 @@
+"""
+Cache of the rendered student views of the blocks whose student view is
+the same for all users, e.g. the HTML blocks of most courses, so that
+they are rendered once for all the learners viewing them.
+
+A block opts in with a true `cacheable_student_view` attribute, and must
+have no user scoped fields of its own.  Its fragment, as wrapped by the
+LMS runtime but before its urls are rewritten, is cached by usage key, the
+time the block was last edited, theme and language, with the token of the
+request it was rendered in replaced by a placeholder.  The urls are
+rewritten for each request, as those of the assets change with their
+versions and lock states.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+from xblock.fields import UserScope
+from xblock.fragment import Fragment
+
+from courseware.field_overrides import OverrideFieldData
+from edxnotes.plugins import EdxNotesTab
+from openedx.core.djangoapps.theming.helpers import get_current_theme
+
+from .config.waffle import CACHE_STUDENT_VIEW_FRAGMENTS, waffle
+
+# Number of seconds a fragment is cached, as the edit time of a block
+# changes with every new version of it.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+FRAGMENT_CACHE_KEY = u'courseware.fragment.{usage_key}.{digest}'
+REQUEST_TOKEN_PLACEHOLDER = u'%%REQUEST_TOKEN%%'
+
+
+def get_fragment_cache(course, request_token, wrap_xmodule_display, url_wrappers):
+    """
+    Returns the FragmentCache of the blocks of the given course rendered
+    with the given arguments of get_module_for_descriptor and url rewriting
+    wrappers, or None if the student views of the course can't be cached.
+
+    The fragments of courses with field override providers, e.g.
+    individual due dates or CCX, or with edX Notes, which annotates
+    content for each user, are not cached.
+    """
+    if (
+            not waffle().is_enabled(CACHE_STUDENT_VIEW_FRAGMENTS) or
+            course is None or
+            OverrideFieldData.has_enabled_providers(course) or
+            EdxNotesTab.is_enabled(course)
+    ):
+        return None
+    return FragmentCache(request_token, wrap_xmodule_display, url_wrappers)
+
+
+class FragmentCache(object):
+    """
+    Gets and sets the cached fragments of the student views of blocks
+    rendered in a given request.
+    """
+    def __init__(self, request_token, wrap_xmodule_display, url_wrappers):
+        self.request_token = request_token
+        self.wrap_xmodule_display = wrap_xmodule_display
+        self.url_wrappers = url_wrappers
+
+    def is_cacheable(self, block):
+        """
+        Returns whether the student view of the given block is the same
+        for all users, and can therefore be cached.
+        """
+        if not getattr(block, 'cacheable_student_view', False):
+            return False
+        if self._get_edited_on(block) is None:
+            return False
+
+        # Only consider the fields of the block itself, not of the mixins of the runtime.
+        fields = getattr(block, 'unmixed_class', block.__class__).fields
+        return all(field.scope.user == UserScope.NONE for field in fields.itervalues())
+
+    def get(self, block):
+        """
+        Returns the cached fragment of the student view of the given
+        block, or None if it isn't cached.
+        """
+        pods = cache.get(self._get_cache_key(block))
+        if pods is None:
+            return None
+        if self.request_token:
+            pods['content'] = pods['content'].replace(REQUEST_TOKEN_PLACEHOLDER, self.request_token)
+        return Fragment.from_pods(pods)
+
+    def set(self, block, fragment):
+        """
+        Caches the given fragment of the student view of the given block.
+        """
+        pods = fragment.to_pods()
+        if self.request_token:
+            pods['content'] = pods['content'].replace(self.request_token, REQUEST_TOKEN_PLACEHOLDER)
+        cache.set(self._get_cache_key(block), pods, FRAGMENT_CACHE_TIMEOUT)
+
+    def rewrite_urls(self, block, view_name, fragment, context):
+        """
+        Returns the given fragment of the given block with its urls
+        rewritten by the url wrappers.
+        """
+        for wrapper in self.url_wrappers:
+            fragment = wrapper(block, view_name, fragment, context)
+        return fragment
+
+    def _get_cache_key(self, block):
+        """
+        Returns the cache key of the fragment of the student view of the
+        given block.
+        """
+        theme = get_current_theme()
+        key_components = [
+            unicode(self._get_edited_on(block)),
+            theme.theme_dir_name if theme else u'',
+            get_language() or u'',
+            unicode(self.wrap_xmodule_display),
+        ]
+        return FRAGMENT_CACHE_KEY.format(
+            usage_key=block.scope_ids.usage_id,
+            digest=hashlib.md5(u'.'.join(key_components).encode('utf-8')).hexdigest(),
+        )
+
+    @staticmethod
+    def _get_edited_on(block):
+        """
+        Returns the time the content or settings of the given block were
+        last edited, which identifies the version of the block.
+        """
+        return getattr(getattr(block, 'descriptor', block), 'edited_on', None)
@@ -1,11 +1,18 @@
 """
 Middleware for the courseware app
 """
+import logging
 
+from django.db import connections, router
 from django.shortcuts import redirect
 
+from courseware.config.waffle import BUFFER_STUDENT_MODULE_WRITES, waffle
+from courseware.models import StudentModule
+from courseware.user_state_client import StudentModuleWriteBuffer
 from lms.djangoapps.courseware.exceptions import Redirect
 
+log = logging.getLogger(__name__)
+
 
 class RedirectMiddleware(object):
     """
@@ -17,3 +24,53 @@ class RedirectMiddleware(object):
         """
         if isinstance(exception, Redirect):
             return redirect(exception.url)
+
+
+class StudentModuleWriteBufferMiddleware(object):
+    """
+    Buffers the XBlock user state saved during each request, and saves it
+    in bulk at the end of the request, when the
+    courseware.buffer_student_module_writes waffle switch is enabled.
+
+    This must come after request_cache.middleware.RequestCache, so that
+    the buffer is flushed before the request caches are cleared.
+    """
+    def process_request(self, _request):
+        """
+        Activate a new write buffer for the request.
+        """
+        if StudentModuleWriteBuffer.current() is not None:
+            # The buffer of an earlier request on this thread was not
+            # deactivated, e.g. because a middleware short-circuited the
+            # response, so save its writes rather than buffering into it.
+            log.warning(u'Saving the XBlock user state left buffered by an earlier request')
+            StudentModuleWriteBuffer.deactivate()
+        if waffle().is_enabled(BUFFER_STUDENT_MODULE_WRITES):
+            StudentModuleWriteBuffer.activate()
+
+    def process_view(self, request, view_func, _view_args, _view_kwargs):
+        """
+        Record whether the view runs in a transaction of the database of
+        the StudentModules, which is rolled back if the view fails.
+        """
+        db_alias = router.db_for_write(StudentModule)
+        request.student_module_writes_atomic = (
+            connections[db_alias].settings_dict.get('ATOMIC_REQUESTS', False) and
+            db_alias not in getattr(view_func, '_non_atomic_requests', set())
+        )
+
+    def process_response(self, _request, response):
+        """
+        Save the writes buffered during the request.  Errors saving them
+        fail the request, rather than losing the state of the learner.
+        """
+        StudentModuleWriteBuffer.deactivate()
+        return response
+
+    def process_exception(self, request, _exception):
+        """
+        Save the writes buffered during a failed request, as they would
+        have been saved without the buffer, unless the transaction of the
+        request was rolled back, which they would have been rolled back with.
+        """
+        StudentModuleWriteBuffer.deactivate(flush=not getattr(request, 'student_module_writes_atomic', False))
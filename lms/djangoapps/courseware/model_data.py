@@ -25,24 +25,33 @@ import json
 import logging
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict, namedtuple
+from itertools import groupby
+from operator import attrgetter
 
 from contracts import contract, new_contract
+from django.conf import settings
 from django.db import DatabaseError
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.keys import CourseKey, UsageKey
-from xblock.core import XBlockAside
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
-from xblock.runtime import KeyValueStore
+from xblock.plugin import PluginMissingError
+from xblock.runtime import KeyValueStore, Mixologist
 
 from courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.djangoapps import monitoring_utils
+from openedx.core.lib.graph_traversals import traverse_pre_order
 from xmodule.modulestore.django import modulestore
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
 
 log = logging.getLogger(__name__)
 
+# The number of items in each IN list of a chunked_filter query.
+QUERY_CHUNK_SIZE = 500
+
 
 class InvalidWriteError(Exception):
     """
@@ -82,6 +91,102 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+def _num_chunked_queries(items):
+    """
+    Return the number of queries made by chunked_filter for the given
+    IN list `items`.
+    """
+    return (len(items) + QUERY_CHUNK_SIZE - 1) // QUERY_CHUNK_SIZE
+
+
+_MIXOLOGIST = None
+
+
+def _runtime_block_class(block_type):
+    """
+    Return the XBlock class, with the runtime mixins applied, used to
+    load blocks of `block_type`, or None if that block type is not installed.
+    """
+    global _MIXOLOGIST  # pylint: disable=global-statement
+    if _MIXOLOGIST is None:
+        _MIXOLOGIST = Mixologist(settings.XBLOCK_MIXINS)
+    try:
+        block_class = XBlock.load_class(block_type, select=settings.XBLOCK_SELECT_FUNCTION)
+    except PluginMissingError:
+        return None
+    return _MIXOLOGIST.mix(block_class)
+
+
+class FieldDataPrefetchPlan(object):
+    """
+    The usage keys, block types and fields, by scope, to prefetch into a
+    :class:`~FieldDataCache` in a single round of queries.
+
+    A plan is built from loaded descriptors, from the blocks of a
+    BlockStructure (without loading their descriptors), or both, so that
+    all the field data needed for a render can be read with one query per
+    scope table.
+    """
+    def __init__(self, asides=None):
+        """
+        Arguments:
+            asides (list of str): The aside types to prefetch field data for.
+        """
+        self.asides = asides or []
+        self.fields = defaultdict(set)
+        self.usage_keys = set()
+        self.block_types = set()
+        self.scorable_locations = set()
+
+    def add_descriptors(self, descriptors):
+        """
+        Add the field data of all `descriptors` to this plan.
+        """
+        self.usage_keys.update(_all_usage_keys(descriptors, self.asides))
+        self.block_types.update(_all_block_types(descriptors, self.asides))
+        self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
+        for descriptor in descriptors:
+            for field in descriptor.fields.values():
+                self.fields[field.scope].add(field)
+
+    def add_block_structure(self, block_structure, start_usage_key=None):
+        """
+        Add the field data of the blocks of `block_structure` to this plan.
+
+        Arguments:
+            block_structure (BlockStructure): The blocks to prefetch field data for.
+            start_usage_key (UsageKey): If given, only the subtree of
+                the block structure rooted at this block is added.
+        """
+        usage_keys = list(traverse_pre_order(
+            start_node=start_usage_key or block_structure.root_block_usage_key,
+            get_children=block_structure.get_children,
+        ))
+        for block_type, block_usage_keys in groupby(
+                sorted(usage_keys, key=attrgetter('block_type')),
+                attrgetter('block_type'),
+        ):
+            block_class = _runtime_block_class(block_type)
+            if block_class is None:
+                continue
+
+            block_usage_keys = list(block_usage_keys)
+            self.block_types.add(BlockTypeKeyV1(block_class.entry_point, block_type))
+            for field in block_class.fields.values():
+                self.fields[field.scope].add(field)
+            if getattr(block_class, 'has_score', False):
+                self.scorable_locations.update(block_usage_keys)
+
+            for usage_key in block_usage_keys:
+                self.usage_keys.add(usage_key)
+                for aside_type in self.asides:
+                    self.usage_keys.add(AsideUsageKeyV1(usage_key, aside_type))
+                    self.usage_keys.add(AsideUsageKeyV2(usage_key, aside_type))
+
+        for aside_type in self.asides:
+            self.block_types.add(BlockTypeKeyV1(XBlockAside.entry_point, aside_type))
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -161,19 +266,28 @@ class DjangoOrmFieldCache(object):
 
     def __init__(self):
         self._cache = {}
+        self._prefetched = set()
 
-    def cache_fields(self, fields, xblocks, aside_types):
+    def cache_fields(self, fields, usage_keys, block_types):
         """
-        Load all fields specified by ``fields`` for the supplied ``xblocks``
-        and ``aside_types`` into this cache.
+        Load all fields specified by ``fields`` for the supplied ``usage_keys``
+        and ``block_types`` into this cache, skipping those already loaded.
 
         Arguments:
-            fields (list of str): Field names to cache.
-            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
-            aside_types (list of str): Aside types to cache fields for.
+            fields (list of :class:`~Field`): Fields to cache.
+            usage_keys (set of :class:`~UsageKey`): Blocks (and asides) to cache fields for.
+            block_types (set of :class:`~BlockTypeKeyV1`): Block (and aside) types to cache fields for.
+
+        Returns: the number of queries made
         """
-        for field_object in self._read_objects(fields, xblocks, aside_types):
+        targets = set(self._prefetch_targets(fields, usage_keys, block_types)) - self._prefetched
+        if not targets:
+            return 0
+
+        self._prefetched.update(targets)
+        for field_object in self._read_objects(targets):
             self._cache[self._cache_key_for_field_object(field_object)] = field_object
+        return self._num_queries(targets)
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def get(self, kvs_key):
@@ -306,20 +420,36 @@ class DjangoOrmFieldCache(object):
         raise NotImplementedError()
 
     @abstractmethod
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _prefetch_targets(self, fields, usage_keys, block_types):
+        """
+        Return an iterator of the targets (the rows, identified without the
+        user) that hold the ``fields`` of the ``usage_keys`` and ``block_types``
+        in the underlying datastore.
+
+        Arguments:
+            fields (list of :class:`~Field`): Fields to load
+            usage_keys (set of :class:`~UsageKey`): Blocks (and asides) to load fields for
+            block_types (set of :class:`~BlockTypeKeyV1`): Block (and aside) types to load fields for
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _read_objects(self, targets):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the ``targets`` returned by :meth:`_prefetch_targets`.
 
         Arguments:
-            fields (list of str): Field names to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            targets (set): The targets to return objects for
         """
         raise NotImplementedError()
 
+    def _num_queries(self, targets):  # pylint: disable=unused-argument
+        """
+        Return the number of queries made by :meth:`_read_objects` for the ``targets``.
+        """
+        return 1
+
     @abstractmethod
     def _cache_key_for_field_object(self, field_object):
         """
@@ -350,24 +480,55 @@ class UserStateCache(object):
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        self._prefetched = set()
 
-    def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
+    def cache_fields(self, fields, usage_keys, block_types):  # pylint: disable=unused-argument
         """
-        Load all fields specified by ``fields`` for the supplied ``xblocks``
-        and ``aside_types`` into this cache.
+        Load all fields specified by ``fields`` for the supplied ``usage_keys``
+        and ``block_types`` into this cache, skipping blocks already loaded.
 
         Arguments:
-            fields (list of str): Field names to cache.
-            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
-            aside_types (list of str): Aside types to cache fields for.
+            fields (list of :class:`~Field`): Fields to cache.
+            usage_keys (set of :class:`~UsageKey`): Blocks (and asides) to cache fields for.
+            block_types (set of :class:`~BlockTypeKeyV1`): Block (and aside) types to cache fields for.
+
+        Returns: the number of queries made
         """
+        usage_keys = set(usage_keys) - self._prefetched
+        if not usage_keys:
+            return 0
+
+        self._prefetched.update(usage_keys)
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+        course_key_func = attrgetter('course_key')
+        return sum(
+            _num_chunked_queries(list(course_usage_keys))
+            for _, course_usage_keys in groupby(sorted(usage_keys, key=course_key_func), course_key_func)
+        )
+
+    def cache_student_modules(self, student_modules):
+        """
+        Load the state of the given StudentModules of the user, which were
+        already fetched from the database, into this cache, so that the
+        state of their blocks isn't queried again.
+
+        Arguments:
+            student_modules (list of :class:`~StudentModule`): The StudentModules to cache.
+        """
+        for student_module in student_modules:
+            usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+            self._prefetched.add(usage_key)
+            state = json.loads(student_module.state) if student_module.state else {}
+            # As for get_many, empty state is treated as if it doesn't exist.
+            if state:
+                self._cache[usage_key] = state
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -517,24 +678,40 @@ class UserStateSummaryCache(DjangoOrmFieldCache):
             value=value,
         )
 
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _prefetch_targets(self, fields, usage_keys, block_types):
+        """
+        Return an iterator of (usage key, field name) pairs for the ``fields``
+        on the ``usage_keys``.
+
+        Arguments:
+            fields (list of :class:`~Field`): Fields to load
+            usage_keys (set of :class:`~UsageKey`): Blocks (and asides) to load fields for
+            block_types (set of :class:`~BlockTypeKeyV1`): Unused
+        """
+        field_names = set(field.name for field in fields)
+        return ((usage_key, field_name) for usage_key in usage_keys for field_name in field_names)
+
+    def _read_objects(self, targets):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the (usage key, field name) ``targets``.
 
         Arguments:
-            fields (list of :class:`~Field`): Fields to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            targets (set): (usage key, field name) pairs to return objects for
         """
         return XModuleUserStateSummaryField.objects.chunked_filter(
             'usage_id__in',
-            _all_usage_keys(xblocks, aside_types),
-            field_name__in=set(field.name for field in fields),
+            sorted(set(usage_key for usage_key, _ in targets), key=unicode),
+            field_name__in=sorted(set(field_name for _, field_name in targets)),
+            chunk_size=QUERY_CHUNK_SIZE,
         )
 
+    def _num_queries(self, targets):
+        """
+        Return the number of queries made by :meth:`_read_objects` for the ``targets``.
+        """
+        return _num_chunked_queries(set(usage_key for usage_key, _ in targets))
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -579,25 +756,41 @@ class PreferencesCache(DjangoOrmFieldCache):
             value=value,
         )
 
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _prefetch_targets(self, fields, usage_keys, block_types):
+        """
+        Return an iterator of (block type, field name) pairs for the ``fields``
+        of the ``block_types``.
+
+        Arguments:
+            fields (list of :class:`~Field`): Fields to load
+            usage_keys (set of :class:`~UsageKey`): Unused
+            block_types (set of :class:`~BlockTypeKeyV1`): Block (and aside) types to load fields for
+        """
+        field_names = set(field.name for field in fields)
+        return ((block_type, field_name) for block_type in block_types for field_name in field_names)
+
+    def _read_objects(self, targets):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the (block type, field name) ``targets``.
 
         Arguments:
-            fields (list of str): Field names to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            targets (set): (block type, field name) pairs to return objects for
         """
         return XModuleStudentPrefsField.objects.chunked_filter(
             'module_type__in',
-            _all_block_types(xblocks, aside_types),
+            sorted(set(block_type for block_type, _ in targets), key=unicode),
             student=self.user.pk,
-            field_name__in=set(field.name for field in fields),
+            field_name__in=sorted(set(field_name for _, field_name in targets)),
+            chunk_size=QUERY_CHUNK_SIZE,
         )
 
+    def _num_queries(self, targets):
+        """
+        Return the number of queries made by :meth:`_read_objects` for the ``targets``.
+        """
+        return _num_chunked_queries(set(block_type for block_type, _ in targets))
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -641,21 +834,28 @@ class UserInfoCache(DjangoOrmFieldCache):
             value=value,
         )
 
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _prefetch_targets(self, fields, usage_keys, block_types):
+        """
+        Return an iterator of the names of the ``fields``.
+
+        Arguments:
+            fields (list of :class:`~Field`): Fields to load
+            usage_keys (set of :class:`~UsageKey`): Unused
+            block_types (set of :class:`~BlockTypeKeyV1`): Unused
+        """
+        return (field.name for field in fields)
+
+    def _read_objects(self, targets):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the field name ``targets``.
 
         Arguments:
-            fields (list of str): Field names to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            targets (set): Field names to return objects for
         """
         return XModuleStudentInfoField.objects.filter(
             student=self.user.pk,
-            field_name__in=set(field.name for field in fields),
+            field_name__in=sorted(targets),
         )
 
     def _cache_key_for_field_object(self, field_object):
@@ -728,15 +928,39 @@ class FieldDataCache(object):
         """
         Add all `descriptors` to this FieldDataCache.
         """
-        if self.user.is_authenticated():
-            self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
-            for scope, fields in self._fields_to_cache(descriptors).items():
-                if scope not in self.cache:
-                    continue
+        plan = FieldDataPrefetchPlan(self.asides)
+        plan.add_descriptors(descriptors)
+        self.prefetch(plan)
 
-                self.cache[scope].cache_fields(fields, descriptors, self.asides)
+    def prefetch(self, plan):
+        """
+        Load the field data of a :class:`~FieldDataPrefetchPlan` into this
+        FieldDataCache, with at most one query per scope table (for each
+        chunk of keys), skipping field data that has already been loaded.
+
+        The number of queries made is accumulated per request in the
+        field_data_cache.prefetch.*.queries custom metrics.
 
-    def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
+        Returns: the number of queries made
+        """
+        if not self.user.is_authenticated():
+            return 0
+
+        self.scorable_locations.update(plan.scorable_locations)
+        total_queries = 0
+        for scope, fields in plan.fields.items():
+            if scope not in self.cache:
+                continue
+
+            num_queries = self.cache[scope].cache_fields(fields, plan.usage_keys, plan.block_types)
+            monitoring_utils.accumulate(u'field_data_cache.prefetch.{}.queries'.format(scope.name), num_queries)
+            total_queries += num_queries
+
+        monitoring_utils.accumulate(u'field_data_cache.prefetch.queries', total_queries)
+        return total_queries
+
+    def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True,
+                                   plan=None):
         """
         Add all descendants of `descriptor` to this FieldDataCache.
 
@@ -746,6 +970,8 @@ class FieldDataCache(object):
                 the supplied descriptor. If depth is None, load all descendant StudentModules
             descriptor_filter is a function that accepts a descriptor and return whether the field data
                 should be cached
+            plan is an optional FieldDataPrefetchPlan of additional field data to prefetch in the same
+                round of queries as the descendants
         """
 
         def get_child_descriptors(descriptor, depth, descriptor_filter):
@@ -774,12 +1000,15 @@ class FieldDataCache(object):
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
-        self.add_descriptors_to_cache(descriptors)
+        if plan is None:
+            plan = FieldDataPrefetchPlan(self.asides)
+        plan.add_descriptors(descriptors)
+        self.prefetch(plan)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         asides=None, read_only=False):
+                                         asides=None, read_only=False, plan=None):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -788,20 +1017,30 @@ class FieldDataCache(object):
             the supplied descriptor. If depth is None, load all descendant StudentModules
         descriptor_filter is a function that accepts a descriptor and return whether the field data
             should be cached
+        plan is an optional FieldDataPrefetchPlan of additional field data to prefetch in the same
+            round of queries as the descendants
         """
         cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
-        cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
+        cache.add_descriptor_descendents(descriptor, depth, descriptor_filter, plan=plan)
         return cache
 
-    def _fields_to_cache(self, descriptors):
+    @classmethod
+    def cache_for_student_module(cls, course_id, user, descriptor, student_module, read_only=False):
         """
-        Returns a map of scopes to fields in that scope that should be cached
+        Returns a FieldDataCache of the given descriptor for the given user,
+        whose state is loaded from the given StudentModule of the user for
+        the descriptor, which was already fetched from the database, e.g.
+        in a batch of StudentModules of many users.
+
+        course_id: the course in the context of which we want StudentModules.
+        user: the django user for whom to load modules.
+        descriptor: An XModuleDescriptor
+        student_module: The StudentModule of the user for the descriptor
         """
-        scope_map = defaultdict(set)
-        for descriptor in descriptors:
-            for field in descriptor.fields.values():
-                scope_map[field.scope].add(field)
-        return scope_map
+        cache = FieldDataCache([], course_id, user, read_only=read_only)
+        cache.cache[Scope.user_state].cache_student_modules([student_module])
+        cache.add_descriptors_to_cache([descriptor])
+        return cache
 
     @contract(key=DjangoKeyValueStore.Key)
     def get(self, key):
@@ -988,6 +1227,32 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients with pre-fetched data for the given locations,
+        for each of the given users, using a single query.
+
+        Returns a dict of user_id to ScoresClient.
+        """
+        clients = {}
+        for user_id in user_ids:
+            clients[user_id] = cls(course_id, user_id)
+            clients[user_id]._has_fetched = True  # pylint: disable=protected-access
+
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created'
+        ):
+            clients[user_id]._locations_to_scores[  # pylint: disable=protected-access
+                UsageKey.from_string(location).map_into_course(course_id)
+            ] = cls.Score(correct, total, created)
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -200,6 +200,38 @@ class BaseStudentModuleHistory(models.Model):
 
         return history_entries
 
+    @staticmethod
+    def bulk_save_history(student_modules):
+        """
+        Save history entries for the given saved StudentModules to the same
+        backend store as their post_save signal handlers would, with a single
+        query. Use this for StudentModules saved without sending post_save,
+        as with QuerySet.update or bulk_create.
+        """
+        student_modules = [
+            module for module in student_modules
+            if module.module_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+        ]
+        if not student_modules:
+            return
+
+        if settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+            history_class = coursewarehistoryextended.models.StudentModuleHistoryExtended
+        else:
+            history_class = StudentModuleHistory
+
+        history_class.objects.bulk_create([
+            history_class(
+                student_module=module,
+                version=None,
+                created=module.modified,
+                state=module.state,
+                grade=module.grade,
+                max_grade=module.max_grade,
+            )
+            for module in student_modules
+        ])
+
 
 class StudentModuleHistory(BaseStudentModuleHistory):
     """Keeps a complete history of state changes for a given XModule for a given
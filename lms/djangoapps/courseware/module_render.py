@@ -36,6 +36,10 @@ from courseware.masquerade import (
     is_masquerading_as_specific_student,
     setup_masquerade
 )
+from courseware import toc
+from courseware.fragment_cache import get_fragment_cache
+from courseware.config.waffle import REPLACE_URLS_IN_SINGLE_PASS
+from courseware.config.waffle import waffle as courseware_waffle
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from edxmako.shortcuts import render_to_string
 from eventtracking import tracker
@@ -57,6 +61,7 @@ from openedx.core.lib.xblock_utils import (
     replace_course_urls,
     replace_jump_to_id_urls,
     replace_static_urls,
+    replace_urls,
     wrap_xblock
 )
 from student.models import anonymous_id_for_user, user_by_anonymous_id
@@ -145,93 +150,140 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     field_data_cache must include data from the course module and 2 levels of its descendants
     '''
 
+    if toc.is_cached_toc_enabled(user, course):
+        chapters = toc.get_toc_chapters(user, course)
+        if chapters is None:
+            return None, None, None
+        return _toc_for_chapters(user, course, chapters, active_chapter, active_section)
+
     with modulestore().bulk_operations(course.id):
         course_module = get_module_for_descriptor(
             user, request, course, field_data_cache, course.id, course=course
         )
         if course_module is None:
             return None, None, None
+        return _toc_for_chapters(user, course, _get_toc_chapters(course_module), active_chapter, active_section)
 
-        toc_chapters = list()
-        chapters = course_module.get_display_items()
-
-        # Check for content which needs to be completed
-        # before the rest of the content is made available
-        required_content = milestones_helpers.get_required_content(course.id, user)
-
-        # The user may not actually have to complete the entrance exam, if one is required
-        if user_can_skip_entrance_exam(user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
-
-        previous_of_active_section, next_of_active_section = None, None
-        last_processed_section, last_processed_chapter = None, None
-        found_active_section = False
-        for chapter in chapters:
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (bool)
-            display_id = slugify(chapter.display_name_with_default_escaped)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
+
+def _toc_for_chapters(user, course, chapters, active_chapter, active_section):
+    """
+    Create the table of contents of toc_for_course from the outline of
+    the given chapters, in the format of courseware.toc.get_toc_chapters.
+    """
+    toc_chapters = list()
+
+    # Check for content which needs to be completed
+    # before the rest of the content is made available
+    required_content = milestones_helpers.get_required_content(course.id, user)
+
+    # The user may not actually have to complete the entrance exam, if one is required
+    if user_can_skip_entrance_exam(user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
+
+    previous_of_active_section, next_of_active_section = None, None
+    last_processed_section, last_processed_chapter = None, None
+    found_active_section = False
+    for chapter in chapters:
+        # Only show required content, if there is required content
+        # chapter.hide_from_toc is read-only (bool)
+        display_id = slugify(chapter['display_name'])
+        local_hide_from_toc = False
+        if required_content:
+            if unicode(chapter['location']) not in required_content:
+                local_hide_from_toc = True
+
+        # Skip the current chapter if a hide flag is tripped
+        if chapter['hide_from_toc'] or local_hide_from_toc:
+            continue
+
+        sections = list()
+        for section in chapter['sections']:
+            # skip the section if it is hidden from the user
+            if section['hide_from_toc']:
                 continue
 
-            sections = list()
-            for section in chapter.get_display_items():
-                # skip the section if it is hidden from the user
-                if section.hide_from_toc:
-                    continue
-
-                is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
-                if is_section_active:
-                    found_active_section = True
-
-                section_context = {
-                    'display_name': section.display_name_with_default_escaped,
-                    'url_name': section.url_name,
-                    'format': section.format if section.format is not None else '',
-                    'due': section.due,
-                    'active': is_section_active,
-                    'graded': section.graded,
-                }
-                _add_timed_exam_info(user, course, section, section_context)
-
-                # update next and previous of active section, if applicable
-                if is_section_active:
-                    if last_processed_section:
-                        previous_of_active_section = last_processed_section.copy()
-                        previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
-                elif found_active_section and not next_of_active_section:
-                    next_of_active_section = section_context.copy()
-                    next_of_active_section['chapter_url_name'] = chapter.url_name
-
-                sections.append(section_context)
-                last_processed_section = section_context
-                last_processed_chapter = chapter
-
-            toc_chapters.append({
-                'display_name': chapter.display_name_with_default_escaped,
-                'display_id': display_id,
-                'url_name': chapter.url_name,
-                'sections': sections,
-                'active': chapter.url_name == active_chapter
-            })
-        return {
-            'chapters': toc_chapters,
-            'previous_of_active_section': previous_of_active_section,
-            'next_of_active_section': next_of_active_section,
+            is_section_active = (chapter['url_name'] == active_chapter and section['url_name'] == active_section)
+            if is_section_active:
+                found_active_section = True
+
+            section_context = {
+                'display_name': section['display_name'],
+                'url_name': section['url_name'],
+                'format': section['format'],
+                'due': section['due'],
+                'active': is_section_active,
+                'graded': section['graded'],
+            }
+            _add_timed_exam_info(user, course, section['is_time_limited'], section['location'], section_context)
+
+            # update next and previous of active section, if applicable
+            if is_section_active:
+                if last_processed_section:
+                    previous_of_active_section = last_processed_section.copy()
+                    previous_of_active_section['chapter_url_name'] = last_processed_chapter['url_name']
+            elif found_active_section and not next_of_active_section:
+                next_of_active_section = section_context.copy()
+                next_of_active_section['chapter_url_name'] = chapter['url_name']
+
+            sections.append(section_context)
+            last_processed_section = section_context
+            last_processed_chapter = chapter
+
+        toc_chapters.append({
+            'display_name': chapter['display_name'],
+            'display_id': display_id,
+            'url_name': chapter['url_name'],
+            'sections': sections,
+            'active': chapter['url_name'] == active_chapter
+        })
+    return {
+        'chapters': toc_chapters,
+        'previous_of_active_section': previous_of_active_section,
+        'next_of_active_section': next_of_active_section,
+    }
+
+
+def _get_toc_chapters(course_module):
+    """
+    Returns the outline of the chapters of the given course module, in
+    the format of courseware.toc.get_toc_chapters.  The sections of each
+    chapter are only loaded when they are iterated over.
+    """
+    return [
+        {
+            'display_name': chapter.display_name_with_default_escaped,
+            'url_name': chapter.url_name,
+            'location': chapter.location,
+            'hide_from_toc': chapter.hide_from_toc,
+            'sections': _iter_toc_sections(chapter),
         }
+        for chapter in course_module.get_display_items()
+    ]
 
 
-def _add_timed_exam_info(user, course, section, section_context):
+def _iter_toc_sections(chapter_module):
+    """
+    Yields the outline of the sections of the given chapter module.
+    """
+    for section in chapter_module.get_display_items():
+        yield {
+            'display_name': section.display_name_with_default_escaped,
+            'url_name': section.url_name,
+            'location': section.location,
+            'hide_from_toc': section.hide_from_toc,
+            'format': section.format if section.format is not None else '',
+            'due': section.due,
+            'graded': section.graded,
+            'is_time_limited': getattr(section, 'is_time_limited', False),
+        }
+
+
+def _add_timed_exam_info(user, course, is_time_limited, section_location, section_context):
     """
     Add in rendering context if exam is a timed exam (which includes proctored)
     """
     section_is_time_limited = (
-        getattr(section, 'is_time_limited', False) and
+        is_time_limited and
         settings.FEATURES.get('ENABLE_SPECIAL_EXAMS', False)
     )
     if section_is_time_limited:
@@ -262,7 +314,7 @@ def _add_timed_exam_info(user, course, section, section_context):
             timed_exam_attempt_context = get_attempt_status_summary(
                 user.id,
                 unicode(course.id),
-                unicode(section.location)
+                unicode(section_location)
             )
         except Exception, ex:  # pylint: disable=broad-except
             # safety net in case something blows up in edx_proctoring
@@ -570,28 +622,40 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
-    block_wrappers.append(partial(
-        replace_jump_to_id_urls,
-        course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
-    ))
+    jump_to_id_base_url = reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''})
+
+    # The url rewriting wrappers, which are applied to the fragments taken from the
+    # fragment cache too, as the urls of the assets change with their versions.
+    url_wrappers = []
+    if courseware_waffle().is_enabled(REPLACE_URLS_IN_SINGLE_PASS):
+        # Rewrite the /static, /course and /jump_to_id urls below in a single pass
+        url_wrappers.append(partial(
+            replace_urls,
+            course_id,
+            jump_to_id_base_url,
+            getattr(descriptor, 'data_dir', None),
+            static_asset_path=static_asset_path or descriptor.static_asset_path
+        ))
+    else:
+        # Rewrite urls beginning in /static to point to course-specific content
+        url_wrappers.append(partial(
+            replace_static_urls,
+            getattr(descriptor, 'data_dir', None),
+            course_id=course_id,
+            static_asset_path=static_asset_path or descriptor.static_asset_path
+        ))
+
+        # Allow URLs of the form '/course/' refer to the root of multicourse directory
+        #   hierarchy of this course
+        url_wrappers.append(partial(replace_course_urls, course_id))
+
+        # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
+        # is an improvement over the /course/... format for studio authored courses,
+        # because it is agnostic to course-hierarchy.
+        url_wrappers.append(partial(replace_jump_to_id_urls, course_id, jump_to_id_base_url))
+    block_wrappers.extend(url_wrappers)
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
         if is_masquerading_as_specific_student(user, course_id):
@@ -630,6 +694,12 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
 
     user_is_staff = bool(has_access(user, u'staff', descriptor.location, course_id))
 
+    # The student views of staff and of masquerading users are wrapped with their debug info,
+    # so only those of other users can be shared through the fragment cache
+    fragment_cache = None
+    if not user_is_staff and not is_masquerading_as_specific_student(user, course_id):
+        fragment_cache = get_fragment_cache(course, request_token, wrap_xmodule_display, url_wrappers)
+
     system = LmsModuleSystem(
         track_function=track_function,
         render_template=render_to_string,
@@ -685,6 +755,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         rebind_noauth_module_to_user=rebind_noauth_module_to_user,
         user_location=user_location,
         request_token=request_token,
+        fragment_cache=fragment_cache,
     )
 
     # pass position specified in URL to module through ModuleSystem
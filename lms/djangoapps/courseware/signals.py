@@ -0,0 +1,33 @@
+"""
+Signal handlers for invalidating the cached outlines of the table of
+contents of the courseware.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from openedx.core.djangoapps.course_groups.models import CohortMembership
+from student.models import CourseEnrollment
+from xmodule.modulestore.django import SignalHandler
+
+from .toc import clear_course_toc_cache, clear_user_toc_cache
+
+
+@receiver(SignalHandler.course_published)
+def _clear_toc_cache_on_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that a course has been published in the module
+    store and invalidates the cached outlines of the course.
+    """
+    clear_course_toc_cache(course_key)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+@receiver(post_save, sender=CohortMembership)
+@receiver(post_delete, sender=CohortMembership)
+def _clear_user_toc_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the cached outline of a course for a user whose
+    enrollment or cohort in the course changed.
+    """
+    clear_user_toc_cache(instance.course_id, instance.user_id)
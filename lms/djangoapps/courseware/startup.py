@@ -0,0 +1,4 @@
+"""
+Setup the signals on startup.
+"""
+import courseware.signals  # pylint: disable=unused-import
@@ -1,12 +1,19 @@
 """
 API related to providing field overrides for individual students.  This is used
 by the individual due dates feature.
+
+All the overrides of a student in a course are loaded at once, the first
+time one of them is read in a request.
 """
 import json
 
+import request_cache
+
 from .field_overrides import FieldOverrideProvider
 from .models import StudentFieldOverride
 
+STUDENT_OVERRIDES_CACHE_NAME = 'courseware.student_field_overrides'
+
 
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
     """
@@ -43,19 +50,47 @@ def _get_overrides_for_user(user, block):
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    course_overrides = get_overrides_for_user_in_course(user, block.runtime.course_id)
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for name, value in course_overrides.get(block.location, {}).iteritems():
+        overrides[name] = block.fields[name].from_json(value)
     return overrides
 
 
+def get_overrides_for_user_in_course(user, course_key):
+    """
+    Gets all of the individual student overrides for the given user in the
+    given course, with a single query cached for the request.  Returns a
+    dictionary mapping the locations of the overridden blocks to
+    dictionaries of the JSON values of their overridden fields, keyed by
+    field name.
+    """
+    overrides_cache = request_cache.get_cache(STUDENT_OVERRIDES_CACHE_NAME)
+    cache_key = (user.id, course_key)
+    if cache_key not in overrides_cache:
+        overrides = {}
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_key,
+            student_id=user.id,
+        )
+        for override in query:
+            # The locations of old Mongo courses are stored without their run.
+            location = override.location.map_into_course(course_key)
+            overrides.setdefault(location, {})[override.field] = json.loads(override.value)
+        overrides_cache[cache_key] = overrides
+    return overrides_cache[cache_key]
+
+
+def _clear_cached_overrides_for_user(user, block):
+    """
+    Clears the overrides of the given user in the course of the given block
+    cached for the request, once they are changed.
+    """
+    request_cache.get_cache(STUDENT_OVERRIDES_CACHE_NAME).pop((user.id, block.runtime.course_id), None)
+    if hasattr(block, '_student_overrides'):
+        block._student_overrides.pop(user.id, None)  # pylint: disable=protected-access
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -70,6 +105,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    _clear_cached_overrides_for_user(user, block)
 
 
 def clear_override_for_user(user, block, name):
@@ -87,3 +123,4 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    _clear_cached_overrides_for_user(user, block)
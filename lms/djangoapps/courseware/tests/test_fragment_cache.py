@@ -0,0 +1,96 @@
+"""
+Tests for the cache of the student views of the blocks that are the same
+for all users.
+"""
+from django.test.client import RequestFactory
+from mock import patch
+from nose.plugins.attrib import attr
+
+import request_cache
+from courseware import module_render as render
+from courseware.config.waffle import CACHE_STUDENT_VIEW_FRAGMENTS, waffle
+from courseware.model_data import FieldDataCache
+from courseware.tests.factories import GlobalStaffFactory, UserFactory
+from static_replace import STATIC_URLS_CACHE_NAME
+from xmodule.html_module import HtmlModule
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from xmodule.x_module import STUDENT_VIEW
+
+
+@attr(shard=1)
+class TestFragmentCache(ModuleStoreTestCase):
+    """
+    Tests rendering student views with the cache_student_view_fragments
+    switch enabled.
+    """
+    def setUp(self):
+        super(TestFragmentCache, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        sequential = ItemFactory.create(parent=chapter, category='sequential')
+        vertical = ItemFactory.create(parent=sequential, category='vertical')
+        self.html = ItemFactory.create(
+            parent=vertical,
+            category='html',
+            data='<p>Some content <img src="/static/image.png"/></p>',
+        )
+
+    def _render(self, user, usage_key=None):
+        """
+        Returns the student view of the html block rendered for the given user.
+        """
+        request = RequestFactory().get('/')
+        request.user = user
+        descriptor = self.store.get_item(usage_key or self.html.location)
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(self.course.id, user, descriptor)
+        module = render.get_module_for_descriptor(
+            user, request, descriptor, field_data_cache, self.course.id, course=self.course
+        )
+        return module.render(STUDENT_VIEW)
+
+    def test_rendered_once_for_all_users(self):
+        with waffle().override(CACHE_STUDENT_VIEW_FRAGMENTS, active=True):
+            with patch.object(HtmlModule, 'get_html', autospec=True, return_value=u'<p>Content</p>') as mock_get_html:
+                first_fragment = self._render(UserFactory.create())
+                second_fragment = self._render(UserFactory.create())
+        self.assertEqual(mock_get_html.call_count, 1)
+        self.assertIn(u'<p>Content</p>', second_fragment.content)
+        self.assertEqual(first_fragment.js_init_fn, second_fragment.js_init_fn)
+
+    def test_not_cached_with_user_id(self):
+        html = ItemFactory.create(parent_location=self.html.parent, category='html', data='<p>%%USER_ID%%</p>')
+        with waffle().override(CACHE_STUDENT_VIEW_FRAGMENTS, active=True):
+            first_content = self._render(UserFactory.create(), html.location).content
+            second_content = self._render(UserFactory.create(), html.location).content
+        self.assertNotEqual(first_content, second_content)
+
+    def test_not_cached_for_staff(self):
+        with waffle().override(CACHE_STUDENT_VIEW_FRAGMENTS, active=True):
+            with patch.object(HtmlModule, 'get_html', autospec=True, return_value=u'<p>Content</p>') as mock_get_html:
+                self._render(GlobalStaffFactory.create())
+                self._render(GlobalStaffFactory.create())
+        self.assertEqual(mock_get_html.call_count, 2)
+
+    def test_invalidated_on_edit(self):
+        user = UserFactory.create()
+        with waffle().override(CACHE_STUDENT_VIEW_FRAGMENTS, active=True):
+            self._render(user)
+            self.html.data = '<p>Edited content</p>'
+            self.store.update_item(self.html, self.user.id)
+            self.assertIn('Edited content', self._render(user).content)
+
+    def test_urls_rewritten_for_each_request(self):
+        html = u'<p><img src="/static/image.png"/></p>'
+        with waffle().override(CACHE_STUDENT_VIEW_FRAGMENTS, active=True):
+            with patch.object(HtmlModule, 'get_html', autospec=True, return_value=html) as mock_get_html:
+                for asset_version in ('first', 'second'):
+                    # A new version of the asset is uploaded between the requests.
+                    request_cache.clear_cache(STATIC_URLS_CACHE_NAME)
+                    with patch(
+                        'static_replace.StaticContent.get_canonicalized_asset_path',
+                        return_value=u'/assets/{}/image.png'.format(asset_version),
+                    ):
+                        content = self._render(UserFactory.create()).content
+                    self.assertIn(u'/assets/{}/image.png'.format(asset_version), content)
+        self.assertEqual(mock_get_html.call_count, 1)
@@ -2,10 +2,15 @@
 Tests for courseware middleware
 """
 
-from django.http import Http404
+from django.db import DatabaseError, transaction
+from django.http import Http404, HttpResponse, HttpResponseServerError
 from django.test.client import RequestFactory
+from mock import patch
 from nose.plugins.attrib import attr
 
+from courseware.config.waffle import BUFFER_STUDENT_MODULE_WRITES, waffle
+from courseware.middleware import StudentModuleWriteBufferMiddleware
+from courseware.user_state_client import StudentModuleWriteBuffer
 from lms.djangoapps.courseware.exceptions import Redirect
 from lms.djangoapps.courseware.middleware import RedirectMiddleware
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
@@ -42,3 +47,85 @@ class CoursewareMiddlewareTestCase(SharedModuleStoreTestCase):
         self.assertEqual(response.status_code, 302)
         target_url = response._headers['location'][1]
         self.assertTrue(target_url.endswith(test_url))
+
+    def test_student_module_write_buffer(self):
+        """
+        The write buffer is active for the duration of a request.
+        """
+        request = RequestFactory().get("dummy_url")
+        middleware = StudentModuleWriteBufferMiddleware()
+        with waffle().override(BUFFER_STUDENT_MODULE_WRITES, active=True):
+            middleware.process_request(request)
+        self.assertIsNotNone(StudentModuleWriteBuffer.current())
+
+        with patch.object(StudentModuleWriteBuffer, 'flush') as mock_flush:
+            middleware.process_response(request, HttpResponse())
+        mock_flush.assert_called_once_with()
+        self.assertIsNone(StudentModuleWriteBuffer.current())
+
+    def _process_exception_with_buffer(self, view):
+        """
+        Runs the write buffer middleware for a request to the given view which
+        fails, and returns the mocked flush of its buffer.
+        """
+        request = RequestFactory().get("dummy_url")
+        middleware = StudentModuleWriteBufferMiddleware()
+        with waffle().override(BUFFER_STUDENT_MODULE_WRITES, active=True):
+            middleware.process_request(request)
+        middleware.process_view(request, view, [], {})
+
+        with patch.object(StudentModuleWriteBuffer, 'flush') as mock_flush:
+            middleware.process_exception(request, Exception())
+            middleware.process_response(request, HttpResponseServerError())
+        self.assertIsNone(StudentModuleWriteBuffer.current())
+        return mock_flush
+
+    def test_student_module_write_buffer_discarded_on_rollback(self):
+        """
+        The buffered writes of a failed request are discarded along with
+        the rest of its transaction.
+        """
+        self.assertFalse(self._process_exception_with_buffer(lambda request: None).called)
+
+    def test_student_module_write_buffer_flushed_without_transaction(self):
+        """
+        The buffered writes of a failed request are saved if it does not
+        run in a transaction.
+        """
+        view = transaction.non_atomic_requests(lambda request: None)
+        self._process_exception_with_buffer(view).assert_called_once_with()
+
+    def test_student_module_write_buffer_flush_error(self):
+        """
+        Errors saving the buffered writes fail the request.
+        """
+        request = RequestFactory().get("dummy_url")
+        middleware = StudentModuleWriteBufferMiddleware()
+        with waffle().override(BUFFER_STUDENT_MODULE_WRITES, active=True):
+            middleware.process_request(request)
+
+        with patch.object(StudentModuleWriteBuffer, 'flush', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                middleware.process_response(request, HttpResponse())
+        self.assertIsNone(StudentModuleWriteBuffer.current())
+
+    def test_student_module_write_buffer_leaked(self):
+        """
+        A buffer left active by an earlier request is saved and deactivated.
+        """
+        StudentModuleWriteBuffer.activate()
+        self.addCleanup(StudentModuleWriteBuffer.deactivate)
+        with patch.object(StudentModuleWriteBuffer, 'flush') as mock_flush:
+            with waffle().override(BUFFER_STUDENT_MODULE_WRITES, active=False):
+                StudentModuleWriteBufferMiddleware().process_request(RequestFactory().get("dummy_url"))
+        mock_flush.assert_called_once_with()
+        self.assertIsNone(StudentModuleWriteBuffer.current())
+
+    def test_student_module_write_buffer_disabled(self):
+        """
+        Writes are not buffered unless the waffle switch is enabled.
+        """
+        request = RequestFactory().get("dummy_url")
+        with waffle().override(BUFFER_STUDENT_MODULE_WRITES, active=False):
+            StudentModuleWriteBufferMiddleware().process_request(request)
+        self.assertIsNone(StudentModuleWriteBuffer.current())
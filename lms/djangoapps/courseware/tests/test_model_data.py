@@ -12,7 +12,7 @@ from xblock.core import XBlock
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.fields import BlockScope, Scope, ScopeIds
 
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache, FieldDataPrefetchPlan, InvalidScopeError
 from courseware.models import (
     StudentModule,
     XModuleStudentInfoField,
@@ -27,6 +27,7 @@ from courseware.tests.factories import (
     course_id,
     location
 )
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
 from student.tests.factories import UserFactory
 
 
@@ -234,6 +235,12 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
                 self.kvs.set_many(kv_dict)
         self.assertEquals(exception_context.exception.saved_field_names, [])
 
+    def test_add_prefetched_descriptor(self):
+        "Test that adding an already prefetched descriptor doesn't query the database again"
+        with self.assertNumQueries(0):
+            self.field_data_cache.add_descriptors_to_cache([mock_descriptor([mock_field(Scope.user_state, 'a_field')])])
+        self.assertEquals('a_value', self.kvs.get(user_state_key('a_field')))
+
 
 @attr(shard=1)
 class TestMissingStudentModule(TestCase):
@@ -291,6 +298,57 @@ class TestMissingStudentModule(TestCase):
             self.assertFalse(self.kvs.has(user_state_key('a_field')))
 
 
+@attr(shard=1)
+class TestFieldDataPrefetchPlan(TestCase):
+    """Tests for prefetching field data planned from a block structure"""
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestFieldDataPrefetchPlan, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.assertEqual(self.user.id, 1)   # check our assumption hard-coded in the key functions above.
+
+        self.sequential_key = course_id.make_usage_key('sequential', 'sequential')
+        self.problem_keys = [location('usage_id')] + [location('problem_{}'.format(index)) for index in range(5)]
+        self.block_structure = BlockStructureBlockData(self.sequential_key)
+        for problem_key in self.problem_keys:
+            self.block_structure._add_relation(self.sequential_key, problem_key)  # pylint: disable=protected-access
+
+    def test_plan_from_block_structure(self):
+        plan = FieldDataPrefetchPlan()
+        plan.add_block_structure(self.block_structure)
+
+        self.assertEquals(plan.usage_keys, set([self.sequential_key] + self.problem_keys))
+        self.assertEquals(plan.scorable_locations, set(self.problem_keys))
+        self.assertIn(Scope.user_state, plan.fields)
+
+    def test_prefetch_one_query_per_scope(self):
+        plan = FieldDataPrefetchPlan()
+        plan.add_block_structure(self.block_structure)
+        field_data_cache = FieldDataCache([], course_id, self.user)
+        num_scopes = len([scope for scope in plan.fields if scope in field_data_cache.cache])
+
+        with self.assertNumQueries(num_scopes):
+            self.assertEquals(field_data_cache.prefetch(plan), num_scopes)
+
+        # Prefetching the same blocks again, or any of their descriptors, is free
+        with self.assertNumQueries(0):
+            self.assertEquals(field_data_cache.prefetch(plan), 0)
+            field_data_cache.add_descriptors_to_cache([mock_descriptor([mock_field(Scope.user_state, 'a_field')])])
+            self.assertEquals('a_value', field_data_cache.get(user_state_key('a_field')))
+
+    def test_cache_for_student_module(self):
+        student_module = StudentModule.objects.get(student=self.user)
+        descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+
+        # The state of the block is loaded from the given StudentModule
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache.cache_for_student_module(course_id, self.user, descriptor, student_module)
+            self.assertEquals('a_value', field_data_cache.get(user_state_key('a_field')))
+
+
 @attr(shard=1)
 class StorageTestBase(object):
     """
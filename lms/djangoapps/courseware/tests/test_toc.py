@@ -0,0 +1,170 @@
+"""
+Tests for the cached outlines of the table of contents of the courseware.
+"""
+from datetime import datetime, timedelta
+
+import ddt
+from django.test.client import RequestFactory
+from milestones.tests.utils import MilestonesTestCaseMixin
+from mock import patch
+from nose.plugins.attrib import attr
+from pytz import UTC
+
+from courseware import module_render as render
+from courseware import toc
+from courseware.config.waffle import CACHE_TABLE_OF_CONTENTS, waffle
+from courseware.model_data import FieldDataCache
+from courseware.tests.factories import UserFactory
+from openedx.core.lib.gating import api as gating_api
+from request_cache.middleware import RequestCache
+from student.models import CourseEnrollment
+from util import milestones_helpers
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
+
+
+@attr(shard=1)
+@ddt.ddt
+class TestCachedTOC(ModuleStoreTestCase):
+    """
+    Tests toc_for_course with the cache_table_of_contents switch enabled.
+    """
+    ENABLED_SIGNALS = ['course_published']
+
+    def setUp(self):
+        super(TestCachedTOC, self).setUp()
+        self.user = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def _create_course(self, default_store=ModuleStoreEnum.Type.split):
+        """
+        Creates a course with two chapters of two sections each, and enrolls the user.
+        """
+        with self.store.default_store(default_store):
+            self.course = CourseFactory.create()
+            self.chapters = []
+            for chapter_index in range(2):
+                chapter = ItemFactory.create(
+                    parent=self.course, category='chapter', display_name='Chapter {}'.format(chapter_index)
+                )
+                self.chapters.append(chapter)
+                for section_index in range(2):
+                    ItemFactory.create(
+                        parent=chapter,
+                        category='sequential',
+                        display_name='Section {}'.format(section_index),
+                        graded=bool(section_index),
+                        format='Homework' if section_index else None,
+                    )
+        CourseEnrollment.enroll(self.user, self.course.id)
+
+    def _toc_for_course(self, active_chapter=None, active_section=None):
+        """
+        Returns the table of contents of the course for the user.
+        """
+        course = self.store.get_course(self.course.id, depth=2)
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.user, course, depth=2
+        )
+        return render.toc_for_course(
+            self.user, self.request, course, active_chapter, active_section, field_data_cache
+        )
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_same_as_modules(self, default_store):
+        self._create_course(default_store)
+        chapter_url_name = self.chapters[1].url_name
+        section_url_name = self.store.get_item(self.chapters[1].children[0]).url_name
+
+        expected = self._toc_for_course(chapter_url_name, section_url_name)
+        with waffle().override(CACHE_TABLE_OF_CONTENTS, active=True):
+            self.assertEqual(self._toc_for_course(chapter_url_name, section_url_name), expected)
+            # from the cache
+            self.assertEqual(self._toc_for_course(chapter_url_name, section_url_name), expected)
+
+    def test_cached_without_modulestore(self):
+        self._create_course()
+        with waffle().override(CACHE_TABLE_OF_CONTENTS, active=True):
+            self._toc_for_course()
+            course = self.store.get_course(self.course.id, depth=2)
+            with check_mongo_calls(0):
+                chapters = toc.get_toc_chapters(self.user, course)
+        self.assertEqual([chapter['display_name'] for chapter in chapters], ['Chapter 0', 'Chapter 1'])
+
+    def test_invalidated_on_publish(self):
+        self._create_course()
+        with waffle().override(CACHE_TABLE_OF_CONTENTS, active=True):
+            self._toc_for_course()
+
+            chapter = self.store.get_item(self.chapters[0].location)
+            chapter.display_name = 'Renamed'
+            self.store.update_item(chapter, self.user.id)
+            self.store.publish(chapter.location, self.user.id)
+
+            toc_chapters = self._toc_for_course()['chapters']
+        self.assertEqual(toc_chapters[0]['display_name'], 'Renamed')
+
+    def test_invalidated_on_unenrollment(self):
+        self._create_course()
+        course = self.store.get_course(self.course.id, depth=2)
+        with waffle().override(CACHE_TABLE_OF_CONTENTS, active=True):
+            cache_key = toc._get_cache_key(self.user, course)  # pylint: disable=protected-access
+            CourseEnrollment.unenroll(self.user, self.course.id)
+            self.assertNotEqual(toc._get_cache_key(self.user, course), cache_key)  # pylint: disable=protected-access
+
+    def test_cached_until_start(self):
+        self._create_course()
+        ItemFactory.create(
+            parent=self.chapters[0],
+            category='sequential',
+            start=datetime.now(UTC) + timedelta(seconds=30),
+        )
+        course = self.store.get_course(self.course.id, depth=2)
+        __, timeout = toc._get_toc_chapters_from_blocks(self.user, course)  # pylint: disable=protected-access
+        self.assertLessEqual(timeout, 30)
+
+    def test_disabled_with_field_overrides(self):
+        self._create_course()
+        with waffle().override(CACHE_TABLE_OF_CONTENTS, active=True):
+            self.assertTrue(toc.is_cached_toc_enabled(self.user, self.course))
+            with patch.object(toc.OverrideFieldData, 'has_enabled_providers', return_value=True):
+                self.assertFalse(toc.is_cached_toc_enabled(self.user, self.course))
+
+
+@attr(shard=1)
+class TestCachedTOCWithMilestones(ModuleStoreTestCase, MilestonesTestCaseMixin):
+    """
+    Tests the cached outlines of a course with a gated subsection.
+    """
+    def setUp(self):
+        super(TestCachedTOCWithMilestones, self).setUp()
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create(enable_subsection_gating=True)
+        chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        self.open_seq = ItemFactory.create(parent=chapter, category='sequential', display_name='Open')
+        self.gated_seq = ItemFactory.create(parent=chapter, category='sequential', display_name='Gated')
+        gating_api.add_prerequisite(self.course.id, self.open_seq.location)
+        gating_api.set_required_content(self.course.id, self.gated_seq.location, self.open_seq.location, 100)
+        CourseEnrollment.enroll(self.user, self.course.id)
+
+    def _get_section_names(self):
+        """
+        Returns the display names of the sections in the cached outline of the course for the user.
+        """
+        RequestCache.clear_request_cache()
+        course = self.store.get_course(self.course.id, depth=2)
+        with waffle().override(CACHE_TABLE_OF_CONTENTS, active=True):
+            chapters = toc.get_toc_chapters(self.user, course)
+        return [section['display_name'] for section in chapters[0]['sections']]
+
+    def test_gated_section_shown_once_unlocked(self):
+        self.assertEqual(self._get_section_names(), ['Open'])
+
+        milestone = milestones_helpers.get_course_content_milestones(
+            self.course.id, unicode(self.gated_seq.location), 'requires'
+        )[0]
+        milestones_helpers.add_user_milestone({'id': self.user.id}, milestone)
+        # from the cache, with the milestones of the user read again
+        self.assertEqual(self._get_section_names(), ['Open', 'Gated'])
@@ -3,14 +3,20 @@ Black-box tests of the DjangoUserStateClient against the semantics
 defined in edx_user_state_client.
 """
 
+import json
 from collections import defaultdict
 from unittest import skip
 
+from django.db import DatabaseError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from edx_user_state_client.tests import UserStateClientTestBase
+from mock import patch
 
-from courseware.tests.factories import UserFactory
-from courseware.user_state_client import DjangoXBlockUserStateClient
+from courseware.models import StudentModule
+from courseware.tests.factories import UserFactory, location
+from courseware.user_state_client import DjangoXBlockUserStateClient, StudentModuleWriteBuffer
+from coursewarehistoryextended.models import StudentModuleHistoryExtended
 
 
 class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
@@ -67,3 +73,91 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
     @skip("Not supported by DjangoXBlockUserStateClient")
     def test_iter_course_many_users(self):
         pass
+
+
+class TestStudentModuleWriteBuffer(TestCase):
+    """
+    Tests of the DjangoUserStateClient with a StudentModuleWriteBuffer.
+    """
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestStudentModuleWriteBuffer, self).setUp()
+        self.user = UserFactory.create()
+        self.client = DjangoXBlockUserStateClient(self.user)
+        self.block_keys = [location('block_{}'.format(index)) for index in range(3)]
+        self.write_buffer = StudentModuleWriteBuffer.activate()
+        self.addCleanup(StudentModuleWriteBuffer.deactivate)
+
+    def _stored_state(self, block_key):
+        """
+        Returns the state stored in the database for the given block.
+        """
+        return json.loads(StudentModule.objects.get(student=self.user, module_state_key=block_key).state)
+
+    def test_coalesced_writes(self):
+        with self.assertNumQueries(0):
+            for block_key in self.block_keys:
+                self.client.set(self.user.username, block_key, {'a_field': 'a_value'})
+            self.client.set(self.user.username, self.block_keys[0], {'a_field': 'new_value', 'b_field': 'b_value'})
+        self.assertEqual(len(self.write_buffer), len(self.block_keys))
+
+        # The buffered writes are read back
+        self.assertEqual(
+            self.client.get(self.user.username, self.block_keys[0]).state,
+            {'a_field': 'new_value', 'b_field': 'b_value'},
+        )
+
+        StudentModuleWriteBuffer.deactivate()
+        self.assertEqual(self._stored_state(self.block_keys[0]), {'a_field': 'new_value', 'b_field': 'b_value'})
+        self.assertEqual(self._stored_state(self.block_keys[1]), {'a_field': 'a_value'})
+        self.assertEqual(StudentModuleHistoryExtended.objects.count(), len(self.block_keys))
+
+    def test_overlay_stored_state(self):
+        StudentModuleWriteBuffer.deactivate()
+        self.client.set(self.user.username, self.block_keys[0], {'a_field': 'a_value', 'b_field': 'b_value'})
+        StudentModuleWriteBuffer.activate()
+
+        self.client.set(self.user.username, self.block_keys[0], {'b_field': 'new_value'})
+        self.assertEqual(self._stored_state(self.block_keys[0]), {'a_field': 'a_value', 'b_field': 'b_value'})
+        self.assertEqual(
+            self.client.get(self.user.username, self.block_keys[0]).state,
+            {'a_field': 'a_value', 'b_field': 'new_value'},
+        )
+
+        StudentModuleWriteBuffer.deactivate()
+        self.assertEqual(self._stored_state(self.block_keys[0]), {'a_field': 'a_value', 'b_field': 'new_value'})
+        self.assertEqual(StudentModuleHistoryExtended.objects.count(), 2)
+
+    def test_delete_flushes_buffer(self):
+        self.client.set(self.user.username, self.block_keys[0], {'a_field': 'a_value', 'b_field': 'b_value'})
+        self.client.delete(self.user.username, self.block_keys[0], fields=['a_field'])
+
+        self.assertEqual(len(self.write_buffer), 0)
+        self.assertEqual(self._stored_state(self.block_keys[0]), {'b_field': 'b_value'})
+
+    def test_stored_states_updated_at_once(self):
+        StudentModuleWriteBuffer.deactivate()
+        for block_key in self.block_keys:
+            self.client.set(self.user.username, block_key, {'a_field': 'a_value'})
+        StudentModuleWriteBuffer.activate()
+
+        for block_key in self.block_keys:
+            self.client.set(self.user.username, block_key, {'b_field': block_key.block_id})
+        with patch.object(StudentModuleWriteBuffer, 'UPDATE_CHUNK_SIZE', 2):
+            with CaptureQueriesContext(connection) as queries:
+                StudentModuleWriteBuffer.deactivate()
+        # One UPDATE of each chunk of the stored modules
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        for block_key in self.block_keys:
+            self.assertEqual(self._stored_state(block_key), {'a_field': 'a_value', 'b_field': block_key.block_id})
+
+    def test_saved_one_by_one_on_error(self):
+        for block_key in self.block_keys:
+            self.client.set(self.user.username, block_key, {'a_field': 'a_value'})
+        with patch.object(StudentModuleWriteBuffer, '_flush_course', side_effect=DatabaseError):
+            StudentModuleWriteBuffer.deactivate()
+        for block_key in self.block_keys:
+            self.assertEqual(self._stored_state(block_key), {'a_field': 'a_value'})
@@ -0,0 +1,234 @@
+"""
+Cached, per-user outlines of the chapters and sections of courses, from
+which the table of contents of the courseware is rendered without
+instantiating XModules.
+
+An outline is built from the course blocks transformed for the user, and
+is cached by user, course version, staff access and partition groups.
+The cached outlines of a course are invalidated when it is published, and
+those of a user when their enrollment or cohort in the course changes.
+The chapters and sections blocked by milestones the user has not
+fulfilled, e.g. gated subsections, are removed from the outline on each
+request, so that they show as soon as the milestones are fulfilled.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from pytz import UTC
+
+from courseware.access import has_access
+from courseware.field_overrides import OverrideFieldData
+from courseware.masquerade import is_masquerading_as_student
+from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.course_blocks.transformers.start_date import StartDateTransformer
+from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
+from util import milestones_helpers
+from xmodule.block_metadata_utils import display_name_with_default_escaped, url_name_for_block
+from xmodule.modulestore.django import modulestore
+from xmodule.partitions.partitions_service import get_all_partitions_for_course
+
+from .config.waffle import CACHE_TABLE_OF_CONTENTS, waffle
+
+# Maximum number of seconds an outline is cached.
+TOC_CACHE_TIMEOUT = 60 * 60
+
+TOC_CACHE_KEY = u'courseware.toc.{course_id}.{user_id}.{digest}'
+COURSE_GENERATION_CACHE_KEY = u'courseware.toc.generation.{course_id}'
+USER_GENERATION_CACHE_KEY = u'courseware.toc.generation.{course_id}.{user_id}'
+
+
+def is_cached_toc_enabled(user, course):
+    """
+    Returns whether the table of contents of the given course can be
+    rendered from the cached outline for the given user.
+
+    Courses with field override providers, e.g. individual due dates
+    or CCX, and staff masquerading as a student are excluded, since
+    their XModules may differ from the course blocks.
+    """
+    return (
+        waffle().is_enabled(CACHE_TABLE_OF_CONTENTS) and
+        user.is_authenticated() and
+        not is_masquerading_as_student(user, course.id) and
+        not OverrideFieldData.has_enabled_providers(course)
+    )
+
+
+def get_toc_chapters(user, course):
+    """
+    Returns the outline of the chapters of the given course accessible to
+    the given user, or None if the user can't access the course.
+
+    Each chapter is a dict with the display_name, url_name, location and
+    hide_from_toc of the chapter, and its sections: a list of dicts with
+    the display_name, url_name, location, hide_from_toc, format, due,
+    graded and is_time_limited of each section.
+
+    The returned outline is cached and must not be modified.
+    """
+    cache_key = _get_cache_key(user, course)
+    chapters = cache.get(cache_key)
+    if chapters is None:
+        chapters, timeout = _get_toc_chapters_from_blocks(user, course)
+        if timeout > 0:
+            cache.set(cache_key, chapters, timeout)
+    if chapters is not None:
+        chapters = _remove_blocked_by_milestones(user, course, chapters)
+    return chapters
+
+
+def clear_course_toc_cache(course_key):
+    """
+    Invalidates the cached outlines of the given course for all users.
+    """
+    cache.delete(COURSE_GENERATION_CACHE_KEY.format(course_id=course_key))
+
+
+def clear_user_toc_cache(course_key, user_id):
+    """
+    Invalidates the cached outline of the given course for the given user.
+    """
+    cache.delete(USER_GENERATION_CACHE_KEY.format(course_id=course_key, user_id=user_id))
+
+
+def _get_cache_key(user, course):
+    """
+    Returns the cache key of the outline of the given course for the
+    given user.
+    """
+    key_components = [
+        unicode(getattr(course, 'course_version', None) or getattr(course, 'subtree_edited_on', None)),
+        unicode(bool(has_access(user, 'staff', course))),
+    ]
+    key_components.extend(_get_generations(course.id, user.id))
+    key_components.extend(
+        u'{}:{}'.format(partition_id, group_id) for partition_id, group_id in _get_partition_groups(user, course)
+    )
+    return TOC_CACHE_KEY.format(
+        course_id=course.id,
+        user_id=user.id,
+        digest=hashlib.md5(u'.'.join(key_components).encode('utf-8')).hexdigest(),
+    )
+
+
+def _get_generations(course_key, user_id):
+    """
+    Returns the current generations of the cached outlines of the given
+    course and of the given user in the course.  Outlines are invalidated
+    by deleting their generation, which is then replaced by a new one.
+    """
+    keys = [
+        COURSE_GENERATION_CACHE_KEY.format(course_id=course_key),
+        USER_GENERATION_CACHE_KEY.format(course_id=course_key, user_id=user_id),
+    ]
+    generations = cache.get_many(keys)
+    new_generations = {key: uuid4().hex for key in keys if key not in generations}
+    if new_generations:
+        cache.set_many(new_generations, TOC_CACHE_TIMEOUT)
+        generations.update(new_generations)
+    return [generations[key] for key in keys]
+
+
+def _get_partition_groups(user, course):
+    """
+    Returns the sorted (partition id, group id) pairs of the groups of the
+    given user in the active partitions of the given course.
+    """
+    partition_groups = []
+    for partition in get_all_partitions_for_course(course, active_only=True):
+        group = partition.scheme.get_group_for_user(course.id, user, partition)
+        if group is not None:
+            partition_groups.append((partition.id, group.id))
+    return sorted(partition_groups)
+
+
+def _get_toc_chapters_from_blocks(user, course):
+    """
+    Returns the outline of the chapters of the given course accessible to
+    the given user, and the number of seconds it can be cached, which is
+    until the next start date of a block of the course.
+    """
+    course_usage_key = modulestore().make_course_usage_key(course.id)
+    collected_block_structure = get_block_structure_manager(course.id).get_collected()
+    block_structure = get_course_blocks(
+        user,
+        course_usage_key,
+        collected_block_structure=collected_block_structure,
+    )
+    timeout = _get_timeout(collected_block_structure)
+
+    if course_usage_key not in block_structure:
+        return None, timeout
+
+    chapters = []
+    for chapter_key in block_structure.get_children(course_usage_key):
+        sections = []
+        for section_key in block_structure.get_children(chapter_key):
+            section_format = block_structure.get_xblock_field(section_key, 'format')
+            sections.append({
+                'display_name': display_name_with_default_escaped(block_structure[section_key]),
+                'url_name': url_name_for_block(block_structure[section_key]),
+                'location': section_key,
+                'hide_from_toc': bool(block_structure.get_xblock_field(section_key, 'hide_from_toc')),
+                'format': section_format if section_format is not None else '',
+                'due': block_structure.get_xblock_field(section_key, 'due'),
+                'graded': block_structure.get_xblock_field(section_key, 'graded', False),
+                'is_time_limited': bool(block_structure.get_xblock_field(section_key, 'is_time_limited')),
+            })
+        chapters.append({
+            'display_name': display_name_with_default_escaped(block_structure[chapter_key]),
+            'url_name': url_name_for_block(block_structure[chapter_key]),
+            'location': chapter_key,
+            'hide_from_toc': bool(block_structure.get_xblock_field(chapter_key, 'hide_from_toc')),
+            'sections': sections,
+        })
+    return chapters, timeout
+
+
+def _remove_blocked_by_milestones(user, course, chapters):
+    """
+    Returns the given outline without the chapters and sections that the
+    given user can't load because of unfulfilled milestones, as checked by
+    has_access.  The milestones of the user are read with a single query
+    per request.
+    """
+    if not settings.FEATURES.get('MILESTONES_APP') or has_access(user, 'staff', course):
+        return chapters
+
+    def is_blocked(block):
+        """
+        Returns whether the given chapter or section requires milestones the user has not fulfilled.
+        """
+        return bool(
+            milestones_helpers.get_course_content_milestones(course.id, unicode(block['location']), 'requires', user.id)
+        )
+
+    return [
+        dict(chapter, sections=[section for section in chapter['sections'] if not is_blocked(section)])
+        for chapter in chapters
+        if not is_blocked(chapter)
+    ]
+
+
+def _get_timeout(collected_block_structure):
+    """
+    Returns the number of seconds until the start date of a block of the
+    given collected block structure, including the early start for beta
+    testers, is next reached, capped to TOC_CACHE_TIMEOUT.
+    """
+    now = datetime.now(UTC)
+    next_start = now + timedelta(seconds=TOC_CACHE_TIMEOUT)
+    for block_key in collected_block_structure:
+        start = collected_block_structure.get_transformer_block_field(
+            block_key, StartDateTransformer, StartDateTransformer.MERGED_START_DATE
+        )
+        if not start or start <= now:
+            continue
+        next_start = min(next_start, start)
+        days_early_for_beta = collected_block_structure.get_xblock_field(block_key, 'days_early_for_beta')
+        if days_early_for_beta is not None and start - timedelta(days_early_for_beta) > now:
+            next_start = min(next_start, start - timedelta(days_early_for_beta))
+    return int((next_start - now).total_seconds())
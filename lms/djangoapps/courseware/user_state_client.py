@@ -5,17 +5,21 @@ data in a Django ORM model.
 
 import itertools
 import logging
+import threading
+from collections import OrderedDict
 from operator import attrgetter
 from time import time
 
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import Case, DateTimeField, TextField, Value, When
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
 import dogstats_wrapper as dog_stats_api
-from courseware.models import BaseStudentModuleHistory, StudentModule
+from courseware.models import BaseStudentModuleHistory, StudentModule, chunks
 from openedx.core.djangoapps import monitoring_utils
 
 try:
@@ -27,6 +31,217 @@ except ImportError:
 log = logging.getLogger(__name__)
 
 
+class _BufferedWrite(object):
+    """
+    The Scope.user_state fields written to a block by a user, and not
+    yet saved to the database.
+    """
+    def __init__(self, user, usage_key):
+        self.user = user
+        self.usage_key = usage_key
+        self.state = {}
+        self.updated = None
+
+    def update(self, state):
+        """
+        Overlays the given state dict over the buffered state.
+        """
+        self.state.update(state)
+        self.updated = timezone.now()
+
+
+class StudentModuleWriteBuffer(object):
+    """
+    A buffer of the Scope.user_state writes made by
+    DjangoXBlockUserStateClient.set_many while it is active in the current
+    thread (normally for the duration of a request, see
+    StudentModuleWriteBufferMiddleware).
+
+    Repeated writes to the same (user, block) are coalesced, and
+    :meth:`flush` saves them all with one read and one bulk insert per
+    course, plus one bulk insert of their history, instead of a
+    get_or_create, save and history insert per write.  The state of the
+    stored rows is updated with one UPDATE per UPDATE_CHUNK_SIZE rows.
+    Until then, DjangoXBlockUserStateClient reads overlay the buffered
+    state over the stored state, so that XBlocks read their own writes.
+    """
+    UPDATE_CHUNK_SIZE = 100
+
+    _local = threading.local()
+
+    def __init__(self):
+        # Map of (username, usage key) to _BufferedWrite, in write order.
+        self._writes = OrderedDict()
+
+    @classmethod
+    def current(cls):
+        """
+        Returns the buffer active in the current thread, or None.
+        """
+        return getattr(cls._local, 'buffer', None)
+
+    @classmethod
+    def activate(cls):
+        """
+        Activates a new, empty buffer in the current thread, and returns it.
+        """
+        cls._local.buffer = cls()
+        return cls._local.buffer
+
+    @classmethod
+    def deactivate(cls, flush=True):
+        """
+        Deactivates the buffer active in the current thread, if any, and
+        flushes it unless flush is False, which discards the buffered writes.
+        """
+        write_buffer = cls.current()
+        cls._local.buffer = None
+        if write_buffer is not None and flush:
+            write_buffer.flush()
+
+    def add(self, user, block_keys_to_state):
+        """
+        Buffers the given state dicts of the given user's blocks, as
+        DjangoXBlockUserStateClient.set_many would save them.
+        """
+        for usage_key, state in block_keys_to_state.iteritems():
+            key = (user.username, usage_key)
+            if key not in self._writes:
+                self._writes[key] = _BufferedWrite(user, usage_key)
+            self._writes[key].update(state)
+
+    def get(self, username, usage_key):
+        """
+        Returns the _BufferedWrite of the given user's block, or None.
+        """
+        return self._writes.get((username, usage_key))
+
+    def usage_keys(self, username):
+        """
+        Returns the usage keys of the blocks with buffered writes by the given user.
+        """
+        return [usage_key for (write_username, usage_key) in self._writes if write_username == username]
+
+    def __len__(self):
+        return len(self._writes)
+
+    def flush(self):
+        """
+        Saves all buffered writes to the database, and empties the buffer.
+        """
+        if not self._writes:
+            return
+
+        writes, self._writes = self._writes.values(), OrderedDict()
+        evt_time = time()
+        course_key_func = lambda write: write.usage_key.course_key
+        writes_by_course = itertools.groupby(sorted(writes, key=course_key_func), course_key_func)
+        try:
+            with transaction.atomic():
+                for course_key, course_writes in writes_by_course:
+                    self._flush_course(course_key, list(course_writes))
+        except Exception:  # pylint: disable=broad-except
+            # Rather than losing the state of the learners, save each write on
+            # its own, as without the buffer, raising the errors of those.
+            log.exception(u'Failed to save %d buffered XBlock user states in bulk, saving them one by one', len(writes))
+            for write in writes:
+                client = DjangoXBlockUserStateClient(write.user)
+                client._save_many(write.user, {write.usage_key: write.state})  # pylint: disable=protected-access
+
+        monitoring_utils.accumulate('xb_user_state.set_many.buffered.flushed_blocks', len(writes))
+        monitoring_utils.accumulate('xb_user_state.set_many.buffered.flush_duration', (time() - evt_time) * 1000)
+
+    def _flush_course(self, course_key, writes):
+        """
+        Saves the given buffered writes, all of blocks in the given course.
+        """
+        updated_modules = []
+        new_modules = []
+        stored_modules = self._get_student_modules(course_key, writes)
+        for write in writes:
+            student_module = stored_modules.get((write.user.id, write.usage_key))
+            if student_module is None:
+                new_modules.append(StudentModule(
+                    student_id=write.user.id,
+                    course_id=course_key,
+                    module_state_key=write.usage_key,
+                    module_type=write.usage_key.block_type,
+                    state=json.dumps(write.state),
+                ))
+            else:
+                # Like DjangoXBlockUserStateClient.set_many, only update the state
+                # so that scores set by other code are not overwritten.
+                current_state = json.loads(student_module.state) if student_module.state is not None else {}
+                current_state.update(write.state)
+                student_module.state = json.dumps(current_state)
+                student_module.modified = write.updated
+                updated_modules.append(student_module)
+        self._update_student_modules(updated_modules)
+
+        if new_modules:
+            try:
+                with transaction.atomic():
+                    StudentModule.objects.bulk_create(new_modules)
+            except IntegrityError:
+                # Some of the rows have been created since they were read, so
+                # save each write (and its history) one by one instead.
+                for write in writes:
+                    if (write.user.id, write.usage_key) not in stored_modules:
+                        client = DjangoXBlockUserStateClient(write.user)
+                        client._save_many(write.user, {write.usage_key: write.state})  # pylint: disable=protected-access
+                new_modules = []
+            else:
+                # bulk_create does not set the primary keys (needed for history) on MySQL.
+                new_keys = set((module.student_id, module.module_state_key) for module in new_modules)
+                new_modules = [
+                    student_module
+                    for key, student_module in self._get_student_modules(course_key, writes).iteritems()
+                    if key in new_keys
+                ]
+
+        BaseStudentModuleHistory.bulk_save_history(updated_modules + new_modules)
+
+    @classmethod
+    def _update_student_modules(cls, student_modules):
+        """
+        Saves the state and modified time of the given stored StudentModules,
+        with one UPDATE of each chunk of them.
+        """
+        for student_modules_chunk in chunks(student_modules, cls.UPDATE_CHUNK_SIZE):
+            StudentModule.objects.filter(pk__in=[student_module.pk for student_module in student_modules_chunk]).update(
+                state=Case(
+                    *[
+                        When(pk=student_module.pk, then=Value(student_module.state))
+                        for student_module in student_modules_chunk
+                    ],
+                    output_field=TextField()
+                ),
+                modified=Case(
+                    *[
+                        When(pk=student_module.pk, then=Value(student_module.modified, output_field=DateTimeField()))
+                        for student_module in student_modules_chunk
+                    ],
+                    output_field=DateTimeField()
+                ),
+            )
+
+    @staticmethod
+    def _get_student_modules(course_key, writes):
+        """
+        Returns a dict of (student id, usage key) to the stored StudentModules
+        of the blocks of the given buffered writes, all in the given course.
+        """
+        return {
+            (student_module.student_id, student_module.module_state_key.map_into_course(course_key)): student_module
+            for student_module in StudentModule.objects.chunked_filter(
+                'module_state_key__in',
+                sorted(set(write.usage_key for write in writes), key=unicode),
+                course_id=course_key,
+                student_id__in=sorted(set(write.user.id for write in writes)),
+            )
+        }
+
+
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
     An interface that uses the Django ORM StudentModule as a backend.
@@ -91,18 +306,75 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             course_key_func,
         )
 
+        # Filter on the student id of an already-loaded user, so that the
+        # query can use the (student, module_state_key, course_id) index
+        # without joining auth_user.
+        if self.user is not None and self.user.username == username:
+            student_filter = {'student_id': self.user.id}
+        else:
+            student_filter = {'student__username': username}
+
         for course_key, usage_keys in by_course:
             query = StudentModule.objects.chunked_filter(
                 'module_state_key__in',
-                usage_keys,
-                student__username=username,
+                sorted(usage_keys, key=unicode),
                 course_id=course_key,
+                **student_filter
             )
 
             for student_module in query:
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _with_buffered_state(self, username, block_keys, modules):
+        """
+        Overlays the state buffered for the given user's blocks in the
+        active StudentModuleWriteBuffer over the state of the given
+        (student module, usage key) pairs, and adds unsaved student modules
+        for the blocks that only have buffered state.
+        """
+        write_buffer = StudentModuleWriteBuffer.current()
+        if write_buffer is None or not len(write_buffer):
+            return modules
+
+        def _overlay():
+            """
+            Generator of the (student module, usage key) pairs with their buffered state.
+            """
+            buffered_keys = set(write_buffer.usage_keys(username)) & set(block_keys)
+            for student_module, usage_key in modules:
+                write = write_buffer.get(username, usage_key)
+                if write is not None:
+                    buffered_keys.discard(usage_key)
+                    state = json.loads(student_module.state) if student_module.state is not None else {}
+                    state.update(write.state)
+                    student_module.state = json.dumps(state)
+                    student_module.modified = write.updated
+                yield student_module, usage_key
+
+            for usage_key in buffered_keys:
+                write = write_buffer.get(username, usage_key)
+                student_module = StudentModule(
+                    student_id=write.user.id,
+                    course_id=usage_key.course_key,
+                    module_state_key=usage_key,
+                    module_type=usage_key.block_type,
+                    state=json.dumps(write.state),
+                    modified=write.updated,
+                )
+                yield student_module, usage_key
+
+        return _overlay()
+
+    def _flush_buffered_state(self):
+        """
+        Saves the writes buffered in the active StudentModuleWriteBuffer, if
+        any, before the stored state is modified or its history is read.
+        """
+        write_buffer = StudentModuleWriteBuffer.current()
+        if write_buffer is not None:
+            write_buffer.flush()
+
     def _ddog_increment(self, evt_time, evt_name):
         """
         DataDog increment method.
@@ -196,7 +468,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'get_many.blks_requested', len(block_keys))
         self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
 
-        modules = self._get_student_modules(username, block_keys)
+        modules = self._with_buffered_state(username, block_keys, self._get_student_modules(username, block_keys))
         for module, usage_key in modules:
             if module.state is None:
                 self._ddog_increment(evt_time, 'get_many.empty_state')
@@ -268,6 +540,19 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        write_buffer = StudentModuleWriteBuffer.current()
+        if write_buffer is not None:
+            write_buffer.add(user, block_keys_to_state)
+            self._nr_stat_accumulate('set_many', 'buffered_blocks', len(block_keys_to_state))
+            return
+
+        self._save_many(user, block_keys_to_state)
+
+    def _save_many(self, user, block_keys_to_state):
+        """
+        Save fields for the given user's XBlocks to the database, as
+        described in :meth:`set_many`.
+        """
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
@@ -358,6 +643,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         self._ddog_histogram(evt_time, 'delete_many.block_count', len(block_keys))
 
+        self._flush_buffered_state()
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
             if fields is None:
@@ -396,6 +682,8 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
+
+        self._flush_buffered_state()
         student_modules = list(
             student_module
             for student_module, usage_id
@@ -25,6 +25,7 @@ from lms.djangoapps.courseware.exceptions import CourseAccessRedirect
 from lms.djangoapps.experiments.utils import get_experiment_user_metadata_context
 from lms.djangoapps.gating.api import get_entrance_exam_score_ratio, get_entrance_exam_usage_key
 from lms.djangoapps.grades.new.course_grade_factory import CourseGradeFactory
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.lang_pref import LANGUAGE_KEY
 from openedx.core.djangoapps.monitoring_utils import set_custom_metrics_for_course_key
@@ -42,6 +43,7 @@ from xmodule.x_module import STUDENT_VIEW
 
 from ..access import has_access
 from ..access_utils import in_preview_mode, check_course_open_for_learner
+from ..config.waffle import PREFETCH_SECTION_WITH_COURSE, waffle
 from ..courses import get_course_with_access, get_current_child, get_studio_url
 from ..entrance_exams import (
     course_has_entrance_exam,
@@ -50,7 +52,7 @@ from ..entrance_exams import (
     user_has_passed_entrance_exam
 )
 from ..masquerade import setup_masquerade
-from ..model_data import FieldDataCache
+from ..model_data import FieldDataCache, FieldDataPrefetchPlan
 from ..module_render import get_module_for_descriptor, toc_for_course
 from .views import (
     CourseTabView,
@@ -280,6 +282,7 @@ class CoursewareIndex(View):
             self.course,
             depth=CONTENT_DEPTH,
             read_only=CrawlersConfig.is_crawler(request),
+            plan=self._section_prefetch_plan(),
         )
 
         self.course = get_module_for_descriptor(
@@ -291,6 +294,25 @@ class CoursewareIndex(View):
             course=self.course,
         )
 
+    def _section_prefetch_plan(self):
+        """
+        Returns a FieldDataPrefetchPlan for the requested section and all
+        its descendants, computed from the course's block structure, so
+        that their field data is prefetched along with the course's, or
+        None if the section is not known yet.
+        """
+        if not (self.section_url_name and waffle().is_enabled(PREFETCH_SECTION_WITH_COURSE)):
+            return None
+
+        block_structure = get_course_in_cache(self.course_key)
+        section_usage_key = self.course_key.make_usage_key('sequential', self.section_url_name)
+        if section_usage_key not in block_structure:
+            return None
+
+        plan = FieldDataPrefetchPlan()
+        plan.add_block_structure(block_structure, start_usage_key=section_usage_key)
+        return plan
+
     def _prefetch_and_bind_section(self):
         """
         Prefetches all descendant data for the requested section and
@@ -526,12 +526,16 @@ def user_profile(request, course_key, user_id):
         else:
             profiled_user = cc.User(id=user_id, course_id=course_key)
 
+        # The profile page also shows the profiled user, who is retrieved
+        # along with the requesting user.
+        cc.User.retrieve_many([user] if request.is_ajax() else [user, profiled_user])
+
         threads, page, num_pages = profiled_user.active_threads(query_params)
         query_params['page'] = page
         query_params['num_pages'] = num_pages
 
         with newrelic_function_trace("get_metadata_for_threads"):
-            user_info = cc.User.from_django_user(request.user).to_dict()
+            user_info = user.to_dict()
             annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
 
         is_staff = has_permission(request.user, 'openclose_thread', course.id)
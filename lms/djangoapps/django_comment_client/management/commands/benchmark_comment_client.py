@@ -0,0 +1,135 @@
+"""
+Command to compare the ways the comment client can send requests to the
+comments service: a new connection per request, the pooled keep-alive
+session, and concurrent batches over the pooled session.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.lib.comment_client.utils import get_session
+from terrain.stubs.comments import StubCommentsService, StubCommentsServiceHandler
+
+
+class KeepAliveCommentsServiceHandler(StubCommentsServiceHandler):
+    """
+    Stub comments service handler which keeps connections alive, as the
+    comments service does behind its HTTP/1.1 front end.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format_str, *args):
+        """
+        Don't log the requests, which would dominate the benchmark.
+        """
+        pass
+
+    def send_json_response(self, content):
+        body = json.dumps(content)
+        self.send_response(200, body, {'Content-Type': 'application/json', 'Content-Length': str(len(body))})
+
+
+class KeepAliveCommentsService(StubCommentsService):
+    """
+    Stub comments service for benchmarking, see KeepAliveCommentsServiceHandler.
+    """
+    HANDLER_CLASS = KeepAliveCommentsServiceHandler
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_comment_client --requests 1000 --settings=devstack
+        $ ./manage.py lms benchmark_comment_client --url http://localhost:4567 --settings=devstack
+    """
+    help = 'Benchmarks the transports of the comment client against a stub or running comments service.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running comments service. By default, a local stub service is started.',
+        )
+        parser.add_argument(
+            '--user_id',
+            help='ID of the comments service user to retrieve.',
+            default='1',
+        )
+        parser.add_argument(
+            '--requests',
+            help='Number of requests to send with each transport.',
+            default=500,
+            type=int,
+        )
+        parser.add_argument(
+            '--batch_size',
+            help='Number of requests sent concurrently in each batch over the pooled session.',
+            default=10,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        stub_service = None
+        base_url = options['url']
+        if not base_url:
+            stub_service = KeepAliveCommentsService()
+            base_url = 'http://127.0.0.1:{}'.format(stub_service.port)
+
+        url = '{}/api/v1/users/{}'.format(base_url, options['user_id'])
+        headers = {'X-Edx-Api-Key': getattr(settings, 'COMMENTS_SERVICE_KEY', None)}
+        num_requests = options['requests']
+        batch_size = options['batch_size']
+
+        def send(request):
+            """
+            Sends a request to retrieve the user with the given send function.
+            """
+            response = request('get', url, params={'complete': True}, headers=headers, timeout=5)
+            if response.status_code != 200:
+                raise CommandError('Unexpected response {} from {}'.format(response.status_code, url))
+
+        try:
+            timings = [
+                ('new connection per request', self._time(lambda: send(requests.request), num_requests)),
+                ('pooled session', self._time(lambda: send(get_session().request), num_requests)),
+            ]
+
+            pool = ThreadPool(batch_size)
+            try:
+                timings.append((
+                    'pooled session, batches of {}'.format(batch_size),
+                    self._time(
+                        lambda: pool.map(lambda __: send(get_session().request), xrange(batch_size)),
+                        num_requests // batch_size,
+                    ) / batch_size,
+                ))
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            if stub_service:
+                stub_service.shutdown()
+
+        self.stdout.write('{} ({} requests)'.format(url, num_requests))
+        for name, duration in timings:
+            self.stdout.write('  {:<32} {:>8.3f} ms/request'.format(name + ':', duration * 1000))
+
+    @staticmethod
+    def _time(func, repeat):
+        """
+        Returns the average duration of the given number of calls to func.
+        """
+        func()  # warm up connections
+        start = default_timer()
+        for __ in xrange(repeat):
+            func()
+        return (default_timer() - start) / max(repeat, 1)
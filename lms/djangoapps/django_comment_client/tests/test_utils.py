@@ -35,12 +35,16 @@ from django_comment_common.utils import (
 )
 from edxmako import add_lookup
 from lms.djangoapps.teams.tests.factories import CourseTeamFactory, CourseTeamMembershipFactory
-from lms.lib.comment_client.utils import CommentClientMaintenanceError, perform_request
+import lms.lib.comment_client as cc
+from lms.lib.comment_client.config import MEMOIZE_GET_REQUESTS, USE_POOLED_SESSION
+from lms.lib.comment_client.config import waffle as comment_client_waffle
+from lms.lib.comment_client.utils import CommentClientMaintenanceError, get_thread_pool, perform_request
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups import cohorts
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohorted
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory, config_course_cohorts
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase
+from request_cache.middleware import RequestCache
 from student.roles import CourseStaffRole
 from student.tests.factories import AdminFactory, CourseEnrollmentFactory, UserFactory
 from xmodule.modulestore import ModuleStoreEnum
@@ -1821,6 +1825,34 @@ class GroupModeratorPermissionsTestCase(ModuleStoreTestCase):
             'can_report': True
         })
 
+    @mock.patch('django_comment_client.permissions._check_condition', side_effect=_check_condition)
+    def test_content_user_group_ids(self, check_condition_function):
+        """
+        The group ids of the authors of a thread and its responses can be looked up all at once.
+        """
+        set_discussion_division_settings(self.course.id, enable_cohorts=True,
+                                         division_scheme=CourseDiscussionSettings.COHORT)
+        thread = {
+            'id': 'thread', 'type': 'thread', 'user_id': self.cohorted_user.id, 'username': self.cohorted_user.username,
+            'children': [
+                {'id': 'plain', 'type': 'comment', 'user_id': self.plain_user.id, 'username': self.plain_user.username},
+                {'id': 'missing', 'type': 'comment', 'user_id': 100, 'username': 'missing'},
+            ],
+        }
+        content_user_group_ids = utils.get_content_user_group_ids(self.course.id, [thread])
+        self.assertEqual(content_user_group_ids, {
+            self.cohorted_user.username: cohorts.get_cohort_id(self.cohorted_user, self.course.id),
+            self.plain_user.username: None,
+            'missing': None,
+        })
+
+        with patch('django_comment_client.utils.get_user_by_username_or_email') as mock_get_user:
+            self.assertEqual(
+                utils.get_ability(self.course.id, thread, self.group_moderator, content_user_group_ids)['editable'],
+                True,
+            )
+        self.assertFalse(mock_get_user.called)
+
 
 class ClientConfigurationTestCase(TestCase):
     """Simple test cases to ensure enabling/disabling the use of the comment service works as intended."""
@@ -1851,6 +1883,89 @@ class ClientConfigurationTestCase(TestCase):
         self.assertEqual(result, {})
 
 
+@patch('lms.lib.comment_client.utils.crum.get_current_request', Mock(return_value=Mock()))
+class ClientSessionTestCase(TestCase):
+    """Test cases for the pooled session and memoized requests of the comment client."""
+
+    def setUp(self):
+        super(ClientSessionTestCase, self).setUp()
+        config = ForumsConfig.current()
+        config.enabled = True
+        config.save()
+        RequestCache.clear_request_cache()
+        self.addCleanup(RequestCache.clear_request_cache)
+
+        self.session = Mock()
+        self.session.request.side_effect = self._response
+        patcher = patch('lms.lib.comment_client.utils.get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _response(method, url, **kwargs):  # pylint: disable=unused-argument
+        """Returns a response with the requested URL as content."""
+        response = Mock(status_code=200)
+        response.json.return_value = {'id': url.rsplit('/', 1)[-1], 'title': url}
+        return response
+
+    @patch('requests.request')
+    def test_pooled_session(self, mock_request):
+        with comment_client_waffle().override(USE_POOLED_SESSION, active=True):
+            self.assertEqual(perform_request('get', 'http://localhost/1')['title'], 'http://localhost/1')
+        self.assertEqual(self.session.request.call_count, 1)
+        self.assertFalse(mock_request.called)
+
+    def test_memoized_get_requests(self):
+        with comment_client_waffle().override(USE_POOLED_SESSION, active=True):
+            with comment_client_waffle().override(MEMOIZE_GET_REQUESTS, active=True):
+                response = perform_request('get', 'http://localhost/1', {'complete': True})
+                response['title'] = 'modified'
+                self.assertEqual(
+                    perform_request('get', 'http://localhost/1', {'complete': True})['title'], 'http://localhost/1'
+                )
+                self.assertEqual(self.session.request.call_count, 1)
+
+                # Other parameters and updates are never memoized
+                perform_request('get', 'http://localhost/1', {'complete': False})
+                perform_request('put', 'http://localhost/1', {'title': 'title'})
+                perform_request('get', 'http://localhost/1', {'complete': True})
+                self.assertEqual(self.session.request.call_count, 4)
+
+    def test_retrieve_many(self):
+        threads = [cc.Thread(id=str(thread_id)) for thread_id in range(3)]
+        with comment_client_waffle().override(USE_POOLED_SESSION, active=True):
+            threads[0].retrieve()
+            cc.Thread.retrieve_many(threads, mark_as_read=False)
+
+        self.assertEqual(self.session.request.call_count, 3)
+        for thread in threads:
+            self.assertTrue(thread.retrieved)
+            self.assertEqual(thread.title, cc.Thread.url(action='get', params={'id': thread.id}))
+        self.assertEqual(self.session.request.call_args[1]['params']['mark_as_read'], False)
+
+    def test_retrieve_many_retries_failed_instances(self):
+        failed_urls = set()
+
+        def respond(method, url, **kwargs):
+            """Fails the first request for the thread 1."""
+            if url.endswith('/1') and url not in failed_urls:
+                failed_urls.add(url)
+                return Mock(status_code=500, text='error')
+            return self._response(method, url, **kwargs)
+
+        self.session.request.side_effect = respond
+        threads = [cc.Thread(id=str(thread_id)) for thread_id in range(3)]
+        with comment_client_waffle().override(USE_POOLED_SESSION, active=True):
+            cc.Thread.retrieve_many(threads)
+
+        # Only the request of the failed thread is sent again.
+        self.assertEqual(self.session.request.call_count, 4)
+        for thread in threads:
+            self.assertTrue(thread.retrieved)
+            self.assertEqual(thread.title, cc.Thread.url(action='get', params={'id': thread.id}))
+        self.assertIs(get_thread_pool(), get_thread_pool())
+
+
 def set_discussion_division_settings(
         course_key, enable_cohorts=False, always_divide_inline_discussions=False,
         divided_discussions=[], division_scheme=CourseDiscussionSettings.COHORT
@@ -538,11 +538,13 @@ class QueryCountDebugMiddleware(object):
         return response
 
 
-def get_ability(course_id, content, user):
+def get_ability(course_id, content, user, content_user_group_ids=None):
     """
     Return a dictionary of forums-oriented actions and the user's permission to perform them
+
+    See get_user_group_ids for content_user_group_ids.
     """
-    (user_group_id, content_user_group_id) = get_user_group_ids(course_id, content, user)
+    (user_group_id, content_user_group_id) = get_user_group_ids(course_id, content, user, content_user_group_ids)
     return {
         'editable': check_permissions_by_view(
             user,
@@ -586,16 +588,21 @@ def get_ability(course_id, content, user):
 # TODO: RENAME
 
 
-def get_user_group_ids(course_id, content, user=None):
+def get_user_group_ids(course_id, content, user=None, content_user_group_ids=None):
     """
     Given a user, course ID, and the content of the thread or comment, returns the group ID for the current user
     and the user that posted the thread/comment.
+
+    The group ID of the user that posted the content is looked up in content_user_group_ids, as returned by
+    get_content_user_group_ids, when it is given and contains their username.
     """
     content_user_group_id = None
     user_group_id = None
     if course_id is not None:
         course_discussion_settings = get_course_discussion_settings(course_id)
-        if content.get('username'):
+        if content_user_group_ids is not None and content.get('username') in content_user_group_ids:
+            content_user_group_id = content_user_group_ids[content['username']]
+        elif content.get('username'):
             try:
                 content_user = get_user_by_username_or_email(content.get('username'))
                 content_user_group_id = get_group_id_for_user(content_user, course_discussion_settings)
@@ -606,9 +613,46 @@ def get_user_group_ids(course_id, content, user=None):
     return user_group_id, content_user_group_id
 
 
-def get_annotated_content_info(course_id, content, user, user_info):
+def _iter_content_tree(content):
+    """
+    Yields the given thread or comment and all of its descendants.
+    """
+    yield content
+    for child in (
+            content.get('children', []) +
+            content.get('endorsed_responses', []) +
+            content.get('non_endorsed_responses', [])
+    ):
+        for descendant in _iter_content_tree(child):
+            yield descendant
+
+
+def get_content_user_group_ids(course_id, contents):
+    """
+    Returns a dict of the usernames of the users that posted the given threads or comments, and their
+    descendants, to their group IDs in the given course, looking all of the users up in a single query.
+    """
+    usernames = set(
+        content['username']
+        for root in contents
+        for content in _iter_content_tree(root)
+        if content.get('username') and '@' not in content['username']
+    )
+    if not usernames:
+        return {}
+
+    course_discussion_settings = get_course_discussion_settings(course_id)
+    content_user_group_ids = dict.fromkeys(usernames)
+    for content_user in User.objects.filter(username__in=usernames):
+        content_user_group_ids[content_user.username] = get_group_id_for_user(content_user, course_discussion_settings)
+    return content_user_group_ids
+
+
+def get_annotated_content_info(course_id, content, user, user_info, content_user_group_ids=None):
     """
     Get metadata for an individual content (thread or comment)
+
+    See get_user_group_ids for content_user_group_ids.
     """
     voted = ''
     if content['id'] in user_info['upvoted_ids']:
@@ -618,37 +662,33 @@ def get_annotated_content_info(course_id, content, user, user_info):
     return {
         'voted': voted,
         'subscribed': content['id'] in user_info['subscribed_thread_ids'],
-        'ability': get_ability(course_id, content, user),
+        'ability': get_ability(course_id, content, user, content_user_group_ids),
     }
 
 # TODO: RENAME
 
 
-def get_annotated_content_infos(course_id, thread, user, user_info):
+def get_annotated_content_infos(course_id, thread, user, user_info, content_user_group_ids=None):
     """
     Get metadata for a thread and its children
     """
-    infos = {}
+    if content_user_group_ids is None and course_id is not None:
+        content_user_group_ids = get_content_user_group_ids(course_id, [thread])
 
-    def annotate(content):
-        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info)
-        for child in (
-                content.get('children', []) +
-                content.get('endorsed_responses', []) +
-                content.get('non_endorsed_responses', [])
-        ):
-            annotate(child)
-    annotate(thread)
-    return infos
+    return {
+        str(content['id']): get_annotated_content_info(course_id, content, user, user_info, content_user_group_ids)
+        for content in _iter_content_tree(thread)
+    }
 
 
 def get_metadata_for_threads(course_id, threads, user, user_info):
     """
     Returns annotated content information for the specified course, threads, and user information
     """
+    content_user_group_ids = get_content_user_group_ids(course_id, threads) if course_id is not None else None
 
     def infogetter(thread):
-        return get_annotated_content_infos(course_id, thread, user, user_info)
+        return get_annotated_content_infos(course_id, thread, user, user_info, content_user_group_ids)
 
     metadata = reduce(merge_dict, map(infogetter, threads), {})
     return metadata
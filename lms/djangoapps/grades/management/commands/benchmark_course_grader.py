@@ -0,0 +1,112 @@
+"""
+Command to compare the per-learner and bulk computations of course
+grade percentages for a synthetic population of learners.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import random
+from collections import OrderedDict, namedtuple
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.djangoapps.grades.context import grading_context_for_course
+from openedx.core.lib.command_utils import parse_course_keys
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+_SyntheticTotal = namedtuple('_SyntheticTotal', ['earned', 'possible'])
+_SyntheticSubsectionGrade = namedtuple('_SyntheticSubsectionGrade', ['graded_total', 'display_name'])
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_course_grader 'edX/DemoX/Demo_Course' --learners 100000 --settings=devstack
+    """
+    args = '<course_id course_id ...>'
+    help = 'Benchmarks the per-learner and bulk course grader computations on synthetic subsection grades.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help='Benchmark the grading policy and graded subsections of the list of courses provided.',
+        )
+        parser.add_argument(
+            '--learners',
+            help='Number of synthetic learners to grade.',
+            default=100000,
+            type=int,
+        )
+        parser.add_argument(
+            '--attempted_ratio',
+            help='Ratio of graded subsections with a score for each synthetic learner.',
+            default=0.8,
+            type=float,
+        )
+        parser.add_argument(
+            '--seed',
+            help='Seed for the generation of synthetic subsection grades.',
+            default=0,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+        for course_key in parse_course_keys(options['courses']):
+            course = modulestore().get_course(course_key, depth=0)
+            course.set_grading_policy(course.grading_policy)
+            subsections_by_format = grading_context_for_course(course_key)['all_graded_subsections_by_type']
+
+            grade_sheets = [
+                self._synthetic_grade_sheet(subsections_by_format, rand, options['attempted_ratio'])
+                for _ in xrange(options['learners'])
+            ]
+
+            start = default_timer()
+            expected_percents = [course.grader.grade(grade_sheet)['percent'] for grade_sheet in grade_sheets]
+            per_learner_time = default_timer() - start
+
+            start = default_timer()
+            bulk_percents = course.grader.bulk_percent(grade_sheets)
+            bulk_time = default_timer() - start
+
+            mismatches = sum(
+                1 for expected, actual in zip(expected_percents, bulk_percents) if expected != actual
+            )
+            self.stdout.write('{} ({} learners, {} graded subsections)'.format(
+                course_key,
+                len(grade_sheets),
+                sum(len(subsections) for subsections in subsections_by_format.itervalues()),
+            ))
+            self.stdout.write('  per-learner grader: {:>10.2f} s'.format(per_learner_time))
+            self.stdout.write('  bulk grader:        {:>10.2f} s'.format(bulk_time))
+            self.stdout.write('  mismatches:         {:>10}'.format(mismatches))
+            if mismatches:
+                raise CommandError('Bulk course grader results differ from per-learner results.')
+
+    @staticmethod
+    def _synthetic_grade_sheet(subsections_by_format, rand, attempted_ratio):
+        """
+        Returns a grade sheet of random subsection grades for the given
+        graded subsections, as in CourseGrade.graded_subsections_by_format.
+        """
+        grade_sheet = {}
+        for subsection_format, subsections in subsections_by_format.iteritems():
+            grade_sheet[subsection_format] = OrderedDict()
+            for subsection in subsections:
+                if rand.random() < attempted_ratio:
+                    subsection_block = subsection['subsection_block']
+                    possible = float(len(subsection['scored_descendants']) or 1)
+                    grade_sheet[subsection_format][subsection_block.location] = _SyntheticSubsectionGrade(
+                        _SyntheticTotal(float(rand.randint(0, int(possible))), possible),
+                        getattr(subsection_block, 'display_name', ''),
+                    )
+        return grade_sheet
@@ -4,6 +4,7 @@ CourseGrade Class
 from abc import abstractmethod
 from collections import OrderedDict, defaultdict
 
+import numpy
 from django.conf import settings
 from lazy import lazy
 
@@ -213,6 +214,44 @@ class CourseGrade(CourseGradeBase):
         self.letter_grade = self._compute_letter_grade(grade_cutoffs, self.percent)
         self.passed = self._compute_passed(grade_cutoffs, self.percent)
 
+    @classmethod
+    def bulk_update(cls, course_grades):
+        """
+        Updates the grades of the given CourseGrades, which must all be
+        for the same course, computing their percentages, letter grades
+        and passed statuses together as arrays.
+
+        The results are exactly equal to those of calling update on
+        each CourseGrade.  Their subsection grades are computed as
+        needed, so callers should prefetch their scores in bulk.
+        """
+        if not course_grades:
+            return
+
+        course = course_grades[0].course_data.course
+        if settings.GENERATE_PROFILE_SCORES:
+            for course_grade in course_grades:
+                course_grade.update()
+            return
+
+        course.set_grading_policy(course.grading_policy)
+        grader_percents = course.grader.bulk_percent(
+            [course_grade.graded_subsections_by_format for course_grade in course_grades]
+        )
+
+        # Rounding is done per grade, since numpy rounds half to even.
+        percents = numpy.array(
+            [cls._compute_percent({'percent': float(grader_percent)}) for grader_percent in grader_percents],
+            dtype=numpy.float64,
+        )
+        letter_grades = cls._bulk_compute_letter_grades(course.grade_cutoffs, percents)
+        passed = cls._bulk_compute_passed(course.grade_cutoffs, percents)
+
+        for index, course_grade in enumerate(course_grades):
+            course_grade.percent = float(percents[index])
+            course_grade.letter_grade = letter_grades[index]
+            course_grade.passed = passed[index]
+
     @lazy
     def attempted(self):
         """
@@ -267,3 +306,35 @@ class CourseGrade(CourseGradeBase):
         nonzero_cutoffs = [cutoff for cutoff in grade_cutoffs.values() if cutoff > 0]
         success_cutoff = min(nonzero_cutoffs) if nonzero_cutoffs else None
         return success_cutoff and percent >= success_cutoff
+
+    @staticmethod
+    def _bulk_compute_letter_grades(grade_cutoffs, percents):
+        """
+        Computes and returns the list of course letter grades for the
+        given array of grade percentages, as in _compute_letter_grade.
+        """
+        letter_grades = [None] * len(percents)
+        unassigned = numpy.ones(len(percents), dtype=bool)
+
+        # Possible grades, sorted in descending order of score
+        descending_grades = sorted(grade_cutoffs, key=lambda x: grade_cutoffs[x], reverse=True)
+        for possible_grade in descending_grades:
+            matches = unassigned & (percents >= grade_cutoffs[possible_grade])
+            for index in numpy.flatnonzero(matches):
+                letter_grades[index] = possible_grade
+            unassigned &= ~matches
+
+        return letter_grades
+
+    @staticmethod
+    def _bulk_compute_passed(grade_cutoffs, percents):
+        """
+        Computes and returns the list of whether each of the given
+        array of grade percentages is a passing grade, as in
+        _compute_passed.
+        """
+        nonzero_cutoffs = [cutoff for cutoff in grade_cutoffs.values() if cutoff > 0]
+        success_cutoff = min(nonzero_cutoffs) if nonzero_cutoffs else None
+        if not success_cutoff:
+            return [success_cutoff] * len(percents)
+        return [bool(passed) for passed in percents >= success_cutoff]
@@ -4,11 +4,13 @@ from logging import getLogger
 
 import dogstats_wrapper as dog_stats_api
 
+from courseware.model_data import ScoresClient
 from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE_GRADE_NOW_PASSED
 
 from ..config import assume_zero_if_absent, should_persist_grades
-from ..config.waffle import WRITE_ONLY_IF_ENGAGED, waffle
-from ..models import PersistentCourseGrade, VisibleBlocks
+from ..config.waffle import BULK_COMPUTE_COURSE_GRADES, WRITE_ONLY_IF_ENGAGED, waffle
+from ..models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
+from ..scores import possibly_scored
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 
@@ -21,6 +23,10 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of students whose grades are computed together when
+    # the BULK_COMPUTE_COURSE_GRADES switch is enabled.
+    BULK_COMPUTE_BATCH_SIZE = 500
+
     def create(self, user, course=None, collected_block_structure=None, course_structure=None, course_key=None):
         """
         Returns the CourseGrade for the given user in the course.
@@ -120,9 +126,16 @@ class CourseGradeFactory(object):
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
         with self._course_transaction(course_data.course_key):
-            for user in users:
-                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
-                    yield self._iter_grade_result(user, course_data, force_update)
+            if waffle().is_enabled(BULK_COMPUTE_COURSE_GRADES):
+                for batch in self._iter_batches(users, self.BULK_COMPUTE_BATCH_SIZE):
+                    with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter_bulk', tags=stats_tags):
+                        results = self._bulk_grade_results(batch, course_data, force_update)
+                    for result in results:
+                        yield result
+            else:
+                for user in users:
+                    with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                        yield self._iter_grade_result(user, course_data, force_update)
 
     def _iter_grade_result(self, user, course_data, force_update):
         try:
@@ -139,15 +152,134 @@ class CourseGradeFactory(object):
             course_grade = method(**kwargs)
             return self.GradeResult(user, course_grade, None)
         except Exception as exc:  # pylint: disable=broad-except
-            # Keep marching on even if this student couldn't be graded for
-            # some reason, but log it for future reference.
-            log.exception(
-                'Cannot grade student %s in course %s because of exception: %s',
-                user.id,
-                course_data.course_key,
-                exc.message
+            return self._error_grade_result(user, course_data, exc)
+
+    def _error_grade_result(self, user, course_data, exc):
+        """
+        Returns a GradeResult for the given user who couldn't be graded
+        because of the given exception.
+        """
+        # Keep marching on even if this student couldn't be graded for
+        # some reason, but log it for future reference.
+        log.exception(
+            'Cannot grade student %s in course %s because of exception: %s',
+            user.id,
+            course_data.course_key,
+            exc.message
+        )
+        return self.GradeResult(user, None, exc)
+
+    @staticmethod
+    def _iter_batches(users, batch_size):
+        """
+        Yields lists of at most batch_size of the given users.
+        """
+        batch = []
+        for user in users:
+            batch.append(user)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _bulk_grade_results(self, users, course_data, force_update):
+        """
+        Returns a list of GradeResults for the given users, equal to
+        those of _iter_grade_result, while reading the users' persisted
+        grades and scores in bulk and computing their course grades
+        together.
+        """
+        course_key = course_data.course_key
+        results = {}
+        grades_to_update = []  # list of (CourseGrade, read_only)
+
+        if not force_update and should_persist_grades(course_key):
+            PersistentCourseGrade.prefetch(course_key, users)
+
+        for user in users:
+            try:
+                user_course_data = CourseData(
+                    user,
+                    course=course_data.course,
+                    collected_block_structure=course_data.collected_structure,
+                    course_key=course_key,
+                )
+                if force_update:
+                    grades_to_update.append(
+                        (CourseGrade(user, user_course_data, force_update_subsections=True), False)
+                    )
+                    continue
+                try:
+                    course_grade, read_policy_hash = self._read(user, user_course_data)
+                    if read_policy_hash == user_course_data.grading_policy_hash:
+                        results[user.id] = self.GradeResult(user, course_grade, None)
+                        continue
+                    read_only = False  # update the persisted grade since the policy changed
+                except PersistentCourseGrade.DoesNotExist:
+                    if assume_zero_if_absent(course_key):
+                        results[user.id] = self.GradeResult(user, self._create_zero(user, user_course_data), None)
+                        continue
+                    read_only = True  # keep the grade un-persisted
+                grades_to_update.append((CourseGrade(user, user_course_data), read_only))
+            except Exception as exc:  # pylint: disable=broad-except
+                results[user.id] = self._error_grade_result(user, course_data, exc)
+
+        self._prefetch_subsection_data(
+            [course_grade for course_grade, _ in grades_to_update], course_data, read_saved_grades=not force_update,
+        )
+
+        # Compute each user's subsection grades, so an error for
+        # one user doesn't prevent computing the others' grades.
+        computed_grades = []
+        for course_grade, read_only in grades_to_update:
+            try:
+                course_grade.graded_subsections_by_format  # pylint: disable=pointless-statement
+                computed_grades.append((course_grade, read_only))
+            except Exception as exc:  # pylint: disable=broad-except
+                results[course_grade.user.id] = self._error_grade_result(course_grade.user, course_data, exc)
+
+        CourseGrade.bulk_update([course_grade for course_grade, _ in computed_grades])
+
+        for course_grade, read_only in computed_grades:
+            user = course_grade.user
+            try:
+                self._save_and_notify(user, course_grade.course_data, course_grade, read_only)
+                results[user.id] = self.GradeResult(user, course_grade, None)
+            except Exception as exc:  # pylint: disable=broad-except
+                results[user.id] = self._error_grade_result(user, course_data, exc)
+
+        return [results[user.id] for user in users]
+
+    @staticmethod
+    def _prefetch_subsection_data(course_grades, course_data, read_saved_grades):
+        """
+        Reads the scores, and optionally the saved subsection grades,
+        of all users of the given CourseGrades in bulk, prefetching them
+        into each CourseGrade's subsection grade factory.
+        """
+        if not course_grades:
+            return
+
+        course_key = course_data.course_key
+        user_ids = [course_grade.user.id for course_grade in course_grades]
+        scorable_locations = [
+            block_key for block_key in course_data.collected_structure if possibly_scored(block_key)
+        ]
+        csm_scores = ScoresClient.create_for_users(course_key, user_ids, scorable_locations)
+
+        saved_subsection_grades = None
+        if read_saved_grades and should_persist_grades(course_key):
+            saved_subsection_grades = {user_id: {} for user_id in user_ids}
+            for record in PersistentSubsectionGrade.bulk_read_grades_for_users(user_ids, course_key):
+                saved_subsection_grades[record.user_id][record.full_usage_key] = record
+
+        for course_grade in course_grades:
+            user_id = course_grade.user.id
+            course_grade._subsection_grade_factory.prefetch(  # pylint: disable=protected-access
+                csm_scores[user_id],
+                saved_subsection_grades[user_id] if saved_subsection_grades is not None else None,
             )
-            return self.GradeResult(user, None, exc)
 
     @staticmethod
     def _create_zero(user, course_data):
@@ -189,7 +321,14 @@ class CourseGradeFactory(object):
         """
         course_grade = CourseGrade(user, course_data, force_update_subsections=force_update_subsections)
         course_grade.update()
+        return CourseGradeFactory._save_and_notify(user, course_data, course_grade, read_only)
 
+    @staticmethod
+    def _save_and_notify(user, course_data, course_grade, read_only):
+        """
+        Saves the given updated CourseGrade, if needed, and sends the
+        signals for the update.
+        """
         should_persist = (
             (not read_only) and  # TODO(TNL-6786) Remove the read_only boolean once all grades are back-filled.
             should_persist_grades(course_data.course_key) and
@@ -54,6 +54,21 @@ class SubsectionGradeFactory(object):
                         self._update_saved_subsection_grade(subsection.location, grade_model)
         return subsection_grade
 
+    def prefetch(self, csm_scores, saved_subsection_grades=None):
+        """
+        Sets the student's scores and saved subsection grades for the
+        course, as read in bulk along with those of other students,
+        instead of lazily querying them.
+
+        Arguments:
+            csm_scores (ScoresClient): The student's scores in the course.
+            saved_subsection_grades (dict): The student's saved
+                PersistentSubsectionGrades, keyed by usage key.
+        """
+        self._csm_scores = csm_scores
+        if saved_subsection_grades is not None:
+            self._cached_subsection_grades = saved_subsection_grades
+
     def bulk_create_unsaved(self):
         """
         Bulk creates all the unsaved subsection_grades to this point.
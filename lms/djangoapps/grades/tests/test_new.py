@@ -13,6 +13,7 @@ from mock import patch
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from courseware.access import has_access
+from courseware.model_data import set_score
 from courseware.tests.test_submitting_problems import ProblemSubmissionTestMixin
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
@@ -24,7 +25,7 @@ from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.utils import TEST_DATA_DIR
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
-from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, WRITE_ONLY_IF_ENGAGED, waffle
+from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, BULK_COMPUTE_COURSE_GRADES, WRITE_ONLY_IF_ENGAGED, waffle
 from ..models import PersistentSubsectionGrade
 from ..new.course_data import CourseData
 from ..new.course_grade import CourseGrade, ZeroCourseGrade
@@ -260,6 +261,29 @@ class TestCourseGradeFactory(GradeTestBase):
         self.assertTrue(desired_call.called)
         self.assertFalse(undesired_call.called)
 
+    @ddt.data(True, False)
+    def test_iter_bulk_compute(self, force_update):
+        users = [self.request.user] + [UserFactory() for _ in range(3)]
+        for index, user in enumerate(users):
+            CourseEnrollment.enroll(user, self.course.id)
+            set_score(user.id, self.problem.location, index % 2, 1)
+
+        with waffle().override(BULK_COMPUTE_COURSE_GRADES, active=True):
+            bulk_results = list(CourseGradeFactory().iter(users=users, course=self.course, force_update=force_update))
+        expected_results = list(CourseGradeFactory().iter(users=users, course=self.course, force_update=True))
+
+        self.assertEqual([result.student for result in bulk_results], users)
+        for bulk_result, expected_result in zip(bulk_results, expected_results):
+            self.assertIsNone(bulk_result.error)
+            self.assertEqual(
+                (bulk_result.course_grade.percent, bulk_result.course_grade.letter_grade, bulk_result.course_grade.passed),
+                (
+                    expected_result.course_grade.percent,
+                    expected_result.course_grade.letter_grade,
+                    expected_result.course_grade.passed,
+                ),
+            )
+
 
 @ddt.ddt
 class TestSubsectionGradeFactory(ProblemSubmissionTestMixin, GradeTestBase):
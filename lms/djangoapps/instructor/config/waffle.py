@@ -0,0 +1,18 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Instructor app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'instructor'
+
+# Switches
+BULK_ENROLLMENT = u'bulk_enrollment'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for Instructor.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Instructor: ')
@@ -6,17 +6,19 @@ Does not include any access control, be sure to check access before calling.
 
 import json
 import logging
+from collections import OrderedDict
 from datetime import datetime
 
 import pytz
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import send_mail
 from django.core.urlresolvers import reverse
 from django.utils.translation import override as override_language
 
 from course_modes.models import CourseMode
-from courseware.models import StudentModule
+from courseware.models import StudentModule, chunks
 from edxmako.shortcuts import render_to_string
 from eventtracking import tracker
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
@@ -25,7 +27,12 @@ from lms.djangoapps.grades.signals.signals import PROBLEM_RAW_SCORE_CHANGED
 from openedx.core.djangoapps.lang_pref import LANGUAGE_KEY
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.djangoapps.user_api.models import UserPreference
-from student.models import CourseEnrollment, CourseEnrollmentAllowed, anonymous_id_for_user
+from student.models import (
+    BULK_ENROLLMENT_CHUNK_SIZE,
+    CourseEnrollment,
+    CourseEnrollmentAllowed,
+    anonymous_id_for_user
+)
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from submissions.models import score_set
 from track.event_transaction_utils import (
@@ -48,7 +55,7 @@ class EmailEnrollmentState(object):
             mode, is_active = CourseEnrollment.enrollment_mode_for_user(user, course_id)
             # is_active is `None` if the user is not enrolled in the course
             exists_ce = is_active is not None and is_active
-            full_name = user.profile.name
+            full_name = _get_full_name(user)
         else:
             mode = None
             exists_ce = False
@@ -64,6 +71,40 @@ class EmailEnrollmentState(object):
         self.full_name = full_name
         self.mode = mode
 
+    @classmethod
+    def for_emails(cls, course_id, emails, users_by_email=None):
+        """
+        Returns the EmailEnrollmentState of each of the given emails, by
+        email, with a few queries for all of them.
+
+        `users_by_email` is the dict of the users with the given emails,
+        by email, if they were already fetched with their profiles.
+        """
+        if users_by_email is None:
+            users_by_email = get_users_by_email(emails)
+        enrollments = {}
+        allowed = {}
+        for emails_chunk in chunks(emails, BULK_ENROLLMENT_CHUNK_SIZE):
+            users = [users_by_email[email] for email in emails_chunk if email in users_by_email]
+            for enrollment in CourseEnrollment.objects.filter(course_id=course_id, user__in=users):
+                enrollments[enrollment.user_id] = enrollment
+            for cea in CourseEnrollmentAllowed.objects.filter(course_id=course_id, email__in=emails_chunk):
+                allowed[cea.email] = cea
+
+        states = {}
+        for email in emails:
+            state = states[email] = cls.__new__(cls)
+            user = users_by_email.get(email)
+            enrollment = enrollments.get(user.id) if user else None
+            cea = allowed.get(email)
+            state.user = user is not None
+            state.enrollment = bool(enrollment and enrollment.is_active)
+            state.allowed = cea is not None
+            state.auto_enroll = bool(cea and cea.auto_enroll)
+            state.full_name = _get_full_name(user) if user else None
+            state.mode = enrollment.mode if enrollment else None
+        return states
+
     def __repr__(self):
         return "{}(user={}, enrollment={}, allowed={}, auto_enroll={})".format(
             self.__class__.__name__,
@@ -90,6 +131,17 @@ class EmailEnrollmentState(object):
         }
 
 
+def _get_full_name(user):
+    """
+    Returns the full name of the given user, or None if the user has no
+    profile.
+    """
+    try:
+        return user.profile.name
+    except ObjectDoesNotExist:
+        return None
+
+
 def get_user_email_language(user):
     """
     Return the language most appropriate for writing emails to user. Returns
@@ -100,6 +152,32 @@ def get_user_email_language(user):
     return UserPreference.get_value(user, LANGUAGE_KEY)
 
 
+def get_users_by_email(emails):
+    """
+    Returns a dict of the users with the given emails, with their profiles,
+    by email.
+    """
+    users_by_email = {}
+    for emails_chunk in chunks(emails, BULK_ENROLLMENT_CHUNK_SIZE):
+        for user in User.objects.filter(email__in=emails_chunk).select_related('profile'):
+            users_by_email[user.email] = user
+    return users_by_email
+
+
+def get_users_email_languages(users):
+    """
+    Returns a dict of the languages most appropriate for writing emails to
+    the given users, as get_user_email_language does for each of them, by
+    user id.  Users without a language preference are left out.
+    """
+    languages = {}
+    for users_chunk in chunks(users, BULK_ENROLLMENT_CHUNK_SIZE):
+        preferences = UserPreference.objects.filter(user__in=users_chunk, key=LANGUAGE_KEY)
+        for user_id, value in preferences.values_list('user_id', 'value'):
+            languages[user_id] = value
+    return languages
+
+
 def enroll_email(course_id, student_email, auto_enroll=False, email_students=False, email_params=None, language=None):
     """
     Enroll a student by email.
@@ -153,6 +231,97 @@ def enroll_email(course_id, student_email, auto_enroll=False, email_students=Fal
     return previous_state, after_state, enrollment_obj
 
 
+def bulk_enroll_email(course_id, student_emails, auto_enroll=False, email_students=False, email_params=None):
+    """
+    Enroll several students by email, as enroll_email does for each of them,
+    with a number of queries that doesn't grow with the number of students.
+
+    `student_emails` is the list of the emails of the students.
+    `auto_enroll` determines what is put in CourseEnrollmentAllowed.auto_enroll
+        for the emails that don't belong to a user yet.
+    `email_students` determines if students should be notified of action by email.
+    `email_params` parameters used while parsing email templates (a `dict`),
+        which is copied for each student.
+
+    returns a dict of the two EmailEnrollmentState's representing the state
+        before and after the action, and the enrollment, of each email that
+        was enrolled, and a dict of the exceptions raised for the others, both
+        by email.
+    """
+    student_emails = list(OrderedDict.fromkeys(student_emails))
+    users_by_email = get_users_by_email(student_emails)
+    previous_states = EmailEnrollmentState.for_emails(course_id, student_emails, users_by_email)
+    errors = {}
+
+    users = []
+    for email in student_emails:
+        user = users_by_email.get(email)
+        if user is None:
+            continue
+        try:
+            user.profile
+        except ObjectDoesNotExist as exc:
+            errors[email] = exc
+        else:
+            users.append(user)
+
+    # White Labels use 'shoppingcart' which is based on the "honor" course_mode,
+    # see enroll_email. Students who are already enrolled keep their mode.
+    if CourseMode.is_white_label(course_id):
+        course_mode = CourseMode.DEFAULT_SHOPPINGCART_MODE_SLUG
+    else:
+        course_mode = None
+    enrollments = CourseEnrollment.bulk_enroll(users, course_id, course_mode)
+
+    allowed_emails = [email for email in student_emails if email not in users_by_email]
+    _allow_enrollments(course_id, allowed_emails, auto_enroll)
+
+    enrolled_emails = [email for email in student_emails if email not in errors]
+    after_states = EmailEnrollmentState.for_emails(course_id, enrolled_emails, users_by_email)
+
+    results = OrderedDict()
+    languages = get_users_email_languages(users) if email_students else {}
+    for email in enrolled_emails:
+        user = users_by_email.get(email)
+        enrollment = enrollments.get(user.id) if user else None
+        if email_students:
+            student_email_params = dict(email_params)
+            student_email_params['email_address'] = email
+            if user:
+                student_email_params['message'] = 'enrolled_enroll'
+                student_email_params['full_name'] = previous_states[email].full_name
+            else:
+                student_email_params['message'] = 'allowed_enroll'
+            try:
+                send_mail_to_student(email, student_email_params, language=languages.get(user.id) if user else None)
+            except Exception as exc:  # pylint: disable=broad-except
+                log.exception(u"Error while sending the enrollment email to %s", email)
+                errors[email] = exc
+                continue
+        results[email] = (previous_states[email], after_states[email], enrollment)
+
+    return results, errors
+
+
+def _allow_enrollments(course_id, emails, auto_enroll):
+    """
+    Allows the given emails, which don't belong to a user, to enroll in the
+    given course, as enroll_email does for each of them.
+    """
+    allowed_emails = set()
+    for emails_chunk in chunks(emails, BULK_ENROLLMENT_CHUNK_SIZE):
+        allowed = CourseEnrollmentAllowed.objects.filter(course_id=course_id, email__in=emails_chunk)
+        allowed.update(auto_enroll=auto_enroll)
+        allowed_emails.update(allowed.values_list('email', flat=True))
+    CourseEnrollmentAllowed.objects.bulk_create(
+        [
+            CourseEnrollmentAllowed(course_id=course_id, email=email, auto_enroll=auto_enroll)
+            for email in emails if email not in allowed_emails
+        ],
+        batch_size=BULK_ENROLLMENT_CHUNK_SIZE
+    )
+
+
 def unenroll_email(course_id, student_email, email_students=False, email_params=None, language=None):
     """
     Unenroll a student by email.
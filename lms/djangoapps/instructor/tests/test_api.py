@@ -45,6 +45,7 @@ from courseware.tests.factories import (
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from django_comment_common.models import FORUM_ROLE_COMMUNITY_TA
 from django_comment_common.utils import seed_permissions_roles
+from lms.djangoapps.instructor.config.waffle import BULK_ENROLLMENT, waffle
 from lms.djangoapps.instructor.tests.utils import FakeContentTask, FakeEmail, FakeEmailInfo
 from lms.djangoapps.instructor.views.api import (
     _split_input_list,
@@ -1164,6 +1165,90 @@ class TestInstructorAPIEnrollment(SharedModuleStoreTestCase, LoginEnrollmentTest
         # Check the outbox
         self.assertEqual(len(mail.outbox), 0)
 
+    def test_bulk_enrollment(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        identifiers = [
+            'percivaloctavius',
+            self.enrolled_student.email,
+            self.notenrolled_student.username,
+            self.allowed_email,
+            self.notregistered_email,
+        ]
+        with waffle().override(BULK_ENROLLMENT, active=True):
+            response = self.client.post(url, {'identifiers': ','.join(identifiers), 'action': 'enroll',
+                                              'email_students': False})
+        self.assertEqual(response.status_code, 200)
+
+        # test the response data
+        not_enrolled_state = {"enrollment": False, "auto_enroll": False, "user": True, "allowed": False}
+        enrolled_state = {"enrollment": True, "auto_enroll": False, "user": True, "allowed": False}
+        allowed_state = {"enrollment": False, "auto_enroll": False, "user": False, "allowed": True}
+        expected = {
+            "action": "enroll",
+            "auto_enroll": False,
+            "results": [
+                {"identifier": 'percivaloctavius', "invalidIdentifier": True},
+                {"identifier": self.enrolled_student.email, "before": enrolled_state, "after": enrolled_state},
+                {"identifier": self.notenrolled_student.username, "before": not_enrolled_state, "after": enrolled_state},
+                {"identifier": self.allowed_email, "before": allowed_state, "after": allowed_state},
+                {
+                    "identifier": self.notregistered_email,
+                    "before": {"enrollment": False, "auto_enroll": False, "user": False, "allowed": False},
+                    "after": allowed_state,
+                },
+            ]
+        }
+        res_json = json.loads(response.content)
+        self.assertEqual(res_json, expected)
+        self.assertTrue(CourseEnrollment.is_enrolled(self.notenrolled_student, self.course.id))
+
+        manual_enrollments = ManualEnrollmentAudit.objects.order_by('id')
+        self.assertEqual(
+            [(audit.enrolled_email, audit.state_transition) for audit in manual_enrollments],
+            [
+                (self.enrolled_student.email, ENROLLED_TO_ENROLLED),
+                (self.notenrolled_student.email, UNENROLLED_TO_ENROLLED),
+                (self.allowed_email, UNENROLLED_TO_ALLOWEDTOENROLL),
+                (self.notregistered_email, UNENROLLED_TO_ALLOWEDTOENROLL),
+            ]
+        )
+
+    def test_bulk_enrollment_user_without_profile(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        user_without_profile = UserFactory()
+        user_without_profile.profile.delete()
+        identifiers = [self.notenrolled_student.email, user_without_profile.username, self.notregistered_email]
+        with waffle().override(BULK_ENROLLMENT, active=True):
+            response = self.client.post(url, {'identifiers': ','.join(identifiers), 'action': 'enroll',
+                                              'email_students': False})
+        self.assertEqual(response.status_code, 200)
+
+        results = json.loads(response.content)['results']
+        self.assertEqual([result['identifier'] for result in results], identifiers)
+        self.assertTrue(results[0]['after']['enrollment'])
+        self.assertEqual(results[1], {'identifier': user_without_profile.username, 'error': True})
+        self.assertTrue(results[2]['after']['allowed'])
+        self.assertEqual(
+            [audit.enrolled_email for audit in ManualEnrollmentAudit.objects.order_by('id')],
+            [self.notenrolled_student.email, self.notregistered_email],
+        )
+
+    def test_bulk_enrollment_falls_back_to_one_by_one(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        identifiers = [self.notenrolled_student.email, 'percivaloctavius', self.notregistered_email]
+        with waffle().override(BULK_ENROLLMENT, active=True):
+            with patch('lms.djangoapps.instructor.views.api.bulk_enroll_email', side_effect=Exception):
+                response = self.client.post(url, {'identifiers': ','.join(identifiers), 'action': 'enroll',
+                                                  'email_students': False})
+        self.assertEqual(response.status_code, 200)
+
+        results = json.loads(response.content)['results']
+        self.assertTrue(results[0]['after']['enrollment'])
+        self.assertEqual(results[1], {'identifier': 'percivaloctavius', 'invalidIdentifier': True})
+        self.assertTrue(results[2]['after']['allowed'])
+        self.assertTrue(CourseEnrollment.is_enrolled(self.notenrolled_student, self.course.id))
+        self.assertEqual(ManualEnrollmentAudit.objects.count(), 2)
+
     @ddt.data('http', 'https')
     def test_enroll_with_email(self, protocol):
         url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id.to_deprecated_string()})
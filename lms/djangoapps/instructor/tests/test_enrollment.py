@@ -9,6 +9,8 @@ from abc import ABCMeta
 import mock
 from ccx_keys.locator import CCXLocator
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import override as override_language
 from django.utils.translation import get_language
 from mock import patch
@@ -23,6 +25,7 @@ from lms.djangoapps.ccx.tests.factories import CcxFactory
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.instructor.enrollment import (
     EmailEnrollmentState,
+    bulk_enroll_email,
     enroll_email,
     get_email_params,
     render_message_to_string,
@@ -221,6 +224,77 @@ class TestInstructorEnrollDB(TestEnrollmentChangeBase):
         return self._run_state_change_test(before_ideal, after_ideal, action)
 
 
+@attr(shard=1)
+class TestInstructorBulkEnrollDB(CacheIsolationTestCase):
+    """ Test instructor.enrollment.bulk_enroll_email """
+    def setUp(self):
+        super(TestInstructorBulkEnrollDB, self).setUp()
+        self.course_key = CourseLocator('Robot', 'fAKE', 'C--se--ID')
+
+    def test_bulk_enroll(self):
+        unenrolled_user = UserFactory()
+        enrolled_user = UserFactory()
+        CourseEnrollment.enroll(enrolled_user, self.course_key, mode='verified')
+        nouser_email = 'robot_no_user_exists_with_this_email@edx.org'
+        allowed_email = 'robot_allowed@edx.org'
+        CourseEnrollmentAllowed.objects.create(email=allowed_email, course_id=self.course_key, auto_enroll=False)
+        emails = [unenrolled_user.email, enrolled_user.email, nouser_email, allowed_email]
+        expected_before = {email: EmailEnrollmentState(self.course_key, email) for email in emails}
+
+        results, errors = bulk_enroll_email(self.course_key, emails, auto_enroll=True)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(list(results), emails)
+        for email in emails:
+            before, after, enrollment = results[email]
+            self.assertEqual(before.to_dict(), expected_before[email].to_dict())
+            self.assertEqual(after.to_dict(), EmailEnrollmentState(self.course_key, email).to_dict())
+        self.assertTrue(results[unenrolled_user.email][1].enrollment)
+        self.assertEqual(results[enrolled_user.email][2].mode, 'verified')
+        self.assertIsNone(results[nouser_email][2])
+        self.assertTrue(results[nouser_email][1].auto_enroll)
+        self.assertTrue(results[allowed_email][1].auto_enroll)
+
+    def test_bulk_enroll_user_without_profile(self):
+        user = UserFactory()
+        user_without_profile = UserFactory()
+        user_without_profile.profile.delete()
+        nouser_email = 'robot_no_user_exists_with_this_email@edx.org'
+        emails = [user.email, user_without_profile.email, nouser_email]
+
+        results, errors = bulk_enroll_email(self.course_key, emails)
+
+        self.assertEqual(list(errors), [user_without_profile.email])
+        self.assertEqual(list(results), [user.email, nouser_email])
+        self.assertTrue(CourseEnrollment.is_enrolled(user, self.course_key))
+        self.assertFalse(CourseEnrollment.is_enrolled(user_without_profile, self.course_key))
+        self.assertIsNone(EmailEnrollmentState(self.course_key, user_without_profile.email).full_name)
+
+    def test_bulk_enroll_queries(self):
+        emails = [UserFactory().email for __ in range(10)]
+        with CaptureQueriesContext(connection) as one_by_one_queries:
+            for email in emails[:5]:
+                enroll_email(self.course_key, email)
+        with CaptureQueriesContext(connection) as bulk_queries:
+            bulk_enroll_email(self.course_key, emails[5:])
+        self.assertLess(len(bulk_queries), len(one_by_one_queries))
+
+    @patch('lms.djangoapps.instructor.enrollment.send_mail_to_student')
+    def test_bulk_enroll_email_students(self, mock_send_mail):
+        user = UserFactory()
+        nouser_email = 'robot_no_user_exists_with_this_email@edx.org'
+        email_params = {'course': 'Robot Super Course'}
+
+        results, __ = bulk_enroll_email(
+            self.course_key, [user.email, nouser_email], email_students=True, email_params=email_params
+        )
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(email_params, {'course': 'Robot Super Course'})
+        messages = {call[0][0]: call[0][1]['message'] for call in mock_send_mail.call_args_list}
+        self.assertEqual(messages, {user.email: 'enrolled_enroll', nouser_email: 'allowed_enroll'})
+
+
 @attr(shard=1)
 class TestInstructorUnenrollDB(TestEnrollmentChangeBase):
     """ Test instructor.enrollment.unenroll_email """
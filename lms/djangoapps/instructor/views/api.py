@@ -14,6 +14,7 @@ import re
 import string
 import StringIO
 import time
+from collections import OrderedDict
 
 import unicodecsv
 from django.conf import settings
@@ -59,7 +60,9 @@ from django_comment_common.models import (
 )
 from edxmako.shortcuts import render_to_string
 from lms.djangoapps.instructor.access import ROLES, allow_access, list_with_level, revoke_access, update_forum_role
+from lms.djangoapps.instructor.config.waffle import BULK_ENROLLMENT, waffle
 from lms.djangoapps.instructor.enrollment import (
+    bulk_enroll_email,
     enroll_email,
     get_email_params,
     get_user_email_language,
@@ -121,6 +124,7 @@ from .tools import (
     dump_student_extensions,
     find_unit,
     get_student_from_identifier,
+    get_students_from_identifiers,
     handle_dashboard_error,
     parse_datetime,
     require_student_from_identifier,
@@ -643,6 +647,16 @@ def students_update_enrollment(request, course_id):
         course = get_course_by_id(course_id)
         email_params = get_email_params(course, auto_enroll, secure=request.is_secure())
 
+    if action == 'enroll' and waffle().is_enabled(BULK_ENROLLMENT):
+        results = _bulk_enroll_students(
+            request, course_id, identifiers, auto_enroll, email_students, email_params, reason
+        )
+        return JsonResponse({
+            'action': action,
+            'results': results,
+            'auto_enroll': auto_enroll,
+        })
+
     results = []
     for identifier in identifiers:
         # First try to get a user object from the identifer
@@ -666,24 +680,7 @@ def students_update_enrollment(request, course_id):
                 before, after, enrollment_obj = enroll_email(
                     course_id, email, auto_enroll, email_students, email_params, language=language
                 )
-                before_enrollment = before.to_dict()['enrollment']
-                before_user_registered = before.to_dict()['user']
-                before_allowed = before.to_dict()['allowed']
-                after_enrollment = after.to_dict()['enrollment']
-                after_allowed = after.to_dict()['allowed']
-
-                if before_user_registered:
-                    if after_enrollment:
-                        if before_enrollment:
-                            state_transition = ENROLLED_TO_ENROLLED
-                        else:
-                            if before_allowed:
-                                state_transition = ALLOWEDTOENROLL_TO_ENROLLED
-                            else:
-                                state_transition = UNENROLLED_TO_ENROLLED
-                else:
-                    if after_allowed:
-                        state_transition = UNENROLLED_TO_ALLOWEDTOENROLL
+                state_transition = _get_enroll_state_transition(before, after, state_transition)
 
             elif action == 'unenroll':
                 before, after = unenroll_email(
@@ -742,6 +739,119 @@ def students_update_enrollment(request, course_id):
     return JsonResponse(response_payload)
 
 
+def _get_enroll_state_transition(before, after, state_transition):
+    """
+    Returns the state transition of the manual enrollment of a student
+    from the given EmailEnrollmentState's before and after the enrollment,
+    or the given state transition if none applies.
+    """
+    if before.user:
+        if after.enrollment:
+            if before.enrollment:
+                state_transition = ENROLLED_TO_ENROLLED
+            else:
+                if before.allowed:
+                    state_transition = ALLOWEDTOENROLL_TO_ENROLLED
+                else:
+                    state_transition = UNENROLLED_TO_ENROLLED
+    else:
+        if after.allowed:
+            state_transition = UNENROLLED_TO_ALLOWEDTOENROLL
+    return state_transition
+
+
+def _bulk_enroll_students(request, course_id, identifiers, auto_enroll, email_students, email_params, reason):
+    """
+    Enroll students by email or username, as students_update_enrollment
+    does for each of them, with a number of queries that doesn't grow with
+    the number of students.
+
+    Returns the results of students_update_enrollment.
+    """
+    students = get_students_from_identifiers(identifiers)
+    emails_by_identifier = OrderedDict()
+    for identifier in identifiers:
+        student = students.get(identifier)
+        email = student.email if student else identifier
+        try:
+            # Use django.core.validators.validate_email to check email address
+            # validity (obviously, cannot check if email actually /exists/,
+            # simply that it is plausibly valid)
+            validate_email(email)  # Raises ValidationError if invalid
+        except ValidationError:
+            email = None
+        emails_by_identifier[identifier] = email
+
+    emails = [email for email in emails_by_identifier.itervalues() if email is not None]
+    try:
+        # Roll back the whole batch if it fails, so that the students can be enrolled one by one.
+        with transaction.atomic():
+            enrollment_results, errors = bulk_enroll_email(
+                course_id, emails, auto_enroll, email_students, email_params
+            )
+    except Exception:  # pylint: disable=broad-except
+        # catch and log any exceptions
+        # so that one error only fails the row of its student.
+        log.exception(u"Error while enrolling students in bulk, enrolling them one by one")
+        enrollment_results, errors = _enroll_students_one_by_one(
+            course_id, emails, students.values(), auto_enroll, email_students, email_params
+        )
+    for email, exc in errors.iteritems():
+        log.error(u"Error while enrolling student %s: %r", email, exc)
+
+    results = []
+    audits = []
+    state_transition = DEFAULT_TRANSITION_STATE
+    for identifier in identifiers:
+        email = emails_by_identifier[identifier]
+        if email is None:
+            # Flag this email as an error if invalid, but continue checking
+            # the remaining in the list
+            results.append({
+                'identifier': identifier,
+                'invalidIdentifier': True,
+            })
+        elif email not in enrollment_results:
+            results.append({
+                'identifier': identifier,
+                'error': True,
+            })
+        else:
+            before, after, enrollment_obj = enrollment_results[email]
+            state_transition = _get_enroll_state_transition(before, after, state_transition)
+            audits.append((email, state_transition, enrollment_obj))
+            results.append({
+                'identifier': identifier,
+                'before': before.to_dict(),
+                'after': after.to_dict(),
+            })
+
+    ManualEnrollmentAudit.bulk_create_manual_enrollment_audits(request.user, audits, reason)
+    return results
+
+
+def _enroll_students_one_by_one(course_id, emails, students, auto_enroll, email_students, email_params):
+    """
+    Enroll students by email with enroll_email, as students_update_enrollment
+    does for each of them, given the students who have an account.
+
+    Returns the results and errors of bulk_enroll_email.
+    """
+    students_by_email = {student.email: student for student in students}
+    enrollment_results = OrderedDict()
+    errors = {}
+    for email in emails:
+        student = students_by_email.get(email)
+        try:
+            enrollment_results[email] = enroll_email(
+                course_id, email, auto_enroll, email_students, dict(email_params),
+                language=get_user_email_language(student) if student else None,
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            errors[email] = exc
+    return enrollment_results, errors
+
+
 @require_POST
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
@@ -8,7 +8,17 @@ from django.db.models import IntegerField
 
 class GradeReportSetting(ConfigurationModel):
     """
-    Sets the batch size used when running grade reports
-    with multiple celery workers.
+    When enabled, course grade reports are run with multiple
+    celery workers, each grading a batch of learners of the
+    given size.
+    """
+    batch_size = IntegerField(default=100)
+
+
+class RescoreSetting(ConfigurationModel):
+    """
+    When enabled, problems are rescored for all learners with
+    multiple celery workers, each rescoring a batch of the given
+    size of the learners' problem states.
     """
     batch_size = IntegerField(default=100)
@@ -270,6 +270,25 @@ class DjangoStorageReportStore(ReportStore):
         output_buffer.seek(0)
         self.store(course_id, filename, output_buffer)
 
+    def exists(self, course_id, filename):
+        """
+        Return whether a file named `filename` is stored for `course_id`.
+        """
+        return self.storage.exists(self.path_to(course_id, filename))
+
+    def open(self, course_id, filename):
+        """
+        Return the stored file named `filename` for `course_id`, opened
+        for reading.
+        """
+        return self.storage.open(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file named `filename` for `course_id`.
+        """
+        self.storage.delete(self.path_to(course_id, filename))
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples.
@@ -27,6 +27,7 @@ from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting, RescoreSetting
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -46,7 +47,9 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     perform_module_state_update,
     override_score_module_state,
+    queue_rescore_subtasks,
     rescore_problem_module_state,
+    rescore_problem_module_states,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
@@ -75,12 +78,26 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    if RescoreSetting.current().enabled:
+        visit_fcn = partial(queue_rescore_subtasks, rescore_problem_subtask, xmodule_instance_args)
+    else:
+        update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+        visit_fcn = partial(perform_module_state_update, update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def rescore_problem_subtask(entry_id, xmodule_instance_args, action_name, student_module_ids, subtask_status_dict):
+    """
+    Rescores one batch of the StudentModules of a problem rescored for all
+    students, as queued by rescore_problem.  The last subtask to finish
+    completes the task.
+    """
+    return rescore_problem_module_states(
+        xmodule_instance_args, entry_id, action_name, student_module_ids, subtask_status_dict
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def override_problem_score(entry_id, xmodule_instance_args):
     """
@@ -183,10 +200,22 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    if GradeReportSetting.current().enabled:
+        task_fn = partial(CourseGradeReport.queue_shards, calculate_grades_csv_shard, xmodule_instance_args)
+    else:
+        task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, xmodule_instance_args, action_name, shard, subtask_status_dict):
+    """
+    Grade the learners in one shard of a course's grade report.  The last
+    shard to be graded pushes the complete report to an S3 bucket for download.
+    """
+    return CourseGradeReport.generate_shard(xmodule_instance_args, entry_id, action_name, shard, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -1,13 +1,18 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
 import re
+import traceback
 from collections import OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, count
 from time import time
+from uuid import uuid4
 
+from celery.states import FAILURE, SUCCESS
+from django.conf import settings
 from lazy import lazy
 from pytz import UTC
 
@@ -29,8 +34,17 @@ from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
+from ..config.models import GradeReportSetting
+from ..models import InstructorTask
+from ..subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    track_memory_usage,
+    update_subtask_status
+)
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import ChunkedCSVUpload, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -75,6 +89,7 @@ class _CourseGradeReportContext(object):
         )
         self.action_name = action_name
         self.course_id = course_id
+        self.entry_id = _entry_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
 
     @lazy
@@ -200,6 +215,95 @@ class CourseGradeReport(object):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def queue_shards(cls, shard_task, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+        """
+        Public method to generate a grade report with multiple celery workers.
+
+        The enrollees are split into shards of consecutive user ids, of the
+        size configured in GradeReportSetting.  Each shard is graded by a
+        `shard_task` subtask, which calls generate_shard.  The last subtask
+        to finish assembles the report from the rows of all shards, in order.
+        """
+        entry = InstructorTask.objects.get(pk=_entry_id)
+
+        # As for bulk emails, the task may be run again if celery loses its
+        # connection to the broker; don't queue another set of subtasks then.
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            TASK_LOG.warning(u'Task %s has already queued its grade report subtasks', entry.task_id)
+            return json.loads(entry.task_output)
+
+        users = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True).order_by('id')
+        total_num_users = users.count()
+        if total_num_users == 0:
+            # There are no shards to grade, so no subtask would complete the report.
+            return cls.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        shard_indices = count()
+
+        def _create_shard_subtask(user_ids, initial_subtask_status):
+            """
+            Creates a subtask to grade the given consecutive users.
+            """
+            shard = {
+                'index': next(shard_indices),
+                'first_user_id': user_ids[0]['pk'],
+                'last_user_id': user_ids[-1]['pk'],
+            }
+            return shard_task.subtask(
+                (
+                    _entry_id,
+                    _xmodule_instance_args,
+                    action_name,
+                    shard,
+                    initial_subtask_status.to_dict(),
+                ),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+
+        return queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_shard_subtask,
+            [users],
+            [],
+            GradeReportSetting.current().batch_size,
+            total_num_users,
+        )
+
+    @classmethod
+    def generate_shard(cls, _xmodule_instance_args, _entry_id, action_name, shard, subtask_status_dict):
+        """
+        Public method to grade the enrollees in the given shard of a grade
+        report queued by queue_shards.  Returns the final status of the
+        subtask, as a dict.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        check_subtask_is_valid(_entry_id, subtask_status.task_id, subtask_status)
+        course_id = InstructorTask.objects.get(pk=_entry_id).course_id
+
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, None, action_name)
+            report = CourseGradeReport()
+            try:
+                upload = ChunkedCSVUpload(context.course_id, report._upload_id(context, shard['index']))
+                report._upload_rows(context, upload, shard)
+            except Exception:
+                TASK_LOG.exception(u'%s, Task type: %s, Failed to grade shard %s', context.task_info_string,
+                                   context.action_name, shard)
+                subtask_status.increment(state=FAILURE)
+                report._complete_shard(context, subtask_status)
+                raise
+
+            subtask_status.increment(
+                succeeded=upload.num_rows('grade_report'),
+                failed=upload.num_rows('grade_report_err'),
+                state=SUCCESS,
+            )
+            report._complete_shard(context, subtask_status)
+        return subtask_status.to_dict()
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -207,16 +311,119 @@ class CourseGradeReport(object):
         context.update_status(u'Starting grades')
         success_headers = self._success_headers(context)
         error_headers = self._error_headers()
-        batched_rows = self._batched_rows(context)
-
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+        upload = ChunkedCSVUpload(context.course_id, self._upload_id(context))
+        self._upload_rows(context, upload)
 
         context.update_status(u'Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+        self._complete_uploads([upload], success_headers, error_headers)
 
         return context.update_status(u'Completed grades')
 
+    def _upload_rows(self, context, upload, shard=None):
+        """
+        Grades the enrollees of this report, or of the given shard of it,
+        and adds the rows of each batch of users as a chunk of the given
+        upload.
+
+        Rows are uploaded as each batch of users is graded, so that memory
+        use is bounded by the batch size rather than the enrollment count.
+        If the task is retried after its worker was interrupted, grading
+        resumes after the last batch that was uploaded.
+        """
+        state = upload.state or {}
+        last_user_id = state.get('last_user_id')
+        max_user_id = None
+        if shard is not None:
+            max_user_id = shard['last_user_id']
+            if last_user_id is None:
+                last_user_id = shard['first_user_id'] - 1
+        if state:
+            TASK_LOG.info(
+                u'%s, Task type: %s, Resuming after user %s',
+                context.task_info_string,
+                context.action_name,
+                last_user_id,
+            )
+        self._update_progress(context, upload)
+
+        context.update_status(u'Compiling grades')
+        for last_user_id, (success_rows, error_rows) in self._batched_rows(context, last_user_id, max_user_id):
+            upload.add_chunk(
+                {'grade_report': success_rows, 'grade_report_err': error_rows},
+                {'last_user_id': last_user_id},
+            )
+            self._update_progress(context, upload)
+            context.update_status(u'Compiling grades')
+
+    def _complete_uploads(self, uploads, success_headers, error_headers):
+        """
+        Assembles the report files from the rows of the given uploads,
+        in order, and deletes the uploaded chunks.
+        """
+        ChunkedCSVUpload.complete_all(uploads, 'grade_report', [success_headers])
+        ChunkedCSVUpload.complete_all(uploads, 'grade_report_err', [error_headers], upload_if_empty=False)
+        for upload in uploads:
+            upload.cleanup()
+
+    def _complete_shard(self, context, subtask_status):
+        """
+        Records the final status of a shard's subtask.  If it is the last
+        subtask to finish, assembles the report from the rows of all shards
+        and completes the InstructorTask.
+        """
+        all_shards_done = update_subtask_status(
+            context.entry_id,
+            subtask_status.task_id,
+            subtask_status,
+            complete_task=False,
+        )
+        if not all_shards_done:
+            return
+
+        entry = InstructorTask.objects.get(pk=context.entry_id)
+        subtasks = json.loads(entry.subtasks)
+        uploads = [
+            ChunkedCSVUpload(context.course_id, self._upload_id(context, shard_index))
+            for shard_index in xrange(subtasks['total'])
+        ]
+        try:
+            if subtasks['failed']:
+                raise ValueError(u'{failed} of {total} grade report subtasks failed'.format(**subtasks))
+            context.update_status(u'Uploading grades')
+            self._complete_uploads(uploads, self._success_headers(context), self._error_headers())
+        except Exception as exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(u'%s, Task type: %s, Failed to complete grades', context.task_info_string,
+                               context.action_name)
+            for upload in uploads:
+                upload.cleanup()
+            entry.task_output = InstructorTask.create_output_for_failure(exception, traceback.format_exc())
+            entry.task_state = FAILURE
+        else:
+            TASK_LOG.info(u'%s, Task type: %s, Completed grades', context.task_info_string, context.action_name)
+            entry.task_state = SUCCESS
+        entry.save_now()
+
+    def _upload_id(self, context, shard_index=None):
+        """
+        Returns the identifier of the chunked upload for the given context,
+        and shard of it, if any.  Uploads are tied to their InstructorTask
+        entry, so that a retried task resumes its own upload.
+        """
+        if context.entry_id is None:
+            return uuid4().hex
+        if shard_index is not None:
+            return u'grade_report_{}_{}'.format(context.entry_id, shard_index)
+        return u'grade_report_{}'.format(context.entry_id)
+
+    def _update_progress(self, context, upload):
+        """
+        Updates the metrics on task status from the rows uploaded so far.
+        """
+        context.task_progress.succeeded = upload.num_rows('grade_report')
+        context.task_progress.failed = upload.num_rows('grade_report_err')
+        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
+        context.task_progress.total = context.task_progress.attempted
+
     def _success_headers(self, context):
         """
         Returns a list of all applicable column headers for this grade report.
@@ -238,40 +445,16 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
-        """
-        A generator of batches of (success_rows, error_rows) for this report.
-        """
-        for users in self._batch_users(context):
-            users = filter(lambda u: u is not None, users)
-            yield self._rows_for_users(context, users)
-
-    def _compile(self, context, batched_rows):
+    def _batched_rows(self, context, last_user_id=None, max_user_id=None):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        A generator of (last_user_id, (success_rows, error_rows)) for each
+        batch of users in this report, starting after the given user id
+        and up to the given maximum user id, if any.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = izip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
-
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
-        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
-        context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
-
-    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
-        """
-        Creates and uploads a CSV for the given headers and rows.
-        """
-        date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
-        if len(error_rows) > 0:
-            error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+        for users in self._batch_users(context, last_user_id, max_user_id):
+            with track_memory_usage('instructor_task.grade_report.batch.memory', context.course_id):
+                rows = self._rows_for_users(context, users)
+            yield users[-1].id, rows
 
     def _grades_header(self, context):
         """
@@ -285,17 +468,27 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, last_user_id=None, max_user_id=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of users, in order of user id,
+        starting after the given user id and up to the given maximum user
+        id, if any.  Each batch is fetched with its own query, so only one
+        batch of users is held in memory at a time.
         """
-        def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
-            args = [iter(iterable)] * chunk_size
-            return izip_longest(*args, fillvalue=fillvalue)
-
         users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
-        users = users.select_related('profile__allow_certificate')
-        return grouper(users)
+        users = users.select_related('profile__allow_certificate').order_by('id')
+        if max_user_id is not None:
+            users = users.filter(id__lte=max_user_id)
+        while True:
+            if last_user_id is not None:
+                batch = list(users.filter(id__gt=last_user_id)[:self.USER_BATCH_SIZE])
+            else:
+                batch = list(users[:self.USER_BATCH_SIZE])
+            if batch:
+                yield batch
+            if len(batch) < self.USER_BATCH_SIZE:
+                return
+            last_user_id = batch[-1].id
 
     def _user_grade_results(self, course_grade, context):
         """
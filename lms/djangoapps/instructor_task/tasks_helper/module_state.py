@@ -3,8 +3,10 @@ Instructor Tasks related to module state.
 """
 import json
 import logging
+from functools import partial
 from time import time
 
+from celery.states import FAILURE, SUCCESS
 from django.contrib.auth.models import User
 from opaque_keys.edx.keys import UsageKey
 from xblock.runtime import KvsFieldData
@@ -26,7 +28,10 @@ from xmodule.modulestore.django import modulestore
 from xblock.runtime import KvsFieldData
 from xblock.scorable import Score, ScorableXBlockMixin
 from xmodule.modulestore.django import modulestore
+from ..config.models import RescoreSetting
 from ..exceptions import UpdateProblemModuleStateError
+from ..models import InstructorTask
+from ..subtasks import SubtaskStatus, check_subtask_is_valid, queue_subtasks_for_query, update_subtask_status
 from .runner import TaskProgress
 from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED, UPDATE_STATUS_SUCCEEDED
 
@@ -73,25 +78,8 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
     student_identifier = task_input.get('student')
-    problems = {}
-
-    # if problem_url is present make a usage key from it
-    if problem_url:
-        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
-        usage_keys.append(usage_key)
-
-        # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[unicode(usage_key)] = problem_descriptor
-
-    # if entrance_exam is present grab all problems in it
-    if entrance_exam_url:
-        problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+    usage_keys, problems = _get_problems_for_task(course_id, task_input)
 
     # find the modules in question
     modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key__in=usage_keys)
@@ -137,12 +125,167 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     return task_progress.update_task_state()
 
 
+def _get_problems_for_task(course_id, task_input):
+    """
+    Returns the usage keys of the problems of the task with the given
+    `task_input`, and a dict of their descriptors by usage key string.
+
+    The problems are either the problem at `problem_url`, or all the
+    problems in the entrance exam at `entrance_exam_url`.
+    """
+    usage_keys = []
+    problem_url = task_input.get('problem_url')
+    entrance_exam_url = task_input.get('entrance_exam_url')
+    problems = {}
+
+    # if problem_url is present make a usage key from it
+    if problem_url:
+        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
+        usage_keys.append(usage_key)
+
+        # find the problem descriptor:
+        problem_descriptor = modulestore().get_item(usage_key)
+        problems[unicode(usage_key)] = problem_descriptor
+
+    # if entrance_exam is present grab all problems in it
+    if entrance_exam_url:
+        problems = get_problems_in_section(entrance_exam_url)
+        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+
+    return usage_keys, problems
+
+
+def queue_rescore_subtasks(rescore_subtask, xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Rescores the problems of the task for all students with multiple celery
+    workers.
+
+    The StudentModules of the problems are split into batches of the size
+    configured in RescoreSetting, and each batch is rescored by a
+    `rescore_subtask` subtask, which calls rescore_problem_module_states.
+    Rescoring the problem of a single student is done in this task, with
+    perform_module_state_update.
+    """
+    if task_input.get('student') is not None:
+        update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+        return perform_module_state_update(update_fcn, None, entry_id, course_id, task_input, action_name)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As for bulk emails, the task may be run again if celery loses its
+    # connection to the broker; don't queue another set of subtasks then.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u'Task %s has already queued its rescore subtasks', entry.task_id)
+        return json.loads(entry.task_output)
+
+    usage_keys, __ = _get_problems_for_task(course_id, task_input)
+    modules_to_update = StudentModule.objects.filter(
+        course_id=course_id, module_state_key__in=usage_keys
+    ).order_by('id')
+    total_num_modules = modules_to_update.count()
+    if total_num_modules == 0:
+        # There are no batches to rescore, so no subtask would complete the task.
+        return TaskProgress(action_name, 0, time()).update_task_state()
+
+    def _create_rescore_subtask(student_modules, initial_subtask_status):
+        """
+        Creates a subtask to rescore the given StudentModules.
+        """
+        return rescore_subtask.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                action_name,
+                [student_module['pk'] for student_module in student_modules],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_rescore_subtask,
+        [modules_to_update],
+        [],
+        RescoreSetting.current().batch_size,
+        total_num_modules,
+    )
+
+
+def rescore_problem_module_states(xmodule_instance_args, entry_id, action_name, student_module_ids,
+                                  subtask_status_dict):
+    """
+    Rescores the StudentModules with the given ids, as a subtask queued by
+    queue_rescore_subtasks.  Returns the final status of the subtask, as a
+    dict.
+
+    The course and the problem descriptors are loaded once for the batch,
+    the StudentModules are fetched with their students in a single query,
+    and the module of each student is then instantiated from the state of
+    its StudentModule, without querying it again.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    check_subtask_is_valid(entry_id, subtask_status.task_id, subtask_status)
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_input = json.loads(entry.task_input)
+
+    try:
+        with modulestore().bulk_operations(course_id):
+            course = get_course_by_id(course_id)
+            __, problems = _get_problems_for_task(course_id, task_input)
+            student_modules = StudentModule.objects.filter(
+                pk__in=student_module_ids
+            ).select_related('student').order_by('id')
+
+            for student_module in student_modules:
+                module_descriptor = problems[unicode(student_module.module_state_key)]
+                field_data_cache = FieldDataCache.cache_for_student_module(
+                    course_id, student_module.student, module_descriptor, student_module
+                )
+                with dog_stats_api.timer(
+                    'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]
+                ):
+                    update_status = rescore_problem_module_state(
+                        xmodule_instance_args,
+                        module_descriptor,
+                        student_module,
+                        task_input,
+                        course=course,
+                        field_data_cache=field_data_cache,
+                    )
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    subtask_status.increment(succeeded=1)
+                elif update_status == UPDATE_STATUS_FAILED:
+                    subtask_status.increment(failed=1)
+                elif update_status == UPDATE_STATUS_SKIPPED:
+                    # Skipped modules are attempted too, as in perform_module_state_update.
+                    subtask_status.increment(skipped=1)
+                    subtask_status.attempted += 1
+                else:
+                    raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    except Exception:
+        TASK_LOG.exception(u'Task %s, subtask %s: failed to rescore problems', entry.task_id, subtask_status.task_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @outer_atomic
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input,
+                                 course=None, field_data_cache=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
     performs rescoring on the student's problem submission.
 
+    The `course` and the `field_data_cache` of the student's module are
+    loaded if they aren't given.
+
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support rescoring.
@@ -156,17 +299,16 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     usage_key = student_module.module_state_key
 
     with modulestore().bulk_operations(course_id):
-        course = get_course_by_id(course_id)
-        # TODO: Here is a call site where we could pass in a loaded course.  I
-        # think we certainly need it since grading is happening here, and field
-        # overrides would be important in handling that correctly
+        if course is None:
+            course = get_course_by_id(course_id)
         instance = _get_module_instance_for_task(
             course_id,
             student,
             module_descriptor,
             xmodule_instance_args,
             grade_bucket_type='rescore',
-            course=course
+            course=course,
+            field_data_cache=field_data_cache,
         )
 
         if instance is None:
@@ -347,16 +489,19 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None, course=None):
+                                  grade_bucket_type=None, course=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    The student's field data is loaded in a new FieldDataCache, unless a `field_data_cache` is given.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
     student_data = KvsFieldData(DjangoKeyValueStore(field_data_cache))
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
@@ -1,4 +1,15 @@
+import csv
+import json
+import os.path
+import shutil
+from datetime import datetime
+from io import BytesIO
+from tempfile import TemporaryFile
+
+from django.core.files.base import ContentFile
 from eventtracking import tracker
+from pytz import UTC
+
 from lms.djangoapps.instructor_task.models import ReportStore
 from util.file import course_filename_prefix_generator
 
@@ -28,18 +39,204 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
         course_id: ID of the course
     """
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    report_store.store_rows(course_id, _report_filename(course_id, csv_name, timestamp), rows)
     tracker_emit(csv_name)
 
 
+def _report_filename(course_id, csv_name, timestamp):
+    """
+    Returns the name of the CSV file to upload for the given report.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
+class ChunkedCSVUpload(object):
+    """
+    Uploads one or more CSVs to the ReportStore incrementally, one chunk
+    of rows at a time, so that the complete set of rows never needs to be
+    held in memory.
+
+    Each chunk is stored as a separate part file, alongside a manifest
+    that records the stored chunks and caller-provided state.  An upload
+    created again with the same `upload_id` (for example, when a task is
+    retried after its worker was restarted) picks up from the last
+    chunk recorded in the manifest.  Once all chunks are added, each
+    CSV is assembled from its parts by `complete`.
+    """
+    MANIFEST_FILENAME = u'manifest.json'
+    TIMESTAMP_FORMAT = "%Y-%m-%d-%H%M%S"
+
+    def __init__(self, course_id, upload_id, config_name='GRADES_DOWNLOAD'):
+        self.course_id = course_id
+        self.report_store = ReportStore.from_config(config_name)
+        self.parts_dir = u'parts_{}'.format(upload_id)
+        self.manifest = self._read_manifest() or {
+            'timestamp': datetime.now(UTC).strftime(self.TIMESTAMP_FORMAT),
+            'chunks': [],
+            'state': None,
+        }
+
+    @property
+    def state(self):
+        """
+        The state recorded with the last chunk added to this upload,
+        or None if no chunks were added yet.
+        """
+        return self.manifest['state']
+
+    @property
+    def timestamp(self):
+        """
+        The datetime at which this upload was first started.
+        """
+        return UTC.localize(datetime.strptime(self.manifest['timestamp'], self.TIMESTAMP_FORMAT))
+
+    def add_chunk(self, rows_by_csv_name, state):
+        """
+        Stores the next chunk of rows for each CSV and records the given
+        state with it.
+
+        Arguments:
+            rows_by_csv_name (dict): Maps the name of each CSV to the
+                list of rows to append to it.
+            state: JSON-serializable data to return as `state` when this
+                upload is resumed.
+        """
+        chunk_index = len(self.manifest['chunks'])
+        row_counts = {}
+        for csv_name, rows in rows_by_csv_name.iteritems():
+            if rows:
+                self._store(self._part_filename(csv_name, chunk_index), ContentFile(self._csv_content(rows)))
+                row_counts[csv_name] = len(rows)
+        self.manifest['chunks'].append(row_counts)
+        self.manifest['state'] = state
+        self._store(self.MANIFEST_FILENAME, ContentFile(json.dumps(self.manifest)))
+
+    def num_rows(self, csv_name):
+        """
+        Returns the number of rows added so far to the given CSV.
+        """
+        return sum(row_counts.get(csv_name, 0) for row_counts in self.manifest['chunks'])
+
+    def complete(self, csv_name, header_rows, upload_if_empty=True):
+        """
+        Assembles the given header rows and all chunks of the given CSV
+        into the final report file.  Returns whether the report was
+        uploaded.
+
+        Arguments:
+            csv_name (unicode): Name of the resulting CSV.
+            header_rows (list): Rows to write before the added rows.
+            upload_if_empty (bool): Whether to upload the report when no
+                rows were added to it.
+        """
+        return self.complete_all([self], csv_name, header_rows, upload_if_empty)
+
+    @classmethod
+    def complete_all(cls, uploads, csv_name, header_rows, upload_if_empty=True):
+        """
+        Assembles the given header rows and all chunks of the given CSV
+        from each of the given uploads, in order, into a single report
+        file named after the first upload.  Returns whether the report
+        was uploaded.
+
+        Arguments:
+            uploads (list): ChunkedCSVUploads of the same course.
+            csv_name (unicode): Name of the resulting CSV.
+            header_rows (list): Rows to write before the added rows.
+            upload_if_empty (bool): Whether to upload the report when no
+                rows were added to it.
+        """
+        if not upload_if_empty and not any(upload.num_rows(csv_name) for upload in uploads):
+            return False
+
+        first_upload = uploads[0]
+        with TemporaryFile() as report_file:
+            report_file.write(first_upload._csv_content(header_rows))  # pylint: disable=protected-access
+            for upload in uploads:
+                upload._copy_parts(csv_name, report_file)  # pylint: disable=protected-access
+            report_file.seek(0)
+            first_upload.report_store.store(
+                first_upload.course_id,
+                _report_filename(first_upload.course_id, csv_name, first_upload.timestamp),
+                report_file,
+            )
+        tracker_emit(csv_name)
+        return True
+
+    def cleanup(self):
+        """
+        Deletes all part files and the manifest of this upload.
+        """
+        for chunk_index, row_counts in enumerate(self.manifest['chunks']):
+            for csv_name in row_counts:
+                self._delete(self._part_filename(csv_name, chunk_index))
+        self._delete(self.MANIFEST_FILENAME)
+
+    def _copy_parts(self, csv_name, report_file):
+        """
+        Copies the content of all chunks of the given CSV to the given file.
+        """
+        for chunk_index, row_counts in enumerate(self.manifest['chunks']):
+            if csv_name in row_counts:
+                part_file = self.report_store.open(
+                    self.course_id,
+                    os.path.join(self.parts_dir, self._part_filename(csv_name, chunk_index)),
+                )
+                try:
+                    shutil.copyfileobj(part_file, report_file)
+                finally:
+                    part_file.close()
+
+    def _read_manifest(self):
+        """
+        Returns the stored manifest of this upload, or None if there is none.
+        """
+        filename = os.path.join(self.parts_dir, self.MANIFEST_FILENAME)
+        if not self.report_store.exists(self.course_id, filename):
+            return None
+        manifest_file = self.report_store.open(self.course_id, filename)
+        try:
+            return json.load(manifest_file)
+        finally:
+            manifest_file.close()
+
+    def _part_filename(self, csv_name, chunk_index):
+        """
+        Returns the filename, relative to the parts directory, of the
+        given chunk of the given CSV.
+        """
+        return u'{}_{:06d}.csv'.format(csv_name, chunk_index)
+
+    def _store(self, filename, content):
+        """
+        Stores the given content in the parts directory, replacing any
+        existing file of the same name left over from an interrupted run.
+        """
+        self._delete(filename)
+        self.report_store.store(self.course_id, os.path.join(self.parts_dir, filename), content)
+
+    def _delete(self, filename):
+        """
+        Deletes the given file from the parts directory, if it exists.
+        """
+        filename = os.path.join(self.parts_dir, filename)
+        if self.report_store.exists(self.course_id, filename):
+            self.report_store.delete(self.course_id, filename)
+
+    def _csv_content(self, rows):
+        """
+        Returns the given rows as utf-8 encoded CSV content.
+        """
+        content = BytesIO()
+        csv.writer(content).writerows(self.report_store._get_utf8_encoded_rows(rows))  # pylint: disable=protected-access
+        return content.getvalue()
+
+
 def tracker_emit(report_name):
     """
     Emits a 'report.requested' event for the given report.
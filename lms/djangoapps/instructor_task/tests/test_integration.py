@@ -27,6 +27,7 @@ from lms.djangoapps.instructor_task.api import (
     submit_rescore_problem_for_student,
     submit_reset_problem_attempts_for_all_students
 )
+from lms.djangoapps.instructor_task.config.models import RescoreSetting
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport
 from lms.djangoapps.instructor_task.tests.test_base import (
@@ -218,6 +219,53 @@ class TestRescoringTask(TestIntegrationTask):
             problem_edit, new_expected_scores, new_expected_max, rescore_if_higher=False,
         )
 
+    @ddt.data(
+        RescoreTestData(edit=dict(correct_answer=OPTION_2), new_expected_scores=(0, 1, 1, 2), new_expected_max=2),
+        RescoreTestData(edit=dict(num_inputs=2), new_expected_scores=(2, 1, 1, 0), new_expected_max=4),
+    )
+    @ddt.unpack
+    def test_rescoring_in_subtasks(self, problem_edit, new_expected_scores, new_expected_max):
+        """
+        Run rescore scenario with the problem rescored for all students in
+        batches by subtasks.
+        """
+        RescoreSetting.objects.create(enabled=True, batch_size=3)
+        self.verify_rescore_results(
+            problem_edit, new_expected_scores, new_expected_max, rescore_if_higher=False,
+        )
+        instructor_task = InstructorTask.objects.filter(task_type='rescore_problem').latest('id')
+        self.assertEqual(instructor_task.task_state, SUCCESS)
+        self.assertEqual(json.loads(instructor_task.subtasks)['total'], 2)
+        self.assertDictContainsSubset(
+            {'attempted': 4, 'succeeded': 4, 'failed': 0, 'total': 4},
+            json.loads(instructor_task.task_output),
+        )
+
+    def test_rescoring_in_subtasks_without_answer(self):
+        """
+        Test that problems without answers are counted as attempted and
+        skipped when rescored by subtasks, as when rescored by the task.
+        """
+        RescoreSetting.objects.create(enabled=True, batch_size=3)
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        StudentModule.objects.create(
+            student=self.user2,
+            course_id=self.course.id,
+            module_state_key=InstructorTaskModuleTestCase.problem_location(problem_url_name),
+            module_type='problem',
+            state='{}',
+        )
+
+        self.submit_rescore_all_student_answers('instructor', problem_url_name)
+        instructor_task = InstructorTask.objects.filter(task_type='rescore_problem').latest('id')
+        self.assertEqual(instructor_task.task_state, SUCCESS)
+        self.assertDictContainsSubset(
+            {'attempted': 2, 'succeeded': 1, 'skipped': 1, 'failed': 0, 'total': 2},
+            json.loads(instructor_task.task_output),
+        )
+
     @ddt.data(
         RescoreTestData(edit=dict(), new_expected_scores=(2, 1, 1, 0), new_expected_max=2),
         RescoreTestData(edit=dict(correct_answer=OPTION_2), new_expected_scores=(2, 1, 1, 2), new_expected_max=2),
@@ -49,6 +49,22 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_exists_open_delete(self):
+        """
+        Test that stored files can be checked for, read back and deleted.
+        """
+        report_store = self.create_report_store()
+        self.assertFalse(report_store.exists(self.course_id, 'parts/file'))
+
+        report_store.store(self.course_id, 'parts/file', StringIO('contents'))
+        self.assertTrue(report_store.exists(self.course_id, 'parts/file'))
+        stored_file = report_store.open(self.course_id, 'parts/file')
+        self.assertEqual(stored_file.read(), 'contents')
+        stored_file.close()
+
+        report_store.delete(self.course_id, 'parts/file')
+        self.assertFalse(report_store.exists(self.course_id, 'parts/file'))
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
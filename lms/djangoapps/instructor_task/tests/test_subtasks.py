@@ -1,11 +1,19 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
+from celery.states import SUCCESS
 from mock import Mock, patch
 
-from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
+from lms.djangoapps.instructor_task.models import PROGRESS
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    initialize_subtask_info,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskCourseTestCase
 from student.models import CourseEnrollment
@@ -79,3 +87,24 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def test_update_subtask_status_without_completing_task(self):
+        """Test update_subtask_status() leaves the task in progress after its last subtask if asked to."""
+
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+        subtask_ids = [str(uuid4()) for _ in range(2)]
+        initialize_subtask_info(instructor_task, 'action_name', 2, subtask_ids)
+
+        for subtask_id, expected_all_done in zip(subtask_ids, [False, True]):
+            subtask_status = SubtaskStatus.create(subtask_id, succeeded=1, state=SUCCESS)
+            all_done = update_subtask_status(instructor_task.id, subtask_id, subtask_status, complete_task=False)
+            self.assertEqual(all_done, expected_all_done)
+
+        instructor_task.refresh_from_db()
+        self.assertEqual(instructor_task.task_state, PROGRESS)
+        self.assertEqual(json.loads(instructor_task.task_output)['succeeded'], 2)
@@ -8,14 +8,17 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 import tempfile
 import urllib
 from datetime import datetime
+from uuid import uuid4
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -33,6 +36,8 @@ from courseware.tests.factories import InstructorFactory
 from instructor_analytics.basic import UNAVAILABLE
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_shard
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_enrollment_report,
@@ -52,6 +57,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_course_survey_report,
     upload_ora2_data
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -422,6 +428,102 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
             {'attempted': expected_students, 'succeeded': expected_students, 'failed': 0}, result
         )
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    @patch.object(CourseGradeReport, 'USER_BATCH_SIZE', 1)
+    def test_resume_after_interruption(self, _mock_current_task):
+        """
+        Test that a grade report interrupted after uploading some batches
+        of users resumes after the last uploaded batch when retried.
+        """
+        students = [self.create_student(u'student{}'.format(index)) for index in range(3)]
+        rows_for_users = CourseGradeReport._rows_for_users.__func__  # pylint: disable=no-member
+
+        def interrupt_second_batch(report, context, users):
+            """
+            Fails the report on the second batch of users.
+            """
+            if mock_rows_for_users.call_count > 1:
+                raise Exception('Worker lost')
+            return rows_for_users(report, context, users)
+
+        with patch.object(CourseGradeReport, '_rows_for_users', autospec=True) as mock_rows_for_users:
+            mock_rows_for_users.side_effect = interrupt_second_batch
+            with self.assertRaises(Exception):
+                CourseGradeReport.generate(None, 42, self.course.id, None, 'graded')
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
+        with patch.object(CourseGradeReport, '_rows_for_users', autospec=True) as mock_rows_for_users:
+            mock_rows_for_users.side_effect = rows_for_users
+            result = CourseGradeReport.generate(None, 42, self.course.id, None, 'graded')
+
+        self.assertEqual(
+            [call_args[0][2] for call_args in mock_rows_for_users.call_args_list],
+            [[students[1]], [students[2]]],
+        )
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        self.verify_rows_in_csv(
+            [{'Username': student.username} for student in students],
+            ignore_other_columns=True,
+        )
+        self.assertFalse(report_store.exists(self.course.id, 'parts_grade_report_42/manifest.json'))
+
+    def _queue_grade_report_shards(self):
+        """
+        Queues a sharded grade report for the test course, running its
+        subtasks eagerly, and returns its updated InstructorTask entry.
+        """
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            CourseGradeReport.queue_shards(calculate_grades_csv_shard, {}, entry.id, self.course.id, None, 'graded')
+        entry.refresh_from_db()
+        return entry
+
+    def test_sharded_report(self):
+        """
+        Test that a grade report graded in shards by subtasks is assembled
+        into a single report with the rows of all shards, in order.
+        """
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        students = [self.create_student(u'student{}'.format(index)) for index in range(5)]
+
+        entry = self._queue_grade_report_shards()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0, 'total': 5},
+            json.loads(entry.task_output),
+        )
+        self.verify_rows_in_csv(
+            [{'Username': student.username} for student in students],
+            ignore_other_columns=True,
+        )
+
+    @patch.object(CourseGradeReport, '_rows_for_users')
+    def test_sharded_report_failure(self, mock_rows_for_users):
+        """
+        Test that a sharded grade report fails without uploading a report
+        if any of its shards could not be graded.
+        """
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        for index in range(5):
+            self.create_student(u'student{}'.format(index))
+        mock_rows_for_users.side_effect = [([], []), Exception('Cannot grade shard'), ([], [])]
+
+        entry = self._queue_grade_report_shards()
+
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertIn(u'1 of 3 grade report subtasks failed', json.loads(entry.task_output)['message'])
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
 
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
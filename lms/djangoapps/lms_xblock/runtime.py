@@ -16,7 +16,7 @@ from xmodule.library_tools import LibraryToolsService
 from xmodule.modulestore.django import ModuleI18nService, modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.services import SettingsService
-from xmodule.x_module import ModuleSystem
+from xmodule.x_module import STUDENT_VIEW, ModuleSystem
 
 
 def handler_url(block, handler_name, suffix='', query='', thirdparty=False):
@@ -147,8 +147,36 @@ class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
         if badges_enabled():
             services['badging'] = BadgingService(course_id=kwargs.get('course_id'), modulestore=store)
         self.request_token = kwargs.pop('request_token', None)
+        self.fragment_cache = kwargs.pop('fragment_cache', None)
         super(LmsModuleSystem, self).__init__(**kwargs)
 
+    def render(self, block, view_name, context=None):
+        """
+        Renders the view of the block, taking the student view of the blocks
+        that are the same for all users from the fragment cache, if any.
+
+        See :method:`xblock.runtime:Runtime.render`
+        """
+        if (
+                self.fragment_cache is None or
+                view_name != STUDENT_VIEW or
+                not self.fragment_cache.is_cacheable(block) or
+                self.applicable_aside_types(block)
+        ):
+            return super(LmsModuleSystem, self).render(block, view_name, context)
+
+        frag = self.fragment_cache.get(block)
+        if frag is None:
+            # Cache the fragment before its urls are rewritten.
+            wrappers = self.wrappers
+            self.wrappers = [wrapper for wrapper in wrappers if wrapper not in self.fragment_cache.url_wrappers]
+            try:
+                frag = super(LmsModuleSystem, self).render(block, view_name, context)
+            finally:
+                self.wrappers = wrappers
+            self.fragment_cache.set(block, frag)
+        return self.fragment_cache.rewrite_urls(block, view_name, frag, context)
+
     def handler_url(self, *args, **kwargs):
         """
         Implement the XBlock runtime handler_url interface.
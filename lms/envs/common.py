@@ -451,6 +451,8 @@ NODE_PATH = ':'.join(node_paths)
 # For geolocation ip database
 GEOIP_PATH = REPO_ROOT / "common/static/data/geoip/GeoIP.dat"
 GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
+# Maximum number of IP addresses whose country is cached by each process
+GEOIP_CACHE_SIZE = 10000
 
 # Where to look for a status message
 STATUS_MESSAGE_PATH = ENV_ROOT / "status_message.json"
@@ -511,6 +513,10 @@ OAUTH2_PROVIDER_APPLICATION_MODEL = 'oauth2_provider.Application'
 # TODO: Move the Mako templating into a different engine in TEMPLATES below.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_lms')
+# Whether to load all the Mako templates at startup, rather than on their
+# first request, compiling those that weren't compiled into MAKO_MODULE_DIR
+# ahead of time by the compile_mako_templates management command.
+MAKO_WARM_UP_TEMPLATES = False
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -816,6 +822,15 @@ MODULESTORE = {
     }
 }
 
+# Node-local disk cache of the course assets served by the contentserver that
+# are too large for the course_assets cache.  When DIRECTORY is None, these
+# assets are streamed from the contentstore on every request.
+COURSE_ASSETS_DISK_CACHE = {
+    'DIRECTORY': None,
+    # Maximum total size of the cached assets, in bytes.
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -1228,6 +1243,9 @@ MIDDLEWARE_CLASSES = (
     # to redirected unenrolled students to the course info page
     'courseware.middleware.RedirectMiddleware',
 
+    # Saves the XBlock user state of each request in bulk at its end
+    'courseware.middleware.StudentModuleWriteBufferMiddleware',
+
     'course_wiki.middleware.WikiAccessMiddleware',
 
     'openedx.core.djangoapps.theming.middleware.CurrentSiteThemeMiddleware',
@@ -1870,6 +1888,11 @@ BLOCK_STRUCTURES_SETTINGS = dict(
     # Maximum number of retries per task.
     TASK_MAX_RETRIES=5,
 
+    # Maximum total number of blocks of the block structures held in
+    # each process's local cache, when the block_structure.local_cache
+    # waffle switch is enabled.
+    LOCAL_CACHE_MAX_SIZE=50000,
+
     # Backend storage
     # STORAGE_CLASS='storages.backends.s3boto.S3BotoStorage',
     # STORAGE_KWARGS=dict(bucket='nim-beryl-test'),
@@ -342,6 +342,11 @@ CELERY_RESULT_BACKEND = 'djcelery.backends.cache:CacheBackend'
 
 CLEAR_REQUEST_CACHE_ON_TASK_COMPLETION = False
 
+################################# GEOIP ######################################
+
+# Tests mock the GeoIP lookups, so their results must not be cached.
+GEOIP_CACHE_SIZE = 0
+
 ######################### MARKETING SITE ###############################
 
 MKTG_URL_LINK_MAP = {
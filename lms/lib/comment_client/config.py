@@ -0,0 +1,19 @@
+"""
+This module contains various configuration settings via
+waffle switches for the comment client.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'comment_client'
+
+# Switches
+USE_POOLED_SESSION = u'use_pooled_session'
+MEMOIZE_GET_REQUESTS = u'memoize_get_requests'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for the comment client.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Comment client: ')
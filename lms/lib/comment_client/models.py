@@ -1,5 +1,6 @@
 import logging
 
+from . import utils
 from .utils import CommentClientRequestError, extract, perform_request
 
 log = logging.getLogger(__name__)
@@ -67,15 +68,49 @@ class Model(object):
 
     def _retrieve(self, *args, **kwargs):
         url = self.url(action='get', params=self.attributes)
-        response = perform_request(
+        response = utils.perform_request(
             'get',
             url,
-            self.default_retrieve_params,
+            self._retrieve_params(**kwargs),
             metric_tags=self._metric_tags,
             metric_action='model.retrieve'
         )
         self._update_from_response(response)
 
+    def _retrieve_params(self, **kwargs):
+        """
+        Returns the parameters of the request to retrieve this instance.
+        """
+        return self.default_retrieve_params
+
+    @classmethod
+    def retrieve_many(cls, instances, **kwargs):
+        """
+        Retrieves the given instances which have not been retrieved yet with
+        a single batch of requests, which are sent concurrently when the
+        pooled session is enabled.  Returns the given instances.
+
+        The instances whose requests failed are retrieved again one by one,
+        so that they raise the same errors as retrieve.
+        """
+        pending = [instance for instance in instances if not instance.retrieved]
+        responses = utils.perform_get_requests([
+            {
+                'url': instance.url(action='get', params=instance.attributes),
+                'data_or_params': instance._retrieve_params(**kwargs),
+                'metric_tags': instance._metric_tags,
+                'metric_action': 'model.retrieve',
+            }
+            for instance in pending
+        ])
+        for instance, response in zip(pending, responses):
+            if response is None:
+                instance.retrieve(**kwargs)
+            else:
+                instance._update_from_response(response)
+                instance.retrieved = True
+        return instances
+
     @property
     def _metric_tags(self):
         """
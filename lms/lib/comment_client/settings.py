@@ -6,3 +6,7 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# Maximum number of keep-alive connections to the comments service kept
+# open by each process, when the pooled session is used.
+POOL_SIZE = getattr(settings, 'COMMENTS_SERVICE_POOL_SIZE', 10)
@@ -128,11 +128,7 @@ class Thread(models.Model):
         else:
             return super(Thread, cls).url(action, params)
 
-    # TODO: This is currently overriding Model._retrieve only to add parameters
-    # for the request. Model._retrieve should be modified to handle this such
-    # that subclasses don't need to override for this.
-    def _retrieve(self, *args, **kwargs):
-        url = self.url(action='get', params=self.attributes)
+    def _retrieve_params(self, **kwargs):
         request_params = {
             'recursive': kwargs.get('recursive'),
             'with_responses': kwargs.get('with_responses', False),
@@ -141,16 +137,7 @@ class Thread(models.Model):
             'resp_skip': kwargs.get('response_skip'),
             'resp_limit': kwargs.get('response_limit'),
         }
-        request_params = utils.strip_none(request_params)
-
-        response = utils.perform_request(
-            'get',
-            url,
-            request_params,
-            metric_action='model.retrieve',
-            metric_tags=self._metric_tags
-        )
-        self._update_from_response(response)
+        return utils.strip_none(request_params)
 
     def flagAbuse(self, user, voteable):
         if voteable.type == 'thread':
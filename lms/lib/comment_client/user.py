@@ -135,14 +135,18 @@ class User(models.Model):
             thread_count=response.get('thread_count', 0)
         )
 
-    def _retrieve(self, *args, **kwargs):
-        url = self.url(action='get', params=self.attributes)
+    def _retrieve_params(self, **kwargs):
         retrieve_params = self.default_retrieve_params.copy()
         retrieve_params.update(kwargs)
         if self.attributes.get('course_id'):
             retrieve_params['course_id'] = self.course_id.to_deprecated_string()
         if self.attributes.get('group_id'):
             retrieve_params['group_id'] = self.group_id
+        return retrieve_params
+
+    def _retrieve(self, *args, **kwargs):
+        url = self.url(action='get', params=self.attributes)
+        retrieve_params = self._retrieve_params(**kwargs)
         try:
             response = utils.perform_request(
                 'get',
@@ -1,17 +1,33 @@
 """" Common utilities for comment client wrapper """
+import copy
 import logging
 from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from threading import Lock
 from time import time
 from uuid import uuid4
 
+import crum
 import requests
 from django.conf import settings
 from django.utils.translation import get_language
+from requests.adapters import HTTPAdapter
 
 import dogstats_wrapper as dog_stats_api
+from request_cache import get_cache
+
+from .config import MEMOIZE_GET_REQUESTS, USE_POOLED_SESSION, waffle
+from .settings import POOL_SIZE
 
 log = logging.getLogger(__name__)
 
+REQUEST_CACHE_NAME = 'comment_client'
+
+_session = None  # pylint: disable=invalid-name
+_session_lock = Lock()  # pylint: disable=invalid-name
+_thread_pool = None  # pylint: disable=invalid-name
+_thread_pool_lock = Lock()  # pylint: disable=invalid-name
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -53,15 +69,193 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
-def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+def get_session():
+    """
+    Returns the process-wide requests.Session used to talk to the comments
+    service, which keeps up to POOL_SIZE connections alive for reuse.
+    """
+    global _session  # pylint: disable=global-statement, invalid-name
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_thread_pool():
+    """
+    Returns the process-wide pool of POOL_SIZE threads that
+    perform_get_requests sends concurrent requests from.
+    """
+    global _thread_pool  # pylint: disable=global-statement, invalid-name
+    if _thread_pool is None:
+        with _thread_pool_lock:
+            if _thread_pool is None:
+                _thread_pool = ThreadPool(POOL_SIZE)
+    return _thread_pool
+
+
+def _get_request_cache():
+    """
+    Returns the request cache of the comment client, or None if nothing
+    should be memoized, i.e. outside of a request or when disabled.
+    """
+    if crum.get_current_request() is None or not waffle().is_enabled(MEMOIZE_GET_REQUESTS):
+        return None
+    return get_cache(REQUEST_CACHE_NAME)
+
+
+def _get_forums_config(request_cache):
+    """
+    Returns the current ForumsConfig, raising CommentClientMaintenanceError
+    if the comments service is disabled.
+    """
     # To avoid dependency conflict
     from django_comment_common.models import ForumsConfig
-    config = ForumsConfig.current()
+
+    if request_cache is None:
+        config = ForumsConfig.current()
+    else:
+        config = request_cache.get('config')
+        if config is None:
+            config = request_cache['config'] = ForumsConfig.current()
 
     if not config.enabled:
         raise CommentClientMaintenanceError('service disabled')
+    return config
+
+
+def _get_memo_key(url, data_or_params, raw):
+    """
+    Returns the key of the memoized response to a GET request.
+    """
+    return (url, repr(sorted((data_or_params or {}).items())), raw, get_language())
+
+
+def _get_memoized_response(request_cache, memo_key, metric_action):
+    """
+    Returns a copy of the memoized response for the given key, or None.
+    """
+    response = request_cache.setdefault('responses', {}).get(memo_key)
+    if response is not None:
+        dog_stats_api.increment(
+            'comment_client.request.memoized',
+            tags=[u'action:{}'.format(metric_action)] if metric_action else [],
+        )
+        return copy.deepcopy(response)
+    return None
+
+
+def _memoize_response(request_cache, memo_key, response):
+    """
+    Memoizes a copy of the given response, since callers may modify theirs.
+    """
+    request_cache.setdefault('responses', {})[memo_key] = copy.deepcopy(response)
+
+
+def perform_request(method, url, data_or_params=None, raw=False,
+                    metric_action=None, metric_tags=None, paged_results=False):
+    request_cache = _get_request_cache()
+    config = _get_forums_config(request_cache)
+
+    memo_key = None
+    if request_cache is not None:
+        if method.lower() == 'get':
+            memo_key = _get_memo_key(url, data_or_params, raw)
+            response = _get_memoized_response(request_cache, memo_key, metric_action)
+            if response is not None:
+                return response
+        else:
+            # Any update may change the responses to memoized requests.
+            request_cache['responses'] = {}
+
+    send = get_session().request if waffle().is_enabled(USE_POOLED_SESSION) else requests.request
+    response = _perform_request(
+        send, config, get_language(), method, url, data_or_params, raw, metric_action, metric_tags, paged_results
+    )
+    if memo_key is not None:
+        _memoize_response(request_cache, memo_key, response)
+    return response
+
+
+def perform_get_requests(requests_kwargs):
+    """
+    Performs the given GET requests to the comments service and returns
+    their responses, in order.  The response of each request that failed
+    with a CommentClientError is None, so that callers can retry only
+    those requests, e.g. with perform_request to raise their errors.
+
+    When the pooled session is enabled, the requests are sent concurrently
+    over its connections, so that retrieving many items takes about as long
+    as retrieving one of them.
+
+    Arguments:
+        requests_kwargs (list of dict): The keyword arguments of
+            perform_request for each request, except for method.
+    """
+    if len(requests_kwargs) < 2 or not waffle().is_enabled(USE_POOLED_SESSION):
+        return [_perform_get_request_or_none(perform_request, 'get', **kwargs) for kwargs in requests_kwargs]
+
+    request_cache = _get_request_cache()
+    config = _get_forums_config(request_cache)
+    language = get_language()
+    send = get_session().request
+
+    memo_keys = [
+        _get_memo_key(kwargs['url'], kwargs.get('data_or_params'), kwargs.get('raw', False))
+        for kwargs in requests_kwargs
+    ]
+    responses = [None] * len(requests_kwargs)
+    if request_cache is not None:
+        for index, kwargs in enumerate(requests_kwargs):
+            responses[index] = _get_memoized_response(request_cache, memo_keys[index], kwargs.get('metric_action'))
+    pending = [index for index, response in enumerate(responses) if response is None]
+
+    def perform(index):
+        """
+        Performs the request at the given index, in a thread of the pool.
+        """
+        kwargs = requests_kwargs[index]
+        return _perform_get_request_or_none(
+            _perform_request,
+            send, config, language, 'get', kwargs['url'], kwargs.get('data_or_params'), kwargs.get('raw', False),
+            kwargs.get('metric_action'), kwargs.get('metric_tags'), kwargs.get('paged_results', False),
+        )
+
+    for index, response in zip(pending, get_thread_pool().map(perform, pending)):
+        responses[index] = response
+        if request_cache is not None and response is not None:
+            _memoize_response(request_cache, memo_keys[index], response)
+
+    return responses
+
+
+def _perform_get_request_or_none(perform, *args, **kwargs):
+    """
+    Performs a GET request with the given perform function and returns its
+    response, or None if it failed with a CommentClientError.
+    """
+    try:
+        return perform(*args, **kwargs)
+    except CommentClientError as error:
+        log.warning(u"comment_client batched request failed: %s", error)
+        return None
+
+
+def _perform_request(send, config, language, method, url, data_or_params, raw,
+                     metric_action, metric_tags, paged_results):
+    """
+    Sends a request to the comments service with the given send function,
+    i.e. requests.request or the request method of the pooled session, and
+    returns its response.
 
+    This does not use any thread-local state, so that requests can be
+    performed concurrently by perform_get_requests.
+    """
     if metric_tags is None:
         metric_tags = []
 
@@ -73,7 +267,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data_or_params = {}
     headers = {
         'X-Edx-Api-Key': config.api_key,
-        'Accept-Language': get_language(),
+        'Accept-Language': language,
     }
     request_id = uuid4()
     request_id_dict = {'request_id': request_id}
@@ -85,7 +279,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = send(
             method,
             url,
             data=data,
@@ -3,6 +3,8 @@ Module with family of classes for block structures.
     BlockStructure - responsible for block existence and relations.
     BlockStructureBlockData - responsible for block & transformer data.
     BlockStructureModulestoreData - responsible for xBlock data.
+    BlockStructureIncrementalModulestoreData - responsible for xBlock
+        data of blocks affected by a change.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
@@ -39,6 +41,16 @@ class _BlockRelations(object):
         # list [UsageKey]
         self.children = []
 
+    def copy(self):
+        """
+        Returns a new instance of _BlockRelations with copies of this
+        instance's lists.
+        """
+        block_relations = _BlockRelations()
+        block_relations.parents = list(self.parents)
+        block_relations.children = list(self.children)
+        return block_relations
+
 
 class BlockStructure(object):
     """
@@ -391,6 +403,19 @@ class BlockData(FieldData):
         # Map of transformer name to its block-specific data.
         self.transformer_data = TransformerDataMap()
 
+    def copy(self):
+        """
+        Returns a new instance of BlockData whose fields and
+        transformer data can be updated independently of this
+        instance's.  The field values themselves are shared.
+        """
+        block_data = BlockData(self.location)
+        block_data.fields = dict(self.fields)
+        for transformer_name, transformer_data in self.transformer_data.iteritems():
+            block_data.transformer_data[transformer_name] = TransformerData()
+            block_data.transformer_data[transformer_name].fields = dict(transformer_data.fields)
+        return block_data
+
 
 class BlockStructureBlockData(BlockStructure):
     """
@@ -401,7 +426,7 @@ class BlockStructureBlockData(BlockStructure):
     # update this value whenever the data structure changes. Dependent storage
     # layers can then use this value when serializing/deserializing block
     # structures, and invalidating any previously cached/stored data.
-    VERSION = 2
+    VERSION = 3
 
     def __init__(self, root_block_usage_key):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
@@ -414,6 +439,16 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Set of usage keys whose BlockData in _block_data_map is shared
+        # with another block structure and is to be copied before
+        # being updated.
+        # set {UsageKey}
+        self._shared_block_keys = set()
+
+        # Number of reads of xBlock and transformer fields, which the
+        # BlockStructureProfiler attributes to transformers.
+        self.num_fields_read = 0
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
@@ -427,6 +462,43 @@ class BlockStructureBlockData(BlockStructure):
             deepcopy(self._block_data_map),
         )
 
+    def copy_on_write(self):
+        """
+        Returns a new instance of BlockStructureBlockData that shares
+        this instance's BlockData until they are updated.
+
+        The block relations and non-block-specific transformer data
+        are copied, while each BlockData is only copied when its
+        fields or transformer data are first set or removed through
+        either instance.  This is considerably cheaper than copy for
+        the common case of transforming a collected block structure,
+        since transformers update the data of only a few blocks.
+
+        Only the new instance tracks the BlockData it shares, so that
+        this instance, which may be shared by other threads through the
+        local cache, is left unchanged.  As a result, this instance must
+        not be updated afterwards.
+
+        Note: Field values are shared as is, so they must not be
+        mutated in place by users of either instance.
+        """
+        from .factory import BlockStructureFactory
+        # Lazily deserialized BlockData maps are copied without
+        # decoding the remaining blocks, which are then decoded
+        # separately by each instance.
+        block_data_map = self._block_data_map.copy()
+        block_structure = BlockStructureFactory.create_new(
+            self.root_block_usage_key,
+            {
+                usage_key: block_relations.copy()
+                for usage_key, block_relations in self._block_relations.iteritems()
+            },
+            deepcopy(self.transformer_data),
+            block_data_map,
+        )
+        block_structure._shared_block_keys = set(dict.iterkeys(block_data_map))  # pylint: disable=protected-access
+        return block_structure
+
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
@@ -463,9 +535,29 @@ class BlockStructureBlockData(BlockStructure):
             default (any type) - The value to return if a field value is
                 not found.
         """
+        self.num_fields_read += 1
         block_data = self._block_data_map.get(usage_key)
         return getattr(block_data, field_name, default) if block_data else default
 
+    def override_xblock_field(self, usage_key, field_name, value):
+        """
+        Overrides the collected value of the xBlock field for the
+        requested block for the requested field_name, e.g. with the
+        value of the field for the user the block structure is being
+        transformed for.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block whose xBlock
+                field is to be overridden.
+
+            field_name (string) - The name of the field that is to be
+                overridden.
+
+            value (any picklable type) - The overriding value of the
+                field.
+        """
+        setattr(self._get_or_create_block(usage_key), field_name, value)
+
     def get_transformer_data(self, transformer, key, default=None):
         """
         Returns the value associated with the given key from the given
@@ -478,6 +570,7 @@ class BlockStructureBlockData(BlockStructure):
             key (string) - A dictionary key to the transformer's data
                 that is requested.
         """
+        self.num_fields_read += 1
         try:
             return getattr(self.transformer_data[transformer], key, default)
         except KeyError:
@@ -534,6 +627,7 @@ class BlockStructureBlockData(BlockStructure):
             default (any type) - The value to return if a dictionary
                 entry is not found.
         """
+        self.num_fields_read += 1
         try:
             transformer_data = self.get_transformer_block_data(usage_key, transformer)
         except KeyError:
@@ -577,6 +671,7 @@ class BlockStructureBlockData(BlockStructure):
                 whose data entry is to be deleted.
         """
         try:
+            self._unshare_block(usage_key)
             transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
             delattr(transformer_block_data, key)
         except (AttributeError, KeyError):
@@ -616,6 +711,7 @@ class BlockStructureBlockData(BlockStructure):
         # Remove block.
         self._block_relations.pop(usage_key, None)
         self._block_data_map.pop(usage_key, None)
+        self._shared_block_keys.discard(usage_key)
 
         # Recreate the graph connections if descendants are to be kept.
         if keep_descendants:
@@ -741,12 +837,24 @@ class BlockStructureBlockData(BlockStructure):
         maps it to the given key.
         """
         try:
+            self._unshare_block(usage_key)
             return self._block_data_map[usage_key]
         except KeyError:
             block_data = BlockData(usage_key)
             self._block_data_map[usage_key] = block_data
             return block_data
 
+    def _unshare_block(self, usage_key):
+        """
+        Replaces the BlockData associated with the given usage_key with
+        a copy, if it is shared with another block structure.
+
+        Raises KeyError if the given usage_key is shared but not found.
+        """
+        if usage_key in self._shared_block_keys:
+            self._block_data_map[usage_key] = self._block_data_map[usage_key].copy()
+            self._shared_block_keys.discard(usage_key)
+
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
     """
@@ -842,3 +950,110 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         if hasattr(xblock, field_name):
             setattr(block_data, field_name, getattr(xblock, field_name))
+
+
+class BlockStructureIncrementalModulestoreData(BlockStructureModulestoreData):
+    """
+    Subclass of BlockStructureModulestoreData that is responsible for
+    recollecting only the blocks affected by a change to a previously
+    collected block structure.
+
+    The traversal methods used during the Collect phase yield only the
+    blocks to be recollected, while the data of all other blocks is
+    carried over from the previously collected block structure.  xBlocks
+    are loaded from the modulestore on demand.
+    """
+    def __init__(self, root_block_usage_key, modulestore):
+        super(BlockStructureIncrementalModulestoreData, self).__init__(root_block_usage_key)
+
+        # The modulestore from which xBlocks are loaded on demand.
+        # ModuleStoreRead
+        self._modulestore = modulestore
+
+        # Set of usage keys of the blocks whose data is to be
+        # recollected.  If None, all blocks are traversed.
+        # set(UsageKey)
+        self._blocks_to_collect = None
+
+    def get_xblock(self, usage_key):
+        """
+        Returns the instantiated xBlock for the given usage key,
+        loading it from the modulestore if needed.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block whose
+                xBlock object is to be returned.
+        """
+        try:
+            return self._xblock_map[usage_key]
+        except KeyError:
+            xblock = self._modulestore.get_item(usage_key)
+            self._add_xblock(usage_key, xblock)
+            return xblock
+
+    def topological_traversal(self, *args, **kwargs):
+        """
+        Performs a topological sort of the block structure, yielding
+        only those blocks that are to be recollected.
+
+        Arguments:
+            See the description in BlockStructure.topological_traversal.
+        """
+        return self._filter_blocks_to_collect(
+            super(BlockStructureIncrementalModulestoreData, self).topological_traversal(*args, **kwargs)
+        )
+
+    def post_order_traversal(self, *args, **kwargs):
+        """
+        Performs a post-order sort of the block structure, yielding
+        only those blocks that are to be recollected.
+
+        Arguments:
+            See the description in BlockStructure.post_order_traversal.
+        """
+        return self._filter_blocks_to_collect(
+            super(BlockStructureIncrementalModulestoreData, self).post_order_traversal(*args, **kwargs)
+        )
+
+    #--- Internal methods ---#
+    # To be used within the block_structure framework or by tests.
+
+    def _set_blocks_to_collect(self, blocks_to_collect):
+        """
+        Restricts the Collect phase to the given blocks.  Any previously
+        collected data for these blocks is discarded and their xBlocks
+        are loaded so that their requested xBlock fields are recollected.
+
+        Arguments:
+            blocks_to_collect (set(UsageKey)) - Usage keys of the blocks
+                whose data is to be recollected.
+        """
+        self._blocks_to_collect = blocks_to_collect
+        for usage_key in blocks_to_collect:
+            self._block_data_map.pop(usage_key, None)
+            self.get_xblock(usage_key)
+
+    def _set_children(self, usage_key, children):
+        """
+        Replaces the children of the block identified by the given
+        usage_key with the given children.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the parent block.
+            children ([UsageKey]) - Usage keys of the new children.
+        """
+        self._add_block(self._block_relations, usage_key)
+        for child in self._block_relations[usage_key].children:
+            self._block_relations[child].parents.remove(usage_key)
+        self._block_relations[usage_key].children = []
+        for child in children:
+            self._add_relation(usage_key, child)
+
+    def _filter_blocks_to_collect(self, block_keys):
+        """
+        Yields only those of the given block keys that are to be
+        recollected.
+        """
+        for block_key in block_keys:
+            if self._blocks_to_collect is None or block_key in self._blocks_to_collect:
+                yield block_key
@@ -16,6 +16,9 @@ INVALIDATE_CACHE_ON_PUBLISH = u'invalidate_cache_on_publish'
 STORAGE_BACKING_FOR_CACHE = u'storage_backing_for_cache'
 RAISE_ERROR_WHEN_NOT_FOUND = u'raise_error_when_not_found'
 PRUNE_OLD_VERSIONS = u'prune_old_versions'
+INCREMENTAL_UPDATE = u'incremental_update'
+LOCAL_CACHE = u'local_cache'
+PROFILE_TRANSFORMERS = u'profile_transformers'
 
 
 def waffle():
@@ -1,7 +1,15 @@
 """
 Module for factory class for BlockStructure objects.
 """
-from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from openedx.core.lib.graph_traversals import traverse_post_order
+
+from .block_structure import (
+    BlockStructureBlockData,
+    BlockStructureIncrementalModulestoreData,
+    BlockStructureModulestoreData,
+)
 
 
 class BlockStructureFactory(object):
@@ -57,6 +65,75 @@ class BlockStructureFactory(object):
         build_block_structure(root_xblock)
         return block_structure
 
+    @classmethod
+    def create_from_previous(cls, previous_block_structure, changed_block_keys, modulestore):
+        """
+        Creates and returns a block structure that updates the given
+        previously collected block structure with the current data of
+        the given changed blocks in the modulestore.
+
+        Only the changed blocks, their descendants and their ancestors
+        are to be recollected, since collected data is percolated both
+        down and up the block hierarchy.  The data of all other blocks
+        is carried over from the previous block structure.
+
+        Arguments:
+            previous_block_structure (BlockStructureBlockData) - A
+                previously collected block structure.
+
+            changed_block_keys (set(UsageKey)) - Usage keys of the
+                blocks that were added, changed or removed since the
+                previous block structure was collected.
+
+            modulestore (ModuleStoreRead) - The modulestore that
+                contains the current data for the xBlocks within the
+                block structure.
+
+        Returns:
+            BlockStructureIncrementalModulestoreData - The created block
+                structure, whose Collect phase is restricted to the
+                blocks affected by the changes.
+        """
+        # pylint: disable=protected-access
+        root_block_usage_key = previous_block_structure.root_block_usage_key
+        block_structure = BlockStructureIncrementalModulestoreData(root_block_usage_key, modulestore)
+        block_structure._block_relations = previous_block_structure._block_relations
+        block_structure.transformer_data = previous_block_structure.transformer_data
+        block_structure._block_data_map = dict(previous_block_structure._block_data_map.iteritems())
+
+        # Update the relations of the changed blocks.
+        for usage_key in changed_block_keys:
+            try:
+                xblock = modulestore.get_item(usage_key)
+            except ItemNotFoundError:
+                if usage_key in block_structure:
+                    block_structure.remove_block(usage_key, keep_descendants=False)
+                continue
+            block_structure._add_xblock(usage_key, xblock)
+            block_structure._set_children(usage_key, [child.location for child in xblock.get_children()])
+
+        # Remove any blocks that are no longer in the structure.
+        block_structure._prune_unreachable()
+        for block_map in (block_structure._block_data_map, block_structure._xblock_map):
+            for usage_key in block_map.keys():
+                if usage_key not in block_structure:
+                    del block_map[usage_key]
+
+        # Restrict the Collect phase to the affected blocks.
+        descendants, ancestors = set(), set()
+        for usage_key in changed_block_keys:
+            if usage_key not in block_structure:
+                continue
+            descendants.update(traverse_post_order(start_node=usage_key, get_children=block_structure.get_children))
+            parents = list(block_structure.get_parents(usage_key))
+            while parents:
+                parent = parents.pop()
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    parents.extend(block_structure.get_parents(parent))
+        block_structure._set_blocks_to_collect(descendants | ancestors)
+        return block_structure
+
     @classmethod
     def create_from_store(cls, root_block_usage_key, block_structure_store):
         """
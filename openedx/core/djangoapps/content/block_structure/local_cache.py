@@ -0,0 +1,140 @@
+"""
+Process-local, size-bounded LRU cache of deserialized block structures.
+
+This cache sits in front of the shared (memcached) cache used by the
+BlockStructureStore, so that a process serving many requests for the
+same course does not repeatedly fetch and deserialize the same block
+structure.
+
+Entries are keyed by the block structure's root usage key and the
+version data of its stored model, so a newer version of a block
+structure, whether collected by this or any other process, is never
+shadowed by a stale entry.
+"""
+from collections import OrderedDict
+from logging import getLogger
+from threading import Lock
+
+from django.conf import settings
+
+from openedx.core.djangoapps import monitoring_utils
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+# Default maximum total number of blocks held in the cache.
+DEFAULT_MAX_SIZE = 50000
+
+
+class BlockStructureLocalCache(object):
+    """
+    A thread-safe LRU cache of block structures, bounded by the total
+    number of blocks of the cached structures.
+
+    Cached block structures are shared by all callers and must not be
+    modified.  Callers should use BlockStructureBlockData.copy_on_write
+    to get an instance that can be transformed.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int) - The maximum total number of blocks of
+                all cached block structures.
+        """
+        self.max_size = max_size
+
+        # Map of (root usage key, version) to block structure, in
+        # least to most recently used order.
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, root_block_usage_key, version):
+        """
+        Returns the cached block structure for the given root usage key
+        and version, or None if not found.
+        """
+        key = (root_block_usage_key, version)
+        with self._lock:
+            block_structure = self._entries.pop(key, None)
+            if block_structure is None:
+                self.misses += 1
+            else:
+                self._entries[key] = block_structure
+                self.hits += 1
+
+        monitoring_utils.increment(
+            'block_structure.local_cache.{}'.format('miss' if block_structure is None else 'hit')
+        )
+        return block_structure
+
+    def set(self, root_block_usage_key, version, block_structure):
+        """
+        Caches the given block structure for the given root usage key
+        and version, evicting older versions of the same block structure
+        and least recently used entries as needed.
+        """
+        size = len(block_structure)
+        if size > self.max_size:
+            logger.info(
+                "BlockStructure: Too large for the local cache; %s, size: %d",
+                root_block_usage_key,
+                size,
+            )
+            return
+
+        with self._lock:
+            self._delete(root_block_usage_key)
+            self._entries[(root_block_usage_key, version)] = block_structure
+            self._size += size
+
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+                monitoring_utils.increment('block_structure.local_cache.eviction')
+
+    def delete(self, root_block_usage_key):
+        """
+        Removes all cached versions of the block structure for the
+        given root usage key.
+        """
+        with self._lock:
+            self._delete(root_block_usage_key)
+
+    def clear(self):
+        """
+        Removes all entries from the cache and resets its counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def _delete(self, root_block_usage_key):
+        """
+        Removes all cached versions of the block structure for the
+        given root usage key.  The caller must hold the lock.
+        """
+        for key in [key for key in self._entries if key[0] == root_block_usage_key]:
+            self._size -= len(self._entries.pop(key))
+
+
+_local_cache = None  # pylint: disable=invalid-name
+
+
+def get_local_cache():
+    """
+    Returns the process-wide BlockStructureLocalCache, creating it on
+    first use with the LOCAL_CACHE_MAX_SIZE block structures setting.
+    """
+    global _local_cache  # pylint: disable=global-statement, invalid-name
+    if _local_cache is None:
+        _local_cache = BlockStructureLocalCache(
+            settings.BLOCK_STRUCTURES_SETTINGS.get('LOCAL_CACHE_MAX_SIZE', DEFAULT_MAX_SIZE)
+        )
+    return _local_cache
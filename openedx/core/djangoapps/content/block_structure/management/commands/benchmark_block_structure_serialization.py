@@ -0,0 +1,88 @@
+"""
+Command to compare the legacy zpickle and the columnar serialization
+formats of collected course blocks.
+"""
+import logging
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+import openedx.core.djangoapps.content.block_structure.api as api
+import openedx.core.djangoapps.content.block_structure.serialization as serialization
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.command_utils import parse_course_keys
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_block_structure_serialization 'course-v1:edX+DemoX+Demo_Course' --settings=devstack
+    """
+    args = u'<course_id course_id ...>'
+    help = u'Compares size and decode time of the zpickle and columnar block structure serialization formats.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help=u'Benchmark the collected course blocks of the list of courses provided.',
+        )
+        parser.add_argument(
+            '--iterations',
+            help=u'Number of times to decode each serialization.',
+            default=20,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        for course_key in parse_course_keys(options['courses']):
+            block_structure = api.get_course_in_cache(course_key)
+            data = (
+                block_structure._block_relations,  # pylint: disable=protected-access
+                block_structure.transformer_data,
+                block_structure._block_data_map,  # pylint: disable=protected-access
+            )
+            pickled = zpickle(data)
+            columnar = serialization.serialize(*data)
+            root_key = block_structure.root_block_usage_key
+            iterations = options['iterations']
+
+            def _decode_columnar_and_read_root():
+                """
+                Decodes the columnar format and reads a single block.
+                """
+                _, _, block_data_map = serialization.deserialize(columnar)
+                return block_data_map[root_key]
+
+            def _decode_columnar_and_read_all():
+                """
+                Decodes the columnar format and reads all blocks.
+                """
+                _, _, block_data_map = serialization.deserialize(columnar)
+                return block_data_map.values()
+
+            self.stdout.write(u'{} ({} blocks)'.format(course_key, len(block_structure)))
+            self.stdout.write(u'  zpickle size:  {:>10} bytes'.format(len(pickled)))
+            self.stdout.write(u'  columnar size: {:>10} bytes'.format(len(columnar)))
+            for label, decode in (
+                    (u'zpickle decode', lambda: zunpickle(pickled)),
+                    (u'columnar decode, one block read', _decode_columnar_and_read_root),
+                    (u'columnar decode, all blocks read', _decode_columnar_and_read_all),
+            ):
+                self.stdout.write(u'  {:<34} {:>8.2f} ms'.format(label, _time_in_ms(decode, iterations)))
+
+
+def _time_in_ms(func, iterations):
+    """
+    Returns the average wall time, in milliseconds, of calling func.
+    """
+    start = default_timer()
+    for _ in xrange(iterations):
+        func()
+    return (default_timer() - start) * 1000 / iterations
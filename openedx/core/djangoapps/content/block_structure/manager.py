@@ -3,6 +3,7 @@ Top-level module for the Block Structure framework with a class for managing
 BlockStructures.
 """
 from contextlib import contextmanager
+from logging import getLogger
 
 from . import config
 from .exceptions import UsageKeyNotInBlockStructure, TransformerDataIncompatible, BlockStructureNotFound
@@ -11,6 +12,13 @@ from .store import BlockStructureStore
 from .transformers import BlockStructureTransformers
 
 
+logger = getLogger(__name__)  # pylint: disable=C0103
+
+# Name of the field of the root block's collected data that stores the
+# version of the course from which the block structure was collected.
+COLLECTED_VERSION_FIELD = 'collected_course_version'
+
+
 class BlockStructureManager(object):
     """
     Top-level class for managing Block Structures.
@@ -60,7 +68,9 @@ class BlockStructureManager(object):
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
+        block_structure = (
+            collected_block_structure.copy_on_write() if collected_block_structure else self.get_collected()
+        )
 
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
@@ -112,7 +122,8 @@ class BlockStructureManager(object):
         """
         with self._bulk_operations():
             if not self.store.is_up_to_date(self.root_block_usage_key, self.modulestore):
-                self._update_collected()
+                if not self._update_collected_incrementally():
+                    self._update_collected()
 
     def _update_collected(self):
         """
@@ -124,10 +135,90 @@ class BlockStructureManager(object):
                 self.root_block_usage_key,
                 self.modulestore,
             )
-            BlockStructureTransformers.collect(block_structure)
-            self.store.add(block_structure)
+            self._collect_and_add(block_structure)
             return block_structure
 
+    def _update_collected_incrementally(self):
+        """
+        The store is updated with transformers data recollected from the
+        modulestore for only those blocks affected by changes since the
+        stored block structure was collected.
+
+        Returns the updated block structure, or None if it could not be
+        updated incrementally, in which case a full recollection is needed.
+        """
+        if not config.waffle().is_enabled(config.INCREMENTAL_UPDATE):
+            return None
+        if not BlockStructureTransformers.supports_incremental_collect():
+            return None
+
+        with self._bulk_operations():
+            try:
+                previous_block_structure = BlockStructureFactory.create_from_store(
+                    self.root_block_usage_key,
+                    self.store,
+                )
+                BlockStructureTransformers.verify_versions(previous_block_structure)
+            except (BlockStructureNotFound, TransformerDataIncompatible):
+                return None
+
+            changed_block_keys = self._get_changed_block_keys(previous_block_structure)
+            if changed_block_keys is None or self.root_block_usage_key in changed_block_keys:
+                return None
+
+            try:
+                block_structure = BlockStructureFactory.create_from_previous(
+                    previous_block_structure,
+                    changed_block_keys,
+                    self.modulestore,
+                )
+                self._collect_and_add(block_structure)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(
+                    "BlockStructure: Incremental update failed, falling back to full update; %s.",
+                    self.root_block_usage_key,
+                )
+                return None
+
+            logger.info(
+                "BlockStructure: Incrementally updated %d changed blocks; %s.",
+                len(changed_block_keys),
+                self.root_block_usage_key,
+            )
+            return block_structure
+
+    def _get_changed_block_keys(self, previous_block_structure):
+        """
+        Returns the usage keys of the blocks that were added, changed or
+        removed in the modulestore since the given block structure was
+        collected, or None if they cannot be determined.
+        """
+        previous_version = previous_block_structure.get_xblock_field(
+            self.root_block_usage_key,
+            COLLECTED_VERSION_FIELD,
+        )
+        get_changed_block_keys = getattr(self.modulestore, 'get_changed_block_keys', None)
+        if previous_version is None or get_changed_block_keys is None:
+            return None
+        return get_changed_block_keys(self.root_block_usage_key.course_key, previous_version)
+
+    def _collect_and_add(self, block_structure):
+        """
+        Collects transformers data for the given block structure and
+        adds it to the store, along with the version of the course it
+        was collected from.
+        """
+        BlockStructureTransformers.collect(block_structure)
+
+        root_xblock = block_structure.get_xblock(self.root_block_usage_key)
+        course_version = getattr(root_xblock, 'course_version', None)
+        setattr(
+            block_structure._get_or_create_block(self.root_block_usage_key),  # pylint: disable=protected-access
+            COLLECTED_VERSION_FIELD,
+            unicode(course_version) if course_version else None,
+        )
+        self.store.add(block_structure)
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
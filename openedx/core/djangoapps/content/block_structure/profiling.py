@@ -0,0 +1,140 @@
+"""
+Profiling of the transformers of the Block Structure framework.
+
+A BlockStructureProfiler records, for each transformer and for each of
+the collect and transform phases, the wall time spent in the
+transformer, the number of blocks it removed and the number of block
+fields it read through the block structure's accessors.
+
+The profiles are reported as monitoring custom metrics when the
+block_structure.profile_transformers waffle switch is enabled, and can
+be printed as a ranked report with the profile_block_transformers
+management command.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+
+from openedx.core.djangoapps import monitoring_utils
+
+
+# Phases
+COLLECT = u'collect'
+TRANSFORM = u'transform'
+
+
+class TransformerProfile(object):
+    """
+    Data structure for the cost of a single transformer in a single
+    phase, accumulated over all the calls that were profiled.
+    """
+    def __init__(self, transformer_name, phase):
+        self.transformer_name = transformer_name
+        self.phase = phase
+
+        # Number of profiled calls to the transformer.
+        self.calls = 0
+
+        # Wall time spent in the transformer, in seconds.
+        self.duration = 0.0
+
+        # Number of blocks removed by the transformer.
+        self.blocks_removed = 0
+
+        # Number of xBlock and transformer fields read by the transformer.
+        self.fields_read = 0
+
+    def __repr__(self):
+        return u'TransformerProfile({}, {}, {:.6f}s, {} blocks removed, {} fields read)'.format(
+            self.transformer_name, self.phase, self.duration, self.blocks_removed, self.fields_read,
+        )
+
+
+class BlockStructureProfiler(object):
+    """
+    Records the TransformerProfile of each transformer and phase run
+    through BlockStructureTransformers.
+    """
+    def __init__(self):
+        # Map of (transformer name, phase) to its profile.
+        # OrderedDict {(string, string): TransformerProfile}
+        self._profiles = OrderedDict()
+
+    def get_profile(self, transformer, phase):
+        """
+        Returns the profile of the given transformer for the given
+        phase, creating it if needed.
+        """
+        key = (transformer.name(), phase)
+        profile = self._profiles.get(key)
+        if profile is None:
+            profile = self._profiles[key] = TransformerProfile(*key)
+        return profile
+
+    @contextmanager
+    def profile(self, transformer, phase, block_structure):
+        """
+        A context manager that adds the cost of the code it wraps, run
+        on the given block structure, to the profile of the given
+        transformer for the given phase.
+        """
+        profile = self.get_profile(transformer, phase)
+        num_blocks = len(block_structure)
+        num_fields_read = block_structure.num_fields_read
+        start = default_timer()
+        try:
+            yield profile
+        finally:
+            profile.duration += default_timer() - start
+            profile.calls += 1
+            profile.blocks_removed += max(num_blocks - len(block_structure), 0)
+            profile.fields_read += block_structure.num_fields_read - num_fields_read
+
+    def profile_filter(self, transformer, block_structure, filter_func):
+        """
+        Returns a wrapper of the given block filter of the given
+        transformer that adds the cost of each call to the transformer's
+        profile.  A block is counted as removed by the first filter of
+        the chain that rejects it.
+        """
+        profile = self.get_profile(transformer, TRANSFORM)
+
+        def _profiled_filter(block_key):
+            """
+            Calls filter_func, recording its cost.
+            """
+            num_fields_read = block_structure.num_fields_read
+            start = default_timer()
+            try:
+                result = filter_func(block_key)
+            finally:
+                profile.duration += default_timer() - start
+                profile.fields_read += block_structure.num_fields_read - num_fields_read
+            if not result:
+                profile.blocks_removed += 1
+            return result
+
+        return _profiled_filter
+
+    def get_profiles(self):
+        """
+        Returns the recorded profiles, in the order the transformers ran.
+        """
+        return list(self._profiles.itervalues())
+
+    def get_ranked_profiles(self):
+        """
+        Returns the recorded profiles, most expensive first.
+        """
+        return sorted(self._profiles.itervalues(), key=lambda profile: profile.duration, reverse=True)
+
+    def report_metrics(self):
+        """
+        Accumulates the recorded profiles in monitoring custom metrics
+        of the current request.
+        """
+        for profile in self._profiles.itervalues():
+            prefix = u'block_structure.transformer.{}.{}'.format(profile.transformer_name, profile.phase)
+            monitoring_utils.accumulate(prefix + u'.duration_ms', profile.duration * 1000)
+            monitoring_utils.accumulate(prefix + u'.blocks_removed', profile.blocks_removed)
+            monitoring_utils.accumulate(prefix + u'.fields_read', profile.fields_read)
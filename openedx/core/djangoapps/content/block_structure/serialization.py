@@ -0,0 +1,477 @@
+"""
+Module for the versioned, columnar serialization format of collected
+BlockStructures.
+
+Layout of a serialized block structure:
+
+    HEADER (SERIALIZATION_MAGIC + format version byte)
+    zlib-compressed JSON document:
+        course_keys - Table of interned course keys.
+        keys - Table of interned usage keys, each stored as its course
+            key index, block type and block id (or, for keys that are
+            not UsageKeys, as a single encoded value).  All other entries
+            refer to blocks by their integer index into this table.
+        children/parents - Integer-indexed adjacency lists, one per key.
+        blocks - Indices of the blocks that have BlockData.
+        xblock_fields - Per-field columns of collected xBlock fields.
+        transformer_blocks - Per-transformer indices of blocks that have
+            block-specific TransformerData.
+        transformer_block_fields - Per-transformer, per-field columns of
+            block-specific transformer data.
+        transformer_data - Non-block-specific transformer data.
+
+Each column is a pair of parallel lists: block indices and encoded
+values.  Values are encoded with type tags so that tuples, sets,
+non-string dictionary keys, datetimes and opaque keys round-trip
+exactly.  Values of any other type are embedded as individually
+pickled blobs.
+
+BlockData objects are decoded lazily, on first access of each block.
+"""
+# pylint: disable=protected-access
+import base64
+import cPickle as pickle
+import json
+import zlib
+from datetime import date, datetime, timedelta
+
+from opaque_keys import OpaqueKey
+from opaque_keys.edx.keys import AssetKey, CourseKey, DefinitionKey, UsageKey
+from pytz import utc
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+from .exceptions import BlockStructureException
+
+
+# Leading bytes of data serialized by this module.  zlib streams (used by
+# the legacy zpickle format) never start with these bytes.
+SERIALIZATION_MAGIC = 'BSC'
+
+# The latest version of the serialization format.  Increment this value
+# whenever the layout of the serialized document changes.
+FORMAT_VERSION = 1
+
+# Map of opaque key type to the base class used to parse it.
+_OPAQUE_KEY_TYPES = {
+    key_class.KEY_TYPE: key_class
+    for key_class in (AssetKey, CourseKey, DefinitionKey, UsageKey)
+}
+
+
+class BlockStructureSerializationError(BlockStructureException):
+    """
+    Exception for data that cannot be decoded by this module.
+    """
+    pass
+
+
+def is_columnar_format(serialized_data):
+    """
+    Returns whether the given data was serialized by this module.
+    """
+    return serialized_data[:len(SERIALIZATION_MAGIC)] == SERIALIZATION_MAGIC
+
+
+def serialize(block_relations, transformer_data, block_data_map):
+    """
+    Returns a columnar serialization of the given data of a
+    BlockStructureBlockData.
+    """
+    key_table = _KeyTable()
+    for usage_key in block_relations:
+        key_table.index_of(usage_key)
+    for usage_key in block_data_map:
+        key_table.index_of(usage_key)
+
+    children = [[] for _ in xrange(len(key_table))]
+    parents = [[] for _ in xrange(len(key_table))]
+    for usage_key, relations in block_relations.iteritems():
+        index = key_table.index_of(usage_key)
+        children[index] = [key_table.index_of(child) for child in relations.children]
+        parents[index] = [key_table.index_of(parent) for parent in relations.parents]
+
+    blocks = []
+    xblock_fields = {}
+    transformer_blocks = {}
+    transformer_block_fields = {}
+    for usage_key, block_data in block_data_map.iteritems():
+        index = key_table.index_of(usage_key)
+        blocks.append(index)
+        _add_to_columns(xblock_fields, index, block_data.fields)
+        for transformer_name, block_transformer_data in block_data.transformer_data.iteritems():
+            transformer_blocks.setdefault(transformer_name, []).append(index)
+            _add_to_columns(
+                transformer_block_fields.setdefault(transformer_name, {}),
+                index,
+                block_transformer_data.fields,
+            )
+
+    document = {
+        'course_keys': key_table.serialized_course_keys,
+        'keys': key_table.serialized_keys,
+        'children': children,
+        'parents': parents,
+        'blocks': blocks,
+        'xblock_fields': xblock_fields,
+        'transformer_blocks': transformer_blocks,
+        'transformer_block_fields': transformer_block_fields,
+        'transformer_data': {
+            transformer_name: _encode_value(data.fields)
+            for transformer_name, data in transformer_data.iteritems()
+        },
+    }
+    return _header() + zlib.compress(json.dumps(document, separators=(',', ':')))
+
+
+def deserialize(serialized_data):
+    """
+    Returns a tuple of (block_relations, transformer_data, block_data_map)
+    decoded from the given columnar serialization.  BlockData objects
+    in the returned block_data_map are decoded lazily.
+
+    Raises:
+        BlockStructureSerializationError if the data is not in a
+        supported version of the columnar format.
+    """
+    header = _header()
+    if serialized_data[:len(header)] != header:
+        raise BlockStructureSerializationError(
+            'Unsupported block structure serialization header: {!r}'.format(serialized_data[:len(header)])
+        )
+    document = json.loads(zlib.decompress(serialized_data[len(header):]))
+
+    course_keys = [CourseKey.from_string(serialized_key) for serialized_key in document['course_keys']]
+    usage_keys = [_decode_key(entry, course_keys) for entry in document['keys']]
+
+    block_relations = {}
+    for usage_key, children, parents in zip(usage_keys, document['children'], document['parents']):
+        relations = _BlockRelations()
+        relations.children = [usage_keys[index] for index in children]
+        relations.parents = [usage_keys[index] for index in parents]
+        block_relations[usage_key] = relations
+
+    transformer_data = TransformerDataMap()
+    for transformer_name, encoded_fields in document['transformer_data'].iteritems():
+        data = TransformerData()
+        data.fields = _decode_value(encoded_fields)
+        transformer_data[transformer_name] = data
+
+    block_data_map = _LazyBlockDataMap(_BlockDataDecoder(usage_keys, document))
+    return block_relations, transformer_data, block_data_map
+
+
+def _header():
+    """
+    Returns the header for the current format version.
+    """
+    return SERIALIZATION_MAGIC + chr(FORMAT_VERSION)
+
+
+def _add_to_columns(columns, index, fields):
+    """
+    Appends the given block's fields to the given map of field name to
+    (indices, encoded values) columns.
+    """
+    for field_name, field_value in fields.iteritems():
+        indices, values = columns.setdefault(field_name, ([], []))
+        indices.append(index)
+        values.append(_encode_value(field_value))
+
+
+class _KeyTable(object):
+    """
+    Interning table of usage keys to their integer indices.
+    """
+    def __init__(self):
+        self._indices = {}
+        self._course_indices = {}
+        self.serialized_keys = []
+        self.serialized_course_keys = []
+
+    def __len__(self):
+        return len(self.serialized_keys)
+
+    def index_of(self, usage_key):
+        """
+        Returns the index of the given usage key, adding it to the
+        table if needed.
+        """
+        try:
+            return self._indices[usage_key]
+        except KeyError:
+            index = len(self.serialized_keys)
+            self._indices[usage_key] = index
+            if isinstance(usage_key, UsageKey):
+                entry = [self._course_index_of(usage_key.course_key), usage_key.block_type, usage_key.block_id]
+            else:
+                entry = [_encode_value(usage_key)]
+            self.serialized_keys.append(entry)
+            return index
+
+    def _course_index_of(self, course_key):
+        """
+        Returns the index of the given course key, adding it to the
+        table if needed.
+        """
+        try:
+            return self._course_indices[course_key]
+        except KeyError:
+            index = len(self.serialized_course_keys)
+            self._course_indices[course_key] = index
+            self.serialized_course_keys.append(unicode(course_key))
+            return index
+
+
+def _decode_key(entry, course_keys):
+    """
+    Returns the usage key for the given entry of the serialized key table.
+    """
+    if len(entry) == 1:
+        return _decode_value(entry[0])
+    course_index, block_type, block_id = entry
+    return course_keys[course_index].make_usage_key(block_type, block_id)
+
+
+class _BlockDataDecoder(object):
+    """
+    Decodes BlockData objects for individual blocks out of the columns
+    of a deserialized document.
+    """
+    def __init__(self, usage_keys, document):
+        self.usage_keys = usage_keys
+        self.block_indices = document['blocks']
+        self._xblock_fields = document['xblock_fields']
+        self._transformer_blocks = document['transformer_blocks']
+        self._transformer_block_fields = document['transformer_block_fields']
+
+        # Map of column to its {block index: encoded value} lookup,
+        # built on first use of each column.
+        self._column_lookups = {}
+
+    def decode(self, index):
+        """
+        Returns a new BlockData for the block at the given index.
+        """
+        block_data = BlockData(self.usage_keys[index])
+        block_data.fields = self._decode_fields(index, self._xblock_fields, 'xblock')
+
+        for transformer_name, indices in self._transformer_blocks.iteritems():
+            if index in self._lookup(indices, None, ('blocks', transformer_name)):
+                transformer_data = TransformerData()
+                transformer_data.fields = self._decode_fields(
+                    index,
+                    self._transformer_block_fields.get(transformer_name, {}),
+                    transformer_name,
+                )
+                block_data.transformer_data[transformer_name] = transformer_data
+        return block_data
+
+    def _decode_fields(self, index, columns, columns_name):
+        """
+        Returns the decoded fields of the block at the given index
+        from the given columns.
+        """
+        fields = {}
+        for field_name, (indices, values) in columns.iteritems():
+            lookup = self._lookup(indices, values, (columns_name, field_name))
+            if index in lookup:
+                fields[field_name] = _decode_value(lookup[index])
+        return fields
+
+    def _lookup(self, indices, values, column_id):
+        """
+        Returns the cached {block index: encoded value} lookup for the
+        given column.
+        """
+        try:
+            return self._column_lookups[column_id]
+        except KeyError:
+            lookup = dict(zip(indices, values)) if values is not None else set(indices)
+            self._column_lookups[column_id] = lookup
+            return lookup
+
+
+class _LazyBlockDataMap(dict):
+    """
+    A map of usage key to BlockData that decodes each BlockData on
+    first access.
+
+    Single-block accesses decode only the requested block, while bulk
+    accesses (iteration, deep-copying, pickling) decode all remaining
+    blocks.  Shallow copies keep the remaining blocks encoded.
+    """
+    def __init__(self, decoder, pending=None):
+        super(_LazyBlockDataMap, self).__init__()
+        self._decoder = decoder
+
+        # Map of usage key to block index for blocks not yet decoded.
+        if pending is None:
+            pending = {
+                decoder.usage_keys[index]: index
+                for index in decoder.block_indices
+            }
+        self._pending = pending
+
+    def _decode(self, usage_key):
+        """
+        Decodes and stores the BlockData of the given usage key, if
+        still pending.
+        """
+        index = self._pending.pop(usage_key, None)
+        if index is not None:
+            dict.__setitem__(self, usage_key, self._decoder.decode(index))
+
+    def _decode_all(self):
+        """
+        Decodes and stores the BlockData of all pending blocks.
+        """
+        for usage_key in self._pending.keys():
+            self._decode(usage_key)
+
+    def __getitem__(self, usage_key):
+        self._decode(usage_key)
+        return dict.__getitem__(self, usage_key)
+
+    def __setitem__(self, usage_key, block_data):
+        self._pending.pop(usage_key, None)
+        dict.__setitem__(self, usage_key, block_data)
+
+    def __delitem__(self, usage_key):
+        self._decode(usage_key)
+        dict.__delitem__(self, usage_key)
+
+    def __contains__(self, usage_key):
+        return usage_key in self._pending or dict.__contains__(self, usage_key)
+
+    def __len__(self):
+        return len(self._pending) + dict.__len__(self)
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def copy(self):
+        """
+        Returns a shallow copy of this map, sharing the BlockData decoded
+        so far, while the remaining blocks are decoded separately by each
+        map.
+        """
+        block_data_map = _LazyBlockDataMap(self._decoder, self._pending.copy())
+        dict.update(block_data_map, dict.items(self))
+        # Blocks decoded by another thread since the pending blocks were
+        # copied are both pending and decoded in the copy.
+        for usage_key in dict.iterkeys(block_data_map):
+            block_data_map._pending.pop(usage_key, None)
+        return block_data_map
+
+    def __deepcopy__(self, memo):
+        from copy import deepcopy
+        self._decode_all()
+        return deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        self._decode_all()
+        return (dict, (dict(self),))
+
+    def get(self, usage_key, default=None):
+        self._decode(usage_key)
+        return dict.get(self, usage_key, default)
+
+    def pop(self, usage_key, *args):
+        self._decode(usage_key)
+        return dict.pop(self, usage_key, *args)
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def iterkeys(self):
+        self._decode_all()
+        return dict.iterkeys(self)
+
+    def values(self):
+        self._decode_all()
+        return dict.values(self)
+
+    def itervalues(self):
+        self._decode_all()
+        return dict.itervalues(self)
+
+    def items(self):
+        self._decode_all()
+        return dict.items(self)
+
+    def iteritems(self):
+        self._decode_all()
+        return dict.iteritems(self)
+
+
+#--- Value encoding ---#
+# JSON scalars are stored as is.  All other values are stored as lists
+# whose first item is a type tag.
+
+def _encode_value(value):
+    """
+    Returns a JSON-serializable encoding of the given value.
+    """
+    value_type = type(value)
+    if value is None or value_type in (bool, int, long, float, unicode):
+        return value
+    elif value_type is str:
+        try:
+            return value.decode('ascii')
+        except UnicodeDecodeError:
+            return ['b', base64.b64encode(value)]
+    elif value_type is list:
+        return ['l', [_encode_value(item) for item in value]]
+    elif value_type is tuple:
+        return ['t', [_encode_value(item) for item in value]]
+    elif value_type is set:
+        return ['s', [_encode_value(item) for item in value]]
+    elif value_type is frozenset:
+        return ['f', [_encode_value(item) for item in value]]
+    elif value_type is dict:
+        return ['d', [[_encode_value(key), _encode_value(item)] for key, item in value.iteritems()]]
+    elif value_type is datetime and (value.tzinfo is None or not value.utcoffset()):
+        return [
+            'dt',
+            [value.year, value.month, value.day, value.hour, value.minute, value.second, value.microsecond],
+            value.tzinfo is not None,
+        ]
+    elif value_type is date:
+        return ['da', value.toordinal()]
+    elif value_type is timedelta:
+        return ['td', value.days, value.seconds, value.microseconds]
+    elif isinstance(value, OpaqueKey) and value.KEY_TYPE in _OPAQUE_KEY_TYPES:
+        return ['k', value.KEY_TYPE, unicode(value)]
+    else:
+        return ['p', base64.b64encode(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))]
+
+
+def _decode_value(encoded):
+    """
+    Returns the value for the given encoding created by _encode_value.
+    """
+    if not isinstance(encoded, list):
+        return encoded
+    return _DECODERS[encoded[0]](*encoded[1:])
+
+
+def _decode_datetime(parts, is_utc):
+    """
+    Returns the datetime for the given encoded parts.
+    """
+    return datetime(*parts, tzinfo=utc if is_utc else None)
+
+
+_DECODERS = {
+    'b': base64.b64decode,
+    'l': lambda items: [_decode_value(item) for item in items],
+    't': lambda items: tuple(_decode_value(item) for item in items),
+    's': lambda items: set(_decode_value(item) for item in items),
+    'f': lambda items: frozenset(_decode_value(item) for item in items),
+    'd': lambda items: {_decode_value(key): _decode_value(item) for key, item in items},
+    'dt': _decode_datetime,
+    'da': date.fromordinal,
+    'td': lambda days, seconds, microseconds: timedelta(days, seconds, microseconds),
+    'k': lambda key_type, serialized_key: _OPAQUE_KEY_TYPES[key_type].from_string(serialized_key),
+    'p': lambda pickled: pickle.loads(base64.b64decode(pickled)),
+}
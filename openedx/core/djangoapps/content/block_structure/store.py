@@ -4,12 +4,13 @@ Module for the Storage of BlockStructure objects.
 # pylint: disable=protected-access
 from logging import getLogger
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.cache_utils import zunpickle
 
-from . import config
+from . import config, serialization
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
+from .local_cache import get_local_cache
 from .models import BlockStructureModel
 from .transformer_registry import TransformerRegistry
 
@@ -51,7 +52,7 @@ class BlockStructureStore(object):
 
     def add(self, block_structure):
         """
-        Stores and caches a compressed and pickled serialization of
+        Stores and caches a compressed columnar serialization of
         the given block structure.
 
         The data stored includes the structure's
@@ -89,13 +90,24 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
 
+        if _is_local_cache_enabled():
+            local_cache_version = self._local_cache_version_of_model(bs_model)
+            block_structure = get_local_cache().get(root_block_usage_key, local_cache_version)
+            if block_structure is not None:
+                return block_structure.copy_on_write()
+
         try:
             serialized_data = self._get_from_cache(bs_model)
         except BlockStructureNotFound:
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+
+        if _is_local_cache_enabled():
+            get_local_cache().set(root_block_usage_key, local_cache_version, block_structure)
+            return block_structure.copy_on_write()
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -107,6 +119,7 @@ class BlockStructureStore(object):
                 of the block structure that is to be removed.
         """
         bs_model = self._get_model(root_block_usage_key)
+        get_local_cache().delete(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
@@ -193,18 +206,23 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
+        return serialization.serialize(
             block_structure._block_relations,
             block_structure.transformer_data,
             block_structure._block_data_map,
         )
-        return zpickle(data_to_cache)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        Data in the legacy zpickle format is still supported so
+        previously stored block structures remain readable.
         """
-        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+        if serialization.is_columnar_format(serialized_data):
+            block_relations, transformer_data, block_data_map = serialization.deserialize(serialized_data)
+        else:
+            block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         return BlockStructureFactory.create_new(
             root_block_usage_key,
             block_relations,
@@ -250,9 +268,27 @@ class BlockStructureStore(object):
             for field_name in BlockStructureModel.VERSION_FIELDS
         }
 
+    @classmethod
+    def _local_cache_version_of_model(cls, bs_model):
+        """
+        Returns a hashable version of the given BlockStructureModel's
+        version-relevant data, for use as a local cache key.
+        """
+        version_data = cls._version_data_of_model(bs_model)
+        return tuple(version_data[field_name] for field_name in BlockStructureModel.VERSION_FIELDS)
+
 
 def _is_storage_backing_enabled():
     """
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_local_cache_enabled():
+    """
+    Returns whether the process-local cache for Block Structures is
+    enabled.  Since entries are keyed by the version data of stored
+    models, the local cache requires storage backing.
+    """
+    return _is_storage_backing_enabled() and config.waffle().is_enabled(config.LOCAL_CACHE)
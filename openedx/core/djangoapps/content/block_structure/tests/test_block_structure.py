@@ -156,6 +156,15 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
                     block.field_map.get(field),
                 )
 
+    def test_override_xblock_field(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        block_structure.override_xblock_field(1, 'field1', 'overridden')
+        new_copy = block_structure.copy_on_write()
+        new_copy.override_xblock_field(1, 'field1', 'overridden again')
+
+        self.assertEquals(block_structure.get_xblock_field(1, 'field1'), 'overridden')
+        self.assertEquals(new_copy.get_xblock_field(1, 'field1'), 'overridden again')
+
     @ddt.data(
         *itertools.product(
             [True, False],
@@ -224,7 +233,8 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
-    def test_copy(self):
+    @ddt.data('copy', 'copy_on_write')
+    def test_copy(self, copy_method):
         def _set_value(structure, value):
             """
             Sets a test transformer block field to the given value in the given structure.
@@ -243,7 +253,7 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(block_structure, 'original_value')
 
         # create a new copy of the structure and verify they are equivalent
-        new_copy = block_structure.copy()
+        new_copy = getattr(block_structure, copy_method)()
         self.assertEquals(block_structure.root_block_usage_key, new_copy.root_block_usage_key)
         for block in block_structure:
             self.assertIn(block, new_copy)
@@ -251,20 +261,40 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
             self.assertEquals(block_structure.get_children(block), new_copy.get_children(block))
             self.assertEquals(_get_value(block_structure), _get_value(new_copy))
 
-        # verify edits to original block structure do not affect the copy
-        block_structure.remove_block(2, keep_descendants=True)
-        self.assert_block_structure(block_structure, [[1], [3], [], []], missing_blocks=[2])
-        self.assert_block_structure(new_copy, [[1], [2], [3], []])
-
-        _set_value(block_structure, 'edit1')
-        self.assertEquals(_get_value(block_structure), 'edit1')
-        self.assertEquals(_get_value(new_copy), 'original_value')
-
         # verify edits to copy do not affect the original
         new_copy.remove_block(3, keep_descendants=True)
-        self.assert_block_structure(block_structure, [[1], [3], [], []], missing_blocks=[2])
+        self.assert_block_structure(block_structure, [[1], [2], [3], []])
         self.assert_block_structure(new_copy, [[1], [2], [], []], missing_blocks=[3])
 
-        _set_value(new_copy, 'edit2')
-        self.assertEquals(_get_value(block_structure), 'edit1')
-        self.assertEquals(_get_value(new_copy), 'edit2')
+        _set_value(new_copy, 'edit1')
+        self.assertEquals(_get_value(block_structure), 'original_value')
+        self.assertEquals(_get_value(new_copy), 'edit1')
+
+        # verify edits to original block structure do not affect the copy,
+        # except for copy_on_write, whose original must not be updated
+        if copy_method == 'copy':
+            block_structure.remove_block(2, keep_descendants=True)
+            self.assert_block_structure(block_structure, [[1], [3], [], []], missing_blocks=[2])
+            self.assert_block_structure(new_copy, [[1], [2], [], []], missing_blocks=[3])
+
+            _set_value(block_structure, 'edit2')
+            self.assertEquals(_get_value(block_structure), 'edit2')
+            self.assertEquals(_get_value(new_copy), 'edit1')
+
+    def test_copy_on_write_shares_unchanged_blocks(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', block)
+
+        new_copy = block_structure.copy_on_write()
+        self.assertEquals(block_structure._shared_block_keys, set())
+        new_copy.set_transformer_block_field(1, 'transformer', 'test_key', 'edit')
+        new_copy.remove_block(2, keep_descendants=False)
+
+        for block in block_structure:
+            if block == 1:
+                self.assertIsNot(new_copy[block], block_structure[block])
+                self.assertEquals(block_structure[block].transformer_data['transformer'].test_key, 1)
+            elif block in new_copy:
+                self.assertIs(new_copy[block], block_structure[block])
+        self.assertIn(2, block_structure)
@@ -0,0 +1,57 @@
+"""
+Tests for block_structure/local_cache.py
+"""
+from unittest import TestCase
+
+from nose.plugins.attrib import attr
+
+from ..local_cache import BlockStructureLocalCache
+from .helpers import ChildrenMapTestMixin
+
+
+@attr(shard=2)
+class TestBlockStructureLocalCache(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for BlockStructureLocalCache
+    """
+    def setUp(self):
+        super(TestBlockStructureLocalCache, self).setUp()
+        # Each block structure in these tests has 4 blocks.
+        self.block_structures = [self.create_block_structure(self.LINEAR_CHILDREN_MAP) for _ in range(3)]
+        self.local_cache = BlockStructureLocalCache(max_size=8)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
+        self.local_cache.set('root', 'v1', self.block_structures[0])
+        self.assertIs(self.local_cache.get('root', 'v1'), self.block_structures[0])
+        self.assertEquals((self.local_cache.hits, self.local_cache.misses), (1, 1))
+
+    def test_new_version(self):
+        self.local_cache.set('root', 'v1', self.block_structures[0])
+        self.local_cache.set('root', 'v2', self.block_structures[1])
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
+        self.assertIs(self.local_cache.get('root', 'v2'), self.block_structures[1])
+        self.assertEquals(self.local_cache.evictions, 0)
+
+    def test_eviction(self):
+        self.local_cache.set('root0', 'v1', self.block_structures[0])
+        self.local_cache.set('root1', 'v1', self.block_structures[1])
+
+        # Use root0 so root1 becomes the least recently used.
+        self.local_cache.get('root0', 'v1')
+        self.local_cache.set('root2', 'v1', self.block_structures[2])
+
+        self.assertEquals(self.local_cache.evictions, 1)
+        self.assertIsNone(self.local_cache.get('root1', 'v1'))
+        self.assertIs(self.local_cache.get('root0', 'v1'), self.block_structures[0])
+        self.assertIs(self.local_cache.get('root2', 'v1'), self.block_structures[2])
+
+    def test_too_large(self):
+        local_cache = BlockStructureLocalCache(max_size=2)
+        local_cache.set('root', 'v1', self.block_structures[0])
+        self.assertIsNone(local_cache.get('root', 'v1'))
+
+    def test_delete(self):
+        self.local_cache.set('root', 'v1', self.block_structures[0])
+        self.local_cache.delete('root')
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
@@ -6,12 +6,12 @@ from nose.plugins.attrib import attr
 from unittest import TestCase
 
 from ..block_structure import BlockStructureBlockData
-from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import INCREMENTAL_UPDATE, RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
 from ..exceptions import UsageKeyNotInBlockStructure, BlockStructureNotFound
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
 from .helpers import (
-    MockModulestoreFactory, MockCache, MockTransformer,
+    MockModulestoreFactory, MockCache, MockTransformer, MockXBlock,
     ChildrenMapTestMixin, UsageKeyFactoryMixin,
     mock_registered_transformers,
 )
@@ -25,6 +25,7 @@ class TestTransformer1(MockTransformer):
     collect_data_key = 't1.collect'
     transform_data_key = 't1.transform'
     collect_call_count = 0
+    SUPPORTS_INCREMENTAL_COLLECT = True
 
     @classmethod
     def collect(cls, block_structure):
@@ -219,3 +220,59 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+    def _update_collected_with_changes(self, changed_block_ids):
+        """
+        Marks the given blocks as changed in a new course version and
+        updates the collected block structure.
+        """
+        root_xblock = self.modulestore.blocks[self.block_key_factory(0)]
+        previous_version = root_xblock.field_map.get('course_version')
+        root_xblock.field_map['course_version'] = (previous_version or 0) + 1
+        self.modulestore.get_changed_block_keys = lambda course_key, since_version: (
+            {self.block_key_factory(block_id) for block_id in changed_block_ids}
+            if since_version == unicode(previous_version) else None
+        )
+        self.modulestore.get_items_call_count = 0
+        with waffle().override(INCREMENTAL_UPDATE, active=True):
+            with mock_registered_transformers(self.registered_transformers):
+                self.bs_manager.update_collected_if_needed()
+
+    def test_update_collected_incrementally(self):
+        self._update_collected_with_changes([])
+        self.assertEquals(self.modulestore.get_items_call_count, len(self.children_map))
+
+        # Only the changed block and its ancestors are loaded.
+        self._update_collected_with_changes([3])
+        self.assertEquals(self.modulestore.get_items_call_count, 3)
+        self.assertEquals(TestTransformer1.collect_call_count, 2)
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+
+    def test_update_collected_incrementally_with_new_block(self):
+        self._update_collected_with_changes([])
+
+        new_block_key = self.block_key_factory(5)
+        self.modulestore.blocks[new_block_key] = MockXBlock(new_block_key, modulestore=self.modulestore)
+        self.modulestore.blocks[self.block_key_factory(2)].children.append(new_block_key)
+        self.children_map = [[1, 2], [3, 4], [5], [], [], []]
+        self._update_collected_with_changes([2, 5])
+
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+
+    def test_update_collected_incrementally_with_removed_block(self):
+        self._update_collected_with_changes([])
+
+        del self.modulestore.blocks[self.block_key_factory(4)]
+        self.modulestore.blocks[self.block_key_factory(1)].children.remove(self.block_key_factory(4))
+        self.children_map = [[1, 2], [3], [], []]
+        self._update_collected_with_changes([1, 4])
+
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+        with mock_registered_transformers(self.registered_transformers):
+            self.assertNotIn(self.block_key_factory(4), self.bs_manager.get_collected())
+
+    def test_update_collected_incrementally_unknown_changes(self):
+        self._update_collected_with_changes([])
+        self.modulestore.blocks[self.block_key_factory(0)].field_map['course_version'] = None
+        self._update_collected_with_changes([3])
+        self.assertEquals(self.modulestore.get_items_call_count, len(self.children_map))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for block_structure/serialization.py
+"""
+# pylint: disable=protected-access
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import date, datetime, timedelta
+from unittest import TestCase
+
+import ddt
+from nose.plugins.attrib import attr
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+from pytz import utc
+
+from ..serialization import BlockStructureSerializationError, deserialize, is_columnar_format, serialize
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the columnar serialization of block structures.
+    """
+    def _round_trip(self, block_structure):
+        """
+        Serializes and deserializes the given block structure, returning
+        the deserialized data.
+        """
+        serialized_data = serialize(
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        )
+        self.assertTrue(is_columnar_format(serialized_data))
+        return deserialize(serialized_data)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_relations(self, children_map):
+        block_structure = self.create_block_structure(children_map)
+        block_relations, _, _ = self._round_trip(block_structure)
+        for usage_key, relations in block_structure._block_relations.iteritems():
+            self.assertEqual(block_relations[usage_key].children, relations.children)
+            self.assertEqual(block_relations[usage_key].parents, relations.parents)
+
+    @ddt.data(
+        None,
+        True,
+        7,
+        2 ** 70,
+        1.5,
+        u'unicode ☃',
+        'ascii',
+        '\xff\xfe bytes',
+        [1, [2, u'3']],
+        (1, (2, 3)),
+        {1, 2},
+        frozenset([u'a']),
+        {1: [u'a'], u'b': {2: None}},
+        datetime(2017, 5, 1, 12, 30, 15, 100, tzinfo=utc),
+        datetime(2017, 5, 1),
+        date(2017, 5, 1),
+        timedelta(days=1, seconds=2, microseconds=3),
+        CourseLocator('org', 'course', 'run'),
+        BlockUsageLocator(CourseLocator('org', 'course', 'run'), 'problem', 'p1'),
+        OrderedDict([(u'a', 1)]),
+    )
+    def test_field_values(self, value):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        usage_key = self.block_key_factory(3)
+        block_structure._get_or_create_block(usage_key).test_field = value
+        block_structure.set_transformer_block_field(usage_key, MockTransformer, 'test_field', value)
+        block_structure.set_transformer_data(MockTransformer, 'test_field', value)
+
+        _, transformer_data, block_data_map = self._round_trip(block_structure)
+
+        for decoded_value in (
+                block_data_map[usage_key].test_field,
+                getattr(block_data_map[usage_key].transformer_data[MockTransformer], 'test_field'),
+                getattr(transformer_data[MockTransformer], 'test_field'),
+        ):
+            self.assertEqual(decoded_value, value)
+            if not isinstance(value, str):
+                self.assertEqual(type(decoded_value), type(value))
+
+    def test_lazy_block_data(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        for block_id in range(len(self.SIMPLE_CHILDREN_MAP)):
+            block_structure._get_or_create_block(self.block_key_factory(block_id)).test_field = block_id
+
+        _, _, block_data_map = self._round_trip(block_structure)
+        self.assertEqual(len(block_data_map), len(self.SIMPLE_CHILDREN_MAP))
+        self.assertEqual(dict.__len__(block_data_map), 0)
+
+        self.assertEqual(block_data_map[self.block_key_factory(2)].test_field, 2)
+        self.assertIn(self.block_key_factory(4), block_data_map)
+        self.assertEqual(dict.__len__(block_data_map), 1)
+
+        shallow_copied_map = block_data_map.copy()
+        self.assertEqual(type(shallow_copied_map), type(block_data_map))
+        self.assertEqual(len(shallow_copied_map), len(self.SIMPLE_CHILDREN_MAP))
+        self.assertEqual(dict.__len__(shallow_copied_map), 1)
+        self.assertIs(shallow_copied_map[self.block_key_factory(2)], block_data_map[self.block_key_factory(2)])
+        self.assertEqual(shallow_copied_map[self.block_key_factory(3)].test_field, 3)
+        self.assertIsNot(shallow_copied_map[self.block_key_factory(3)], block_data_map[self.block_key_factory(3)])
+        self.assertEqual(dict.__len__(block_data_map), 2)
+
+        copied_map = deepcopy(block_data_map)
+        self.assertEqual(type(copied_map), dict)
+        self.assertEqual(
+            {usage_key: block_data.test_field for usage_key, block_data in copied_map.iteritems()},
+            {self.block_key_factory(block_id): block_id for block_id in range(len(self.SIMPLE_CHILDREN_MAP))},
+        )
+
+    def test_unsupported_version(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = serialize(block_structure._block_relations, block_structure.transformer_data, {})
+        with self.assertRaises(BlockStructureSerializationError):
+            deserialize(serialized_data[:3] + chr(255) + serialized_data[4:])
@@ -5,10 +5,13 @@ import ddt
 from nose.plugins.attrib import attr
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+from openedx.core.lib.cache_utils import zpickle
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import LOCAL_CACHE, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
+from ..local_cache import get_local_cache
+from ..serialization import is_columnar_format
 from ..store import BlockStructureStore
 from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockCache, MockTransformer
 
@@ -31,6 +34,9 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
 
+        get_local_cache().clear()
+        self.addCleanup(get_local_cache().clear)
+
     def add_transformers(self):
         """
         Add each registered transformer to the block structure.
@@ -90,3 +96,45 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         self.assertEquals(self.mock_cache.timeout_from_last_call, 0)
         self.store.add(self.block_structure)
         self.assertEquals(self.mock_cache.timeout_from_last_call, timeout)
+
+    def test_columnar_format(self):
+        self.store.add(self.block_structure)
+        serialized_data = self.mock_cache.map.values()[0]
+        self.assertTrue(is_columnar_format(serialized_data))
+
+    def test_legacy_format(self):
+        self.store.add(self.block_structure)
+        cache_key = self.mock_cache.map.keys()[0]
+        self.mock_cache.map[cache_key] = zpickle((
+            self.block_structure._block_relations,  # pylint: disable=protected-access
+            self.block_structure.transformer_data,
+            self.block_structure._block_data_map,  # pylint: disable=protected-access
+        ))
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+
+    def test_local_cache(self):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(LOCAL_CACHE, active=True):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assertEquals(get_local_cache().misses, 1)
+
+                self.mock_cache.map.clear()
+                second_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assertEquals(get_local_cache().hits, 1)
+                self.assert_block_structure(second_value, self.children_map)
+
+                # Each call returns an instance that can be modified independently.
+                self.assertIsNot(first_value, second_value)
+                first_value.remove_block(self.block_key_factory(1), keep_descendants=False)
+                self.assert_block_structure(self.store.get(self.block_structure.root_block_usage_key), self.children_map)
+
+    def test_local_cache_delete(self):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(LOCAL_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(self.block_structure.root_block_usage_key)
+                self.store.delete(self.block_structure.root_block_usage_key)
+                with self.assertRaises(BlockStructureNotFound):
+                    self.store.get(self.block_structure.root_block_usage_key)
@@ -6,7 +6,9 @@ from nose.plugins.attrib import attr
 from unittest import TestCase
 
 from ..block_structure import BlockStructureModulestoreData
+from ..config import PROFILE_TRANSFORMERS, waffle
 from ..exceptions import TransformerException, TransformerDataIncompatible
+from ..profiling import COLLECT, TRANSFORM, BlockStructureProfiler
 from ..transformers import BlockStructureTransformers
 from .helpers import (
     ChildrenMapTestMixin, MockTransformer, MockFilteringTransformer, mock_registered_transformers
@@ -82,3 +84,91 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
                 self.transformers.verify_versions(block_structure)
             self.transformers.collect(block_structure)
             self.assertTrue(self.transformers.verify_versions(block_structure))
+
+
+class FieldReadingTransformer(MockTransformer):
+    """
+    Mock transformer that reads a field of each block and removes block 2.
+    """
+    def transform(self, usage_info, block_structure):
+        for block_key in list(block_structure):
+            block_structure.get_xblock_field(block_key, 'display_name')
+        block_structure.remove_block(2, keep_descendants=False)
+
+
+class BlockRemovingFilteringTransformer(MockFilteringTransformer):
+    """
+    Mock filtering transformer that removes block 1.
+    """
+    def transform_block_filters(self, usage_info, block_structure):
+        return [block_structure.create_removal_filter(lambda block_key: block_key == 1)]
+
+
+@attr(shard=2)
+class TestBlockStructureTransformersProfiling(ChildrenMapTestMixin, TestCase):
+    """
+    Test class for the profiling of BlockStructureTransformers
+    """
+    def setUp(self):
+        super(TestBlockStructureTransformersProfiling, self).setUp()
+        self.registered_transformers = [FieldReadingTransformer(), BlockRemovingFilteringTransformer()]
+        self.block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+
+    def create_transformers(self, profiler=None):
+        """
+        Returns a collection of the registered transformers.
+        """
+        with mock_registered_transformers(self.registered_transformers):
+            return BlockStructureTransformers(self.registered_transformers, MagicMock(), profiler)
+
+    def test_transform_profiles(self):
+        profiler = BlockStructureProfiler()
+        self.create_transformers(profiler).transform(self.block_structure)
+
+        profiles = {profile.transformer_name: profile for profile in profiler.get_profiles()}
+        self.assertEquals(set(profiles), {'FieldReadingTransformer', 'BlockRemovingFilteringTransformer'})
+
+        filtering_profile = profiles['BlockRemovingFilteringTransformer']
+        self.assertEquals(filtering_profile.phase, TRANSFORM)
+        self.assertEquals(filtering_profile.blocks_removed, 1)
+        self.assertEquals(filtering_profile.fields_read, 0)
+
+        # Block 1 was removed by the filters, but its descendants remain until pruned.
+        reading_profile = profiles['FieldReadingTransformer']
+        self.assertEquals(reading_profile.phase, TRANSFORM)
+        self.assertEquals(reading_profile.calls, 1)
+        self.assertEquals(reading_profile.blocks_removed, 1)
+        self.assertEquals(reading_profile.fields_read, 4)
+
+        ranked_profiles = profiler.get_ranked_profiles()
+        self.assertEquals(len(ranked_profiles), 2)
+        self.assertGreaterEqual(ranked_profiles[0].duration, ranked_profiles[1].duration)
+
+    def test_collect_profiles(self):
+        profiler = BlockStructureProfiler()
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP, BlockStructureModulestoreData)
+        with mock_registered_transformers(self.registered_transformers):
+            BlockStructureTransformers.collect(block_structure, profiler)
+
+        profiles = profiler.get_profiles()
+        self.assertEquals(len(profiles), 2)
+        self.assertEquals({profile.phase for profile in profiles}, {COLLECT})
+        self.assertEquals({profile.calls for profile in profiles}, {1})
+
+    @patch('openedx.core.djangoapps.content.block_structure.profiling.monitoring_utils.accumulate')
+    def test_metrics_when_switch_enabled(self, mock_accumulate):
+        with waffle().override(PROFILE_TRANSFORMERS, active=True):
+            self.create_transformers().transform(self.block_structure)
+
+        mock_accumulate.assert_any_call(
+            u'block_structure.transformer.FieldReadingTransformer.transform.fields_read', 4
+        )
+        mock_accumulate.assert_any_call(
+            u'block_structure.transformer.BlockRemovingFilteringTransformer.transform.blocks_removed', 1
+        )
+
+    @patch('openedx.core.djangoapps.content.block_structure.profiling.monitoring_utils.accumulate')
+    def test_no_metrics_when_switch_disabled(self, mock_accumulate):
+        with waffle().override(PROFILE_TRANSFORMERS, active=False):
+            self.create_transformers().transform(self.block_structure)
+        self.assertFalse(mock_accumulate.called)
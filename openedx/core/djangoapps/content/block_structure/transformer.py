@@ -55,6 +55,17 @@ class BlockStructureTransformer(object):
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # Whether the transformer's collect method can be run on a block
+    # structure whose traversals yield only the blocks affected by a
+    # change (see BlockStructureIncrementalModulestoreData), with the
+    # previously collected data of all other blocks retained.
+    #
+    # This holds when the data collected for each block depends only on
+    # the block itself, its ancestors and its descendants.  Block
+    # structures are incrementally recollected only if all registered
+    # transformers support it.
+    SUPPORTS_INCREMENTAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
@@ -2,9 +2,12 @@
 Module for a collection of BlockStructureTransformers.
 """
 import functools
+from contextlib import contextmanager
 from logging import getLogger
 
+from . import config
 from .exceptions import TransformerException, TransformerDataIncompatible
+from .profiling import COLLECT, TRANSFORM, BlockStructureProfiler
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
 
@@ -23,7 +26,7 @@ class BlockStructureTransformers(object):
     Clients are expected to access the list of transformers through the
     class' interface rather than directly.
     """
-    def __init__(self, transformers=None, usage_info=None):
+    def __init__(self, transformers=None, usage_info=None, profiler=None):
         """
         Arguments:
             transformers ([BlockStructureTransformer]) - List of transformers
@@ -36,11 +39,19 @@ class BlockStructureTransformers(object):
                 usage_info would contain a user object for which the
                 transform should be applied.
 
+            profiler (BlockStructureProfiler) - Optional profiler that
+                records the cost of each transformer.  If None, the
+                transformers are only profiled when the
+                profile_transformers waffle switch is enabled, in
+                which case their costs are reported as monitoring
+                custom metrics.
+
         Raises:
             TransformerException - if any transformer is not registered in the
                 Transformer Registry.
         """
         self.usage_info = usage_info
+        self.profiler = profiler
         self._transformers = {'supports_filter': [], 'no_filter': []}
         if transformers:
             self.__iadd__(transformers)
@@ -71,17 +82,37 @@ class BlockStructureTransformers(object):
         return self
 
     @classmethod
-    def collect(cls, block_structure):
+    def collect(cls, block_structure, profiler=None):
         """
         Collects data for each registered transformer.
-        """
-        for transformer in TransformerRegistry.get_registered_transformers():
-            block_structure._add_transformer(transformer)  # pylint: disable=protected-access
-            transformer.collect(block_structure)
+
+        Arguments:
+            profiler (BlockStructureProfiler) - Optional profiler that
+                records the cost of each transformer's collect phase.
+        """
+        with cls._profiling(profiler) as profiler:
+            for transformer in TransformerRegistry.get_registered_transformers():
+                block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+                if profiler:
+                    with profiler.profile(transformer, COLLECT, block_structure):
+                        transformer.collect(block_structure)
+                else:
+                    transformer.collect(block_structure)
 
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def supports_incremental_collect(cls):
+        """
+        Returns whether all registered transformers support collecting
+        data for only the blocks affected by a change.
+        """
+        return all(
+            transformer.SUPPORTS_INCREMENTAL_COLLECT
+            for transformer in TransformerRegistry.get_registered_transformers()
+        )
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -112,13 +143,14 @@ class BlockStructureTransformers(object):
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
         """
-        self._transform_with_filters(block_structure)
-        self._transform_without_filters(block_structure)
+        with self._profiling(self.profiler) as profiler:
+            self._transform_with_filters(block_structure, profiler)
+            self._transform_without_filters(block_structure, profiler)
 
         # Prune the block structure to remove any unreachable blocks.
         block_structure._prune_unreachable()  # pylint: disable=protected-access
 
-    def _transform_with_filters(self, block_structure):
+    def _transform_with_filters(self, block_structure, profiler=None):
         """
         Transforms the given block_structure using the transform_block_filters
         method from the given transformers.
@@ -128,7 +160,15 @@ class BlockStructureTransformers(object):
 
         filters = []
         for transformer in self._transformers['supports_filter']:
-            filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
+            if profiler:
+                with profiler.profile(transformer, TRANSFORM, block_structure):
+                    transformer_filters = transformer.transform_block_filters(self.usage_info, block_structure)
+                filters.extend(
+                    profiler.profile_filter(transformer, block_structure, transformer_filter)
+                    for transformer_filter in transformer_filters
+                )
+            else:
+                filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
 
         combined_filters = functools.reduce(
             self._filter_chain,
@@ -144,10 +184,33 @@ class BlockStructureTransformers(object):
         """
         return lambda block_key: accumulated(block_key) and additional(block_key)
 
-    def _transform_without_filters(self, block_structure):
+    def _transform_without_filters(self, block_structure, profiler=None):
         """
         Transforms the given block_structure using the transform
         method from the given transformers.
         """
         for transformer in self._transformers['no_filter']:
-            transformer.transform(self.usage_info, block_structure)
+            if profiler:
+                with profiler.profile(transformer, TRANSFORM, block_structure):
+                    transformer.transform(self.usage_info, block_structure)
+            else:
+                transformer.transform(self.usage_info, block_structure)
+
+    @staticmethod
+    @contextmanager
+    def _profiling(profiler):
+        """
+        A context manager that yields the given profiler or, if None and
+        the profile_transformers waffle switch is enabled, a new profiler
+        whose profiles are reported as monitoring custom metrics on exit.
+        Otherwise, yields None.
+        """
+        if profiler is not None or not config.waffle().is_enabled(config.PROFILE_TRANSFORMERS):
+            yield profiler
+            return
+
+        profiler = BlockStructureProfiler()
+        try:
+            yield profiler
+        finally:
+            profiler.report_metrics()
@@ -1,11 +1,33 @@
 """
 Helper functions for caching course assets.
+
+Assets under CONTENT_CACHE_MAX_LENGTH are cached in the "course_assets"
+cache.  Larger assets can be cached on the local disk of each node, in the
+COURSE_ASSETS_DISK_CACHE directory, with only their metadata in the
+"course_assets" cache.  Their files are named after their location and
+content digest, so that a new version of an asset, found once its metadata
+is deleted from the cache by del_cached_content, is cached in a new file,
+while the least recently used files are removed when the cache exceeds its
+maximum size.  Files are written in the background, by a single thread of
+all the processes sharing the disk cache at a time.
 """
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+from threading import Thread
+from time import time
+
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContent, StaticContentStream
+
+log = logging.getLogger(__name__)
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -14,6 +36,16 @@ try:
 except InvalidCacheBackendError:
     pass
 
+# Assets of this length or more aren't cached in the "course_assets" cache.
+CONTENT_CACHE_MAX_LENGTH = 1048576
+
+# Prefix of the files of the disk cache that are being written, and of their locks.
+DISK_CACHE_TEMP_PREFIX = '.tmp'
+
+# Number of seconds after which the lock of a file of the disk cache is
+# considered stale, e.g. because the process writing the file was killed.
+DISK_CACHE_LOCK_TIMEOUT = 60 * 60
+
 
 def set_cached_content(content):
     """
@@ -48,3 +80,241 @@ def del_cached_content(location):
         pass
 
     CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+
+    # Other nodes find the new version of the content, and cache it in a new
+    # file, once its metadata is deleted from the cache.
+    if is_disk_cache_enabled():
+        _delete_disk_cached_files(location)
+
+
+def set_cached_content_metadata(content):
+    """
+    Stores the metadata of the given piece of content in the cache, without
+    its data, using its location as the key.
+    """
+    set_cached_content(_get_metadata(content))
+
+
+def _get_metadata(content):
+    """
+    Returns a StaticContent with the metadata of the given piece of content,
+    without its data.
+    """
+    return StaticContent(
+        content.location, content.name, content.content_type, None,
+        last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+        import_path=content.import_path, length=content.length, locked=content.locked,
+        content_digest=content.content_digest,
+    )
+
+
+def is_metadata_only(content):
+    """
+    Returns whether the given piece of content was cached without its data.
+    """
+    return not isinstance(content, StaticContentStream) and content.data is None
+
+
+def is_disk_cache_enabled():
+    """
+    Returns whether large assets are cached on the local disk.
+    """
+    return bool(_get_disk_cache_setting('DIRECTORY'))
+
+
+def get_disk_cached_content_path(content):
+    """
+    Returns the path of the file of the given piece of content in the disk
+    cache, or None if it isn't cached on disk.
+    """
+    file_path = _get_disk_cache_path(content.location, content.content_digest)
+    if file_path is None:
+        return None
+
+    try:
+        # Mark the file as recently used, for the eviction of the least recently used files.
+        os.utime(file_path, None)
+    except OSError as exception:
+        if exception.errno != errno.ENOENT:
+            log.exception(u'Cannot access the disk cached content of %s', content.location)
+        return None
+    return file_path
+
+
+def set_disk_cached_content_in_background(content):
+    """
+    Stores the data of the given piece of content in the disk cache from a
+    background thread, so that requests are not held up by copying large
+    assets from the contentstore.  Returns the thread, or None if the
+    content can't be cached on disk.
+    """
+    if not _is_disk_cacheable(content):
+        return None
+    thread = Thread(target=set_disk_cached_content, args=(_get_metadata(content),), name='contentserver.disk_cache')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def set_disk_cached_content(content):
+    """
+    Stores the data of the given piece of content in the disk cache, reading
+    it from the contentstore, and returns the path of its file, or None if it
+    couldn't be cached, or is being cached by another thread or process.
+    """
+    if not _is_disk_cacheable(content):
+        return None
+
+    file_path = _get_disk_cache_path(content.location, content.content_digest)
+    directory = os.path.dirname(file_path)
+    lock_path = None
+    temp_path = None
+    try:
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as exception:
+                if exception.errno != errno.EEXIST:
+                    raise
+
+        lock_path = _acquire_disk_cache_lock(file_path)
+        if lock_path is None:
+            return None
+        if os.path.exists(file_path):
+            # Cached by another thread or process in the meantime.
+            return file_path
+
+        stream = AssetManager.find(content.location, as_stream=True)
+        try:
+            temp_file = tempfile.NamedTemporaryFile(dir=directory, prefix=DISK_CACHE_TEMP_PREFIX, delete=False)
+            temp_path = temp_file.name
+            with temp_file:
+                for chunk in stream.stream_data():
+                    temp_file.write(chunk)
+        finally:
+            stream.close()
+        # Readers only ever see complete files.
+        os.rename(temp_path, file_path)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u'Cannot cache the content of %s on disk', content.location)
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+    finally:
+        if lock_path is not None:
+            os.remove(lock_path)
+
+    _evict_disk_cached_files(directory, _get_disk_cache_setting('MAX_SIZE'))
+    return file_path
+
+
+def _is_disk_cacheable(content):
+    """
+    Returns whether the given piece of content can be cached on disk.
+    """
+    max_size = _get_disk_cache_setting('MAX_SIZE')
+    return (
+        _get_disk_cache_path(content.location, content.content_digest) is not None and
+        bool(content.length) and
+        (max_size is None or content.length <= max_size)
+    )
+
+
+def _acquire_disk_cache_lock(file_path):
+    """
+    Creates the lock of the given file of the disk cache, and returns its
+    path, or None if the file is already locked by another thread or process.
+    """
+    directory, file_name = os.path.split(file_path)
+    lock_path = os.path.join(directory, u'{}{}.lock'.format(DISK_CACHE_TEMP_PREFIX, file_name))
+    for __ in range(2):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lock_path
+        except OSError as exception:
+            if exception.errno != errno.EEXIST:
+                raise
+        try:
+            if time() - os.path.getmtime(lock_path) < DISK_CACHE_LOCK_TIMEOUT:
+                return None
+            # Remove the stale lock, and try again.
+            os.remove(lock_path)
+        except OSError:
+            pass
+    return None
+
+
+def _get_disk_cache_setting(name):
+    """
+    Returns the value of the given setting of the disk cache.
+    """
+    return getattr(settings, 'COURSE_ASSETS_DISK_CACHE', {}).get(name)
+
+
+def _get_disk_cache_path(location, content_digest):
+    """
+    Returns the path of the file of the given version of the content at the
+    given location in the disk cache, or None if it can't be cached on disk.
+    """
+    directory = _get_disk_cache_setting('DIRECTORY')
+    if not directory or not content_digest:
+        return None
+    return os.path.join(directory, u'{}.{}'.format(_get_location_digest(location), content_digest))
+
+
+def _get_location_digest(location):
+    """
+    Returns the digest of the given location used in the names of its files
+    in the disk cache, which is the same for the location without a run.
+    """
+    try:
+        location = location.replace(run=None)
+    except InvalidKeyError:
+        pass
+    return hashlib.sha1(unicode(location).encode('utf-8')).hexdigest()
+
+
+def _delete_disk_cached_files(location):
+    """
+    Deletes all the versions of the content at the given location from the
+    disk cache of this node.
+    """
+    directory = _get_disk_cache_setting('DIRECTORY')
+    prefix = _get_location_digest(location) + '.'
+    try:
+        file_names = [file_name for file_name in os.listdir(directory) if file_name.startswith(prefix)]
+    except OSError:
+        return
+    for file_name in file_names:
+        try:
+            os.remove(os.path.join(directory, file_name))
+        except OSError:
+            pass
+
+
+def _evict_disk_cached_files(directory, max_size):
+    """
+    Deletes the least recently used files of the disk cache in the given
+    directory until their total size is at most the given size.
+    """
+    files = []
+    total_size = 0
+    for file_name in os.listdir(directory):
+        if file_name.startswith(DISK_CACHE_TEMP_PREFIX):
+            continue
+        file_path = os.path.join(directory, file_name)
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            continue
+        files.append((file_stat.st_mtime, file_stat.st_size, file_path))
+        total_size += file_stat.st_size
+
+    for __, file_size, file_path in sorted(files):
+        if max_size is None or total_size <= max_size:
+            break
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        total_size -= file_size
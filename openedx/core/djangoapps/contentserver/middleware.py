@@ -4,23 +4,34 @@ Middleware to serve assets.
 
 import logging
 import datetime
+from uuid import uuid4
 log = logging.getLogger(__name__)
 try:
     import newrelic.agent
 except ImportError:
     newrelic = None  # pylint: disable=invalid-name
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
-    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect, StreamingHttpResponse)
+from django.utils.http import parse_etags, quote_etag
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from openedx.core.djangoapps.header_control import force_header_for_response
-from .caching import get_cached_content, set_cached_content
+from .caching import (
+    CONTENT_CACHE_MAX_LENGTH,
+    get_cached_content,
+    get_disk_cached_content_path,
+    is_disk_cache_enabled,
+    is_metadata_only,
+    set_cached_content,
+    set_cached_content_metadata,
+    set_disk_cached_content_in_background
+)
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -31,6 +42,9 @@ from .models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# Range requests with more ranges than this, once coalesced, get the full content.
+MAX_BYTE_RANGES = 20
+
 
 class StaticContentServer(object):
     """
@@ -107,23 +121,37 @@ class StaticContentServer(object):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
+            # if this asset has changed since then.  If-None-Match takes precedence over
+            # If-Modified-Since when both are sent.
+            # https://tools.ietf.org/html/rfc7232#section-6
+            etag = get_etag(content)
             last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag is not None and etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
-            # *** File streaming within a byte range ***
+            # Serve the assets too large for the cache from the disk cache of this node.
+            disk_cached_file = None
+            if is_disk_cache_enabled() and (isinstance(content, StaticContentStream) or is_metadata_only(content)):
+                content, disk_cached_file = self.load_asset_from_disk_cache(content)
+
+            # *** File streaming within byte ranges ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
+            # Request -> Range attribute structure: "Range: bytes=first-[last][, first-[last]...]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
-            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
+            # Multiple ranges are coalesced, and sent back as the parts of a multipart/byteranges response.
+            # https://tools.ietf.org/html/rfc7233
             response = None
-            if request.META.get('HTTP_RANGE'):
+            if request.META.get('HTTP_RANGE') and is_range_applicable(request, etag, last_modified_at_str):
                 # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
+                if not isinstance(content, StaticContentStream):
                     content = AssetManager.find(loc, as_stream=True)
 
                 header_value = request.META['HTTP_RANGE']
@@ -138,36 +166,60 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
+                        # Unsatisfiable ranges are ignored, as long as one of the ranges is satisfiable.
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            content.close()
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        ranges = coalesce_ranges(ranges)
+                        if len(ranges) > MAX_BYTE_RANGES:
+                            log.warning(
+                                u"Too many ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = StreamingHttpResponse(
+                                stream_and_close(content, content.stream_data_in_range(first, last)),
+                                content_type=content.content_type,
+                            )
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
+                        else:
+                            boundary = uuid4().hex
+                            response = StreamingHttpResponse(
+                                stream_and_close(content, stream_multipart_byteranges(content, ranges, boundary)),
+                                content_type='multipart/byteranges; boundary={}'.format(boundary),
+                            )
+                            response['Content-Length'] = str(
+                                get_multipart_byteranges_length(content, ranges, boundary)
+                            )
+
+                        if response is not None:
                             response.status_code = 206  # Partial Content
 
                             if newrelic:
                                 newrelic.agent.add_custom_parameter('contentserver.ranged', True)
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
-            # If Range header is absent or syntactically invalid return a full content response.
+            # If Range header is absent, syntactically invalid, has too many ranges or doesn't apply,
+            # return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if disk_cached_file is not None:
+                    response = FileResponse(disk_cached_file, content_type=content.content_type)
+                elif isinstance(content, StaticContentStream):
+                    response = StreamingHttpResponse(
+                        stream_and_close(content, content.stream_data()), content_type=content.content_type
+                    )
+                else:
+                    response = HttpResponse(content.stream_data(), content_type=content.content_type)
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -176,7 +228,6 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
             # middleware we have in place, there's no easy way to use the built-in Django
@@ -212,6 +263,9 @@ class StaticContentServer(object):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        etag = get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
@@ -273,7 +327,9 @@ class StaticContentServer(object):
 
         # See if we can load this item from cache.
         content = get_cached_content(location)
-        if content is None:
+        if content is None or (is_metadata_only(content) and not is_disk_cache_enabled()):
+            # Only the metadata of assets cached on disk is in the cache, so their data
+            # must be loaded from the contentstore on nodes without a disk cache.
             # Not in cache, so just try and load it from the asset manager.
             try:
                 content = AssetManager.find(location, as_stream=True)
@@ -283,12 +339,44 @@ class StaticContentServer(object):
             # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
             # because it's the default for memcached and also we don't want to do too much
             # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
+            if content.length is not None and content.length < CONTENT_CACHE_MAX_LENGTH:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
+            elif is_disk_cache_enabled():
+                # The data of larger assets is cached on disk, so only cache their metadata.
+                set_cached_content_metadata(content)
 
         return content
 
+    def load_asset_from_disk_cache(self, content):
+        """
+        Returns a StaticContentStream of the given asset, and the file of the
+        disk cache it is read from, if any.  Assets not cached on disk yet are
+        streamed from the contentstore, while they are cached in the background.
+        """
+        file_path = get_disk_cached_content_path(content)
+        if file_path is not None:
+            try:
+                disk_cached_file = open(file_path, 'rb')
+            except IOError:
+                # The file was evicted from the disk cache since.
+                pass
+            else:
+                if isinstance(content, StaticContentStream):
+                    content.close()
+                return StaticContentStream(
+                    content.location, content.name, content.content_type, disk_cached_file,
+                    last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+                    import_path=content.import_path, length=content.length, locked=content.locked,
+                    content_digest=content.content_digest,
+                ), disk_cached_file
+        else:
+            set_disk_cached_content_in_background(content)
+
+        if is_metadata_only(content):
+            content = AssetManager.find(content.location, as_stream=True)
+        return content, None
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -331,3 +419,121 @@ def parse_range_header(header_value, content_length):
         raise ValueError('Invalid syntax')
 
     return unit, ranges
+
+
+def coalesce_ranges(ranges):
+    """
+    Returns the given list of (start, end) tuples of ranges sorted, with the
+    overlapping and adjacent ranges merged.
+    """
+    coalesced_ranges = []
+    for first, last in sorted(ranges):
+        if coalesced_ranges and first <= coalesced_ranges[-1][1] + 1:
+            coalesced_ranges[-1] = (coalesced_ranges[-1][0], max(last, coalesced_ranges[-1][1]))
+        else:
+            coalesced_ranges.append((first, last))
+    return coalesced_ranges
+
+
+def get_etag(content):
+    """
+    Returns the strong ETag of the given content, based on its digest, or
+    None if it has no digest.
+    """
+    if not content.content_digest:
+        return None
+    return quote_etag(content.content_digest)
+
+
+def etag_matches(header_value, etag):
+    """
+    Returns whether the given ETag matches one of the entity tags of the
+    given If-None-Match header, using the weak comparison.
+
+    See spec for details: https://tools.ietf.org/html/rfc7232#section-3.2
+    """
+    if header_value.strip() == '*':
+        return True
+    # parse_etags drops the weakness indicators of the entity tags.
+    return etag in [quote_etag(tag) for tag in parse_etags(header_value)]
+
+
+def is_range_applicable(request, etag, last_modified_at_str):
+    """
+    Returns whether the Range header of the given request applies to the
+    content with the given ETag and last modification date, i.e. whether
+    the If-Range header of the request, if any, matches the content.  A
+    weak entity tag never matches.
+
+    See spec for details: https://tools.ietf.org/html/rfc7233#section-3.2
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+    if if_range.startswith('W/'):
+        return False
+    return if_range == last_modified_at_str
+
+
+def stream_and_close(content, chunks):
+    """
+    Yields the given chunks of the data of the given StaticContentStream,
+    and closes it once they are all sent, or the response is closed.
+    """
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        content.close()
+
+
+def _get_multipart_byterange_header(content, first, last, boundary):
+    """
+    Returns the boundary and headers of the part of a multipart/byteranges
+    response with the data of the given content between first and last.
+    """
+    return (
+        u'--{boundary}\r\n'
+        u'Content-Type: {content_type}\r\n'
+        u'Content-Range: bytes {first}-{last}/{length}\r\n'
+        u'\r\n'
+    ).format(
+        boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+    ).encode('utf-8')
+
+
+def _get_multipart_byteranges_end(boundary):
+    """
+    Returns the final boundary of a multipart/byteranges response.
+    """
+    return '--{boundary}--\r\n'.format(boundary=boundary)
+
+
+def stream_multipart_byteranges(content, ranges, boundary):
+    """
+    Yields the body of a multipart/byteranges response with the data of the
+    given StaticContentStream in the given (first, last) ranges, without
+    loading the data in memory.
+
+    See spec for details: https://tools.ietf.org/html/rfc7233#appendix-A
+    """
+    for first, last in ranges:
+        yield _get_multipart_byterange_header(content, first, last, boundary)
+        for chunk in content.stream_data_in_range(first, last):
+            yield chunk
+        yield '\r\n'
+    yield _get_multipart_byteranges_end(boundary)
+
+
+def get_multipart_byteranges_length(content, ranges, boundary):
+    """
+    Returns the length of the body of the multipart/byteranges response
+    streamed by stream_multipart_byteranges.
+    """
+    length = len(_get_multipart_byteranges_end(boundary))
+    for first, last in ranges:
+        length += len(_get_multipart_byterange_header(content, first, last, boundary)) + (last - first + 1) + 2
+    return length
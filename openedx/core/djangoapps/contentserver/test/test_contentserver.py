@@ -6,6 +6,7 @@ import copy
 import datetime
 import ddt
 import logging
+import os
 import unittest
 from uuid import uuid4
 
@@ -27,7 +28,10 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
-from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from openedx.core.lib.tempdir import mkdtemp_clean
+
+from ..caching import DISK_CACHE_TEMP_PREFIX, del_cached_content
+from ..middleware import coalesce_ranges, parse_range_header, HTTP_DATE_FORMAT, MAX_BYTE_RANGES, StaticContentServer
 
 log = logging.getLogger(__name__)
 
@@ -38,6 +42,30 @@ TEST_DATA_DIR = settings.COMMON_TEST_DATA_ROOT
 FAKE_MD5_HASH = 'ffffffffffffffffffffffffffffffff'
 
 
+def get_response_content(response):
+    """
+    Returns the content of the given response, whether it's streaming or not.
+    """
+    if response.streaming:
+        return ''.join(response.streaming_content)
+    return response.content
+
+
+class SynchronousThread(object):
+    """
+    Thread running its target when started, to fill the disk cache synchronously in tests.
+    """
+    def __init__(self, target, args=(), **kwargs):  # pylint: disable=unused-argument
+        self.target = target
+        self.args = args
+
+    def start(self):
+        """
+        Runs the target of the thread.
+        """
+        self.target(*self.args)
+
+
 def get_versioned_asset_url(asset_path):
     """
     Creates a versioned asset URL.
@@ -242,17 +270,91 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message with
+        a part for each range.
         """
+        data = get_response_content(self.client.get(self.url_unlocked))
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
+        self.assertEqual(resp.status_code, 206)
+        self.assertNotIn('Content-Range', resp)
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+
+        content = get_response_content(resp)
+        self.assertEqual(resp['Content-Length'], str(len(content)))
+        parts = content.split('--{}'.format(boundary))
+        self.assertEqual(parts[0], '')
+        self.assertEqual(parts[-1], '--\r\n')
+        expected_ranges = [
+            (first_byte, last_byte),
+            (self.length_unlocked - 100, self.length_unlocked - 1),
+        ]
+        self.assertEqual(len(parts[1:-1]), len(expected_ranges))
+        for part, (first, last) in zip(parts[1:-1], expected_ranges):
+            headers, part_data = part.split('\r\n\r\n', 1)
+            self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+                first=first, last=last, length=self.length_unlocked), headers)
+            self.assertEqual(part_data, data[first:last + 1] + '\r\n')
+
+    def test_range_request_partially_satisfiable_ranges(self):
+        """
+        Test that unsatisfiable ranges are ignored when other ranges are satisfiable.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1, {first}-'.format(
+            first=self.length_unlocked))
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-1/{length}'.format(length=self.length_unlocked))
+
+    def test_range_request_overlapping_ranges(self):
+        """
+        Test that overlapping and adjacent ranges are coalesced into a single range.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-19, 0-9, 5-14')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-19/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '20')
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that a range request with too many ranges outputs a 200 OK full content response.
+        """
+        header_value = 'bytes=' + ', '.join(
+            '{first}-{first}'.format(first=first) for first in range(0, 2 * (MAX_BYTE_RANGES + 1), 2)
+        )
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE=header_value)
         self.assertEqual(resp.status_code, 200)
         self.assertNotIn('Content-Range', resp)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
+    def test_if_none_match(self):
+        """
+        Test that a request with the ETag of the asset in If-None-Match outputs 304 Not Modified.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", {}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    @ddt.data(
+        (True, 206),
+        (False, 200),
+    )
+    @ddt.unpack
+    def test_if_range(self, matching_etag, expected_status_code):
+        """
+        Test that a range request is only satisfied if its If-Range matches the ETag of the asset.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag'] if matching_etag else '"other"'
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual(resp.status_code, expected_status_code)
+
     @ddt.data(
         'bytes 0-',
         'bits=0-',
@@ -402,6 +504,91 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         is_from_cdn = StaticContentServer.is_cdn_request(browser_request)
         self.assertEqual(is_from_cdn, True)
 
+    def _override_disk_cache(self):
+        """
+        Returns a context manager caching all the assets in a new disk cache directory.
+        """
+        self.disk_cache_directory = mkdtemp_clean()
+        return override_settings(COURSE_ASSETS_DISK_CACHE={'DIRECTORY': self.disk_cache_directory, 'MAX_SIZE': None})
+
+    @patch('openedx.core.djangoapps.contentserver.caching.Thread', SynchronousThread)
+    @patch('openedx.core.djangoapps.contentserver.middleware.CONTENT_CACHE_MAX_LENGTH', 0)
+    def test_disk_cache(self):
+        """
+        Test that assets too large for the cache are served from the disk cache.
+        """
+        with self._override_disk_cache():
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+            file_names = os.listdir(self.disk_cache_directory)
+            self.assertEqual(len(file_names), 1)
+
+            # Replace the data of the cached file to check it's served from the disk cache.
+            with open(os.path.join(self.disk_cache_directory, file_names[0]), 'wb') as cached_file:
+                cached_file.write('x' * self.length_unlocked)
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(get_response_content(resp), 'x' * self.length_unlocked)
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(get_response_content(resp), 'xx')
+
+            del_cached_content(self.unlocked_asset)
+            self.assertEqual(os.listdir(self.disk_cache_directory), [])
+
+    @patch('openedx.core.djangoapps.contentserver.caching.Thread', SynchronousThread)
+    @patch('openedx.core.djangoapps.contentserver.middleware.CONTENT_CACHE_MAX_LENGTH', 0)
+    def test_disk_cache_eviction(self):
+        """
+        Test that the least recently used assets are evicted from the disk cache.
+        """
+        with self._override_disk_cache():
+            self.client.get(self.url_unlocked)
+            # Make the unlocked asset the least recently used one.
+            file_name = os.listdir(self.disk_cache_directory)[0]
+            os.utime(os.path.join(self.disk_cache_directory, file_name), (0, 0))
+            with override_settings(COURSE_ASSETS_DISK_CACHE={
+                'DIRECTORY': self.disk_cache_directory, 'MAX_SIZE': self.length_unlocked,
+            }):
+                resp = self.client.get(unicode(self.course_key.make_asset_key('asset', 'just_a_test.jpg')))
+            self.assertEqual(resp.status_code, 200)
+            file_names = os.listdir(self.disk_cache_directory)
+            self.assertEqual(len(file_names), 1)
+            with open(os.path.join(self.disk_cache_directory, file_names[0]), 'rb') as cached_file:
+                self.assertEqual(cached_file.read(), get_response_content(resp))
+
+    @patch('openedx.core.djangoapps.contentserver.caching.Thread', SynchronousThread)
+    @patch('openedx.core.djangoapps.contentserver.middleware.CONTENT_CACHE_MAX_LENGTH', 0)
+    def test_disk_cache_locked_file(self):
+        """
+        Test that files being cached on disk by another process are not cached
+        again, while their assets are still served from the contentstore.
+        """
+        expected_content = AssetManager.find(self.unlocked_asset).data
+        with self._override_disk_cache():
+            self.client.get(self.url_unlocked)
+            file_name = os.listdir(self.disk_cache_directory)[0]
+            del_cached_content(self.unlocked_asset)
+            lock_path = os.path.join(self.disk_cache_directory, u'{}{}.lock'.format(DISK_CACHE_TEMP_PREFIX, file_name))
+            open(lock_path, 'w').close()
+
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(get_response_content(resp), expected_content)
+            self.assertEqual(os.listdir(self.disk_cache_directory), [os.path.basename(lock_path)])
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.CONTENT_CACHE_MAX_LENGTH', 0)
+    def test_disk_cache_disabled_on_node(self):
+        """
+        Test that assets whose metadata only is cached are loaded from the
+        contentstore on nodes without a disk cache.
+        """
+        with self._override_disk_cache():
+            with patch('openedx.core.djangoapps.contentserver.caching.Thread'):
+                self.client.get(self.url_unlocked)
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(get_response_content(resp), AssetManager.find(self.unlocked_asset).data)
+
 
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
@@ -431,6 +618,17 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertEqual(len(ranges), excepted_ranges_length)
         self.assertEqual(ranges, expected_ranges)
 
+    @ddt.data(
+        ([(0, 9)], [(0, 9)]),
+        ([(10, 19), (0, 9)], [(0, 19)]),
+        ([(0, 9), (5, 14), (20, 29)], [(0, 14), (20, 29)]),
+        ([(0, 99), (10, 19)], [(0, 99)]),
+        ([(9900, 9999), (9800, 9999)], [(9800, 9999)]),
+    )
+    @ddt.unpack
+    def test_coalesce_ranges(self, ranges, expected_ranges):
+        self.assertEqual(coalesce_ranges(ranges), expected_ranges)
+
     @ddt.data(
         ('bytes=one-20', ValueError, 'invalid literal for int()'),
         ('bytes=-one', ValueError, 'invalid literal for int()'),
@@ -13,7 +13,7 @@ from ipware.ip import get_ip
 from rest_framework import status
 from rest_framework.response import Response
 
-import pygeoip
+from openedx.core.djangoapps.geoinfo.api import country_code_by_addr
 from student.auth import has_course_author_access
 
 from .models import CountryAccessRule, RestrictedCourse
@@ -170,10 +170,7 @@ def _country_code_from_ip(ip_addr):
         str: A 2-letter country code.
 
     """
-    if ip_addr.find(':') >= 0:
-        return pygeoip.GeoIP(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
-    else:
-        return pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+    return country_code_by_addr(ip_addr)
 
 
 def get_embargo_response(request, course_id, user):
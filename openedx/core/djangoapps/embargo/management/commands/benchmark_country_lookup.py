@@ -0,0 +1,106 @@
+"""
+Command to compare the throughput of country lookups of IP addresses by
+opening the GeoIP database for each lookup, as the embargo app used to,
+and by the shared country lookup service.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import random
+import socket
+import struct
+from timeit import default_timer
+
+import pygeoip
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from openedx.core.djangoapps.geoinfo.api import CountryLookupService
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_country_lookup --lookups 100000 --distinct 5000 --settings=devstack
+    """
+    help = 'Benchmarks the lookups per second of the country lookup service on random IPv4 addresses.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            '--lookups',
+            help='Number of lookups to time.',
+            default=100000,
+            type=int,
+        )
+        parser.add_argument(
+            '--distinct',
+            help='Number of distinct IP addresses to look up, as many requests come from the same addresses.',
+            default=5000,
+            type=int,
+        )
+        parser.add_argument(
+            '--seed',
+            help='Seed for the generation of random IP addresses.',
+            default=0,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+        distinct_ip_addrs = [
+            socket.inet_ntoa(struct.pack(b'>I', rand.randint(1 << 24, (224 << 24) - 1)))
+            for __ in xrange(options['distinct'])
+        ]
+        ip_addrs = [rand.choice(distinct_ip_addrs) for __ in xrange(options['lookups'])]
+        geoip_path = settings.GEOIP_PATH
+
+        def lookup_per_database():
+            """
+            Opens the database for each lookup.
+            """
+            return [pygeoip.GeoIP(geoip_path).country_code_by_addr(ip_addr) for ip_addr in ip_addrs]
+
+        def lookup_uncached():
+            """
+            Looks all addresses up in a shared memory-mapped database.
+            """
+            service = CountryLookupService(geoip_path, settings.GEOIPV6_PATH, cache_size=0)
+            return [service.country_code_by_addr(ip_addr) for ip_addr in ip_addrs]
+
+        def lookup_cached():
+            """
+            Looks all addresses up with the shared service, as configured.
+            """
+            service = CountryLookupService(
+                geoip_path, settings.GEOIPV6_PATH, getattr(settings, 'GEOIP_CACHE_SIZE', options['distinct'])
+            )
+            return [service.country_code_by_addr(ip_addr) for ip_addr in ip_addrs]
+
+        def lookup_bulk():
+            """
+            Looks all addresses up with the bulk API of the shared service.
+            """
+            service = CountryLookupService(geoip_path, settings.GEOIPV6_PATH, cache_size=0)
+            country_codes = service.country_codes_by_addr(ip_addrs)
+            return [country_codes[ip_addr] for ip_addr in ip_addrs]
+
+        expected = None
+        self.stdout.write('{} lookups of {} distinct IPv4 addresses'.format(len(ip_addrs), len(distinct_ip_addrs)))
+        for name, lookup in (
+                ('database per lookup', lookup_per_database),
+                ('shared mmap database', lookup_uncached),
+                ('shared database and LRU cache', lookup_cached),
+                ('bulk lookup', lookup_bulk),
+        ):
+            start = default_timer()
+            country_codes = lookup()
+            duration = default_timer() - start
+            self.stdout.write('  {:<32} {:>12.0f} lookups/s'.format(name + ':', len(ip_addrs) / duration))
+
+            if expected is None:
+                expected = country_codes
+            elif country_codes != expected:
+                self.stderr.write('  {} results differ from the database per lookup results.'.format(name))
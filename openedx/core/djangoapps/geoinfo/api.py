@@ -0,0 +1,121 @@
+"""
+Lookup of the country of IP addresses, shared by the embargo app and the
+geoinfo middleware.
+
+The GeoIP databases are opened once per process, in memory-mapped mode,
+and the most recently looked up addresses are cached, so that lookups on
+the hot path of requests don't re-open and re-parse the database files.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+import pygeoip
+from django.conf import settings
+
+# Default maximum number of IP addresses whose country codes are cached.
+DEFAULT_CACHE_SIZE = 10000
+
+
+class CountryLookupService(object):
+    """
+    A thread-safe lookup of the country codes of IPv4 and IPv6 addresses,
+    with a bounded LRU cache of the results.
+    """
+    def __init__(self, geoip_path, geoipv6_path, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Arguments:
+            geoip_path (str) - The path of the IPv4 GeoIP country database.
+            geoipv6_path (str) - The path of the IPv6 GeoIP country database.
+            cache_size (int) - The maximum number of cached IP addresses.
+        """
+        self.geoip_path = geoip_path
+        self.geoipv6_path = geoipv6_path
+        self.cache_size = cache_size
+
+        self._databases = {}
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
+    def country_code_by_addr(self, ip_addr):
+        """
+        Returns the 2-letter country code associated with the given IP
+        address, or an empty string if it is unknown.
+        """
+        with self._lock:
+            country_code = self._cache.pop(ip_addr, None)
+            if country_code is not None:
+                self._cache[ip_addr] = country_code
+                return country_code
+
+        country_code = self._database(ip_addr).country_code_by_addr(ip_addr)
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[ip_addr] = country_code
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return country_code
+
+    def country_codes_by_addr(self, ip_addrs):
+        """
+        Returns a dict of the given IP addresses to their 2-letter country
+        codes, looking each distinct address up only once.
+        """
+        return {ip_addr: self.country_code_by_addr(ip_addr) for ip_addr in set(ip_addrs)}
+
+    def clear(self):
+        """
+        Removes all cached country codes.
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def _database(self, ip_addr):
+        """
+        Returns the GeoIP database to look the given IP address up in,
+        opening it on first use.
+        """
+        path = self.geoipv6_path if ip_addr.find(':') >= 0 else self.geoip_path
+        database = self._databases.get(path)
+        if database is None:
+            with self._lock:
+                database = self._databases.get(path)
+                if database is None:
+                    database = self._databases[path] = pygeoip.GeoIP(path, pygeoip.MMAP_CACHE)
+        return database
+
+
+_service = None  # pylint: disable=invalid-name
+
+
+def get_country_lookup_service():
+    """
+    Returns the process-wide CountryLookupService for the GEOIP_PATH and
+    GEOIPV6_PATH settings, creating it on first use with the
+    GEOIP_CACHE_SIZE setting.
+    """
+    global _service  # pylint: disable=global-statement, invalid-name
+    service = _service
+    if service is None or (service.geoip_path, service.geoipv6_path) != (settings.GEOIP_PATH, settings.GEOIPV6_PATH):
+        service = _service = CountryLookupService(
+            settings.GEOIP_PATH,
+            settings.GEOIPV6_PATH,
+            getattr(settings, 'GEOIP_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+        )
+    return service
+
+
+def country_code_by_addr(ip_addr):
+    """
+    Returns the 2-letter country code associated with the given IPv4 or
+    IPv6 address, or an empty string if it is unknown.
+    """
+    return get_country_lookup_service().country_code_by_addr(ip_addr)
+
+
+def country_codes_by_addr(ip_addrs):
+    """
+    Returns a dict of the given IPv4 or IPv6 addresses to their 2-letter
+    country codes, e.g. to process the addresses of log records in bulk.
+    """
+    return get_country_lookup_service().country_codes_by_addr(ip_addrs)
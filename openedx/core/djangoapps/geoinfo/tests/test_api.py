@@ -0,0 +1,66 @@
+"""
+Tests for the country lookup service.
+"""
+from django.conf import settings
+from django.test import TestCase
+from mock import patch
+import pygeoip
+
+from openedx.core.djangoapps.geoinfo.api import CountryLookupService
+
+
+class CountryLookupServiceTests(TestCase):
+    """
+    Tests of CountryLookupService.
+    """
+    def setUp(self):
+        super(CountryLookupServiceTests, self).setUp()
+        self.service = CountryLookupService(settings.GEOIP_PATH, settings.GEOIPV6_PATH, cache_size=2)
+        self.patcher = patch.object(pygeoip.GeoIP, 'country_code_by_addr', side_effect=self.mock_country_code_by_addr)
+        self.mock_lookup = self.patcher.start()
+        self.addCleanup(self.patcher.stop)
+
+    def mock_country_code_by_addr(self, ip_addr):
+        """
+        Gives us a fake set of IPs
+        """
+        return {'117.79.83.1': 'CN', '4.0.0.0': 'SD'}.get(ip_addr, 'US')
+
+    def test_cached_lookups(self):
+        for __ in range(2):
+            self.assertEqual(self.service.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(self.mock_lookup.call_count, 1)
+
+        # The least recently used address is evicted
+        self.service.country_code_by_addr('4.0.0.0')
+        self.service.country_code_by_addr('117.79.83.1')
+        self.service.country_code_by_addr('8.8.8.8')
+        self.service.country_code_by_addr('117.79.83.1')
+        self.assertEqual(self.mock_lookup.call_count, 3)
+        self.service.country_code_by_addr('4.0.0.0')
+        self.assertEqual(self.mock_lookup.call_count, 4)
+
+    def test_uncached_lookups(self):
+        self.service.cache_size = 0
+        for __ in range(2):
+            self.assertEqual(self.service.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(self.mock_lookup.call_count, 2)
+
+    def test_databases_opened_once(self):
+        with patch('openedx.core.djangoapps.geoinfo.api.pygeoip.GeoIP') as mock_geoip:
+            self.service.country_code_by_addr('117.79.83.1')
+            self.service.country_code_by_addr('4.0.0.0')
+            self.service.country_code_by_addr('2001:da8:20f:1502:edcf:550b:4a9c:207d')
+            self.service.country_code_by_addr('2001:da8:20f:1502:edcf:550b:4a9c:207e')
+        self.assertEqual(
+            [call[0] for call in mock_geoip.call_args_list],
+            [(settings.GEOIP_PATH, pygeoip.MMAP_CACHE), (settings.GEOIPV6_PATH, pygeoip.MMAP_CACHE)],
+        )
+
+    def test_bulk_lookup(self):
+        self.service.cache_size = 0
+        self.assertEqual(
+            self.service.country_codes_by_addr(['117.79.83.1', '4.0.0.0', '117.79.83.1']),
+            {'117.79.83.1': 'CN', '4.0.0.0': 'SD'},
+        )
+        self.assertEqual(self.mock_lookup.call_count, 2)
@@ -51,6 +51,7 @@ setup(
             "library_content = lms.djangoapps.course_blocks.transformers.library_content:ContentLibraryTransformer",
             "split_test = lms.djangoapps.course_blocks.transformers.split_test:SplitTestTransformer",
             "start_date = lms.djangoapps.course_blocks.transformers.start_date:StartDateTransformer",
+            "student_field_overrides = lms.djangoapps.course_blocks.transformers.student_field_overrides:IndividualStudentOverridesTransformer",
             "user_partitions = lms.djangoapps.course_blocks.transformers.user_partitions:UserPartitionTransformer",
             "visibility = lms.djangoapps.course_blocks.transformers.visibility:VisibilityTransformer",
             "hidden_content = lms.djangoapps.course_blocks.transformers.hidden_content:HiddenContentTransformer",